@@ -15,7 +15,7 @@ import os
 from dotenv import load_dotenv
 
 # Импорты из проекта
-from src.core.database import SessionLocal, get_db
+from src.core.database import SessionLocal, db as db_manager, get_db
 from src.core.models import Trade, User, BotState, TradingPair, Signal, TradeStatus
 from src.core.process_bot_manager import process_bot_manager
 from src.web.auth import auth_service, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
@@ -1432,6 +1432,11 @@ async def close_position(
     else:
         raise HTTPException(status_code=404, detail="Position not found")
 
+@app.on_event("shutdown")
+async def close_database():
+    """Закрыть пул асинхронного engine при остановке"""
+    await db_manager.close_async()
+
 # Health check
 @app.get("/health")
 async def health_check():
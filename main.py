@@ -71,6 +71,10 @@ async def run_bot():
     except Exception as e:
         logger.error(f"❌ Критическая ошибка: {e}")
         sys.exit(1)
+    finally:
+        # Пул асинхронного engine закрывает владелец процесса, а не BotManager
+        from src.core.database import db
+        await db.close_async()
 
 def run_web():
     """Запуск веб-интерфейса"""
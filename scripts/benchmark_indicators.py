@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Бенчмарк и сверка бэкендов индикаторов
+
+Примеры:
+    python scripts/benchmark_indicators.py
+    python scripts/benchmark_indicators.py --sizes 200 1000 --indicators RSI ATR
+    python scripts/benchmark_indicators.py --baseline logs/benchmarks/indicators_prev.json
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.indicators.benchmark import (
+    DEFAULT_PERIODS, DEFAULT_SIZES, DEFAULT_TOLERANCE,
+    BenchmarkReport, compare_reports, format_report, run_benchmark
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк и сверка бэкендов индикаторов")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Длины рядов")
+    parser.add_argument('--periods', type=int, nargs='+', default=list(DEFAULT_PERIODS), help="Периоды")
+    parser.add_argument('--indicators', nargs='+', help="Только эти индикаторы (SMA, RSI, ...)")
+    parser.add_argument('--backends', nargs='+', help="Только эти бэкенды (эталон считается всегда)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Допуск расхождения")
+    parser.add_argument('--output-dir', default='logs/benchmarks', help="Куда сохранить отчет")
+    parser.add_argument('--baseline', help="Отчет прошлого релиза (JSON) для сравнения")
+    parser.add_argument('--quiet', action='store_true', help="Не выводить прогресс")
+    args = parser.parse_args()
+
+    print("⏱️ БЕНЧМАРК ИНДИКАТОРОВ")
+    print("=" * 50)
+
+    report = run_benchmark(
+        sizes=args.sizes,
+        periods=args.periods,
+        indicators=args.indicators,
+        backends=args.backends,
+        tolerance=args.tolerance,
+        progress=None if args.quiet else print
+    )
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    json_path = output_dir / f"indicators_{stamp}.json"
+    report.save(str(json_path))
+    (output_dir / f"indicators_{stamp}.md").write_text(format_report(report), encoding='utf-8')
+
+    print("\n🏆 Рекомендуемые бэкенды:")
+    for indicator, backend in sorted(report.recommendations.items()):
+        print(f"   {indicator}: {backend}")
+
+    failed = [r for r in report.results if r.passed is False]
+    if failed:
+        print(f"\n❌ Расхождения с эталоном ({report.reference}): {len(failed)}")
+        for r in failed:
+            print(f"   {r.indicator}({r.period or ''}) n={r.size} {r.backend}: {r.error or r.max_error}")
+
+    if args.baseline:
+        changes = compare_reports(report, BenchmarkReport.load(args.baseline))
+        print(f"\n📈 Изменения относительно {args.baseline}:")
+        for change in changes or ["   без существенных изменений"]:
+            print(f"   {change}")
+
+    print(f"\n💾 Отчет: {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
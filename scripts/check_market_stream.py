@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Проверка BybitMarketStream на локальном стенде WebSocket
+
+ReplayServer - небольшой aiohttp сервер вместо публичного WebSocket
+Bybit: отвечает на subscribe/ping так же, как биржа, проигрывает
+записанные кадры (scripts/fixtures/bybit_ws_frames.jsonl) по
+подписанным топикам и один раз обрывает соединение.
+
+Скрипт запускает поток против стенда и сверяет хранилище с кадрами:
+тикеры (snapshot + delta), свечи и их закрытие, пропуск некорректного
+кадра без переподключения, ping и повторную подписку после обрыва.
+
+Примеры:
+    python scripts/check_market_stream.py
+    python scripts/check_market_stream.py --frames recorded.jsonl --symbols BTCUSDT
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.exchange.market_store import MarketDataStore
+from src.exchange.market_stream import INTERVAL_TO_TIMEFRAME, TICKER_FIELDS, BybitMarketStream
+
+DEFAULT_FRAMES = Path(__file__).parent / 'fixtures' / 'bybit_ws_frames.jsonl'
+KLINE_FIELDS = {'start', 'open', 'high', 'low', 'close', 'volume'}
+
+
+class ReplayServer:
+    """Стенд публичного WebSocket Bybit с записанными кадрами"""
+
+    PATH = '/v5/public/linear'
+
+    def __init__(self, frames: List[Dict], drop_after_replay: bool = True):
+        """
+        Args:
+            frames: Записанные кадры (проигрываются в первом соединении)
+            drop_after_replay: Закрыть первое соединение после проигрывания
+        """
+        self.frames = frames
+        self.drop_after_replay = drop_after_replay
+        self.url = None
+
+        # Что видел стенд
+        self.connections = 0
+        self.subscriptions: List[Set[str]] = []     # Топики каждого соединения
+        self.pings = 0
+
+        self._runner = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запуск сервера, возвращает URL для BybitMarketStream"""
+        app = web.Application()
+        app.router.add_get(self.PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+        port = self._runner.addresses[0][1]
+        self.url = f'ws://{host}:{port}{self.PATH}'
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        self.connections += 1
+        connection = self.connections
+        topics: Set[str] = set()
+        self.subscriptions.append(topics)
+        replay = None
+
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            message = json.loads(msg.data)
+            op = message.get('op')
+
+            if op == 'ping':
+                self.pings += 1
+                await ws.send_json({'success': True, 'ret_msg': 'pong', 'conn_id': f'replay-{connection}', 'op': 'ping'})
+            elif op in ('subscribe', 'unsubscribe'):
+                args = message.get('args', [])
+                if op == 'subscribe':
+                    topics.update(args)
+                else:
+                    topics.difference_update(args)
+                await ws.send_json({'success': True, 'ret_msg': '', 'conn_id': f'replay-{connection}', 'op': op})
+
+                # Кадры проигрываются один раз - в первом соединении
+                if op == 'subscribe' and connection == 1 and replay is None:
+                    replay = asyncio.create_task(self._replay(ws, topics))
+
+        if replay is not None:
+            replay.cancel()
+        return ws
+
+    async def _replay(self, ws: web.WebSocketResponse, topics: Set[str]):
+        # Даем клиенту дослать остальные пачки subscribe
+        await asyncio.sleep(0.05)
+        for frame in self.frames:
+            if frame.get('topic') in topics:
+                await ws.send_str(json.dumps(frame))
+                await asyncio.sleep(0.005)
+
+        if self.drop_after_replay:
+            await ws.close()
+
+
+def load_frames(path: Path) -> List[Dict]:
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def expected_state(frames: List[Dict], symbols: Set[str]):
+    """
+    Что должно оказаться в хранилище после кадров
+
+    Returns:
+        (тикеры {symbol: поля Bybit}, свечи {(symbol, timeframe): {start: close}},
+         подтвержденные свечи {(symbol, timeframe, start)}, число некорректных кадров)
+    """
+    tickers: Dict[str, Dict] = {}
+    candles: Dict[Tuple[str, str], Dict[int, float]] = {}
+    confirmed: Set[Tuple[str, str, int]] = set()
+    bad_frames = 0
+
+    for frame in frames:
+        kind, _, rest = frame.get('topic', '').partition('.')
+        if kind == 'tickers' and rest in symbols:
+            tickers.setdefault(rest, {}).update(frame['data'])
+        elif kind == 'kline':
+            interval, symbol = rest.split('.', 1)
+            if symbol not in symbols:
+                continue
+            if any(not KLINE_FIELDS <= bar.keys() for bar in frame['data']):
+                bad_frames += 1
+                continue
+            timeframe = INTERVAL_TO_TIMEFRAME[interval]
+            for bar in frame['data']:
+                candles.setdefault((symbol, timeframe), {})[int(bar['start'])] = float(bar['close'])
+                if bar.get('confirm'):
+                    confirmed.add((symbol, timeframe, int(bar['start'])))
+
+    return tickers, candles, confirmed, bad_frames
+
+
+async def wait_for(condition, timeout: float) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            return False
+        await asyncio.sleep(0.02)
+    return True
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Проверка BybitMarketStream на локальном стенде")
+    parser.add_argument('--frames', type=Path, default=DEFAULT_FRAMES, help="Записанные кадры (JSON Lines)")
+    parser.add_argument('--symbols', nargs='+', default=['BTCUSDT', 'ETHUSDT'], help="Символы подписки")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Ожидание стенда, секунд")
+    args = parser.parse_args()
+
+    print("📡 ПРОВЕРКА ПОТОКА РЫНОЧНЫХ ДАННЫХ")
+    print("=" * 50)
+
+    frames = load_frames(args.frames)
+    symbols = set(args.symbols)
+    tickers, candles, confirmed, bad_frames = expected_state(frames, symbols)
+    timeframes = sorted({timeframe for _, timeframe in candles}) or ['5m']
+
+    server = ReplayServer(frames)
+    url = await server.start()
+
+    store = MarketDataStore()
+    closed_events: Set[Tuple[str, str, int]] = set()
+    store.add_close_listener(lambda symbol, timeframe, ts: closed_events.add((symbol, timeframe, ts)))
+
+    stream = BybitMarketStream(store=store, url=url, timeframes=timeframes)
+    stream.PING_INTERVAL = 0.2
+    stream.RECONNECT_MIN_DELAY = 0.1
+
+    await stream.start(args.symbols)
+    try:
+        expected_topics = len(stream._topics(stream.symbols))
+        resubscribed = await wait_for(
+            lambda: server.connections >= 2 and len(server.subscriptions[1]) == expected_topics,
+            args.timeout
+        )
+        await wait_for(lambda: server.pings > 0, args.timeout)
+    finally:
+        await stream.stop()
+        await server.stop()
+
+    results = []
+
+    for symbol, data in sorted(tickers.items()):
+        ticker = store.get_ticker(symbol, fresh_only=False) or {}
+        wrong = [
+            ccxt_field for field, ccxt_field in TICKER_FIELDS.items()
+            if data.get(field) not in (None, '') and ticker.get(ccxt_field) != float(data[field])
+        ]
+        results.append((f"тикер {symbol} (snapshot + delta)", not wrong, f"расходятся поля {wrong}" if wrong else ""))
+
+    for (symbol, timeframe), closes in sorted(candles.items()):
+        actual = {int(c[0]): c[4] for c in store.get_candles(symbol, timeframe)}
+        results.append((f"свечи {symbol} {timeframe}", actual == closes, f"ожидалось {closes}, получено {actual}"))
+
+    # Первую закрытую свечу пары хранилище только запоминает (это история)
+    first_closed = {}
+    for symbol, timeframe, ts in sorted(confirmed):
+        first_closed.setdefault((symbol, timeframe), ts)
+    announced = {(s, tf, ts) for s, tf, ts in confirmed if ts != first_closed[(s, tf)]}
+    missing = announced - closed_events
+    results.append(("закрытие подтвержденных свечей", bool(announced) and not missing,
+                    f"нет событий для {sorted(missing)}" if missing else "в кадрах нет закрытий для проверки"))
+    results.append(("некорректные кадры пропущены", stream.bad_frames == bad_frames,
+                    f"пропущено {stream.bad_frames}, ожидалось {bad_frames}"))
+    results.append(("ping/pong", server.pings > 0, "стенд не получил ping"))
+    results.append(("переподключение только после обрыва стендом", resubscribed and stream.reconnects == 1,
+                    f"соединений {server.connections}, переподключений {stream.reconnects}"))
+
+    passed = True
+    for name, ok, detail in results:
+        print(f"{'✅' if ok else '❌'} {name}" + ("" if ok else f": {detail}"))
+        passed &= ok
+
+    print(f"\nКадров: {len(frames)}, принято потоком: {stream.messages_received}, соединений: {server.connections}")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
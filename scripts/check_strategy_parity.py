@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Сверка analyze_series стратегий с побаровым analyze
+
+analyze_series считает сигналы всей истории за один проход; здесь
+его результат сравнивается с analyze на каждом префиксе свечей
+(медленный эталон BaseStrategy.replay) и выводится ускорение.
+
+Примеры:
+    python scripts/check_strategy_parity.py
+    python scripts/check_strategy_parity.py --strategies momentum scalping --bars 1000 --last 500
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.indicators.benchmark import synthetic_ohlcv
+from src.strategies.base import SERIES_COLUMNS, BaseStrategy
+from src.strategies.factory import strategy_factory
+
+DEFAULT_STRATEGIES = ['multi_indicator', 'safe_multi_indicator', 'momentum', 'scalping', 'conservative']
+
+
+def make_candles(size: int, seed: int) -> pd.DataFrame:
+    """Синтетические 5m свечи с индексом по времени"""
+    data = synthetic_ohlcv(size, seed)
+    index = pd.date_range('2024-01-01', periods=size, freq='5min')
+    return pd.DataFrame({col: data[col] for col in ('open', 'high', 'low', 'close', 'volume')}, index=index)
+
+
+def compare_series(expected: pd.DataFrame, actual: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """Бары, где действие или уровни расходятся больше tolerance (относительно)"""
+    actual = actual.loc[expected.index, SERIES_COLUMNS]
+    bad = expected['action'].to_numpy() != actual['action'].to_numpy()
+    for column in SERIES_COLUMNS[1:]:
+        a = expected[column].to_numpy(dtype=float)
+        b = actual[column].to_numpy(dtype=float)
+        both_nan = np.isnan(a) & np.isnan(b)
+        close = np.isclose(a, b, rtol=tolerance, atol=tolerance)
+        bad |= ~(both_nan | close)
+    return expected[bad].join(actual[bad], rsuffix='_series')
+
+
+async def check(strategy: BaseStrategy, df: pd.DataFrame, last: int, tolerance: float) -> bool:
+    start = time.perf_counter()
+    series = strategy.analyze_series(df)
+    series_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = await strategy.replay(df, start=max(0, len(df) - last))
+    replay_time = time.perf_counter() - start
+
+    mismatches = compare_series(expected, series, tolerance)
+    signals = series['action'].ne('WAIT').sum()
+    checked_signals = expected['action'].ne('WAIT').sum()
+    status = "✅" if mismatches.empty else "❌"
+
+    # Полный прогон analyze по всем барам дороже проверенного хвоста
+    full_replay = replay_time / len(expected) * len(df)
+    print(
+        f"{status} {strategy.name}: сигналов {signals} (в проверенных барах {checked_signals}), "
+        f"расхождений {len(mismatches)}/{len(expected)}; "
+        f"analyze_series {series_time * 1000:.1f} мс, побаровый analyze ~{full_replay:.1f} с "
+        f"(x{full_replay / series_time:.0f})"
+    )
+    if not mismatches.empty:
+        print(mismatches.head(10).to_string())
+    return mismatches.empty
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Сверка analyze_series с побаровым analyze")
+    parser.add_argument('--strategies', nargs='+', default=DEFAULT_STRATEGIES, help="Стратегии")
+    parser.add_argument('--bars', type=int, default=800, help="Длина истории")
+    parser.add_argument('--last', type=int, default=400, help="Сколько последних баров сверять")
+    parser.add_argument('--seed', type=int, default=42, help="Зерно синтетических свечей")
+    parser.add_argument('--tolerance', type=float, default=1e-9, help="Допуск для уверенности и уровней")
+    args = parser.parse_args()
+
+    print("🔍 СВЕРКА analyze_series")
+    print("=" * 50)
+
+    df = make_candles(args.bars, args.seed)
+    passed = True
+    for name in args.strategies:
+        strategy = strategy_factory.create(name)
+        if not strategy.supports_series:
+            print(f"⚠️ {name}: analyze_series не реализован")
+            continue
+        passed &= await check(strategy, df, args.last, args.tolerance)
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
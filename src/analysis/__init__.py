@@ -1,6 +1,6 @@
 """
 Модули анализа
 """
-from .market_analyzer import MarketAnalyzer
+from .market_analyzer import MarketAnalyzer, market_analyzer
 
-__all__ = ['MarketAnalyzer']
+__all__ = ['MarketAnalyzer', 'market_analyzer']
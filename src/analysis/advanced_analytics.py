@@ -12,9 +12,21 @@ from collections import defaultdict
 
 from ..core.database import SessionLocal
 from ..core.models import Trade, Signal, Balance, TradeStatus
+from ..indicators.candle_patterns import detect_patterns
 
 logger = logging.getLogger(__name__)
 
+# Свечные паттерны контекста сделки и их сила
+CANDLE_PATTERN_STRENGTH = {
+    'engulfing': 'strong',
+    'morning_star': 'strong',
+    'evening_star': 'strong',
+    'three_white_soldiers': 'strong',
+    'three_black_crows': 'strong',
+    'hammer': 'medium',
+    'shooting_star': 'medium'
+}
+
 class AdvancedAnalytics:
     """
     Продвинутая аналитика для глубокого анализа торговли
@@ -156,44 +168,23 @@ class AdvancedAnalytics:
         if len(data) < 3:
             return patterns
         
-        # Проверяем последние 3 свечи на паттерны
+        detected = detect_patterns(data, list(CANDLE_PATTERN_STRENGTH))
+        
+        # Первые две свечи пропускаем - им не хватает истории
         for i in range(2, len(data)):
-            candle = data.iloc[i]
-            prev_candle = data.iloc[i-1]
-            prev_prev_candle = data.iloc[i-2]
-            
-            # Бычье поглощение
-            if (candle['close'] > candle['open'] and 
-                prev_candle['close'] < prev_candle['open'] and
-                candle['close'] > prev_candle['open'] and
-                candle['open'] < prev_candle['close']):
-                patterns.append({
-                    'type': 'bullish_engulfing',
-                    'time': candle.name.isoformat(),
-                    'strength': 'strong'
-                })
-            
-            # Медвежье поглощение
-            elif (candle['close'] < candle['open'] and
-                  prev_candle['close'] > prev_candle['open'] and
-                  candle['close'] < prev_candle['open'] and
-                  candle['open'] > prev_candle['close']):
-                patterns.append({
-                    'type': 'bearish_engulfing',
-                    'time': candle.name.isoformat(),
-                    'strength': 'strong'
-                })
-            
-            # Молот
-            body = abs(candle['close'] - candle['open'])
-            lower_wick = candle['open'] - candle['low'] if candle['close'] > candle['open'] else candle['close'] - candle['low']
-            upper_wick = candle['high'] - candle['close'] if candle['close'] > candle['open'] else candle['high'] - candle['open']
-            
-            if lower_wick > body * 2 and upper_wick < body * 0.5:
+            for name, strength in CANDLE_PATTERN_STRENGTH.items():
+                value = detected[name].iat[i]
+                if not value:
+                    continue
+                
+                # Поглощение - один знаковый паттерн
+                if name == 'engulfing':
+                    name = 'bullish_engulfing' if value > 0 else 'bearish_engulfing'
+                
                 patterns.append({
-                    'type': 'hammer',
-                    'time': candle.name.isoformat(),
-                    'strength': 'medium'
+                    'type': name,
+                    'time': data.index[i].isoformat(),
+                    'strength': strength
                 })
         
         return patterns
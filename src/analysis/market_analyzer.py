@@ -3,11 +3,15 @@
 Путь: /var/www/www-root/data/www/systemetech.ru/src/analysis/market_analyzer.py
 """
 import logging
+import threading
 import pandas as pd
 from typing import Dict, Any, List, Optional, Tuple, Dict, List, Optional
 from datetime import datetime, timedelta
 
 from ..exchange.client import exchange_client
+from ..exchange.market_hub import market_hub
+from ..utils.concurrency import run_cpu_bound
+from ..indicators.support_resistance import SupportResistanceTracker, find_levels
 
 logger = logging.getLogger(__name__)
 
@@ -16,56 +20,44 @@ class MarketAnalyzer:
     
     def __init__(self):
         self.exchange = exchange_client
-        self.cache = {}  # Кэш данных
+        self.hub = market_hub  # Общий источник свечей и тикеров
+        self.cache = {}  # Кэш результатов анализа
         self.cache_ttl = 60  # TTL кэша в секундах
+        self.timeframe = '5m'
+        self.candles_limit = 200
+        self.sr_order = 10  # Баров слева и справа от пивота уровня
+        self.sr_trackers: Dict[str, SupportResistanceTracker] = {}  # Пивоты по парам между циклами
+        self._sr_locks: Dict[str, threading.Lock] = {}  # sync трекера идет в пуле потоков
+        self._sr_guard = threading.Lock()
         
     async def analyze_symbol(self, symbol: str) -> Optional[Dict]:
         """Анализ конкретного символа"""
         try:
-            # Проверяем кэш
-            if self._is_cache_valid(symbol):
-                logger.debug(f"Используем кэш для {symbol}")
-                return self.cache[symbol]['data']
+            # Свечи из общего хаба (поток или инкрементальная догрузка)
+            df = await self.hub.get_candles(symbol, self.timeframe, self.candles_limit)
             
-            # Получаем данные
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, '5m', 200)
-            
-            if not ohlcv:
+            if df is None:
                 logger.warning(f"Нет данных для {symbol}")
                 return None
             
-            # Преобразуем в DataFrame
-            df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            )
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            # Свечи не изменились - отдаем уже посчитанный анализ
+            if self._is_cache_valid(symbol, df):
+                logger.debug(f"Используем кэш для {symbol}")
+                return self.cache[symbol]['data']
             
             # Получаем текущую цену
-            ticker = await self.exchange.fetch_ticker(symbol)
-            current_price = ticker['last']
-            
-            # Рассчитываем дополнительные метрики
-            volatility = self.calculate_volatility(df)
-            trend = self.detect_trend(df)
-            support_resistance = self.find_support_resistance(df)
-            volume_profile = self.analyze_volume(df)
+            current_price = await self.hub.get_last_price(symbol)
+            if current_price is None:
+                current_price = float(df['close'].iloc[-1])
             
-            result = {
-                'df': df,
-                'current_price': current_price,
-                'volatility': volatility,
-                'trend': trend,
-                'support': support_resistance['support'],
-                'resistance': support_resistance['resistance'],
-                'volume_analysis': volume_profile,
-                'timestamp': datetime.now()
-            }
+            # Снимок свечей: буфер потока меняется в event loop, а расчет
+            # идет в пуле потоков
+            result = await run_cpu_bound(self._compute_analysis, df.copy(), current_price, symbol)
             
             # Сохраняем в кэш
             self.cache[symbol] = {
                 'data': result,
+                'bar': self._last_bar(df),
                 'timestamp': datetime.now()
             }
             
@@ -75,6 +67,21 @@ class MarketAnalyzer:
             logger.error(f"Ошибка анализа {symbol}: {e}")
             return None
     
+    def _compute_analysis(self, df: pd.DataFrame, current_price: float, symbol: Optional[str] = None) -> Dict:
+        """Расчет всех метрик по свечам (выполняется вне event loop)"""
+        support_resistance = self.find_support_resistance(df, symbol)
+        
+        return {
+            'df': df,
+            'current_price': current_price,
+            'volatility': self.calculate_volatility(df),
+            'trend': self.detect_trend(df),
+            'support': support_resistance['support'],
+            'resistance': support_resistance['resistance'],
+            'volume_analysis': self.analyze_volume(df),
+            'timestamp': datetime.now()
+        }
+    
     def calculate_volatility(self, df: pd.DataFrame) -> Dict:
         """Расчет волатильности"""
         # Дневная волатильность
@@ -145,51 +152,53 @@ class MarketAnalyzer:
             'sma_200': sma_200.iloc[-1] if not pd.isna(sma_200.iloc[-1]) else None
         }
     
-    def find_support_resistance(self, df: pd.DataFrame) -> Dict:
-        """Поиск уровней поддержки и сопротивления"""
-        # Простой метод - локальные минимумы и максимумы
-        window = 20
-        
-        # Поддержка - локальные минимумы
-        lows = df['low'].rolling(window=window).min()
-        support_levels = []
-        
-        for i in range(window, len(df) - window):
-            if df['low'].iloc[i] == lows.iloc[i]:
-                support_levels.append(df['low'].iloc[i])
-        
-        # Сопротивление - локальные максимумы
-        highs = df['high'].rolling(window=window).max()
-        resistance_levels = []
-        
-        for i in range(window, len(df) - window):
-            if df['high'].iloc[i] == highs.iloc[i]:
-                resistance_levels.append(df['high'].iloc[i])
-        
-        # Кластеризация уровней
-        current_price = df['close'].iloc[-1]
+    def find_support_resistance(self, df: pd.DataFrame, symbol: Optional[str] = None) -> Dict:
+        """
+        Поиск уровней поддержки и сопротивления
+        
+        Для известной пары пивоты держит SupportResistanceTracker: за цикл
+        добавляются только новые закрытые свечи, без прохода по всей истории.
+        """
+        if symbol is not None:
+            with self._sr_guard:
+                tracker = self.sr_trackers.get(symbol)
+                if tracker is None:
+                    tracker = SupportResistanceTracker(order=self.sr_order, max_bars=self.candles_limit)
+                    self.sr_trackers[symbol] = tracker
+                    self._sr_locks[symbol] = threading.Lock()
+                lock = self._sr_locks[symbol]
+            
+            # Анализ одной пары может идти одновременно из селектора и менеджера
+            with lock:
+                tracker.sync(df)
+                levels = tracker.levels
+        else:
+            levels = find_levels(df['high'], df['low'], order=self.sr_order)
         
         # Ближайшие уровни
-        nearest_support = None
-        nearest_resistance = None
-        
-        if support_levels:
-            below_price = [s for s in support_levels if s < current_price]
-            if below_price:
-                nearest_support = max(below_price)
-        
-        if resistance_levels:
-            above_price = [r for r in resistance_levels if r > current_price]
-            if above_price:
-                nearest_resistance = min(above_price)
+        current_price = df['close'].iloc[-1]
+        nearest_support = levels.nearest_support(current_price)
+        nearest_resistance = levels.nearest_resistance(current_price)
         
         return {
-            'support': nearest_support,
-            'resistance': nearest_resistance,
-            'all_supports': sorted(set(support_levels))[-5:],  # Последние 5 уровней
-            'all_resistances': sorted(set(resistance_levels))[:5]  # Первые 5 уровней
+            'support': nearest_support.price if nearest_support else None,
+            'resistance': nearest_resistance.price if nearest_resistance else None,
+            'all_supports': [z.price for z in levels.supports][-5:],  # Последние 5 уровней
+            'all_resistances': [z.price for z in levels.resistances][:5],  # Первые 5 уровней
+            'support_zones': [z.to_dict() for z in levels.supports],
+            'resistance_zones': [z.to_dict() for z in levels.resistances]
         }
     
+    def retain_symbols(self, symbols: List[str]):
+        """Забыть трекеры уровней и кэш пар, которых нет в списке активных"""
+        active = set(symbols)
+        with self._sr_guard:
+            for symbol in [symbol for symbol in self.sr_trackers if symbol not in active]:
+                del self.sr_trackers[symbol]
+                del self._sr_locks[symbol]
+        for symbol in [symbol for symbol in self.cache if symbol not in active]:
+            del self.cache[symbol]
+    
     def analyze_volume(self, df: pd.DataFrame) -> Dict:
         """Анализ объемов"""
         # Средний объем
@@ -218,10 +227,22 @@ class MarketAnalyzer:
             'is_low': volume_ratio < 0.5
         }
     
-    def _is_cache_valid(self, symbol: str) -> bool:
-        """Проверка валидности кэша"""
+    @staticmethod
+    def _last_bar(df: pd.DataFrame) -> Tuple:
+        """Время и значения последнего бара - по ним видно, изменились ли свечи"""
+        return (df.index[-1], df['close'].iloc[-1], df['volume'].iloc[-1])
+    
+    def _is_cache_valid(self, symbol: str, df: pd.DataFrame) -> bool:
+        """Проверка валидности кэша: свечи те же и TTL не истек"""
         if symbol not in self.cache:
             return False
         
+        if self.cache[symbol]['bar'] != self._last_bar(df):
+            return False
+        
         cache_time = self.cache[symbol]['timestamp']
-        return (datetime.now() - cache_time).total_seconds() < self.cache_ttl
\ No newline at end of file
+        return (datetime.now() - cache_time).total_seconds() < self.cache_ttl
+
+
+# Глобальный экземпляр анализатора - общий для бота, селектора и API
+market_analyzer = MarketAnalyzer()
\ No newline at end of file
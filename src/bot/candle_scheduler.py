@@ -0,0 +1,193 @@
+"""
+Планировщик по закрытию свечей
+Путь: src/bot/candle_scheduler.py
+
+Вместо анализа всех пар через случайную паузу торговый цикл ждет
+событий candle_closed(symbol, timeframe) и запускает стратегии только
+для пар, у которых появилась новая закрытая свеча. Остальные пары
+в этом цикле не пересчитываются - их позиции и так проверяет ExitMonitor.
+
+События приходят из MarketDataStore: из потока WebSocket (kline с
+confirm) или из инкрементальной догрузки по REST. Для пар без потока
+планировщик сам дергает хаб сразу после расчетного закрытия бара.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from ..exchange.candle_buffer import TIMEFRAME_MS
+from ..exchange.market_hub import MarketDataHub, market_hub
+from ..exchange.market_store import normalize_symbol
+
+logger = logging.getLogger(__name__)
+
+
+class CandleCloseScheduler:
+    """
+    Очередь пар с новыми закрытыми свечами
+
+    Использование:
+        await scheduler.start(pairs)
+        symbols = await scheduler.wait_for_closed(stop_event)
+    """
+
+    def __init__(
+        self,
+        hub: MarketDataHub = market_hub,
+        timeframe: str = '5m',
+        candles_limit: int = 200,
+        grace_seconds: float = 2.0
+    ):
+        """
+        Args:
+            hub: Хаб рыночных данных (хранилище и догрузка по REST)
+            timeframe: Таймфрейм, по закрытию которого запускается анализ
+            candles_limit: Сколько свечей догружать для пар без потока
+            grace_seconds: Запас после закрытия бара до опроса REST
+        """
+        self.hub = hub
+        self.store = hub.store
+        self.timeframe = timeframe
+        self.candles_limit = candles_limit
+        self.grace_seconds = grace_seconds
+
+        self.symbols: List[str] = []
+
+        # Пары с новыми свечами в порядке поступления событий
+        self._pending: "OrderedDict[str, int]" = OrderedDict()
+        self._event = asyncio.Event()
+        self._poll_task: Optional[asyncio.Task] = None
+
+        # Статистика
+        self.events = 0
+        self.last_event_delay: Optional[float] = None  # Задержка события от закрытия бара, с
+
+    @property
+    def is_running(self) -> bool:
+        return self._poll_task is not None and not self._poll_task.done()
+
+    @property
+    def period_ms(self) -> int:
+        return TIMEFRAME_MS.get(self.timeframe, 300_000)
+
+    # =========================================================================
+    # === ЖИЗНЕННЫЙ ЦИКЛ ===
+    # =========================================================================
+
+    async def start(self, symbols: Iterable[str]):
+        """Подписка на закрытия свечей и запуск опроса пар без потока"""
+        self.set_symbols(symbols)
+
+        if self.is_running:
+            return
+
+        self.store.add_close_listener(self._on_candle_closed)
+        self._poll_task = asyncio.create_task(self._poll_loop())
+        logger.info(f"🕯️ Планировщик по закрытию свечей {self.timeframe} запущен: {len(self.symbols)} пар")
+
+    async def stop(self):
+        """Отписка и остановка опроса"""
+        self.store.remove_close_listener(self._on_candle_closed)
+
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+        self._pending.clear()
+        self._event.set()  # Освобождаем ожидающий цикл
+        logger.info("🕯️ Планировщик по закрытию свечей остановлен")
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Смена списка отслеживаемых пар"""
+        self.symbols = list(symbols)
+        tracked = {normalize_symbol(s) for s in self.symbols}
+        for symbol in [s for s in self._pending if s not in tracked]:
+            del self._pending[symbol]
+
+    # =========================================================================
+    # === СОБЫТИЯ ===
+    # =========================================================================
+
+    def _on_candle_closed(self, symbol: str, timeframe: str, closed_ts: int):
+        """candle_closed(symbol, timeframe) из хранилища"""
+        if timeframe != self.timeframe:
+            return
+        if symbol not in {normalize_symbol(s) for s in self.symbols}:
+            return
+
+        self._pending[symbol] = closed_ts
+        self._pending.move_to_end(symbol)
+        self._event.set()
+
+        self.events += 1
+        self.last_event_delay = time.time() - (closed_ts + self.period_ms) / 1000
+        logger.debug(f"🕯️ Закрылась свеча {symbol} {timeframe} (задержка {self.last_event_delay:.2f}с)")
+
+    async def wait_for_closed(self, stop_event: Optional[asyncio.Event] = None) -> List[str]:
+        """
+        Дождаться пар с новыми закрытыми свечами
+
+        Args:
+            stop_event: Событие остановки бота - при нем возвращается пустой список
+
+        Returns:
+            Символы в том виде, как они заданы в set_symbols/start
+        """
+        while not self._pending:
+            if stop_event is not None and stop_event.is_set():
+                return []
+            if not self.is_running:
+                return []
+
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+        closed = set(self._pending)
+        self._pending.clear()
+        return [symbol for symbol in self.symbols if normalize_symbol(symbol) in closed]
+
+    # =========================================================================
+    # === ОПРОС ПАР БЕЗ ПОТОКА ===
+    # =========================================================================
+
+    async def _poll_loop(self):
+        """
+        Сразу после расчетного закрытия бара догружаем свечи тех пар,
+        которые не получают данные из потока. Догрузка кладет свечи
+        в хранилище, а оно само объявляет о закрытии.
+        """
+        while True:
+            now_ms = time.time() * 1000
+            next_close_ms = (now_ms // self.period_ms + 1) * self.period_ms
+            await asyncio.sleep((next_close_ms - now_ms) / 1000 + self.grace_seconds)
+
+            # Пары с живым потоком сами сообщат о закрытии
+            polled = [s for s in self.symbols if not self.store.has_fresh_candles(s, self.timeframe)]
+            results = await asyncio.gather(
+                *(self.hub.get_candles(symbol, self.timeframe, self.candles_limit) for symbol in polled),
+                return_exceptions=True
+            )
+            for symbol, result in zip(polled, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"⚠️ Не удалось догрузить свечи {symbol}: {result}")
+
+    def get_statistics(self) -> Dict:
+        """Статистика для мониторинга"""
+        return {
+            'running': self.is_running,
+            'timeframe': self.timeframe,
+            'events': self.events,
+            'pending': list(self._pending),
+            'last_event_delay_sec': (
+                round(self.last_event_delay, 3) if self.last_event_delay is not None else None
+            )
+        }
@@ -8,6 +8,7 @@ import numpy as np
 
 from ..core.models import Trade, Signal, Order
 from ..core.database import SessionLocal
+from ..exchange.market_hub import market_hub
 from ..ml.strategy_selector import MLStrategySelector
 from ..ml.models.regressor import PriceLevelRegressor
 from ..ml.models.reinforcement import TradingRLAgent
@@ -15,6 +16,7 @@ from ..ml.features.feature_engineering import FeatureEngineering
 from ..analysis.news.impact_scorer import NewsImpactScorer
 from ..analysis.social.signal_extractor import SocialSignalExtractor
 from ..logging.smart_logger import SmartLogger
+from ..indicators.support_resistance import find_levels
 
 logger = SmartLogger(__name__)
 
@@ -178,28 +180,17 @@ class DynamicLevelCalculator:
         if not candles:
             return {'support': [], 'resistance': []}
         
-        # Простой алгоритм поиска локальных экстремумов
-        highs = [c['high'] for c in candles[-100:]]
-        lows = [c['low'] for c in candles[-100:]]
-        
-        resistance_levels = []
-        support_levels = []
-        
-        # Поиск локальных максимумов и минимумов
-        for i in range(2, len(highs) - 2):
-            # Сопротивление
-            if highs[i] > highs[i-1] and highs[i] > highs[i-2] and \
-               highs[i] > highs[i+1] and highs[i] > highs[i+2]:
-                resistance_levels.append(highs[i])
-            
-            # Поддержка
-            if lows[i] < lows[i-1] and lows[i] < lows[i-2] and \
-               lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-                support_levels.append(lows[i])
+        # Зоны по локальным экстремумам (2 бара с каждой стороны) последних 100 свечей
+        recent = candles[-100:]
+        levels = find_levels(
+            np.fromiter((c['high'] for c in recent), dtype=float, count=len(recent)),
+            np.fromiter((c['low'] for c in recent), dtype=float, count=len(recent)),
+            order=2
+        )
         
         return {
-            'resistance': sorted(resistance_levels, reverse=True)[:3],
-            'support': sorted(support_levels)[:3]
+            'resistance': [zone.price for zone in reversed(levels.resistances)][:3],
+            'support': [zone.price for zone in levels.supports][:3]
         }
     
     def _adjust_to_resistance(self, price: float, resistance_levels: List[float]) -> float:
@@ -225,6 +216,7 @@ class SmartTradeExecutor:
     def __init__(self, exchange_client, balance_manager):
         self.exchange = exchange_client
         self.balance_manager = balance_manager
+        self.market_hub = market_hub
         self.ml_selector = MLStrategySelector()
         self.risk_manager = EnhancedRiskManager()
         self.level_calculator = DynamicLevelCalculator()
@@ -454,17 +446,20 @@ class SmartTradeExecutor:
         }
     
     async def _get_market_data(self, symbol: str) -> Dict:
-        """Получает текущие рыночные данные"""
-        ticker = await self.exchange.get_ticker(symbol)
-        orderbook = await self.exchange.get_orderbook(symbol)
-        candles = await self.exchange.get_candles(symbol, '1m', limit=100)
+        """Получает текущие рыночные данные (через общий хаб)"""
+        ticker, orderbook, candles_df = await asyncio.gather(
+            self.market_hub.get_ticker(symbol),
+            self.market_hub.get_order_book(symbol),
+            self.market_hub.get_candles(symbol, '1m', 100)
+        )
+        candles = candles_df.to_dict('records') if candles_df is not None else []
         
         return {
             'symbol': symbol,
             'price': ticker['last'],
             'bid': ticker['bid'],
             'ask': ticker['ask'],
-            'volume_24h': ticker['volume'],
+            'volume_24h': ticker.get('baseVolume'),
             'orderbook': orderbook,
             'candles': candles,
             'spread': (ticker['ask'] - ticker['bid']) / ticker['bid'],
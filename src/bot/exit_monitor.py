@@ -0,0 +1,151 @@
+"""
+Монитор защитных выходов
+Путь: src/bot/exit_monitor.py
+
+Отдельная asyncio-задача, которая с частотой в доли секунды проверяет
+открытые позиции на стоп-лосс, тейк-профит и таймаут. Работает
+независимо от торгового цикла BotManager, поэтому человеческие паузы
+и "перерывы" цикла задерживают только новые входы, но не выходы.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from ..core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Скользящая статистика задержек"""
+
+    WINDOW = 500
+
+    def __init__(self):
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=self.WINDOW)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def to_dict(self) -> Dict:
+        recent = sorted(self.recent)
+        return {
+            'count': self.count,
+            'avg_ms': round(sum(recent) / len(recent) * 1000, 2) if recent else 0.0,
+            'p95_ms': round(recent[max(int(len(recent) * 0.95) - 1, 0)] * 1000, 2) if recent else 0.0,
+            'max_ms': round(self.max * 1000, 2)
+        }
+
+
+class ExitMonitor:
+    """
+    Фоновая проверка открытых позиций
+
+    Каждый тик берет один снимок цен (поток WebSocket или bulk тикеры)
+    и векторно проверяет все позиции через BotManager._evaluate_positions.
+    Закрытия запускаются отдельными задачами, чтобы медленный ордер
+    по одной паре не задерживал проверку остальных.
+    """
+
+    def __init__(self, manager, interval: float = config.EXIT_MONITOR_INTERVAL):
+        """
+        Args:
+            manager: BotManager (позиции, цены и закрытие)
+            interval: Период проверки в секундах
+        """
+        self.manager = manager
+        self.interval = interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._exit_tasks: Dict[str, asyncio.Task] = {}  # Закрытия в процессе по символам
+        self._stop_event = asyncio.Event()
+
+        # Метрики
+        self.tick_latency = LatencyStats()   # Длительность проверки всех позиций
+        self.exit_latency = LatencyStats()   # От срабатывания условия до закрытия
+        self.last_tick_time: Optional[float] = None
+        self.errors = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Запуск мониторинга"""
+        if self.is_running:
+            return
+
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"🛡️ Монитор выходов запущен (период {self.interval:.2f}с)")
+
+    async def stop(self):
+        """Остановка мониторинга с ожиданием начатых закрытий"""
+        if self._task is None:
+            return
+
+        self._stop_event.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Начатые закрытия доводим до конца
+        if self._exit_tasks:
+            await asyncio.gather(*self._exit_tasks.values(), return_exceptions=True)
+
+        logger.info("🛡️ Монитор выходов остановлен")
+
+    async def _run(self):
+        """Основной цикл проверки"""
+        while not self._stop_event.is_set():
+            tick_start = time.monotonic()
+
+            try:
+                for symbol, trade, price, reason in await self.manager._evaluate_positions():
+                    if symbol in self._exit_tasks:
+                        continue
+                    self._exit_tasks[symbol] = asyncio.create_task(
+                        self._exit(symbol, trade, price, reason, tick_start)
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Ошибка монитора выходов: {e}")
+
+            now = time.monotonic()
+            self.tick_latency.record(now - tick_start)
+            self.last_tick_time = now
+
+            await asyncio.sleep(max(0.0, self.interval - (now - tick_start)))
+
+    async def _exit(self, symbol: str, trade, price: float, reason: str, detected_at: float):
+        """Закрытие позиции с замером задержки"""
+        try:
+            await self.manager._exit_position(symbol, trade, price, reason)
+            self.exit_latency.record(time.monotonic() - detected_at)
+        finally:
+            self._exit_tasks.pop(symbol, None)
+
+    def get_statistics(self) -> Dict:
+        """Метрики для мониторинга"""
+        return {
+            'running': self.is_running,
+            'interval_sec': self.interval,
+            'tick': self.tick_latency.to_dict(),
+            'exit': self.exit_latency.to_dict(),
+            'closing_now': len(self._exit_tasks),
+            'seconds_since_last_tick': (
+                round(time.monotonic() - self.last_tick_time, 2) if self.last_tick_time else None
+            ),
+            'errors': self.errors
+        }
@@ -8,13 +8,16 @@ import sys
 import logging
 import psutil
 import os
-from typing import Any, List, Optional, Tuple, Dict
+import time
+from typing import Any, List, Optional, Set, Tuple, Dict
 from datetime import datetime, timedelta
 from enum import Enum
 import random
+import numpy as np
 
 # SQLAlchemy
-from sqlalchemy import text, func
+from sqlalchemy import text, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -24,16 +27,25 @@ from ..core.models import (
     TradeStatus, OrderSide, Balance, User,
     TradingLog, MLModel
 )
-from ..core.database import SessionLocal, db
+from ..core.database import SessionLocal, db, get_async_session
 from ..core.config import config
+from ..core.persistence import orm_values, persistence
 
 # Остальные импорты
-from ..exchange.client import ExchangeClient
-from ..strategies import strategy_factory
-from ..analysis.market_analyzer import MarketAnalyzer
+from ..exchange.client import ExchangeClient, exchange_client
+from ..exchange.market_store import market_store
+from ..exchange.market_stream import BybitMarketStream
+from ..strategies import strategy_factory, strategy_pool
+from ..strategies.ensemble import strategy_ensemble
+from ..strategies.performance import strategy_performance
+from ..analysis.market_analyzer import market_analyzer
+from ..indicators.context import indicator_contexts
 from ..notifications.telegram import telegram_notifier
 from .trader import Trader
 from .risk_manager import RiskManager
+from .exit_monitor import ExitMonitor
+from .candle_scheduler import CandleCloseScheduler
+from ..utils.concurrency import run_coroutine_in_executor
 from ..strategies.auto_strategy_selector import auto_strategy_selector
 from ..logging.smart_logger import SmartLogger
 from ..logging.log_manager import cleanup_scheduler
@@ -46,7 +58,7 @@ import sys
 import logging
 import psutil
 import os
-from typing import Any, List, Optional, Tuple, Dict
+from typing import Any, List, Optional, Set, Tuple, Dict
 from datetime import datetime, timedelta
 from enum import Enum
 import random
@@ -63,7 +75,8 @@ from ..core.database import SessionLocal
 from ..core.models import Trade, Signal, BotState, TradingPair, TradeStatus, OrderSide, Balance, User
 from ..exchange.client import ExchangeClient
 from ..strategies import strategy_factory
-from ..analysis.market_analyzer import MarketAnalyzer
+from ..analysis.market_analyzer import market_analyzer
+from ..indicators.context import indicator_contexts
 from ..notifications.telegram import telegram_notifier
 from .trader import Trader
 from .risk_manager import RiskManager
@@ -141,17 +154,34 @@ class BotManager:
             
             # === ОСНОВНЫЕ КОМПОНЕНТЫ ===
             # Каждый компонент отвечает за свою область
-            self.exchange = ExchangeClient()           # Взаимодействие с биржей
-            self.analyzer = MarketAnalyzer()           # Анализ рыночных данных
+            self.exchange = exchange_client            # Взаимодействие с биржей (общий пул соединений)
+            self.analyzer = market_analyzer            # Анализ рыночных данных (общий с селектором)
             self.notifier = telegram_notifier          # Уведомления в Telegram
             self.strategy_factory = strategy_factory  # Создание торговых стратегий
+            self.strategy_pool = strategy_pool         # Переиспользуемые экземпляры стратегий
+            self.strategy_ensemble = strategy_ensemble # Оценка всех стратегий на одном баре
             self.trader = Trader(self.exchange)        # Исполнение сделок
             self.risk_manager = RiskManager()          # Управление рисками
+            self.market_store = market_store           # Свечи и тикеры в памяти
+            self.market_stream = BybitMarketStream(    # WebSocket поток рыночных данных
+                store=self.market_store,
+                exchange=self.exchange
+            )
+            self.exit_monitor = ExitMonitor(self)      # Защитные выходы (SL/TP) в фоне
+            self.persistence = persistence             # Отложенная запись в БД вне торгового цикла
+            self.candle_scheduler = CandleCloseScheduler(  # Анализ по закрытию свечей
+                timeframe=self.analyzer.timeframe,
+                candles_limit=self.analyzer.candles_limit
+            )
             
             # === СОСТОЯНИЕ БОТА ===
             self.status = BotStatus.STOPPED
             self.positions: Dict[str, Trade] = {}      # Открытые позиции {symbol: Trade}
             self.active_pairs: List[str] = []          # Активные торговые пары
+            self._closing_symbols: Set[str] = set()    # Позиции, закрытие которых уже идет
+            self.last_analysis_stats: Dict = {}        # Длительность последнего анализа пар
+            self._next_pairs: Optional[List[str]] = None  # Пары с новыми свечами для следующего цикла
+            self._strategy_choices: Dict[str, Tuple[str, float]] = {}  # Стратегии пар, выбранные в начале цикла
             
             # === УПРАВЛЕНИЕ ПРОЦЕССОМ ===
             self._main_task: Optional[asyncio.Task] = None  # Основная задача торговли
@@ -222,6 +252,10 @@ class BotManager:
                 action='bot_start'
             )
                         
+            # === ШАГ 0: ОТКРЫТИЕ СЕССИИ С БИРЖЕЙ ===
+            logger.info("🔌 Открываем сессию с биржей...")
+            await self.exchange.start()
+            
             # === ШАГ 1: ПРЕДВАРИТЕЛЬНЫЕ ПРОВЕРКИ ===
             logger.info("🔍 Выполняем предварительные проверки...")
             if not await self._pre_start_checks():
@@ -231,10 +265,31 @@ class BotManager:
             logger.info("📋 Загружаем конфигурацию...")
             await self._load_configuration()
             
+            # === ШАГ 2.1: ПРОГРЕВ ПУЛА СТРАТЕГИЙ ===
+            self.strategy_pool.warm_up()
+            
+            # === ШАГ 2.2: ОТЛОЖЕННАЯ ЗАПИСЬ В БД ===
+            await self.persistence.start()
+            
             # === ШАГ 3: ОБНОВЛЕНИЕ СОСТОЯНИЯ В БД ===
             logger.info("💾 Обновляем состояние в базе данных...")
             self._update_bot_state_db(is_running=True)
             
+            # === ШАГ 3.1: ПОТОК РЫНОЧНЫХ ДАННЫХ ===
+            if config.ENABLE_WS_MARKET_DATA:
+                logger.info("📡 Запускаем WebSocket поток рыночных данных...")
+                await self.market_stream.start(self.active_pairs)
+            
+            # === ШАГ 3.2: МОНИТОР ЗАЩИТНЫХ ВЫХОДОВ ===
+            if config.ENABLE_EXIT_MONITOR:
+                logger.info("🛡️ Запускаем монитор защитных выходов...")
+                await self.exit_monitor.start()
+            
+            # === ШАГ 3.3: ПЛАНИРОВЩИК ПО ЗАКРЫТИЮ СВЕЧЕЙ ===
+            if config.ENABLE_CANDLE_SCHEDULER:
+                logger.info("🕯️ Запускаем планировщик по закрытию свечей...")
+                await self.candle_scheduler.start(self.active_pairs)
+            
             # === ШАГ 4: ЗАПУСК ОСНОВНОГО ЦИКЛА ===
             logger.info("🔄 Запускаем основной торговый цикл...")
             self._stop_event.clear()  # Сбрасываем флаг остановки
@@ -269,6 +324,13 @@ class BotManager:
             
             # Обновляем состояние в БД
             self._update_bot_state_db(is_running=False)
+            await self.persistence.stop()
+            
+            # Освобождаем соединения с биржей
+            await self.exit_monitor.stop()
+            await self.candle_scheduler.stop()
+            await self.market_stream.stop()
+            await self.exchange.close()
             
             return False, error_msg
     
@@ -282,7 +344,8 @@ class BotManager:
         3. Ожидание завершения торгового цикла
         4. Закрытие всех открытых позиций
         5. Сохранение статистики
-        6. Уведомление об остановке
+        6. Закрытие сессии с биржей
+        7. Уведомление об остановке
         
         Returns:
             Tuple[bool, str]: (успешность, сообщение)
@@ -317,6 +380,8 @@ class BotManager:
                         logger.info("✅ Торговый цикл принудительно остановлен")
             
             # === ШАГ 3: ЗАКРЫТИЕ ПОЗИЦИЙ ===
+            await self.exit_monitor.stop()
+            await self.candle_scheduler.stop()
             logger.info("🔄 Закрываем все открытые позиции...")
             await self._close_all_positions("Bot shutdown")
             
@@ -324,11 +389,19 @@ class BotManager:
             logger.info("💾 Обновляем состояние в базе данных...")
             self._update_bot_state_db(is_running=False)
             
+            # Сбрасываем в БД все отложенные записи (сделки, сигналы, балансы)
+            await self.persistence.stop()
+            
             # === ШАГ 5: СОХРАНЕНИЕ СТАТИСТИКИ ===
             logger.info("📊 Сохраняем статистику работы...")
             self._save_statistics()
             
-            # === ШАГ 6: УВЕДОМЛЕНИЕ ОБ ОСТАНОВКЕ ===
+            # === ШАГ 6: ЗАКРЫТИЕ СЕССИИ С БИРЖЕЙ ===
+            logger.info("🔌 Закрываем сессию с биржей...")
+            await self.market_stream.stop()
+            await self.exchange.close()
+            
+            # === ШАГ 7: УВЕДОМЛЕНИЕ ОБ ОСТАНОВКЕ ===
             try:
                 runtime = datetime.utcnow() - self.start_time if self.start_time else None
                 await self.notifier.send_shutdown_message(
@@ -395,55 +468,58 @@ class BotManager:
                 except Exception as balance_error:
                     logger.warning(f"⚠️ Не удалось обновить баланс: {balance_error}")
                 
-                # === ШАГ 3: АНАЛИЗ ВСЕХ АКТИВНЫХ ПАР ===
-                for symbol in self.active_pairs:
-                    # Проверяем сигнал остановки перед каждой парой
+                # Состояние анализатора по парам, ушедшим из активного списка, не копим
+                self.analyzer.retain_symbols(self.active_pairs)
+                
+                # === ШАГ 2.1: ВЫБОР СТРАТЕГИЙ ДЛЯ ВСЕХ ПАР ===
+                # Один пакетный проход селектора вместо выбора по каждой паре
+                if not config.ENABLE_STRATEGY_ENSEMBLE:
+                    try:
+                        self._strategy_choices = await auto_strategy_selector.analyze_and_select_all_pairs(
+                            self.active_pairs,
+                            max_concurrency=getattr(config, 'MAX_CONCURRENT_PAIRS', 4)
+                        )
+                    except Exception as selection_error:
+                        self._strategy_choices = {}
+                        logger.warning(f"⚠️ Ошибка пакетного выбора стратегий: {selection_error}")
+                
+                # === ШАГ 3: АНАЛИЗ ПАР (ПАРАЛЛЕЛЬНО) ===
+                # С планировщиком - только пары с новой закрытой свечой,
+                # в первом цикле и без планировщика - все активные пары
+                pairs = self._next_pairs if self._next_pairs is not None else self.active_pairs
+                self._next_pairs = None
+                signals = await self._analyze_pairs(pairs)
+                
+                # === ШАГ 3.1: ИСПОЛНЕНИЕ СИЛЬНЫХ СИГНАЛОВ ===
+                # Ордера идут по одному, вне таймаутов анализа - прерывать
+                # исполнение на середине нельзя
+                for signal in signals:
                     if self._stop_event.is_set():
-                        logger.info("🛑 Получен сигнал остановки, прерываем анализ пар")
                         break
                     
                     try:
-                        logger.debug(f"🔍 Анализируем пару: {symbol}")
-                        
-                        # Анализируем рыночные данные
-                        market_data = await self.analyzer.analyze_symbol(symbol)
-                        if not market_data:
-                            logger.debug(f"📊 Нет данных для анализа {symbol}")
-                            continue
-                        
-                        # Генерируем торговый сигнал
-                        signal = await self._generate_signal(symbol, market_data)
-                        if not signal:
-                            logger.debug(f"📊 Сигнал для {symbol} не сгенерирован")
-                            continue
-                        
-                        # Сохраняем сигнал в базу данных
-                        self._save_signal(signal)
-                        
                         # Исполняем сигнал если он достаточно сильный
                         if signal.action in ['BUY', 'SELL'] and signal.confidence >= 0.6:
-                            logger.info(f"🎯 Сильный сигнал {signal.action} для {symbol} (уверенность: {signal.confidence:.1%})")
-                            await self._execute_signal_human_like(signal)
+                            logger.info(f"🎯 Сильный сигнал {signal.action} для {signal.symbol} (уверенность: {signal.confidence:.1%})")
+                            await self._execute_signal(signal)
                         else:
-                            logger.debug(f"📊 Слабый сигнал для {symbol}: {signal.action} (уверенность: {signal.confidence:.1%})")
-                        
-                    except Exception as symbol_error:
-                        logger.error(f"❌ Ошибка анализа {symbol}: {symbol_error}")
-                        # Отправляем уведомление об ошибке, но продолжаем работу
-                        try:
-                            await self.notifier.send_error(f"Ошибка анализа {symbol}: {str(symbol_error)}")
-                        except:
-                            pass  # Не падаем из-за ошибки уведомления
+                            logger.debug(f"📊 Слабый сигнал для {signal.symbol}: {signal.action} (уверенность: {signal.confidence:.1%})")
+                    
+                    except Exception as execution_error:
+                        logger.error(f"❌ Ошибка исполнения сигнала {signal.symbol}: {execution_error}")
                 
                 # === ШАГ 4: УПРАВЛЕНИЕ ОТКРЫТЫМИ ПОЗИЦИЯМИ ===
-                try:
-                    await self._manage_positions()
-                except Exception as positions_error:
-                    logger.error(f"❌ Ошибка управления позициями: {positions_error}")
+                # При работающем мониторе выходы проверяются в фоне, и
+                # человеческие паузы цикла задерживают только новые входы
+                if not self.exit_monitor.is_running:
+                    try:
+                        await self._manage_positions()
+                    except Exception as positions_error:
+                        logger.error(f"❌ Ошибка управления позициями: {positions_error}")
                 
                 # === ШАГ 5: ОБНОВЛЕНИЕ СТАТИСТИКИ ===
                 try:
-                    self._update_statistics()
+                    await self._update_statistics()
                 except Exception as stats_error:
                     logger.warning(f"⚠️ Ошибка обновления статистики: {stats_error}")
                 
@@ -451,8 +527,12 @@ class BotManager:
                 cycle_duration = (datetime.utcnow() - cycle_start).total_seconds()
                 logger.debug(f"⏱️ Цикл #{self.cycles_count} выполнен за {cycle_duration:.1f} секунд")
                 
-                # Делаем паузу с имитацией человеческого поведения
-                await self._human_delay()
+                if self.candle_scheduler.is_running:
+                    # Ждем закрытия следующей свечи вместо фиксированной паузы
+                    self._next_pairs = await self.candle_scheduler.wait_for_closed(self._stop_event)
+                else:
+                    # Делаем паузу с имитацией человеческого поведения
+                    await self._human_delay()
                 
             except asyncio.CancelledError:
                 logger.info("🛑 Торговый цикл был отменен")
@@ -472,6 +552,96 @@ class BotManager:
     # === ГЕНЕРАЦИЯ И ИСПОЛНЕНИЕ ТОРГОВЫХ СИГНАЛОВ ===
     # =========================================================================
     
+    async def _analyze_pairs(self, symbols: List[str]) -> List[Signal]:
+        """
+        Параллельный анализ пар с ограничением одновременности
+        
+        Не больше MAX_CONCURRENT_PAIRS пар анализируются одновременно,
+        каждая - не дольше PAIR_ANALYSIS_TIMEOUT секунд. Медленная пара
+        не задерживает остальные, а длительность шага определяется самой
+        медленной парой, а не суммой.
+        
+        Args:
+            symbols: Торговые пары
+            
+        Returns:
+            List[Signal]: Сгенерированные и сохраненные сигналы
+        """
+        semaphore = asyncio.Semaphore(getattr(config, 'MAX_CONCURRENT_PAIRS', 4))
+        timeout = getattr(config, 'PAIR_ANALYSIS_TIMEOUT', 30)
+        durations: Dict[str, float] = {}
+        
+        async def run(symbol: str) -> Optional[Signal]:
+            async with semaphore:
+                # Проверяем сигнал остановки перед каждой парой
+                if self._stop_event.is_set():
+                    return None
+                
+                started = time.monotonic()
+                try:
+                    return await asyncio.wait_for(self._analyze_pair(symbol), timeout=timeout)
+                finally:
+                    durations[symbol] = time.monotonic() - started
+        
+        cycle_start = time.monotonic()
+        results = await asyncio.gather(*(run(symbol) for symbol in symbols), return_exceptions=True)
+        
+        signals = []
+        timeouts = 0
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, asyncio.TimeoutError):
+                timeouts += 1
+                logger.warning(f"⏱️ Анализ {symbol} не уложился в {timeout:.0f}с, пропускаем")
+            elif isinstance(result, Exception):
+                logger.error(f"❌ Ошибка анализа {symbol}: {result}")
+                # Отправляем уведомление об ошибке, но продолжаем работу
+                try:
+                    await self.notifier.send_error(f"Ошибка анализа {symbol}: {str(result)}")
+                except:
+                    pass  # Не падаем из-за ошибки уведомления
+            elif result is not None:
+                signals.append(result)
+        
+        self.last_analysis_stats = {
+            'pairs': len(symbols),
+            'signals': len(signals),
+            'timeouts': timeouts,
+            'wall_time_sec': round(time.monotonic() - cycle_start, 3),
+            'max_pair_sec': round(max(durations.values(), default=0.0), 3),
+            'sum_pair_sec': round(sum(durations.values()), 3)
+        }
+        
+        return signals
+    
+    async def _analyze_pair(self, symbol: str) -> Optional[Signal]:
+        """
+        Конвейер одной пары: анализ рынка -> сигнал -> запись в БД
+        
+        Args:
+            symbol: Торговая пара
+            
+        Returns:
+            Signal или None
+        """
+        logger.debug(f"🔍 Анализируем пару: {symbol}")
+        
+        # Анализируем рыночные данные
+        market_data = await self.analyzer.analyze_symbol(symbol)
+        if not market_data:
+            logger.debug(f"📊 Нет данных для анализа {symbol}")
+            return None
+        
+        # Генерируем торговый сигнал
+        signal = await self._generate_signal(symbol, market_data)
+        if not signal:
+            logger.debug(f"📊 Сигнал для {symbol} не сгенерирован")
+            return None
+        
+        # Сохраняем сигнал в базу данных (отложенная запись, без ожидания БД)
+        self._save_signal(signal)
+        
+        return signal
+    
     async def _generate_signal(self, symbol: str, market_data: Dict) -> Optional[Signal]:
         """
         Генерация торгового сигнала с автоматическим выбором стратегии
@@ -491,85 +661,154 @@ class BotManager:
         try:
             logger.info(f"🎯 Генерируем сигнал для {symbol}")
             
+            if config.ENABLE_STRATEGY_ENSEMBLE:
+                choice = await self._select_from_ensemble(symbol, market_data)
+                if not choice:
+                    return None
+                best_strategy_name, strategy_confidence, analysis = choice
+                return self._build_signal(symbol, market_data, best_strategy_name, strategy_confidence, analysis)
+            
             # === ШАГ 1: АВТОМАТИЧЕСКИЙ ВЫБОР СТРАТЕГИИ ===
-            # Используем интеллектуальный селектор
-            best_strategy_name, strategy_confidence = await auto_strategy_selector.select_best_strategy(symbol)
+            # Выбор селектора в начале цикла; пара без него (добавлена позже) - отдельно
+            choice = self._strategy_choices.get(symbol)
+            if choice is None:
+                choice = await auto_strategy_selector.select_best_strategy(symbol)
+            best_strategy_name, strategy_confidence = choice
             
             logger.info(f"🧠 Выбрана стратегия '{best_strategy_name}' для {symbol} "
                        f"с уверенностью {strategy_confidence:.1%}")
             
             # === ШАГ 2: ПОЛУЧАЕМ КОНФИГУРАЦИЮ ПАРЫ ===
-            pair_config = self._get_pair_config(symbol)
+            pair_config = await self._get_pair_config(symbol)
             
             # Обновляем стратегию в конфигурации на выбранную
             # (это временное изменение, не сохраняется в БД)
             original_strategy = pair_config.strategy
             pair_config.strategy = best_strategy_name
             
-            # === ШАГ 3: СОЗДАЕМ ЭКЗЕМПЛЯР ВЫБРАННОЙ СТРАТЕГИИ ===
+            # === ШАГ 3: ЭКЗЕМПЛЯР ВЫБРАННОЙ СТРАТЕГИИ ИЗ ПУЛА ===
             try:
-                strategy = self.strategy_factory.create(best_strategy_name)
+                strategy = self.strategy_pool.get(best_strategy_name)
             except ValueError as e:
                 logger.error(f"❌ Не удалось создать стратегию {best_strategy_name}: {e}")
                 # Fallback к безопасной стратегии
-                strategy = self.strategy_factory.create('safe_multi_indicator')
+                strategy = self.strategy_pool.get('safe_multi_indicator')
                 best_strategy_name = 'safe_multi_indicator'
             
             # === ШАГ 4: АНАЛИЗИРУЕМ РЫНОЧНЫЕ ДАННЫЕ ===
-            analysis = await strategy.analyze(market_data['df'], symbol)
+            # Чистые вычисления - выполняем в пуле, не блокируя event loop
+            analysis = await run_coroutine_in_executor(strategy.analyze, market_data['df'], symbol)
             
             # Если стратегия рекомендует ждать, сигнал не генерируем
             if analysis.action == 'WAIT':
                 logger.debug(f"📊 Стратегия {best_strategy_name} рекомендует ждать: {analysis.reason}")
                 return None
             
-            # === ШАГ 5: КОРРЕКТИРУЕМ УВЕРЕННОСТЬ ===
-            # Учитываем уверенность в выборе стратегии
-            combined_confidence = analysis.confidence * strategy_confidence
-            
-            # Если общая уверенность слишком низкая, не торгуем
-            if combined_confidence < 0.5:
-                logger.info(f"📊 Низкая общая уверенность ({combined_confidence:.1%}), "
-                           f"пропускаем сигнал")
-                return None
-            
-            # === ШАГ 6: СОЗДАЕМ СИГНАЛ ===
-            signal = Signal(
-                symbol=symbol,
-                action=analysis.action,
-                confidence=combined_confidence,
-                price=market_data['current_price'],
-                stop_loss=analysis.stop_loss,
-                take_profit=analysis.take_profit,
-                strategy=best_strategy_name,  # Используем выбранную стратегию
-                reason=f"[AUTO] {analysis.reason} (стратегия: {best_strategy_name}, "
-                       f"уверенность выбора: {strategy_confidence:.1%})",
-                created_at=datetime.utcnow()
-            )
-            
-            logger.info(f"✅ Сгенерирован сигнал {signal.action} для {symbol}: {signal.reason}")
-            
-            # === ШАГ 7: ОБУЧЕНИЕ СЕЛЕКТОРА ===
-            # Асинхронно запускаем обучение если накопилось достаточно данных
-            if len(auto_strategy_selector.selection_history) > 100 and \
-               len(auto_strategy_selector.selection_history) % 100 == 0:
-                asyncio.create_task(self._train_strategy_selector())
-            
-            return signal
+            return self._build_signal(symbol, market_data, best_strategy_name, strategy_confidence, analysis)
             
         except Exception as e:
             logger.error(f"❌ Ошибка генерации сигнала для {symbol}: {e}")
             return None
+    
+    async def _select_from_ensemble(self, symbol: str, market_data: Dict) -> Optional[Tuple[str, float, Any]]:
+        """
+        Все стратегии на одном баре, выбор селектором среди их сигналов
+        
+        Returns:
+            (стратегия, уверенность выбора, TradingSignal стратегии) или None
+        """
+        # Все стратегии - одним заданием в пуле: общий контекст индикаторов бара
+        evaluation = await run_coroutine_in_executor(
+            self.strategy_ensemble.evaluate, symbol, market_data['df']
+        )
+        
+        choice = await auto_strategy_selector.select_from_ensemble(symbol, evaluation)
+        if not choice:
+            logger.debug(f"📊 Все стратегии ансамбля рекомендуют ждать для {symbol}")
+            return None
+        
+        best_strategy_name, strategy_confidence = choice
+        logger.info(f"🧠 Ансамбль: выбрана стратегия '{best_strategy_name}' для {symbol} "
+                   f"с уверенностью {strategy_confidence:.1%}")
+        return best_strategy_name, strategy_confidence, evaluation.signals[best_strategy_name]
+    
+    def _build_signal(self, symbol: str, market_data: Dict, best_strategy_name: str,
+                      strategy_confidence: float, analysis) -> Optional[Signal]:
+        """Сигнал по анализу выбранной стратегии с учетом уверенности выбора"""
+        # === ШАГ 5: КОРРЕКТИРУЕМ УВЕРЕННОСТЬ ===
+        # Учитываем уверенность в выборе стратегии
+        combined_confidence = analysis.confidence * strategy_confidence
+        
+        # Если общая уверенность слишком низкая, не торгуем
+        if combined_confidence < 0.5:
+            logger.info(f"📊 Низкая общая уверенность ({combined_confidence:.1%}), "
+                       f"пропускаем сигнал")
+            return None
+        
+        # === ШАГ 6: СОЗДАЕМ СИГНАЛ ===
+        signal = Signal(
+            symbol=symbol,
+            action=analysis.action,
+            confidence=combined_confidence,
+            price=market_data['current_price'],
+            stop_loss=analysis.stop_loss,
+            take_profit=analysis.take_profit,
+            strategy=best_strategy_name,  # Используем выбранную стратегию
+            reason=f"[AUTO] {analysis.reason} (стратегия: {best_strategy_name}, "
+                   f"уверенность выбора: {strategy_confidence:.1%})",
+            created_at=datetime.utcnow()
+        )
+        
+        logger.info(f"✅ Сгенерирован сигнал {signal.action} для {symbol}: {signal.reason}")
+        
+        return signal
+    
+    async def _execute_signal(self, signal: Signal) -> Optional[Trade]:
+        """
+        Открытие позиции по сигналу
+        
+        Паузы "как человек" делает сам ExchangeClient.create_order,
+        здесь - проверки риск-менеджера и учет открытой сделки.
+        Реальные ордера отправляются только при ENABLE_SIGNAL_ENTRY.
+        
+        Args:
+            signal: Сильный сигнал BUY/SELL
             
-    async def _train_strategy_selector(self):
-        """Асинхронное обучение селектора стратегий"""
+        Returns:
+            Trade или None, если позиция не открыта
+        """
+        if not getattr(config, 'ENABLE_SIGNAL_ENTRY', False):
+            logger.info(f"⏸️ Вход по сигналу {signal.symbol} выключен (ENABLE_SIGNAL_ENTRY=false)")
+            return None
+        
+        if signal.symbol in self.positions:
+            logger.debug(f"📊 Позиция {signal.symbol} уже открыта, сигнал пропущен")
+            return None
+        
+        current_balance = await asyncio.to_thread(self._get_current_balance)
+        if not self.risk_manager.check_signal(signal, self.positions, current_balance):
+            return None
+        
+        trade = await self.trader.execute_signal(signal)
+        if not trade:
+            return None
+        
+        self.positions[trade.symbol] = trade
+        
+        # Условия выбора стратегии - контекст сделки для онлайн-модели
+        auto_strategy_selector.bind_trade_context(trade.symbol, trade.strategy)
+        
         try:
-            logger.info("🎓 Запускаем обучение селектора стратегий...")
-            await asyncio.get_event_loop().run_in_executor(
-                None, auto_strategy_selector.train_ml_model
+            await self.notifier.send_trade_opened(
+                symbol=trade.symbol,
+                side=trade.side.value if hasattr(trade.side, 'value') else str(trade.side),
+                amount=trade.quantity,
+                price=trade.entry_price
             )
-        except Exception as e:
-            logger.error(f"❌ Ошибка обучения селектора: {e}")
+        except Exception as notify_error:
+            logger.warning(f"⚠️ Не удалось отправить уведомление об открытии: {notify_error}")
+        
+        return trade
     
     # =========================================================================
     # === УПРАВЛЕНИЕ ОТКРЫТЫМИ ПОЗИЦИЯМИ ===
@@ -586,37 +825,135 @@ class BotManager:
         4. Изменение рыночных условий
         
         При необходимости закрываем позицию.
+        
+        Пока работает ExitMonitor, то же самое он делает в фоне с
+        собственной частотой, а торговый цикл этот метод не вызывает.
         """
-        if not self.positions:
-            return  # Нет открытых позиций
+        for symbol, trade, current_price, reason in await self._evaluate_positions():
+            await self._exit_position(symbol, trade, current_price, reason)
+    
+    async def _evaluate_positions(self) -> List[Tuple[str, Trade, float, str]]:
+        """
+        Проверка всех открытых позиций по одному снимку цен
         
-        logger.debug(f"🔄 Проверяем {len(self.positions)} открытых позиций")
+        Обновляет нереализованный PnL и возвращает позиции, которые
+        нужно закрыть. Позиции, закрытие которых уже идет, пропускаются.
+        
+        Returns:
+            List[(символ, сделка, цена, причина)]
+        """
+        if not self.positions:
+            return []  # Нет открытых позиций
         
         # Создаем копию словаря для безопасной итерации
-        positions_copy = list(self.positions.items())
+        positions_copy = [
+            (symbol, trade) for symbol, trade in self.positions.items()
+            if symbol not in self._closing_symbols
+        ]
+        if not positions_copy:
+            return []
         
-        for symbol, trade in positions_copy:
-            try:
-                # Получаем текущую цену с биржи
-                ticker = await self.exchange.fetch_ticker(symbol)
-                current_price = ticker['last']
-                
-                # Проверяем условия закрытия позиции
-                should_close, reason = self._should_close_position(trade, current_price)
-                
-                if should_close:
-                    logger.info(f"🔄 Закрываем позицию {symbol}: {reason}")
-                    await self._close_position(trade, current_price, reason)
-                    # Удаляем из активных позиций
-                    if symbol in self.positions:
-                        del self.positions[symbol]
-                else:
-                    # Обновляем текущую прибыль/убыток
-                    self._update_position_pnl(trade, current_price)
-                
-            except Exception as position_error:
-                logger.error(f"❌ Ошибка управления позицией {symbol}: {position_error}")
-                # Продолжаем с другими позициями
+        # Один снимок цен на все позиции
+        try:
+            prices = await self._get_current_prices([symbol for symbol, _ in positions_copy])
+        except Exception as prices_error:
+            logger.error(f"❌ Не удалось получить цены позиций: {prices_error}")
+            return []
+        
+        positions_copy = [(symbol, trade) for symbol, trade in positions_copy if symbol in prices]
+        if not positions_copy:
+            return []
+        
+        trades = [trade for _, trade in positions_copy]
+        current_prices = np.array([prices[symbol] for symbol, _ in positions_copy], dtype=float)
+        
+        # Проверяем условия закрытия и PnL сразу для всех позиций
+        close_reasons = self._should_close_positions(trades, current_prices)
+        self._update_positions_pnl(trades, current_prices)
+        
+        return [
+            (symbol, trade, float(current_price), reason)
+            for (symbol, trade), current_price, reason in zip(positions_copy, current_prices, close_reasons)
+            if reason
+        ]
+    
+    async def _exit_position(self, symbol: str, trade: Trade, current_price: float, reason: str):
+        """
+        Закрытие позиции с защитой от повторного закрытия
+        
+        Args:
+            symbol: Торговая пара
+            trade: Открытая сделка
+            current_price: Цена, по которой сработало условие
+            reason: Причина закрытия
+        """
+        if symbol in self._closing_symbols:
+            return
+        
+        self._closing_symbols.add(symbol)
+        try:
+            logger.info(f"🔄 Закрываем позицию {symbol}: {reason}")
+            await self._close_position(trade, current_price, reason)
+            # Удаляем из активных позиций
+            if symbol in self.positions:
+                del self.positions[symbol]
+            
+        except Exception as position_error:
+            logger.error(f"❌ Ошибка управления позицией {symbol}: {position_error}")
+            # Продолжаем с другими позициями
+        finally:
+            self._closing_symbols.discard(symbol)
+    
+    async def _get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Текущие цены нескольких символов
+        
+        Свежие цены берутся из WebSocket хранилища, недостающие -
+        одним bulk запросом тикеров.
+        
+        Args:
+            symbols: Торговые пары
+            
+        Returns:
+            Dict[символ, последняя цена]
+        """
+        prices = {}
+        missing = []
+        
+        for symbol in symbols:
+            price = self.market_store.get_last_price(symbol)
+            if price is not None:
+                prices[symbol] = price
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            tickers = await self.exchange.fetch_tickers(missing)
+            for symbol, ticker in tickers.items():
+                if ticker.get('last') is not None:
+                    prices[symbol] = float(ticker['last'])
+        
+        return prices
+    
+    async def _get_current_price(self, symbol: str) -> float:
+        """
+        Текущая цена символа
+        
+        Берется из WebSocket хранилища, если тикер свежий,
+        иначе запрашивается по REST.
+        
+        Args:
+            symbol: Торговая пара
+            
+        Returns:
+            float: Последняя цена
+        """
+        price = self.market_store.get_last_price(symbol)
+        if price is not None:
+            return price
+        
+        ticker = await self.exchange.fetch_ticker(symbol)
+        return ticker['last']
     
     def _should_close_position(self, trade: Trade, current_price: float) -> Tuple[bool, str]:
         """
@@ -651,6 +988,71 @@ class BotManager:
         
         return False, ""
     
+    def _should_close_positions(self, trades: List[Trade], current_prices: np.ndarray) -> List[str]:
+        """
+        Векторная проверка условий закрытия для всех позиций
+        
+        Те же правила, что в _should_close_position, но за один проход
+        по массивам: SL, затем TP, затем таймаут.
+        
+        Args:
+            trades: Открытые сделки
+            current_prices: Текущие цены в том же порядке
+            
+        Returns:
+            List[str]: Причина закрытия для каждой сделки ('' - не закрывать)
+        """
+        is_long = np.array([trade.side == OrderSide.BUY for trade in trades], dtype=bool)
+        stop_loss = np.array(
+            [trade.stop_loss if trade.stop_loss is not None else np.nan for trade in trades], dtype=float
+        )
+        take_profit = np.array(
+            [trade.take_profit if trade.take_profit is not None else np.nan for trade in trades], dtype=float
+        )
+        
+        # Сравнения с NaN дают False - позиции без уровней не закрываются
+        with np.errstate(invalid='ignore'):
+            sl_hit = np.where(is_long, current_prices <= stop_loss, current_prices >= stop_loss)
+            tp_hit = np.where(is_long, current_prices >= take_profit, current_prices <= take_profit)
+        
+        timeout = np.zeros(len(trades), dtype=bool)
+        max_hours = getattr(config, 'MAX_POSITION_HOURS', None)
+        if max_hours:
+            now = datetime.utcnow()
+            ages = np.array([(now - trade.created_at).total_seconds() for trade in trades], dtype=float)
+            timeout = ages > max_hours * 3600
+        
+        reasons = np.select(
+            [sl_hit, tp_hit, timeout],
+            ["Stop Loss triggered", "Take Profit triggered", "Position timeout"],
+            default=""
+        )
+        return reasons.tolist()
+    
+    def _update_positions_pnl(self, trades: List[Trade], current_prices: np.ndarray):
+        """
+        Векторное обновление нереализованного PnL всех позиций
+        
+        Args:
+            trades: Открытые сделки
+            current_prices: Текущие цены в том же порядке
+        """
+        try:
+            direction = np.array([1.0 if trade.side == OrderSide.BUY else -1.0 for trade in trades])
+            entry = np.array([trade.entry_price for trade in trades], dtype=float)
+            quantity = np.array([trade.quantity for trade in trades], dtype=float)
+            commission = np.array([trade.commission or 0 for trade in trades], dtype=float)
+            
+            unrealized = (current_prices - entry) * quantity * direction - commission
+            
+            for trade, pnl in zip(trades, unrealized):
+                trade.unrealized_pnl = float(pnl)
+        
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка векторного обновления PnL, считаем по одной: {e}")
+            for trade, current_price in zip(trades, current_prices):
+                self._update_position_pnl(trade, float(current_price))
+    
     def _update_position_pnl(self, trade: Trade, current_price: float):
         """
         Обновляет текущую прибыль/убыток позиции
@@ -674,7 +1076,8 @@ class BotManager:
         except Exception as e:
             logger.warning(f"⚠️ Ошибка обновления PnL для {trade.symbol}: {e}")
     
-    async def _close_position(self, trade: Trade, current_price: float, reason: str):
+    async def _close_position(self, trade: Trade, current_price: float, reason: str,
+                              confirm: bool = False):
         """
         Закрытие конкретной позиции
         
@@ -682,6 +1085,7 @@ class BotManager:
             trade: Сделка для закрытия
             current_price: Цена закрытия
             reason: Причина закрытия
+            confirm: Дождаться записи закрытой сделки в БД
         """
         try:
             # Отправляем ордер на закрытие через trader
@@ -697,8 +1101,19 @@ class BotManager:
                 # Рассчитываем итоговую прибыль
                 trade.calculate_profit()
                 
-                # Сохраняем в базу данных
-                self._update_trade_db(trade)
+                # Сохраняем в базу данных (закрытие других позиций запись не ждет)
+                confirmation = self._update_trade_db(trade, wait=confirm)
+                if confirmation is not None:
+                    try:
+                        await confirmation
+                    except Exception as db_error:
+                        logger.error(f"❌ Закрытая сделка {trade.symbol} не записана в БД: {db_error}")
+                
+                # Статистика стратегий для селектора - без повторного чтения истории
+                strategy_performance.record_trade(trade.symbol, trade.strategy, trade.profit, trade.created_at)
+                
+                # Онлайн-модель селектора учится на исходе сделки
+                auto_strategy_selector.learn_from_trade(trade.symbol, trade.strategy, trade.profit)
                 
                 # Отправляем уведомление
                 try:
@@ -768,19 +1183,15 @@ class BotManager:
         # === ПРОВЕРКА 3: ПОДКЛЮЧЕНИЕ К БАЗЕ ДАННЫХ ===
         logger.debug("💾 Проверяем подключение к базе данных...")
         try:
-            db = SessionLocal()
-            try:
+            async with get_async_session() as db_session:
                 # Используем text() для безопасного SQL запроса
-                result = db.execute(text("SELECT 1 as test_connection"))
-                test_value = result.fetchone()
-                
-                if test_value and test_value[0] == 1:
-                    logger.info("✅ Подключение к базе данных успешно")
-                else:
-                    logger.error("❌ База данных вернула неожиданный результат")
-                    return False
-            finally:
-                db.close()
+                test_value = await db_session.scalar(text("SELECT 1 as test_connection"))
+            
+            if test_value == 1:
+                logger.info("✅ Подключение к базе данных успешно")
+            else:
+                logger.error("❌ База данных вернула неожиданный результат")
+                return False
         except Exception as db_error:
             logger.error(f"❌ Не удалось подключиться к базе данных: {db_error}")
             return False
@@ -828,12 +1239,17 @@ class BotManager:
         """
         logger.info("📋 Загружаем конфигурацию из базы данных...")
         
-        db = SessionLocal()
         try:
-            # === ЗАГРУЗКА АКТИВНЫХ ТОРГОВЫХ ПАР ===
-            pairs = db.query(TradingPair).filter(
-                TradingPair.is_active == True
-            ).all()
+            async with get_async_session() as db_session:
+                # === ЗАГРУЗКА АКТИВНЫХ ТОРГОВЫХ ПАР ===
+                pairs = (await db_session.scalars(
+                    select(TradingPair).where(TradingPair.is_active == True)
+                )).all()
+                
+                # === ЗАГРУЗКА ОТКРЫТЫХ ПОЗИЦИЙ ===
+                open_trades = (await db_session.scalars(
+                    select(Trade).where(Trade.status == TradeStatus.OPEN)
+                )).all()
             
             if pairs:
                 self.active_pairs = [pair.symbol for pair in pairs]
@@ -848,11 +1264,6 @@ class BotManager:
                     self.active_pairs = ['BTCUSDT', 'ETHUSDT']
                     logger.warning(f"⚠️ Используем дефолтные пары: {self.active_pairs}")
             
-            # === ЗАГРУЗКА ОТКРЫТЫХ ПОЗИЦИЙ ===
-            open_trades = db.query(Trade).filter(
-                Trade.status == TradeStatus.OPEN
-            ).all()
-            
             if open_trades:
                 self.positions = {trade.symbol: trade for trade in open_trades}
                 logger.info(f"📊 Загружены открытые позиции: {list(self.positions.keys())}")
@@ -868,8 +1279,6 @@ class BotManager:
             self.active_pairs = getattr(config, 'TRADING_PAIRS', ['BTCUSDT', 'ETHUSDT'])
             self.positions = {}
             logger.warning("⚠️ Используем дефолтную конфигурацию")
-        finally:
-            db.close()
     
     # =========================================================================
     # === ИМИТАЦИЯ ЧЕЛОВЕЧЕСКОГО ПОВЕДЕНИЯ ===
@@ -974,6 +1383,27 @@ class BotManager:
             logger.error(f"❌ Ошибка в операции БД '{operation_name}': {e}")
             return None
     
+    async def _safe_async_db_operation(self, operation_name: str, operation_func, *args, **kwargs):
+        """
+        Безопасное выполнение запроса через асинхронную сессию
+        
+        То же, что _safe_db_operation, но operation_func - корутина,
+        получающая AsyncSession первым аргументом: торговый цикл не
+        блокируется на время ожидания ответа БД.
+        
+        Returns:
+            Результат операции или None при ошибке
+        """
+        try:
+            logger.debug(f"💾 Выполняем операцию БД: {operation_name}")
+            async with get_async_session() as db_session:
+                result = await operation_func(db_session, *args, **kwargs)
+            logger.debug(f"✅ Операция БД завершена: {operation_name}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Ошибка в операции БД '{operation_name}': {e}")
+            return None
+    
     def _load_state_from_db(self):
         """
         Загрузка состояния бота из базы данных при инициализации
@@ -1004,127 +1434,91 @@ class BotManager:
     
     def _update_bot_state_db(self, is_running: bool):
         """
-        Обновление состояния бота в базе данных
+        Обновление состояния бота в базе данных (отложенная запись)
         
         Args:
             is_running: Флаг запуска бота
         """
-        def _update_operation():
-            db = SessionLocal()
-            try:
-                # Ищем существующую запись состояния
-                state = db.query(BotState).first()
-                if not state:
-                    # Создаем новую запись
-                    state = BotState()
-                    db.add(state)
-                
-                # Обновляем поля
-                state.is_running = is_running
-                if is_running:
-                    state.start_time = datetime.utcnow()
-                    state.stop_time = None
-                else:
-                    state.stop_time = datetime.utcnow()
-                
-                # Обновляем статистику
-                state.total_trades = self.trades_today
-                state.current_balance = self._get_current_balance()
-                
-                db.commit()
-                return True
-            except Exception as e:
-                db.rollback()
-                raise e
-            finally:
-                db.close()
+        trades_today = self.trades_today
+        event_time = datetime.utcnow()
+        
+        def _update_operation(db: Session):
+            # Ищем существующую запись состояния
+            state = db.query(BotState).first()
+            if not state:
+                # Создаем новую запись
+                state = BotState()
+                db.add(state)
+            
+            # Обновляем поля
+            state.is_running = is_running
+            if is_running:
+                state.start_time = event_time
+                state.stop_time = None
+            else:
+                state.stop_time = event_time
+            
+            # Обновляем статистику
+            state.total_trades = trades_today
+            state.current_balance = self._get_current_balance()
         
-        self._safe_db_operation("обновление состояния бота", _update_operation)
+        self.persistence.call('bot_state', _update_operation)
     
     def _save_signal(self, signal: Signal):
         """
-        Сохранение торгового сигнала в базу данных
+        Сохранение торгового сигнала в базу данных (отложенная запись)
+        
+        Сигналы вставляются пачкой, поэтому ID из БД в объект не возвращается.
         
         Args:
             signal: Объект сигнала для сохранения
         """
-        def _save_operation():
-            db = SessionLocal()
-            try:
-                # Создаем новый объект Signal в контексте текущей сессии
-                new_signal = Signal(
-                    symbol=signal.symbol,
-                    action=signal.action,
-                    confidence=signal.confidence,
-                    price=signal.price,
-                    stop_loss=signal.stop_loss,
-                    take_profit=signal.take_profit,
-                    strategy=signal.strategy,
-                    reason=signal.reason,
-                    created_at=signal.created_at
-                )
-                db.add(new_signal)
-                db.commit()
-                # Обновляем ID в исходном объекте
-                signal.id = new_signal.id
-                return True
-            except Exception as e:
-                db.rollback()
-                raise e
-            finally:
-                db.close()
-        
-        self._safe_db_operation(f"сохранение сигнала {signal.symbol}", _save_operation)
+        self.persistence.insert(Signal, {
+            'symbol': signal.symbol,
+            'action': signal.action,
+            'confidence': signal.confidence,
+            'price': signal.price,
+            'stop_loss': signal.stop_loss,
+            'take_profit': signal.take_profit,
+            'strategy': signal.strategy,
+            'reason': signal.reason,
+            'created_at': signal.created_at
+        })
     
     def _update_signal_db(self, signal: Signal):
         """
-        Обновление сигнала в базе данных
+        Обновление сигнала в базе данных (отложенная запись)
         
         Args:
             signal: Объект сигнала для обновления
         """
-        def _update_operation():
-            db = SessionLocal()
-            try:
-                # Получаем объект из БД и обновляем его
-                db_signal = db.query(Signal).filter(Signal.id == signal.id).first()
-                if db_signal:
-                    db_signal.executed = signal.executed
-                    db_signal.executed_at = signal.executed_at
-                    db_signal.trade_id = signal.trade_id
-                    db.commit()
-                    return True
-                else:
-                    logger.warning(f"Сигнал с ID {signal.id} не найден в БД")
-                    return False
-            except Exception as e:
-                db.rollback()
-                raise e
-            finally:
-                db.close()
+        if signal.id is None:
+            logger.warning(f"Сигнал {signal.symbol} без ID, обновление в БД пропущено")
+            return
         
-        self._safe_db_operation(f"обновление сигнала {signal.symbol}", _update_operation)
+        self.persistence.update(Signal, signal.id, {
+            'executed': signal.executed,
+            'executed_at': signal.executed_at,
+            'trade_id': signal.trade_id
+        })
     
-    def _update_trade_db(self, trade: Trade):
+    def _update_trade_db(self, trade: Trade, wait: bool = False) -> Optional[asyncio.Future]:
         """
-        Обновление сделки в базе данных
+        Обновление сделки в базе данных (отложенная запись)
+        
+        Обновления одной сделки за окно сброса склеиваются в одно.
         
         Args:
             trade: Объект сделки для обновления
+            wait: Вернуть Future подтверждения записи
+            
+        Returns:
+            Future подтверждения, если wait=True
         """
-        def _update_operation():
-            db = SessionLocal()
-            try:
-                db.merge(trade)
-                db.commit()
-                return True
-            except Exception as e:
-                db.rollback()
-                raise e
-            finally:
-                db.close()
-        
-        self._safe_db_operation(f"обновление сделки {trade.symbol}", _update_operation)
+        if trade.id is None:
+            # Сделки еще нет в БД - как раньше, через merge
+            return self.persistence.call(('trade', id(trade)), lambda db: db.merge(trade), wait=wait)
+        return self.persistence.update(Trade, trade.id, orm_values(trade), wait=wait)
     
     def _save_statistics(self):
         """
@@ -1243,33 +1637,17 @@ class BotManager:
             balance = await self.exchange.fetch_balance()
             logger.debug("💰 Обновляем информацию о балансе...")
             
-            def _save_balance():
-                db = SessionLocal()
-                try:
-                    # Сохраняем только валюты с ненулевым балансом
-                    for currency, amount_info in balance.items():
-                        if amount_info['total'] > 0:
-                            balance_record = Balance(
-                                currency=currency,
-                                total=float(amount_info['total']),
-                                free=float(amount_info['free']),
-                                used=float(amount_info['used']),
-                                timestamp=datetime.utcnow()
-                            )
-                            db.add(balance_record)
-                    
-                    db.commit()
-                    return True
-                except Exception as e:
-                    db.rollback()
-                    raise e
-                finally:
-                    db.close()
-            
-            # Сохраняем через безопасный метод
-            result = self._safe_db_operation("обновление баланса", _save_balance)
-            if result:
-                logger.debug("✅ Баланс обновлен в БД")
+            # Сохраняем только валюты с ненулевым балансом (отложенная запись пачкой)
+            timestamp = datetime.utcnow()
+            for currency, amount_info in balance.items():
+                if amount_info['total'] > 0:
+                    self.persistence.insert(Balance, {
+                        'currency': currency,
+                        'total': float(amount_info['total']),
+                        'free': float(amount_info['free']),
+                        'used': float(amount_info['used']),
+                        'timestamp': timestamp
+                    })
             
         except Exception as e:
             logger.warning(f"⚠️ Ошибка обновления баланса: {e}")
@@ -1301,7 +1679,7 @@ class BotManager:
         result = self._safe_db_operation("получение текущего баланса", _get_balance)
         return result if result is not None else 1000.0
     
-    def _get_pair_config(self, symbol: str) -> TradingPair:
+    async def _get_pair_config(self, symbol: str) -> TradingPair:
         """
         Получение конфигурации торговой пары
         
@@ -1311,29 +1689,25 @@ class BotManager:
         Returns:
             TradingPair: Конфигурация пары
         """
-        def _get_config():
-            db = SessionLocal()
-            try:
-                pair = db.query(TradingPair).filter(
-                    TradingPair.symbol == symbol
-                ).first()
-                
-                if pair:
-                    return pair
-                else:
-                    # Возвращаем дефолтную конфигурацию (не сохраняем в БД здесь)
-                    logger.debug(f"🔧 Создаем дефолтную конфигурацию для {symbol}")
-                    return TradingPair(
-                        symbol=symbol,
-                        strategy='multi_indicator',
-                        stop_loss_percent=float(getattr(config, 'STOP_LOSS_PERCENT', 2.0)),
-                        take_profit_percent=float(getattr(config, 'TAKE_PROFIT_PERCENT', 4.0)),
-                        is_active=True
-                    )
-            finally:
-                db.close()
+        async def _get_config(db_session: AsyncSession):
+            pair = await db_session.scalar(select(TradingPair).where(
+                TradingPair.symbol == symbol
+            ))
+            
+            if pair:
+                return pair
+            else:
+                # Возвращаем дефолтную конфигурацию (не сохраняем в БД здесь)
+                logger.debug(f"🔧 Создаем дефолтную конфигурацию для {symbol}")
+                return TradingPair(
+                    symbol=symbol,
+                    strategy='multi_indicator',
+                    stop_loss_percent=float(getattr(config, 'STOP_LOSS_PERCENT', 2.0)),
+                    take_profit_percent=float(getattr(config, 'TAKE_PROFIT_PERCENT', 4.0)),
+                    is_active=True
+                )
         
-        result = self._safe_db_operation(f"получение конфигурации {symbol}", _get_config)
+        result = await self._safe_async_db_operation(f"получение конфигурации {symbol}", _get_config)
         
         # Если произошла ошибка, возвращаем минимальную конфигурацию
                 # Если произошла ошибка, возвращаем минимальную конфигурацию
@@ -1396,7 +1770,7 @@ class BotManager:
                 'status': 'unknown'
             }
     
-    def _update_statistics(self):
+    async def _update_statistics(self):
         """
         Обновление внутренней статистики бота
         
@@ -1406,8 +1780,7 @@ class BotManager:
         - Текущую производительность
         - Статистику активности
         """
-        def _stats_operation():
-            db = SessionLocal()
+        async def _stats_operation(db_session: AsyncSession):
             try:
                 # Определяем начало текущего дня в UTC
                 today_start = datetime.utcnow().replace(
@@ -1415,12 +1788,12 @@ class BotManager:
                 )
                 
                 # Считаем сделки за сегодня
-                today_trades_count = db.query(Trade).filter(
-                    Trade.created_at >= today_start
-                ).count()
+                today_trades_count = await db_session.scalar(
+                    select(func.count(Trade.id)).where(Trade.created_at >= today_start)
+                )
                 
                 # Обновляем внутренний счетчик
-                self.trades_today = today_trades_count
+                self.trades_today = today_trades_count or 0
                 
                 logger.debug(f"📊 Обновлена статистика: {self.trades_today} сделок сегодня")
                 return True
@@ -1429,11 +1802,9 @@ class BotManager:
                 logger.warning(f"⚠️ Ошибка обновления статистики: {e}")
                 # Сохраняем текущее значение при ошибке
                 return False
-            finally:
-                db.close()
         
         # Выполняем обновление через безопасный метод
-        self._safe_db_operation("обновление внутренней статистики", _stats_operation)
+        await self._safe_async_db_operation("обновление внутренней статистики", _stats_operation)
     
     async def _close_all_positions(self, reason: str):
         """
@@ -1454,13 +1825,21 @@ class BotManager:
         # Создаем копию словаря для безопасной итерации
         positions_to_close = list(self.positions.items())
         
+        # Один снимок цен на все позиции
+        try:
+            prices = await self._get_current_prices([symbol for symbol, _ in positions_to_close])
+        except Exception as prices_error:
+            logger.error(f"❌ Не удалось получить цены позиций: {prices_error}")
+            prices = {}
+        
         for symbol, trade in positions_to_close:
             try:
                 logger.info(f"🔄 Закрываем позицию {symbol}...")
                 
-                # Получаем текущую цену
-                ticker = await self.exchange.fetch_ticker(symbol)
-                current_price = ticker['last']
+                # Текущая цена из снимка, при отсутствии - отдельный запрос
+                current_price = prices.get(symbol)
+                if current_price is None:
+                    current_price = await self._get_current_price(symbol)
                 
                 # Закрываем позицию
                 await self._close_position(trade, current_price, reason)
@@ -1540,6 +1919,19 @@ class BotManager:
             # Информация о процессе
             status_info['process_info'] = self._process_info.copy()
             
+            # Поток рыночных данных
+            status_info['market_data'] = self.market_stream.get_statistics()
+            status_info['market_data']['hub'] = self.analyzer.hub.get_statistics()
+            status_info['rate_limiter'] = self.exchange.rate_limiter.get_statistics()
+            status_info['exit_monitor'] = self.exit_monitor.get_statistics()
+            status_info['candle_scheduler'] = self.candle_scheduler.get_statistics()
+            status_info['analysis'] = self.last_analysis_stats
+            status_info['indicator_cache'] = indicator_contexts.get_statistics()
+            status_info['strategy_pool'] = self.strategy_pool.get_statistics()
+            status_info['strategy_ensemble'] = self.strategy_ensemble.get_statistics()
+            status_info['strategy_performance'] = strategy_performance.get_statistics()
+            status_info['persistence'] = self.persistence.get_statistics()
+            
             # Конфигурация
             status_info['config'] = {
                 'mode': 'TESTNET' if getattr(config, 'BYBIT_TESTNET', True) else 'MAINNET',
@@ -1647,6 +2039,11 @@ class BotManager:
                 # Обновляем внутренний список активных пар
                 self.active_pairs = valid_pairs
                 
+                # Переподписываем поток рыночных данных
+                if self.market_stream.is_running:
+                    await self.market_stream.set_symbols(valid_pairs)
+                self.candle_scheduler.set_symbols(valid_pairs)
+                
                 success_message = (
                     f"Торговые пары обновлены: {result['total']} активных, "
                     f"{result['updated']} обновлено, {result['created']} создано"
@@ -1693,7 +2090,7 @@ class BotManager:
             current_price = ticker['last']
             
             # Закрываем позицию
-            await self._close_position(trade, current_price, "Manual close via API")
+            await self._close_position(trade, current_price, "Manual close via API", confirm=True)
             
             # Удаляем из активных позиций
             del self.positions[symbol]
@@ -6,11 +6,12 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 import numpy as np
+from sqlalchemy import insert
 
 # Импорты из вашего проекта
-from ..core.models import Trade, Signal, Order
-from ..core.database import SessionLocal
+from ..core.models import Trade, Signal, Order, OrderSide, TradeStatus
 from ..core.config import config
+from ..core.persistence import orm_values, persistence
 from ..exchange.client import ExchangeClient
 
 # ML модули
@@ -68,7 +69,8 @@ class Trader:
                 symbol=signal.symbol,
                 side=signal.action,
                 amount=amount,
-                order_type='market'
+                order_type='market',
+                params=self._exchange_sltp_params(signal, current_price)
             )
             
             if not order:
@@ -79,7 +81,8 @@ class Trader:
             trade = Trade(
                 symbol=signal.symbol,
                 side=OrderSide[signal.action],
-                entry_price=order.get('price', current_price),
+                # У рыночного ордера ccxt price=None, цена исполнения - average
+                entry_price=order.get('average') or order.get('price') or current_price,
                 quantity=amount,
                 status=TradeStatus.OPEN,
                 strategy=signal.strategy,
@@ -88,14 +91,18 @@ class Trader:
                 created_at=datetime.utcnow()
             )
             
-            # Сохраняем в БД
-            db = SessionLocal()
+            # Сохраняем в БД через очередь записи и ждем подтверждения:
+            # ID сделки нужен для последующих обновлений
+            def _insert_trade(session):
+                values = {key: value for key, value in orm_values(trade).items() if value is not None}
+                trade.id = session.execute(insert(Trade).values(**values)).inserted_primary_key[0]
+            
             try:
-                db.add(trade)
-                db.commit()
-                db.refresh(trade)
-            finally:
-                db.close()
+                await persistence.call(('trade_insert', id(trade)), _insert_trade, wait=True)
+            except Exception as db_error:
+                # Ордер уже исполнен - позицию ведем, запись повторит merge при обновлении
+                trade.id = None
+                logger.error(f"❌ Открытая сделка {trade.symbol} не записана в БД: {db_error}")
             
             logger.info(f"✅ Открыта позиция: {trade.side.value} {trade.quantity} {trade.symbol} @ {trade.entry_price}")
             
@@ -105,9 +112,43 @@ class Trader:
             logger.error(f"❌ Ошибка исполнения сигнала: {e}")
             return None
     
+    def _exchange_sltp_params(self, signal: Signal, current_price: float) -> Dict[str, Any]:
+        """
+        SL/TP на стороне биржи - страховка на случай остановки бота
+        
+        Уровень не с той стороны цены биржа отклонит вместе с ордером,
+        поэтому такие уровни не передаются (позицию все равно закроет ExitMonitor).
+        """
+        params = {}
+        if not getattr(config, 'EXCHANGE_SIDE_SLTP', False):
+            return params
+        
+        is_buy = signal.action == 'BUY'
+        if signal.stop_loss and (signal.stop_loss < current_price) == is_buy:
+            params['stopLoss'] = {'triggerPrice': signal.stop_loss}
+        elif signal.stop_loss:
+            logger.warning(f"⚠️ Стоп-лосс {signal.stop_loss} {signal.symbol} не с той стороны цены {current_price}, на бирже не ставим")
+        
+        if signal.take_profit and (signal.take_profit > current_price) == is_buy:
+            params['takeProfit'] = {'triggerPrice': signal.take_profit}
+        elif signal.take_profit:
+            logger.warning(f"⚠️ Тейк-профит {signal.take_profit} {signal.symbol} не с той стороны цены {current_price}, на бирже не ставим")
+        
+        return params
+    
     async def close_position(self, trade: Trade, current_price: float) -> bool:
-        """Закрытие позиции"""
+        """
+        Закрытие позиции
+        
+        Закрывающий ордер только уменьшает позицию (reduceOnly): если биржа
+        уже закрыла ее по своим SL/TP, встречный ордер не откроет обратную.
+        """
         try:
+            # SL/TP на бирже могли сработать раньше ExitMonitor
+            if getattr(config, 'EXCHANGE_SIDE_SLTP', False) and not await self._exchange_position_open(trade):
+                logger.info(f"✅ Позиция {trade.symbol} уже закрыта биржей по SL/TP")
+                return True
+            
             # Определяем направление закрывающего ордера
             close_side = 'SELL' if trade.side == OrderSide.BUY else 'BUY'
             
@@ -116,7 +157,9 @@ class Trader:
                 symbol=trade.symbol,
                 side=close_side,
                 amount=trade.quantity,
-                order_type='market'
+                order_type='market',
+                action_type='close_position',
+                params={'reduceOnly': True}
             )
             
             if not order:
@@ -129,4 +172,23 @@ class Trader:
             
         except Exception as e:
             logger.error(f"❌ Ошибка закрытия позиции: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def _exchange_position_open(self, trade: Trade) -> bool:
+        """
+        Есть ли еще позиция по сделке на бирже
+        
+        При ошибке запроса считаем позицию открытой: reduceOnly все равно
+        не даст закрывающему ордеру открыть обратную позицию.
+        """
+        try:
+            positions = await self.exchange.fetch_positions([trade.symbol])
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось проверить позицию {trade.symbol} на бирже: {e}")
+            return True
+        
+        side = 'long' if trade.side == OrderSide.BUY else 'short'
+        return any(
+            float(position.get('contracts') or 0) > 0 and position.get('side') in (side, None)
+            for position in positions or []
+        )
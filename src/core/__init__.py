@@ -39,7 +39,10 @@ from .database import (
     SessionLocal,
     get_db,
     get_session,
-    transaction
+    transaction,
+    AsyncSessionLocal,
+    get_async_db,
+    get_async_session
 )
 
 # Импортируем конфигурацию
@@ -90,6 +93,9 @@ __all__ = [
     'get_db',
     'get_session',
     'transaction',
+    'AsyncSessionLocal',
+    'get_async_db',
+    'get_async_session',
     # Config
     'config',
     'settings'
@@ -64,6 +64,8 @@ class Config:
     MIN_DELAY_SECONDS = float(os.getenv('MIN_DELAY_SECONDS', '0.5'))
     MAX_DELAY_SECONDS = float(os.getenv('MAX_DELAY_SECONDS', '3.0'))
     RANDOM_DELAY_ENABLED = os.getenv('RANDOM_DELAY_ENABLED', 'true').lower() == 'true'
+    # Паузы перед действиями с ордерами, JSON: {"create_order": {"delay": [1, 4], "cooldown": [2, 5]}}
+    HUMAN_ACTION_PACING = os.getenv('HUMAN_ACTION_PACING', '')
     
     # Торговые параметры
     TRADING_SYMBOL = os.getenv('TRADING_SYMBOL', 'BTCUSDT')
@@ -142,6 +144,44 @@ class Config:
     BOLLINGER_PERIOD = int(os.getenv('BOLLINGER_PERIOD', '20'))
     BOLLINGER_DEVIATION = int(os.getenv('BOLLINGER_DEVIATION', '2'))
     
+    # Поток рыночных данных (WebSocket)
+    ENABLE_WS_MARKET_DATA = os.getenv('ENABLE_WS_MARKET_DATA', 'true').lower() == 'true'
+    BYBIT_WS_PUBLIC_URL = os.getenv('BYBIT_WS_PUBLIC_URL', '')
+    WS_CANDLE_BUFFER_SIZE = int(os.getenv('WS_CANDLE_BUFFER_SIZE', '500'))
+    WS_STALE_AFTER_SECONDS = float(os.getenv('WS_STALE_AFTER_SECONDS', '30'))
+    
+    # Параллельный анализ пар
+    MAX_CONCURRENT_PAIRS = int(os.getenv('MAX_CONCURRENT_PAIRS', '4'))
+    PAIR_ANALYSIS_TIMEOUT = float(os.getenv('PAIR_ANALYSIS_TIMEOUT', '30'))
+    CPU_WORKERS = int(os.getenv('CPU_WORKERS', '4'))
+    
+    # Монитор защитных выходов (SL/TP) независимо от пауз торгового цикла
+    ENABLE_EXIT_MONITOR = os.getenv('ENABLE_EXIT_MONITOR', 'true').lower() == 'true'
+    EXIT_MONITOR_INTERVAL = float(os.getenv('EXIT_MONITOR_INTERVAL', '0.5'))
+    EXCHANGE_SIDE_SLTP = os.getenv('EXCHANGE_SIDE_SLTP', 'false').lower() == 'true'
+    
+    # Открытие позиций по сильным сигналам торгового цикла (реальные ордера)
+    ENABLE_SIGNAL_ENTRY = os.getenv('ENABLE_SIGNAL_ENTRY', 'false').lower() == 'true'
+    
+    # Запуск анализа по закрытию свечей вместо фиксированных пауз цикла
+    ENABLE_CANDLE_SCHEDULER = os.getenv('ENABLE_CANDLE_SCHEDULER', 'true').lower() == 'true'
+    
+    # Все стратегии оцениваются на каждом баре, селектор выбирает среди их сигналов
+    ENABLE_STRATEGY_ENSEMBLE = os.getenv('ENABLE_STRATEGY_ENSEMBLE', 'false').lower() == 'true'
+    
+    # Старшие таймфреймы собираются из свечей базового, а не запрашиваются отдельно
+    RESAMPLE_BASE_TIMEFRAME = os.getenv('RESAMPLE_BASE_TIMEFRAME', '5m')
+    RESAMPLED_TIMEFRAMES = [tf for tf in os.getenv('RESAMPLED_TIMEFRAMES', '15m,1h,4h').split(',') if tf]
+    
+    # Общий хаб рыночных данных
+    MARKET_HUB_MEMORY_MB = float(os.getenv('MARKET_HUB_MEMORY_MB', '64'))
+    MARKET_HUB_QUOTE_TTL = float(os.getenv('MARKET_HUB_QUOTE_TTL', '1.0'))
+    
+    # Отложенная запись в БД (сигналы, сделки, балансы) вне торгового цикла
+    PERSISTENCE_QUEUE_SIZE = int(os.getenv('PERSISTENCE_QUEUE_SIZE', '10000'))
+    PERSISTENCE_FLUSH_INTERVAL = float(os.getenv('PERSISTENCE_FLUSH_INTERVAL', '0.5'))
+    PERSISTENCE_BATCH_SIZE = int(os.getenv('PERSISTENCE_BATCH_SIZE', '500'))
+    
     # Redis (опционально)
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
@@ -2,8 +2,10 @@
 Database module с поддержкой SessionLocal для обратной совместимости
 """
 import os
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
@@ -18,6 +20,27 @@ for env_path in ['/etc/crypto/config/.env', '.env']:
 
 logger = logging.getLogger(__name__)
 
+# Асинхронные драйверы вместо синхронных (тот же диалект)
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql+mysqldb': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """URL для асинхронного engine: pymysql -> aiomysql, sqlite -> aiosqlite"""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername:
+        url = url.set(drivername=drivername)
+    return url.render_as_string(hide_password=False)
+
+
 class Database:
     """Singleton класс для работы с базой данных"""
     
@@ -25,6 +48,8 @@ class Database:
     _engine = None
     _metadata = None
     _SessionLocal = None
+    _async_engine = None
+    _AsyncSessionLocal = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -70,8 +95,45 @@ class Database:
             # Scoped session
             self.Session = scoped_session(self._SessionLocal)
             
+            # Асинхронный engine для API и торгового цикла
+            self._init_async_engine()
+            
             logger.info("✅ Database инициализирована")
     
+    def _init_async_engine(self):
+        """
+        Асинхронный engine и фабрика сессий
+        
+        Синхронный engine остается для скриптов и фоновых потоков.
+        Запросы через асинхронный engine не занимают поток event loop
+        на время ожидания ответа БД.
+        """
+        self.async_database_url = to_async_url(os.getenv('ASYNC_DATABASE_URL') or self.database_url)
+        
+        engine_kwargs = {'pool_pre_ping': True, 'echo': False}
+        if not make_url(self.async_database_url).drivername.startswith('sqlite'):
+            # Пул: соединения API и торгового цикла + запас на всплески
+            engine_kwargs.update(
+                pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+                max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20')),
+                pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', '30')),
+                pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '3600'))  # До wait_timeout MySQL
+            )
+        
+        try:
+            self._async_engine = create_async_engine(self.async_database_url, **engine_kwargs)
+            self._AsyncSessionLocal = async_sessionmaker(
+                bind=self._async_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        except Exception as e:
+            # Нет асинхронного драйвера (aiomysql/aiosqlite)
+            logger.error(f"❌ Асинхронный engine не создан: {e}")
+            self._async_engine = None
+            self._AsyncSessionLocal = None
+    
     @property
     def engine(self):
         """Получить engine"""
@@ -82,6 +144,17 @@ class Database:
         """Получить metadata"""
         return self._metadata
     
+    @property
+    def async_engine(self):
+        """Получить асинхронный engine"""
+        return self._async_engine
+    
+    def create_async_session(self) -> AsyncSession:
+        """Создать новую асинхронную сессию"""
+        if self._AsyncSessionLocal is None:
+            raise RuntimeError("Асинхронный engine не инициализирован: установите aiomysql/aiosqlite")
+        return self._AsyncSessionLocal()
+    
     @contextmanager
     def get_session(self):
         """Контекстный менеджер для сессии"""
@@ -96,6 +169,20 @@ class Database:
         finally:
             session.close()
     
+    @asynccontextmanager
+    async def get_async_session(self):
+        """Асинхронный контекстный менеджер для сессии (commit при выходе)"""
+        session = self.create_async_session()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Ошибка в сессии БД: {e}")
+            raise
+        finally:
+            await session.close()
+    
     def create_session(self):
         """Создать новую сессию"""
         return self.Session()
@@ -105,6 +192,11 @@ class Database:
         self.Session.remove()
         if self._engine:
             self._engine.dispose()
+    
+    async def close_async(self):
+        """Закрыть соединения асинхронного engine"""
+        if self._async_engine:
+            await self._async_engine.dispose()
 
 # Создаем глобальный экземпляр
 db = Database()
@@ -115,6 +207,9 @@ metadata = db.metadata
 get_session = db.get_session
 create_session = db.create_session
 SessionLocal = db._SessionLocal  # ВАЖНО: экспортируем SessionLocal!
+async_engine = db.async_engine
+AsyncSessionLocal = db._AsyncSessionLocal
+get_async_session = db.get_async_session
 
 # Дополнительные функции для совместимости
 def get_db():
@@ -124,6 +219,14 @@ def get_db():
         yield session
     finally:
         session.close()
+
+async def get_async_db():
+    """Генератор асинхронных сессий для FastAPI"""
+    session = db.create_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
         
 # Декоратор для транзакций
 def transaction(func):
@@ -149,5 +252,10 @@ __all__ = [
     'get_session',
     'create_session',
     'SessionLocal',  # Добавляем в экспорт
-    'get_db'
+    'get_db',
+    'async_engine',
+    'AsyncSessionLocal',
+    'get_async_session',
+    'get_async_db',
+    'to_async_url'
 ]
@@ -0,0 +1,378 @@
+"""
+Отложенная запись в БД (write-behind)
+Путь: src/core/persistence.py
+
+BotManager сохранял сигналы, сделки, балансы и состояние бота через
+синхронную SessionLocal() с commit прямо в торговом цикле: каждый commit
+блокировал event loop на время запроса к MySQL, и всплеск задержки БД
+задерживал выставление ордеров.
+
+PersistenceService принимает записи в ограниченную asyncio-очередь и
+сразу возвращает управление. Фоновая задача собирает записи за окно
+сброса (flush window), склеивает обновления одной строки (остается
+последнее значение каждого поля) и пишет пачку одной транзакцией в
+отдельном потоке: вставки и обновления по первичному ключу - через
+executemany. Если запись важна (сделка), вызывающий может дождаться
+подтверждения: wait=True возвращает Future, и такая запись сбрасывается
+без ожидания окна.
+
+Использование:
+    await persistence.start()
+    persistence.insert(Balance, {'currency': 'USDT', ...})
+    persistence.update(Trade, trade.id, orm_values(trade))
+    await persistence.update(Trade, trade.id, orm_values(trade), wait=True)
+    persistence.call('bot_state', lambda session: ...)
+    await persistence.stop()                  # сбрасывает очередь
+"""
+import asyncio
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect as sa_inspect, insert, update
+
+from .config import config
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def orm_values(instance: Any) -> Dict[str, Any]:
+    """Значения колонок ORM-объекта (для update вместо session.merge)"""
+    return {attr.key: getattr(instance, attr.key) for attr in sa_inspect(type(instance)).column_attrs}
+
+
+def _primary_key(model: type) -> str:
+    mapper = sa_inspect(model)
+    return mapper.get_property_by_column(mapper.primary_key[0]).key
+
+
+@dataclass
+class WriteOp:
+    """Запись в очереди"""
+    kind: str                                   # 'insert', 'update', 'call'
+    model: Optional[type] = None
+    key: Hashable = None                        # Первичный ключ (update) или ключ склейки (call)
+    values: Dict[str, Any] = field(default_factory=dict)
+    func: Optional[Callable] = None             # call: func(session)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    error: Optional[Exception] = None           # Ошибка записи (для подтверждения)
+
+
+class WriteBatch:
+    """Записи одного сброса: обновления одной строки склеиваются"""
+
+    def __init__(self):
+        self.ops: Dict[Tuple, WriteOp] = {}
+        self.received = 0                       # Записей из очереди (для task_done)
+        self.coalesced = 0
+        self.urgent = False
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.ops)
+
+    def add(self, op: WriteOp):
+        self.received += 1
+        self.urgent = self.urgent or bool(op.futures)
+
+        if op.kind == 'insert':
+            self.ops[('insert', next(self._sequence))] = op
+            return
+
+        key = (op.kind, op.model, op.key)
+        current = self.ops.get(key)
+        if current is None:
+            self.ops[key] = op
+            return
+
+        # Та же строка за окно сброса - пишем только последнее состояние
+        current.values.update(op.values)
+        current.func = op.func or current.func
+        current.futures.extend(op.futures)
+        self.coalesced += 1
+
+
+class PersistenceService:
+    """Очередь записей в БД с фоновой пакетной записью в отдельном потоке"""
+
+    def __init__(self, session_factory: Callable = SessionLocal,
+                 max_queue: int = None, flush_interval: float = None, batch_size: int = None):
+        """
+        Args:
+            session_factory: Фабрика синхронных сессий
+            max_queue: Максимум записей в очереди
+            flush_interval: Окно сброса в секундах
+            batch_size: Максимум строк в одной транзакции
+        """
+        self.session_factory = session_factory
+        self.max_queue = max_queue or getattr(config, 'PERSISTENCE_QUEUE_SIZE', 10000)
+        self.flush_interval = flush_interval or getattr(config, 'PERSISTENCE_FLUSH_INTERVAL', 0.5)
+        self.batch_size = batch_size or getattr(config, 'PERSISTENCE_BATCH_SIZE', 500)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[asyncio.Future] = set()      # Отложенные постановки и прямые записи
+
+        # Статистика
+        self.enqueued = 0
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._writer_task is not None and not self._writer_task.done()
+
+    # =========================================================================
+    # === ЗАПУСК И ОСТАНОВКА ===
+    # =========================================================================
+
+    async def start(self):
+        """Запуск фоновой записи"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._writer_task = asyncio.create_task(self._writer_worker())
+        logger.info(f"💾 Отложенная запись в БД запущена (окно {self.flush_interval:.2f} с)")
+
+    async def stop(self, timeout: float = 30.0):
+        """Сброс всех записей из очереди и остановка"""
+        if not self.is_running:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Не все записи сброшены в БД за {timeout:.0f} с: "
+                         f"в очереди {self._queue.qsize()}")
+
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        logger.info(f"💾 Отложенная запись в БД остановлена: записано {self.written}")
+
+    async def flush(self):
+        """Дождаться записи всего, что уже поставлено в очередь"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self.is_running:
+            await self._queue.join()
+
+    # =========================================================================
+    # === ПОСТАНОВКА ЗАПИСЕЙ ===
+    # =========================================================================
+
+    def insert(self, model: type, values: Dict[str, Any], wait: bool = False) -> Optional[asyncio.Future]:
+        """Новая строка (вставляется пачкой через executemany)"""
+        return self._submit(WriteOp('insert', model, values=dict(values)), wait)
+
+    def update(self, model: type, key: Any, values: Dict[str, Any], wait: bool = False) -> Optional[asyncio.Future]:
+        """Обновление строки по первичному ключу; обновления одной строки за окно склеиваются"""
+        return self._submit(WriteOp('update', model, key, values=dict(values)), wait)
+
+    def call(self, key: Hashable, func: Callable, wait: bool = False) -> Optional[asyncio.Future]:
+        """
+        Запись с логикой ORM: func(session) в потоке записи
+
+        Из нескольких вызовов с одним ключом за окно выполняется последний.
+        """
+        return self._submit(WriteOp('call', key=key, func=func), wait)
+
+    def _submit(self, op: WriteOp, wait: bool) -> Optional[asyncio.Future]:
+        """
+        Постановка записи в очередь без ожидания БД
+
+        Returns:
+            Future подтверждения записи, если wait=True
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Синхронный скрипт без event loop - блокировать нечего, пишем сразу
+            self._write_batch([op])
+            return None
+
+        future = loop.create_future() if wait else None
+        if future is not None:
+            op.futures.append(future)
+
+        if not self.is_running:
+            # Сервис не запущен (API без бота) - пишем сразу, но в потоке, а не в event loop
+            write = loop.run_in_executor(None, self._write_batch, [op])
+            self._track(write, lambda _: self._resolve_all(op))
+            return future
+
+        try:
+            self._queue.put_nowait(op)
+        except asyncio.QueueFull:
+            if not wait:
+                # Торговый цикл не ждет БД: второстепенная запись теряется
+                self.dropped += 1
+                logger.warning(f"⚠️ Очередь записи в БД переполнена, запись пропущена ({self.dropped})")
+                return None
+            # Для важных записей ждет только тот, кто ждет подтверждения
+            self._track(asyncio.create_task(self._queue.put(op)))
+
+        self.enqueued += 1
+        return future
+
+    def _track(self, pending: asyncio.Future, callback: Optional[Callable] = None):
+        """Ссылка на задачу до ее завершения, иначе ее может собрать GC"""
+        self._pending.add(pending)
+        pending.add_done_callback(self._pending.discard)
+        if callback is not None:
+            pending.add_done_callback(callback)
+
+    def _resolve_all(self, op: WriteOp):
+        for future in op.futures:
+            self._resolve(future, op)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, op: WriteOp):
+        if future.done():
+            return
+        if op.error is not None:
+            future.set_exception(op.error)
+        else:
+            future.set_result(True)
+
+    # =========================================================================
+    # === ФОНОВАЯ ЗАПИСЬ ===
+    # =========================================================================
+
+    async def _writer_worker(self):
+        """Сбор записей за окно сброса и запись пачкой"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = WriteBatch()
+            batch.add(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+
+            try:
+                # Важную запись сбрасываем сразу, остальные ждут окно
+                while len(batch) < self.batch_size and not batch.urgent:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.add(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # Все, что уже лежит в очереди, - в ту же пачку
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.add(self._queue.get_nowait())
+
+                await self._flush_batch(loop, batch)
+            finally:
+                for _ in range(batch.received):
+                    self._queue.task_done()
+
+    async def _flush_batch(self, loop: asyncio.AbstractEventLoop, batch: WriteBatch):
+        started = loop.time()
+        ops = list(batch.ops.values())
+        try:
+            await loop.run_in_executor(self._executor, self._write_batch, ops)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка пакетной записи в БД: {e}")
+
+        self.flushes += 1
+        self.coalesced += batch.coalesced
+        self.last_flush_ms = (loop.time() - started) * 1000
+
+        for op in ops:
+            self._resolve_all(op)
+
+    def _write_batch(self, ops: List[WriteOp]):
+        """
+        Запись пачки одной транзакцией (выполняется в потоке записи)
+
+        Если транзакция не прошла, записи повторяются по одной: ошибочная
+        строка не должна терять остальные.
+        """
+        try:
+            self._write(ops)
+            self.written += len(ops)
+            return
+        except Exception as e:
+            if len(ops) == 1:
+                ops[0].error = e
+                self.failed += 1
+                logger.error(f"❌ Ошибка записи в БД: {e}")
+                return
+            logger.warning(f"⚠️ Пачка из {len(ops)} записей не записана ({e}), пишем по одной")
+
+        for op in ops:
+            try:
+                self._write([op])
+                self.written += 1
+            except Exception as e:
+                op.error = e
+                self.failed += 1
+                logger.error(f"❌ Ошибка записи в БД ({op.kind} {op.model or op.key}): {e}")
+
+    def _write(self, ops: List[WriteOp]):
+        """Вставки, затем обновления (executemany по группам), затем call"""
+        inserts: Dict[Tuple, List[Dict]] = {}
+        updates: Dict[Tuple, List[Dict]] = {}
+        calls: List[WriteOp] = []
+
+        for op in ops:
+            if op.kind == 'insert':
+                inserts.setdefault((op.model, tuple(sorted(op.values))), []).append(op.values)
+            elif op.kind == 'update':
+                row = dict(op.values)
+                row[_primary_key(op.model)] = op.key
+                updates.setdefault((op.model, tuple(sorted(row))), []).append(row)
+            else:
+                calls.append(op)
+
+        session = self.session_factory()
+        try:
+            for (model, _), rows in inserts.items():
+                session.execute(insert(model), rows)
+            for (model, _), rows in updates.items():
+                session.execute(update(model), rows)
+            for op in calls:
+                op.func(session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_statistics(self) -> Dict:
+        return {
+            'running': self.is_running,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'last_flush_ms': round(self.last_flush_ms, 2)
+        }
+
+
+# Глобальный сервис записи
+persistence = PersistenceService()
+
+# Экспорт
+__all__ = ['PersistenceService', 'WriteOp', 'orm_values', 'persistence']
@@ -2,5 +2,12 @@
 Модуль работы с биржами
 """
 from .client import ExchangeClient
+from .market_store import MarketDataStore, market_store
+from .market_stream import BybitMarketStream
+from .market_hub import MarketDataHub, market_hub
+from .rate_limiter import PriorityRateLimiter, RequestLane
 
-__all__ = ['ExchangeClient']
+__all__ = [
+    'ExchangeClient', 'MarketDataStore', 'market_store', 'BybitMarketStream',
+    'MarketDataHub', 'market_hub', 'PriorityRateLimiter', 'RequestLane'
+]
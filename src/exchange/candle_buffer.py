@@ -0,0 +1,263 @@
+"""
+Буфер свечей на numpy и инкрементальная синхронизация OHLCV
+Путь: src/exchange/candle_buffer.py
+
+CandleBuffer держит свечи одной пары (символ, таймфрейм) в заранее
+выделенных массивах. Формирующийся бар заменяется на месте, новые
+дописываются в конец, а DataFrame отдается как представление (view)
+без копирования данных.
+
+OHLCVSynchronizer догружает по REST только свечи новее последней
+сохраненной (параметр since в ccxt), а не все 200 штук каждый цикл.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Колонки значений (время хранится отдельно, как индекс)
+CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+NS_PER_MS = 1_000_000
+
+# Длительность таймфреймов ccxt в миллисекундах
+TIMEFRAME_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '12h': 43_200_000, '1d': 86_400_000, '1w': 604_800_000
+}
+
+
+class CandleBuffer:
+    """
+    Кольцевой буфер свечей на непрерывном numpy массиве
+
+    Под капотом массив вдвое больше capacity: свечи дописываются в конец,
+    а когда место заканчивается, последние capacity свечей переносятся
+    в новый массив. Поэтому данные всегда лежат одним куском и срез
+    отдается без копирования, а ранее выданные представления не портятся
+    при переносе.
+
+    Важно: представление "живое" для последнего бара - обновление
+    формирующейся свечи видно через уже выданный DataFrame. Если нужен
+    неизменяемый снимок, вызывайте .copy().
+    """
+
+    def __init__(self, capacity: int = 500):
+        """
+        Args:
+            capacity: Сколько последних свечей хранить
+        """
+        self.capacity = capacity
+        self._allocate()
+
+    def _allocate(self):
+        """Выделение пустых массивов"""
+        self._index = np.empty(self.capacity * 2, dtype='datetime64[ns]')
+        self._values = np.empty((self.capacity * 2, len(CANDLE_COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return min(self._end - self._start, self.capacity)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Время открытия последней свечи в мс (None - буфер пуст)"""
+        if self._end == self._start:
+            return None
+        return int(self._index[self._end - 1].astype(np.int64)) // NS_PER_MS
+
+    @property
+    def previous_timestamp(self) -> Optional[int]:
+        """Время открытия предпоследней (последней закрытой) свечи в мс"""
+        if len(self) < 2:
+            return None
+        return int(self._index[self._end - 2].astype(np.int64)) // NS_PER_MS
+
+    # =========================================================================
+    # === ЗАПИСЬ ===
+    # =========================================================================
+
+    def update(self, candle: List[float]) -> bool:
+        """
+        Обновление одной свечи [timestamp_ms, open, high, low, close, volume]
+
+        Свеча с тем же временем, что последняя, заменяет ее на месте,
+        более новая дописывается, более старая игнорируется.
+
+        Returns:
+            bool: Была ли свеча записана
+        """
+        timestamp = int(candle[0])
+        last = self.last_timestamp
+
+        if last is not None and timestamp < last:
+            return False
+
+        if last is None or timestamp > last:
+            if self._end == len(self._index):
+                self._compact()
+            self._end += 1
+
+        position = self._end - 1
+        self._index[position] = np.datetime64(timestamp * NS_PER_MS, 'ns')
+        self._values[position] = candle[1:6]
+        return True
+
+    def merge(self, candles: List[List[float]]):
+        """
+        Слияние пачки свечей (догрузка по REST)
+
+        Частый случай - все свечи не старше последней - идет через update.
+        Если пачка перекрывает историю глубже, буфер пересобирается,
+        при совпадении времени побеждает свеча из пачки.
+        """
+        if not candles:
+            return
+
+        last = self.last_timestamp
+        if last is None or int(candles[0][0]) >= last:
+            for candle in candles:
+                self.update(candle)
+            return
+
+        merged = {candle[0]: candle for candle in self.to_list()}
+        for candle in candles:
+            merged[int(candle[0])] = list(candle)
+
+        ordered = [merged[ts] for ts in sorted(merged)][-self.capacity:]
+        self._allocate()
+        count = len(ordered)
+        data = np.asarray(ordered, dtype=np.float64)
+        self._index[:count] = (data[:, 0].astype(np.int64) * NS_PER_MS).astype('datetime64[ns]')
+        self._values[:count] = data[:, 1:6]
+        self._end = count
+
+    def _compact(self):
+        """Перенос последних capacity свечей в начало нового массива"""
+        keep_from = max(self._end - self.capacity + 1, self._start)
+        count = self._end - keep_from
+
+        index = np.empty_like(self._index)
+        values = np.empty_like(self._values)
+        index[:count] = self._index[keep_from:self._end]
+        values[:count] = self._values[keep_from:self._end]
+
+        self._index, self._values = index, values
+        self._start, self._end = 0, count
+
+    def clear(self):
+        """Очистка буфера"""
+        self._allocate()
+
+    # =========================================================================
+    # === ЧТЕНИЕ ===
+    # =========================================================================
+
+    def _window(self, limit: Optional[int]) -> Tuple[int, int]:
+        """Границы последних limit свечей"""
+        count = min(limit, self.capacity) if limit else self.capacity
+        return max(self._end - count, self._start), self._end
+
+    def dataframe(self, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Свечи как DataFrame с индексом по времени - без копирования
+
+        Колонки open/high/low/close/volume ссылаются на память буфера.
+        """
+        start, end = self._window(limit)
+        if start == end:
+            return None
+
+        index = pd.DatetimeIndex(self._index[start:end], name='timestamp')
+        return pd.DataFrame(self._values[start:end], index=index, columns=CANDLE_COLUMNS, copy=False)
+
+    def to_list(self, limit: Optional[int] = None) -> List[List[float]]:
+        """Свечи в формате ccxt (копия)"""
+        start, end = self._window(limit)
+        timestamps = self._index[start:end].astype(np.int64) // NS_PER_MS
+        return [
+            [int(ts)] + row
+            for ts, row in zip(timestamps.tolist(), self._values[start:end].tolist())
+        ]
+
+
+class OHLCVSynchronizer:
+    """
+    Инкрементальная синхронизация свечей по REST
+
+    Первая загрузка берет limit свечей, дальше запрашиваются только
+    свечи начиная с последней сохраненной (она могла еще формироваться
+    и должна быть перезаписана).
+    """
+
+    def __init__(self, store, exchange):
+        """
+        Args:
+            store: MarketDataStore, в буферы которого пишутся свечи
+            exchange: ExchangeClient
+        """
+        self.store = store
+        self.exchange = exchange
+
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+        # Статистика
+        self.full_loads = 0
+        self.incremental_loads = 0
+        self.candles_fetched = 0
+
+    async def sync(self, symbol: str, timeframe: str, limit: int = 200) -> Optional[pd.DataFrame]:
+        """
+        Догрузка новых свечей и DataFrame последних limit свечей
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            limit: Сколько свечей нужно потребителю
+
+        Returns:
+            DataFrame (представление буфера) или None, если данных нет
+        """
+        key = (symbol, timeframe)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            last_timestamp = self.store.last_candle_timestamp(symbol, timeframe)
+            count = self.store.candles_count(symbol, timeframe)
+
+            if last_timestamp is None or count < limit:
+                ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit)
+                self.full_loads += 1
+            else:
+                # Сколько баров могло появиться с последней свечи (+ она сама)
+                period = TIMEFRAME_MS.get(timeframe)
+                since_limit = limit
+                if period:
+                    elapsed = time.time() * 1000 - last_timestamp
+                    since_limit = min(limit, max(int(elapsed // period) + 2, 2))
+
+                ohlcv = await self.exchange.fetch_ohlcv(
+                    symbol, timeframe, since_limit, since=last_timestamp
+                )
+                self.incremental_loads += 1
+
+            if ohlcv:
+                self.candles_fetched += len(ohlcv)
+                self.store.merge_candles(symbol, timeframe, ohlcv)
+
+        return self.store.get_dataframe(symbol, timeframe, limit)
+
+    def get_statistics(self) -> Dict:
+        """Статистика для мониторинга"""
+        return {
+            'full_loads': self.full_loads,
+            'incremental_loads': self.incremental_loads,
+            'candles_fetched': self.candles_fetched
+        }
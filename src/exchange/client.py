@@ -2,7 +2,8 @@
 Единый клиент для работы с биржей Bybit
 Путь: /var/www/www-root/data/www/systemetech.ru/src/exchange/client.py
 """
-import ccxt
+import ccxt.async_support as ccxt
+import aiohttp
 import asyncio
 import sys
 import random
@@ -11,7 +12,9 @@ from typing import Dict, Any, List, Optional, Tuple, Dict, Optional, List
 from datetime import datetime
 
 from ..core.config import config
-from .humanizer import HumanBehaviorMixin
+from .humanizer import HumanBehaviorMixin, OrderActionScheduler
+from .market_store import normalize_symbol
+from .rate_limiter import PriorityRateLimiter, RequestLane
 
 logger = logging.getLogger(__name__)
 
@@ -19,20 +22,122 @@ class ExchangeClient(HumanBehaviorMixin):
     """
     Единый клиент для работы с Bybit
     Включает имитацию человеческого поведения
+    
+    Человеческие паузы (OrderActionScheduler) применяются только к
+    действиям, изменяющим счет: создание и отмена ордеров. Запросы
+    на чтение выполняются без задержек.
+    
+    Все запросы выполняются через ccxt.async_support и не блокируют
+    event loop. HTTP-соединения берутся из одной aiohttp-сессии,
+    которая открывается в start() и закрывается в close().
+    
+    Частоту запросов ограничивает PriorityRateLimiter (встроенный
+    троттлинг ccxt выключен - он обслуживает запросы строго по очереди).
     """
     
+    # Размер пула соединений aiohttp
+    POOL_SIZE = 50
+    
     def __init__(self):
         """Инициализация клиента"""
-        self.exchange = self._create_exchange()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.exchange = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self.rate_limiter = PriorityRateLimiter()
         self._init_human_behavior()
+        self.action_scheduler = OrderActionScheduler(enabled=self.enable_human_mode)
         logger.info(f"✅ Exchange клиент инициализирован ({'TESTNET' if config.BYBIT_TESTNET else 'MAINNET'})")
     
-    def _create_exchange(self):
+    # =========================================================================
+    # === ЖИЗНЕННЫЙ ЦИКЛ ===
+    # =========================================================================
+    
+    @property
+    def is_started(self) -> bool:
+        """Открыта ли сессия с биржей"""
+        return self.exchange is not None and self.session is not None and not self.session.closed
+    
+    async def start(self):
+        """
+        Открытие пула соединений и загрузка рынков
+        
+        Должен вызываться из работающего event loop (BotManager.start).
+        Повторный вызов безопасен.
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        
+        async with self._start_lock:
+            if self.is_started:
+                return
+            
+            connector = aiohttp.TCPConnector(
+                limit=self.POOL_SIZE,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.exchange = self._create_exchange(self.session)
+            
+            try:
+                await self._request(RequestLane.MARKET_DATA, 'market', self.exchange.load_markets)
+            except Exception as e:
+                # Рынки догрузятся при первом запросе
+                logger.warning(f"⚠️ Не удалось загрузить рынки: {e}")
+            
+            logger.info("🔌 Сессия с биржей открыта")
+    
+    async def close(self):
+        """Закрытие соединений с биржей (вызывается из BotManager.stop)"""
+        exchange, session = self.exchange, self.session
+        self.exchange = None
+        self.session = None
+        
+        await self.rate_limiter.close()
+        
+        try:
+            if exchange is not None:
+                await exchange.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка закрытия exchange: {e}")
+        
+        try:
+            if session is not None and not session.closed:
+                await session.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка закрытия aiohttp сессии: {e}")
+        
+        logger.info("🔌 Сессия с биржей закрыта")
+    
+    async def _ensure_started(self):
+        """Ленивое открытие сессии, если start() еще не вызывался"""
+        if not self.is_started:
+            await self.start()
+    
+    async def _request(self, lane: RequestLane, endpoint: str, method, *args, **kwargs):
+        """
+        Запрос к бирже через приоритетный ограничитель частоты
+        
+        Args:
+            lane: Полоса приоритета
+            endpoint: Группа эндпоинтов для лимитов
+            method: Метод ccxt
+        """
+        await self.rate_limiter.acquire(lane, endpoint)
+        try:
+            return await method(*args, **kwargs)
+        except ccxt.RateLimitExceeded:
+            self.rate_limiter.penalize(endpoint)
+            raise
+    
+    def _create_exchange(self, session: aiohttp.ClientSession):
         """Создание подключения к бирже"""
         exchange_config = {
             'apiKey': config.BYBIT_API_KEY,
             'secret': config.BYBIT_API_SECRET,
-            'enableRateLimit': True,
+            'enableRateLimit': False,  # Лимиты соблюдает PriorityRateLimiter
+            # Общая сессия: ccxt не создает и не закрывает свою
+            'session': session,
             'options': {
                 'defaultType': 'swap',  # Для бессрочных контрактов
                 'testnet': config.BYBIT_TESTNET
@@ -49,8 +154,8 @@ class ExchangeClient(HumanBehaviorMixin):
     async def test_connection(self) -> bool:
         """Тест подключения к бирже"""
         try:
-            await self.human_delay()
-            self.exchange.fetch_time()
+            await self._ensure_started()
+            await self._request(RequestLane.TICKERS, 'market', self.exchange.fetch_time)
             return True
         except Exception as e:
             logger.error(f"❌ Ошибка подключения: {e}")
@@ -58,10 +163,10 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def fetch_balance(self) -> Dict:
         """Получить баланс"""
-        await self.human_delay()
+        await self._ensure_started()
         
         try:
-            balance = self.exchange.fetch_balance()
+            balance = await self._request(RequestLane.ACCOUNT, 'account', self.exchange.fetch_balance)
             
             # Фильтруем только значимые балансы
             filtered_balance = {}
@@ -78,21 +183,64 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def fetch_ticker(self, symbol: str) -> Dict:
         """Получить текущую цену"""
-        await self.micro_delay()  # Короткая задержка для тикера
+        await self._ensure_started()
         
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = await self._request(RequestLane.TICKERS, 'market', self.exchange.fetch_ticker, symbol)
             return ticker
         except Exception as e:
             logger.error(f"❌ Ошибка получения тикера {symbol}: {e}")
             raise
     
-    async def fetch_ohlcv(self, symbol: str, timeframe: str = '5m', limit: int = 100) -> List:
-        """Получить исторические данные"""
-        await self.human_delay()
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Получить тикеры нескольких символов одним запросом
+        
+        Использует bulk эндпоинт Bybit /v5/market/tickers вместо
+        отдельного запроса на каждый символ.
+        
+        Returns:
+            Dict[символ в том виде, как передан, тикер]
+        """
+        await self._ensure_started()
+        
+        if not symbols:
+            return {}
+        
+        try:
+            tickers = await self._request(RequestLane.TICKERS, 'market', self.exchange.fetch_tickers, symbols)
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения тикеров {symbols}: {e}")
+            raise
+        
+        # ccxt возвращает унифицированные символы ('BTC/USDT:USDT')
+        by_id = {normalize_symbol(key): ticker for key, ticker in tickers.items()}
+        return {
+            symbol: by_id[normalize_symbol(symbol)]
+            for symbol in symbols
+            if normalize_symbol(symbol) in by_id
+        }
+    
+    async def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = '5m',
+        limit: int = 100,
+        since: Optional[int] = None
+    ) -> List:
+        """
+        Получить исторические данные
+        
+        Args:
+            since: Время в мс, начиная с которого нужны свечи (None - последние limit)
+        """
+        await self._ensure_started()
         
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = await self._request(
+                RequestLane.MARKET_DATA, 'market', self.exchange.fetch_ohlcv,
+                symbol, timeframe, since=since, limit=limit
+            )
             logger.debug(f"📊 Получено {len(ohlcv)} свечей для {symbol}")
             return ohlcv
         except Exception as e:
@@ -105,47 +253,54 @@ class ExchangeClient(HumanBehaviorMixin):
         side: str,
         amount: float,
         order_type: str = 'market',
-        price: Optional[float] = None
+        price: Optional[float] = None,
+        action_type: str = 'create_order',
+        params: Optional[Dict] = None
     ) -> Optional[Dict]:
-        """Создание ордера с имитацией человека"""
+        """
+        Создание ордера с имитацией человека
+        
+        Args:
+            action_type: Тип действия для пауз ('close_position' - защитный
+                выход: без раздумий, сомнений и искажения количества)
+            params: Дополнительные параметры ccxt (например, stopLoss/takeProfit)
+        """
+        await self._ensure_started()
+        
+        protective = action_type == 'close_position'
         
-        # Имитация раздумий перед ордером
-        await self.think_before_action()
+        # Очередь действий с человеческими паузами
+        await self.action_scheduler.pace(action_type)
         
         # Человеческое округление количества
-        amount = self.humanize_amount(amount)
+        if not protective:
+            amount = self.humanize_amount(amount)
         
         # Иногда "передумываем"
-        if self.should_hesitate():
+        if not protective and self.should_hesitate():
             logger.info(f"😕 Имитация сомнений - отмена ордера {symbol}")
             return None
         
         # Иногда "случайно" делаем ошибку в размере (но не критичную)
-        if config.ENABLE_HUMAN_MODE and random.random() < 0.02:  # 2% шанс
+        if not protective and config.ENABLE_HUMAN_MODE and random.random() < 0.02:  # 2% шанс
             error_factor = random.uniform(0.95, 1.05)  # ±5%
             amount = self.humanize_amount(amount * error_factor)
             logger.info(f"🤏 Имитация небольшой ошибки в размере: {amount}")
         
         try:
-            # Добавляем случайные микро-задержки
-            await self.micro_delay()
-            
             # Создаем ордер
-            order = self.exchange.create_order(
+            order = await self._request(
+                RequestLane.ORDERS, 'order', self.exchange.create_order,
                 symbol=symbol,
                 type=order_type,
                 side=side.lower(),
                 amount=amount,
-                price=price
+                price=price,
+                params=params or {}
             )
             
             logger.info(f"✅ Ордер создан: {side} {amount} {symbol} @ {order.get('price', 'market')}")
             
-            # Иногда проверяем ордер после создания (как человек)
-            if config.ENABLE_HUMAN_MODE and random.random() < 0.3:  # 30% шанс
-                await asyncio.sleep(random.uniform(2, 5))
-                logger.debug("👀 Проверяем созданный ордер...")
-                
             return order
             
         except Exception as e:
@@ -153,15 +308,17 @@ class ExchangeClient(HumanBehaviorMixin):
             
             # Имитируем попытку повтора как человек
             if config.ENABLE_HUMAN_MODE and random.random() < 0.3:  # 30% шанс повтора
-                await asyncio.sleep(random.uniform(2, 5))
+                await self.action_scheduler.pace(action_type)
                 logger.info("🔄 Повторная попытка создания ордера")
                 try:
-                    return self.exchange.create_order(
+                    return await self._request(
+                        RequestLane.ORDERS, 'order', self.exchange.create_order,
                         symbol=symbol,
                         type=order_type,
                         side=side.lower(),
                         amount=amount,
-                        price=price
+                        price=price,
+                        params=params or {}
                     )
                 except:
                     pass
@@ -169,10 +326,11 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def cancel_order(self, order_id: str, symbol: str) -> bool:
         """Отмена ордера"""
-        await self.human_delay()
+        await self._ensure_started()
+        await self.action_scheduler.pace('cancel_order')
         
         try:
-            self.exchange.cancel_order(order_id, symbol)
+            await self._request(RequestLane.ORDERS, 'order', self.exchange.cancel_order, order_id, symbol)
             logger.info(f"❌ Ордер {order_id} отменен")
             return True
         except Exception as e:
@@ -181,10 +339,10 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def fetch_order_book(self, symbol: str, limit: int = 10) -> Dict:
         """Получить стакан"""
-        await self.micro_delay()
+        await self._ensure_started()
         
         try:
-            order_book = self.exchange.fetch_order_book(symbol, limit)
+            order_book = await self._request(RequestLane.TICKERS, 'market', self.exchange.fetch_order_book, symbol, limit)
             return order_book
         except Exception as e:
             logger.error(f"❌ Ошибка получения стакана {symbol}: {e}")
@@ -192,10 +350,10 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def fetch_trades(self, symbol: str, limit: int = 50) -> List:
         """Получить последние сделки"""
-        await self.micro_delay()
+        await self._ensure_started()
         
         try:
-            trades = self.exchange.fetch_trades(symbol, limit=limit)
+            trades = await self._request(RequestLane.MARKET_DATA, 'market', self.exchange.fetch_trades, symbol, limit=limit)
             return trades
         except Exception as e:
             logger.error(f"❌ Ошибка получения сделок {symbol}: {e}")
@@ -203,24 +361,28 @@ class ExchangeClient(HumanBehaviorMixin):
     
     async def fetch_my_trades(self, symbol: str = None, limit: int = 50) -> List:
         """Получить свои сделки"""
-        await self.human_delay()
+        await self._ensure_started()
         
         try:
             if symbol:
-                trades = self.exchange.fetch_my_trades(symbol, limit=limit)
+                trades = await self._request(
+                    RequestLane.ACCOUNT, 'account', self.exchange.fetch_my_trades, symbol, limit=limit
+                )
             else:
-                trades = self.exchange.fetch_my_trades(limit=limit)
+                trades = await self._request(
+                    RequestLane.ACCOUNT, 'account', self.exchange.fetch_my_trades, limit=limit
+                )
             return trades
         except Exception as e:
             logger.error(f"❌ Ошибка получения своих сделок: {e}")
             raise
     
-    async def fetch_positions(self) -> List:
-        """Получить открытые позиции"""
-        await self.human_delay()
+    async def fetch_positions(self, symbols: Optional[List[str]] = None) -> List:
+        """Получить открытые позиции (все или только по symbols)"""
+        await self._ensure_started()
         
         try:
-            positions = self.exchange.fetch_positions()
+            positions = await self._request(RequestLane.ACCOUNT, 'position', self.exchange.fetch_positions, symbols)
             return positions
         except Exception as e:
             logger.error(f"❌ Ошибка получения позиций: {e}")
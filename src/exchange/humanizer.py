@@ -4,9 +4,11 @@
 """
 import asyncio
 import sys
+import json
 import random
 import time
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 
@@ -14,6 +16,130 @@ from ..core.config import config
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class ActionPacing:
+    """Политика пауз для одного типа действия"""
+    delay: Tuple[float, float]              # Пауза перед действием (мин, макс)
+    cooldown: Tuple[float, float] = (0, 0)  # Минимальный интервал до следующего действия
+    think_chance: float = 0.0               # Шанс "долгого размышления" 3-8с
+    bypass_queue: bool = False              # Не ждать предыдущие действия (защитные выходы)
+
+
+def default_action_pacing() -> Dict[str, ActionPacing]:
+    """Политики по умолчанию, из MIN/MAX_DELAY_SECONDS с прежними множителями"""
+    low, high = config.MIN_DELAY_SECONDS, config.MAX_DELAY_SECONDS
+    return {
+        'create_order': ActionPacing(delay=(low * 1.5, high * 1.5), cooldown=(2, 5), think_chance=0.15),
+        'cancel_order': ActionPacing(delay=(low * 0.8, high * 0.8), cooldown=(0.5, 1.5)),
+        'close_position': ActionPacing(delay=(0.1, 0.5), bypass_queue=True),
+        'default': ActionPacing(delay=(low, high), cooldown=(0.5, 1.5)),
+    }
+
+
+class OrderActionScheduler:
+    """
+    Планировщик действий, изменяющих состояние счета
+
+    Человеческие паузы применяются только к ордерам и отменам - запросы
+    на чтение (свечи, тикеры, баланс) биржа не связывает с поведением
+    человека, поэтому они идут без задержек.
+
+    Действия выстраиваются в очередь: каждое получает свое время
+    старта не раньше окончания cooldown предыдущего. Пауза после
+    действия не задерживает вызывающего, а только следующее действие.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, ActionPacing]] = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            policies: Политики по типам действий (по умолчанию + HUMAN_ACTION_PACING)
+            enabled: Включены ли паузы (по умолчанию ENABLE_HUMAN_MODE)
+        """
+        self.enabled = config.ENABLE_HUMAN_MODE if enabled is None else enabled
+        self.policies = policies or self._load_policies()
+
+        self._next_allowed = 0.0
+
+        # Статистика
+        self.actions: Dict[str, int] = {}
+        self.total_wait: Dict[str, float] = {}
+
+    @staticmethod
+    def _load_policies() -> Dict[str, ActionPacing]:
+        """Политики по умолчанию с переопределением из конфига"""
+        policies = default_action_pacing()
+
+        raw = getattr(config, 'HUMAN_ACTION_PACING', '')
+        if not raw:
+            return policies
+
+        try:
+            for action_type, overrides in json.loads(raw).items():
+                base = policies.get(action_type, policies['default'])
+                policies[action_type] = ActionPacing(
+                    delay=tuple(overrides.get('delay', base.delay)),
+                    cooldown=tuple(overrides.get('cooldown', base.cooldown)),
+                    think_chance=overrides.get('think_chance', base.think_chance),
+                    bypass_queue=overrides.get('bypass_queue', base.bypass_queue)
+                )
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"⚠️ Некорректный HUMAN_ACTION_PACING, используем значения по умолчанию: {e}")
+
+        return policies
+
+    def get_policy(self, action_type: str) -> ActionPacing:
+        return self.policies.get(action_type, self.policies['default'])
+
+    def _draw_delay(self, policy: ActionPacing) -> float:
+        """Случайная пауза перед действием"""
+        if random.random() < policy.think_chance:
+            return random.uniform(3, 8)
+
+        delay = random.uniform(*policy.delay)
+
+        # Ночью медленнее
+        current_hour = datetime.now().hour
+        if 23 <= current_hour or current_hour < 6:
+            delay *= random.uniform(1.5, 2.5)
+
+        return delay
+
+    async def pace(self, action_type: str = 'default'):
+        """
+        Дождаться своей очереди на действие
+
+        Args:
+            action_type: Тип действия (create_order, cancel_order, close_position, ...)
+        """
+        if not self.enabled:
+            return
+
+        policy = self.get_policy(action_type)
+        now = time.monotonic()
+
+        start = now if policy.bypass_queue else max(now, self._next_allowed)
+        start += self._draw_delay(policy)
+        if not policy.bypass_queue:
+            self._next_allowed = start + random.uniform(*policy.cooldown)
+
+        wait = start - now
+        self.actions[action_type] = self.actions.get(action_type, 0) + 1
+        self.total_wait[action_type] = self.total_wait.get(action_type, 0.0) + wait
+
+        logger.debug(f"Человеческая пауза: {wait:.2f}с для действия '{action_type}'")
+        await asyncio.sleep(wait)
+
+    def get_statistics(self) -> Dict:
+        """Количество действий и средняя пауза по типам"""
+        return {
+            action_type: {
+                'count': count,
+                'avg_wait_sec': round(self.total_wait[action_type] / count, 2)
+            }
+            for action_type, count in self.actions.items()
+        }
+
 class HumanBehaviorMixin:
     """Миксин для добавления человеческого поведения"""
     
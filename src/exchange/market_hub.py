@@ -0,0 +1,271 @@
+"""
+Общий хаб рыночных данных
+Путь: src/exchange/market_hub.py
+
+Единая точка получения свечей, тикеров и стаканов для всего процесса.
+MarketAnalyzer, AutoStrategySelector, SmartTradeExecutor и FeatureEngineer
+берут данные отсюда, поэтому одна и та же пара не запрашивается
+у биржи несколько раз за цикл.
+
+- одинаковые одновременные запросы объединяются в один (single-flight)
+- кэш свечей ограничен по памяти и вытесняет давно не используемые пары (LRU)
+- свечи пары считаются устаревшими при закрытии текущего бара
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from ..core.config import config
+from .client import exchange_client
+from .candle_buffer import OHLCVSynchronizer, TIMEFRAME_MS
+from .market_store import market_store, normalize_symbol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _FrameEntry:
+    """Закэшированные свечи пары"""
+    df: pd.DataFrame
+    limit: int
+    expires_at: float   # Время (мс), после которого свечи нужно перечитать
+    nbytes: int
+    from_stream: bool
+
+
+class MarketDataHub:
+    """
+    Хаб рыночных данных с объединением запросов и LRU кэшем
+
+    Свечи из WebSocket потока отдаются как "живое" представление буфера,
+    поэтому для них достаточно инвалидации при закрытии бара. Свечи,
+    загруженные по REST, дополнительно перечитываются не реже
+    CANDLE_REFRESH_SECONDS, чтобы формирующийся бар не устаревал.
+    """
+
+    CANDLE_REFRESH_SECONDS = 60
+
+    def __init__(
+        self,
+        store=market_store,
+        exchange=exchange_client,
+        memory_budget_mb: float = config.MARKET_HUB_MEMORY_MB,
+        quote_ttl: float = config.MARKET_HUB_QUOTE_TTL
+    ):
+        """
+        Args:
+            store: Хранилище свечей и тикеров
+            exchange: ExchangeClient
+            memory_budget_mb: Лимит памяти кэша свечей
+            quote_ttl: Сколько секунд кэшировать тикеры и стаканы из REST
+        """
+        self.store = store
+        self.exchange = exchange
+        self.synchronizer = OHLCVSynchronizer(store, exchange)
+
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.quote_ttl = quote_ttl
+
+        self._frames: "OrderedDict[Tuple[str, str], _FrameEntry]" = OrderedDict()
+        self._quotes: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._memory_used = 0
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        # Закрытие свечи сразу делает кэш пары устаревшим
+        self.store.add_close_listener(self._on_candle_closed)
+
+    # =========================================================================
+    # === СВЕЧИ ===
+    # =========================================================================
+
+    async def get_candles(self, symbol: str, timeframe: str = '5m', limit: int = 200) -> Optional[pd.DataFrame]:
+        """
+        Последние limit свечей пары
+
+        Returns:
+            DataFrame с индексом по времени (представление буфера, не изменять
+            на месте) или None, если данных нет
+        """
+        key = (normalize_symbol(symbol), timeframe)
+        entry = self._frames.get(key)
+
+        if entry is not None and entry.limit >= limit and time.time() * 1000 < entry.expires_at:
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return entry.df.iloc[-limit:]
+
+        self.misses += 1
+        df = await self._single_flight(
+            ('candles', key, limit),
+            lambda: self._load_candles(symbol, timeframe, limit)
+        )
+        return df.iloc[-limit:] if df is not None else None
+
+    async def _load_candles(self, symbol: str, timeframe: str, limit: int) -> Optional[pd.DataFrame]:
+        """Чтение свечей из потока или догрузка по REST и запись в кэш"""
+        from_stream = self.store.has_fresh_candles(symbol, timeframe, limit)
+
+        if from_stream:
+            df = self.store.get_dataframe(symbol, timeframe, limit)
+        else:
+            df = await self.synchronizer.sync(symbol, timeframe, limit)
+
+        if df is None or df.empty:
+            return None
+
+        # Бар закрывается через период после открытия последней свечи
+        period = TIMEFRAME_MS.get(timeframe, 60_000)
+        expires_at = df.index[-1].value // 1_000_000 + period
+        if not from_stream:
+            expires_at = min(expires_at, time.time() * 1000 + self.CANDLE_REFRESH_SECONDS * 1000)
+
+        self._put_frame(
+            (normalize_symbol(symbol), timeframe),
+            _FrameEntry(
+                df=df,
+                limit=limit,
+                expires_at=expires_at,
+                nbytes=int(df.memory_usage(index=True).sum()),
+                from_stream=from_stream
+            )
+        )
+        return df
+
+    def _put_frame(self, key: Tuple[str, str], entry: _FrameEntry):
+        """Запись в кэш с соблюдением лимита памяти"""
+        old = self._frames.pop(key, None)
+        if old is not None:
+            self._memory_used -= old.nbytes
+
+        self._frames[key] = entry
+        self._memory_used += entry.nbytes
+
+        # Вытесняем самые давно использованные пары, последнюю оставляем всегда
+        while self._memory_used > self.memory_budget and len(self._frames) > 1:
+            evicted_key, evicted = self._frames.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+            self.evictions += 1
+
+            # Буфер пары без потока больше никому не нужен
+            if not self.store.has_fresh_candles(evicted_key[0], evicted_key[1]):
+                self.store.drop_candles(evicted_key[0], evicted_key[1])
+
+            logger.debug(f"🧹 Хаб вытеснил свечи {evicted_key[0]} {evicted_key[1]}")
+
+    def _on_candle_closed(self, symbol: str, timeframe: str, closed_ts: int):
+        """Обработчик закрытия свечи из хранилища"""
+        self.invalidate(symbol, timeframe)
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None):
+        """
+        Сброс кэша свечей пары (например, при закрытии бара)
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм (None - все таймфреймы пары)
+        """
+        symbol = normalize_symbol(symbol)
+        for key in [k for k in self._frames if k[0] == symbol and timeframe in (None, k[1])]:
+            self._memory_used -= self._frames.pop(key).nbytes
+
+    # =========================================================================
+    # === ТИКЕРЫ И СТАКАН ===
+    # =========================================================================
+
+    async def get_ticker(self, symbol: str) -> Optional[Dict]:
+        """Тикер в формате ccxt: из потока, иначе из REST с коротким кэшем"""
+        ticker = self.store.get_ticker(symbol)
+        if ticker is not None:
+            self.hits += 1
+            return ticker
+
+        return await self._get_quote('ticker', symbol, lambda: self.exchange.fetch_ticker(symbol))
+
+    async def get_last_price(self, symbol: str) -> Optional[float]:
+        """Последняя цена пары"""
+        ticker = await self.get_ticker(symbol)
+        if ticker and ticker.get('last') is not None:
+            return float(ticker['last'])
+        return None
+
+    async def get_order_book(self, symbol: str, limit: int = 10) -> Optional[Dict]:
+        """Стакан с коротким кэшем"""
+        return await self._get_quote(
+            f'orderbook_{limit}', symbol,
+            lambda: self.exchange.fetch_order_book(symbol, limit)
+        )
+
+    async def _get_quote(self, kind: str, symbol: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Котировка из кэша или одним запросом на всех ожидающих"""
+        key = (kind, normalize_symbol(symbol))
+
+        cached = self._quotes.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+
+        async def load():
+            data = await loader()
+            self._quotes[key] = (time.monotonic() + self.quote_ttl, data)
+            return data
+
+        return await self._single_flight(key, load)
+
+    # =========================================================================
+    # === СЛУЖЕБНОЕ ===
+    # =========================================================================
+
+    async def _single_flight(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Один запрос на все одновременные обращения с одним ключом
+
+        Загрузка идет отдельной задачей, поэтому отмена одного из
+        ожидающих не отменяет ее для остальных.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def clear(self):
+        """Полная очистка кэша"""
+        self._frames.clear()
+        self._quotes.clear()
+        self._memory_used = 0
+
+    def get_statistics(self) -> Dict:
+        """Статистика для мониторинга"""
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'cached_frames': len(self._frames),
+            'memory_used_mb': round(self._memory_used / 1024 / 1024, 2),
+            'memory_budget_mb': round(self.memory_budget / 1024 / 1024, 2),
+            'sync': self.synchronizer.get_statistics()
+        }
+
+
+# Глобальный экземпляр хаба
+market_hub = MarketDataHub()
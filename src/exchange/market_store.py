@@ -0,0 +1,386 @@
+"""
+Хранилище рыночных данных в памяти
+Путь: src/exchange/market_store.py
+
+Держит последние свечи и тикеры по каждому символу. Данные пишет
+WebSocket-поток (BybitMarketStream), а читают MarketAnalyzer,
+BotManager и веб-графики - без обращений к REST.
+"""
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from ..core.config import config
+from .candle_buffer import CandleBuffer, TIMEFRAME_MS
+from .resampler import CandleAggregator, can_resample, resample_ohlcv
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Приводит символ к виду биржи: 'BTC/USDT:USDT' -> 'BTCUSDT'"""
+    return symbol.split(':')[0].replace('/', '').upper()
+
+
+class MarketDataStore:
+    """
+    Кольцевые буферы свечей и последние тикеры по символам
+
+    Свечи принимаются и отдаются списками [timestamp_ms, open, high, low,
+    close, volume], в том же формате, что возвращает ccxt.fetch_ohlcv,
+    а внутри лежат в numpy буферах CandleBuffer.
+
+    При закрытии свечи вызываются подписчики add_close_listener:
+    callback(symbol, timeframe, timestamp_закрытой_свечи_мс).
+
+    Старшие таймфреймы (derived_timeframes) не запрашиваются отдельно,
+    а собираются из свечей base_timeframe при каждом их обновлении -
+    с такими же событиями закрытия, как у обычных буферов.
+    """
+
+    def __init__(
+        self,
+        max_candles: int = 500,
+        stale_after: float = 30.0,
+        base_timeframe: Optional[str] = None,
+        derived_timeframes: Iterable[str] = ()
+    ):
+        """
+        Args:
+            max_candles: Размер кольцевого буфера на (символ, таймфрейм)
+            stale_after: Через сколько секунд без обновлений данные считаются устаревшими
+            base_timeframe: Таймфрейм, из которого собираются старшие
+            derived_timeframes: Старшие таймфреймы, собираемые из base_timeframe
+        """
+        self.max_candles = max_candles
+        self.stale_after = stale_after
+
+        # Сборка старших таймфреймов из базового
+        self.base_timeframe = base_timeframe
+        self.derived_timeframes = [
+            tf for tf in derived_timeframes if base_timeframe and can_resample(base_timeframe, tf)
+        ]
+        self._aggregators: Dict[Tuple[str, str], CandleAggregator] = {}
+
+        self._candles: Dict[Tuple[str, str], CandleBuffer] = {}
+        self._tickers: Dict[str, Dict] = {}
+        self._updated_at: Dict[Tuple[str, str], float] = {}
+
+        # Подписчики на закрытие свечей и последняя объявленная закрытой свеча
+        self._close_listeners: List[Callable[[str, str, int], None]] = []
+        self._last_closed: Dict[Tuple[str, str], int] = {}
+
+        # Чтение возможно из потоков Flask, запись - из event loop
+        self._lock = threading.RLock()
+
+    # =========================================================================
+    # === СВЕЧИ ===
+    # =========================================================================
+
+    def _get_buffer(self, key: Tuple[str, str]) -> CandleBuffer:
+        """Буфер свечей пары (создается при первом обращении)"""
+        buffer = self._candles.get(key)
+        if buffer is None:
+            buffer = CandleBuffer(self.max_candles)
+            self._candles[key] = buffer
+        return buffer
+
+    def update_candle(self, symbol: str, timeframe: str, candle: List[float], closed: bool = False):
+        """
+        Обновление свечи из потока
+
+        Свеча с тем же временем открытия, что и последняя, заменяет ее
+        (формирующийся бар), более новая - добавляется, более старая игнорируется.
+
+        Args:
+            closed: Биржа подтвердила, что свеча закрыта (confirm в kline Bybit)
+        """
+        key = (normalize_symbol(symbol), timeframe)
+
+        with self._lock:
+            buffer = self._get_buffer(key)
+            previous_last = buffer.last_timestamp
+            buffer.update(candle)
+            self._updated_at[key] = time.monotonic()
+
+            if closed:
+                closed_ts = int(candle[0])
+            elif previous_last is not None and buffer.last_timestamp > previous_last:
+                # Началась новая свеча - предыдущая закрыта
+                closed_ts = previous_last
+            else:
+                closed_ts = None
+
+            events = []
+            if closed_ts is not None and self._register_close(key, closed_ts):
+                events.append((key, closed_ts))
+            if timeframe == self.base_timeframe:
+                events.extend(self._update_derived(key[0], buffer, candle, closed))
+
+        for event_key, event_ts in events:
+            self._notify_close(event_key, event_ts)
+
+    def merge_candles(self, symbol: str, timeframe: str, candles: List[List[float]]):
+        """
+        Слияние свечей из REST (догрузка после переподключения)
+
+        Свечи из буфера и из REST объединяются по времени открытия,
+        при совпадении побеждает более свежая запись из REST.
+        """
+        if not candles:
+            return
+
+        key = (normalize_symbol(symbol), timeframe)
+
+        with self._lock:
+            buffer = self._get_buffer(key)
+            buffer.merge(candles)
+            self._updated_at[key] = time.monotonic()
+
+            # Последняя свеча из REST обычно еще формируется, закрыта предпоследняя
+            closed_ts = buffer.previous_timestamp
+
+            events = []
+            if closed_ts is not None and self._register_close(key, closed_ts):
+                events.append((key, closed_ts))
+            if timeframe == self.base_timeframe:
+                events.extend(self._rebuild_derived(key[0], buffer))
+
+        for event_key, event_ts in events:
+            self._notify_close(event_key, event_ts)
+
+    # =========================================================================
+    # === СТАРШИЕ ТАЙМФРЕЙМЫ ИЗ БАЗОВОГО ===
+    # =========================================================================
+
+    def _update_derived(self, symbol: str, base_buffer: CandleBuffer, candle: List[float],
+                        closed: bool) -> List[Tuple[Tuple[str, str], int]]:
+        """Обновление формирующихся старших баров одной базовой свечой (под блокировкой)"""
+        if any((symbol, tf) not in self._aggregators for tf in self.derived_timeframes):
+            # Первая свеча пары (или после сброса) - собираем историю целиком
+            return self._rebuild_derived(symbol, base_buffer)
+
+        events = []
+        base_period = TIMEFRAME_MS[self.base_timeframe]
+
+        for timeframe in self.derived_timeframes:
+            key = (symbol, timeframe)
+            aggregator = self._aggregators[key]
+            bar, closed_bucket = aggregator.update(candle)
+            if bar is None:
+                continue
+
+            self._get_buffer(key).update(bar)
+            self._updated_at[key] = time.monotonic()
+
+            if closed and aggregator.closes_with(int(candle[0]), base_period):
+                # Закрылась последняя базовая свеча старшего бара
+                closed_bucket = aggregator.bucket
+            if closed_bucket is not None and self._register_close(key, closed_bucket):
+                events.append((key, closed_bucket))
+
+        return events
+
+    def _rebuild_derived(self, symbol: str, base_buffer: CandleBuffer) -> List[Tuple[Tuple[str, str], int]]:
+        """Пересборка старших таймфреймов по всей истории базового буфера (под блокировкой)"""
+        if not self.derived_timeframes:
+            return []
+
+        events = []
+        candles = base_buffer.to_list()
+
+        for timeframe in self.derived_timeframes:
+            key = (symbol, timeframe)
+            bars = resample_ohlcv(candles, timeframe)
+            if not bars:
+                continue
+
+            buffer = self._get_buffer(key)
+            buffer.merge(bars)
+            self._updated_at[key] = time.monotonic()
+
+            aggregator = CandleAggregator(timeframe)
+            aggregator.seed(candles)
+            self._aggregators[key] = aggregator
+
+            closed_ts = buffer.previous_timestamp
+            if closed_ts is not None and self._register_close(key, closed_ts):
+                events.append((key, closed_ts))
+
+        return events
+
+    def add_close_listener(self, callback: Callable[[str, str, int], None]):
+        """Подписка на закрытие свечей"""
+        if callback not in self._close_listeners:
+            self._close_listeners.append(callback)
+
+    def remove_close_listener(self, callback: Callable[[str, str, int], None]):
+        """Отписка от закрытия свечей"""
+        if callback in self._close_listeners:
+            self._close_listeners.remove(callback)
+
+    def _register_close(self, key: Tuple[str, str], closed_ts: int) -> bool:
+        """
+        Запоминает закрытую свечу, True - если о ней нужно объявить
+
+        Первая увиденная по паре свеча только запоминается: это история,
+        загруженная при старте, а не закрытие.
+        """
+        last = self._last_closed.get(key)
+        if last is not None and closed_ts <= last:
+            return False
+        self._last_closed[key] = closed_ts
+        return last is not None
+
+    def _notify_close(self, key: Tuple[str, str], closed_ts: int):
+        """Вызов подписчиков (вне блокировки)"""
+        for callback in list(self._close_listeners):
+            try:
+                callback(key[0], key[1], closed_ts)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработчика закрытия свечи {key[0]} {key[1]}: {e}")
+
+    def get_candles(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> List[List[float]]:
+        """Последние свечи в формате ccxt (копия)"""
+        key = (normalize_symbol(symbol), timeframe)
+
+        with self._lock:
+            buffer = self._candles.get(key)
+            if not buffer:
+                return []
+            return buffer.to_list(limit)
+
+    def get_dataframe(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Свечи в виде DataFrame с индексом по времени (как в MarketAnalyzer)
+
+        Возвращается представление буфера без копирования - последний
+        (формирующийся) бар в нем обновляется вместе с потоком.
+        """
+        key = (normalize_symbol(symbol), timeframe)
+
+        with self._lock:
+            buffer = self._candles.get(key)
+            if not buffer:
+                return None
+            return buffer.dataframe(limit)
+
+    def last_candle_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Время открытия последней свечи в мс"""
+        with self._lock:
+            buffer = self._candles.get((normalize_symbol(symbol), timeframe))
+            return buffer.last_timestamp if buffer is not None else None
+
+    def drop_candles(self, symbol: str, timeframe: str):
+        """Удаление буфера свечей пары"""
+        key = (normalize_symbol(symbol), timeframe)
+        with self._lock:
+            self._candles.pop(key, None)
+            self._updated_at.pop(key, None)
+            self._last_closed.pop(key, None)
+            self._aggregators.pop(key, None)
+
+            # Без базовых свечей старшие собирать не из чего
+            if timeframe == self.base_timeframe:
+                for derived in self.derived_timeframes:
+                    self._aggregators.pop((key[0], derived), None)
+
+    def candles_count(self, symbol: str, timeframe: str) -> int:
+        """Количество свечей в буфере"""
+        with self._lock:
+            return len(self._candles.get((normalize_symbol(symbol), timeframe), ()))
+
+    def has_fresh_candles(self, symbol: str, timeframe: str, min_count: int = 1) -> bool:
+        """Есть ли в буфере достаточно свежих свечей"""
+        key = (normalize_symbol(symbol), timeframe)
+        return self.candles_count(symbol, timeframe) >= min_count and self._is_fresh(key)
+
+    # =========================================================================
+    # === ТИКЕРЫ ===
+    # =========================================================================
+
+    def update_ticker(self, symbol: str, data: Dict):
+        """
+        Обновление тикера (snapshot или delta)
+
+        Поля delta накладываются на последний известный тикер.
+        """
+        symbol = normalize_symbol(symbol)
+
+        with self._lock:
+            ticker = self._tickers.setdefault(symbol, {'symbol': symbol})
+            ticker.update({k: v for k, v in data.items() if v is not None})
+            self._updated_at[(symbol, 'ticker')] = time.monotonic()
+
+    def get_ticker(self, symbol: str, fresh_only: bool = True) -> Optional[Dict]:
+        """
+        Последний тикер в формате ccxt (last, bid, ask, high, low, ...)
+
+        Args:
+            fresh_only: Вернуть None, если тикер устарел
+        """
+        symbol = normalize_symbol(symbol)
+
+        with self._lock:
+            ticker = self._tickers.get(symbol)
+            if ticker is None:
+                return None
+            if fresh_only and not self._is_fresh((symbol, 'ticker')):
+                return None
+            return dict(ticker)
+
+    def get_last_price(self, symbol: str) -> Optional[float]:
+        """Последняя цена из свежего тикера"""
+        ticker = self.get_ticker(symbol)
+        if ticker and ticker.get('last'):
+            return float(ticker['last'])
+        return None
+
+    # =========================================================================
+    # === СЛУЖЕБНОЕ ===
+    # =========================================================================
+
+    def _is_fresh(self, key: Tuple[str, str]) -> bool:
+        """Обновлялись ли данные за последние stale_after секунд"""
+        updated_at = self._updated_at.get(key)
+        return updated_at is not None and time.monotonic() - updated_at < self.stale_after
+
+    def clear(self, symbol: Optional[str] = None):
+        """Очистка хранилища (целиком или по символу)"""
+        with self._lock:
+            if symbol is None:
+                self._candles.clear()
+                self._tickers.clear()
+                self._updated_at.clear()
+                self._aggregators.clear()
+                return
+
+            symbol = normalize_symbol(symbol)
+            for key in [k for k in self._candles if k[0] == symbol]:
+                del self._candles[key]
+                self._aggregators.pop(key, None)
+            self._tickers.pop(symbol, None)
+            for key in [k for k in self._updated_at if k[0] == symbol]:
+                del self._updated_at[key]
+
+    def get_statistics(self) -> Dict:
+        """Статистика для мониторинга"""
+        with self._lock:
+            return {
+                'symbols': len(self._tickers),
+                'candle_buffers': len(self._candles),
+                'candles_total': sum(len(b) for b in self._candles.values()),
+                'derived_timeframes': self.derived_timeframes
+            }
+
+
+# Глобальный экземпляр хранилища
+market_store = MarketDataStore(
+    max_candles=config.WS_CANDLE_BUFFER_SIZE,
+    stale_after=config.WS_STALE_AFTER_SECONDS,
+    base_timeframe=config.RESAMPLE_BASE_TIMEFRAME,
+    derived_timeframes=config.RESAMPLED_TIMEFRAMES
+)
@@ -0,0 +1,308 @@
+"""
+Поток рыночных данных Bybit через WebSocket
+Путь: src/exchange/market_stream.py
+
+Подписывается на публичные топики kline и tickers и складывает данные
+в MarketDataStore. REST используется только для догрузки свечей после
+(пере)подключения, чтобы закрыть пропуск за время обрыва.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from ..core.config import config
+from .market_store import MarketDataStore, market_store, normalize_symbol
+
+logger = logging.getLogger(__name__)
+
+# Публичные эндпоинты Bybit v5 (бессрочные USDT контракты)
+BYBIT_WS_MAINNET = 'wss://stream.bybit.com/v5/public/linear'
+BYBIT_WS_TESTNET = 'wss://stream-testnet.bybit.com/v5/public/linear'
+
+# Таймфрейм ccxt -> интервал топика kline
+TIMEFRAME_TO_INTERVAL = {
+    '1m': '1', '3m': '3', '5m': '5', '15m': '15', '30m': '30',
+    '1h': '60', '2h': '120', '4h': '240', '6h': '360', '12h': '720',
+    '1d': 'D', '1w': 'W'
+}
+INTERVAL_TO_TIMEFRAME = {v: k for k, v in TIMEFRAME_TO_INTERVAL.items()}
+
+# Поля тикера Bybit -> поля тикера ccxt
+TICKER_FIELDS = {
+    'lastPrice': 'last',
+    'bid1Price': 'bid',
+    'ask1Price': 'ask',
+    'highPrice24h': 'high',
+    'lowPrice24h': 'low',
+    'volume24h': 'baseVolume',
+    'turnover24h': 'quoteVolume',
+    'markPrice': 'markPrice',
+    'indexPrice': 'indexPrice',
+}
+
+
+class BybitMarketStream:
+    """
+    Подписчик на публичный WebSocket Bybit
+
+    Для тестов можно передать url локального сервера, который
+    проигрывает записанные кадры, и собственный store.
+    """
+
+    PING_INTERVAL = 20          # Bybit закрывает соединение без ping ~ через 30с
+    RECONNECT_MIN_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 30.0
+    SUBSCRIBE_BATCH = 10        # Максимум топиков в одном запросе subscribe
+
+    def __init__(
+        self,
+        store: MarketDataStore = market_store,
+        exchange=None,
+        url: Optional[str] = None,
+        timeframes: Iterable[str] = ('5m',),
+        backfill_limit: int = 200
+    ):
+        """
+        Args:
+            store: Куда складывать данные
+            exchange: ExchangeClient для догрузки по REST (None - без догрузки)
+            url: Адрес WebSocket (по умолчанию из конфига / по режиму testnet)
+            timeframes: Таймфреймы свечей для подписки
+            backfill_limit: Сколько свечей догружать по REST после подключения
+        """
+        self.store = store
+        self.exchange = exchange
+        self.url = url or config.BYBIT_WS_PUBLIC_URL or (
+            BYBIT_WS_TESTNET if config.BYBIT_TESTNET else BYBIT_WS_MAINNET
+        )
+        self.timeframes = list(timeframes)
+        self.backfill_limit = backfill_limit
+
+        self.symbols: List[str] = []
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event = asyncio.Event()
+
+        # Статистика
+        self.connected = False
+        self.reconnects = 0
+        self.messages_received = 0
+        self.bad_frames = 0
+        self.last_message_time: Optional[float] = None
+
+    # =========================================================================
+    # === ЖИЗНЕННЫЙ ЦИКЛ ===
+    # =========================================================================
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, symbols: Iterable[str]):
+        """Запуск потока для списка символов"""
+        self.symbols = [normalize_symbol(s) for s in symbols]
+
+        if self.is_running:
+            return
+
+        self._stop_event.clear()
+        self._session = aiohttp.ClientSession()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📡 Поток рыночных данных запущен: {len(self.symbols)} пар, {self.url}")
+
+    async def stop(self):
+        """Остановка потока и закрытие соединения"""
+        self._stop_event.set()
+
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self.connected = False
+
+        logger.info("📡 Поток рыночных данных остановлен")
+
+    async def set_symbols(self, symbols: Iterable[str]):
+        """Смена списка символов без перезапуска"""
+        new_symbols = [normalize_symbol(s) for s in symbols]
+        added = [s for s in new_symbols if s not in self.symbols]
+        removed = [s for s in self.symbols if s not in new_symbols]
+        self.symbols = new_symbols
+
+        if not self.connected or self._ws is None:
+            return
+
+        if removed:
+            await self._send_batched('unsubscribe', self._topics(removed))
+        if added:
+            await self._send_batched('subscribe', self._topics(added))
+            await self._backfill(added)
+
+    # =========================================================================
+    # === ОСНОВНОЙ ЦИКЛ ===
+    # =========================================================================
+
+    async def _run(self):
+        """Подключение, подписка и чтение с переподключением"""
+        delay = self.RECONNECT_MIN_DELAY
+
+        while not self._stop_event.is_set():
+            ping_task = None
+            try:
+                async with self._session.ws_connect(self.url, heartbeat=None) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    delay = self.RECONNECT_MIN_DELAY
+
+                    await self._send_batched('subscribe', self._topics(self.symbols))
+                    ping_task = asyncio.create_task(self._ping_loop(ws))
+
+                    # Закрываем пропуск, накопившийся до подключения
+                    await self._backfill(self.symbols)
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._handle_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка WebSocket потока: {e}")
+            finally:
+                self.connected = False
+                self._ws = None
+                if ping_task is not None:
+                    ping_task.cancel()
+
+            if self._stop_event.is_set():
+                break
+
+            self.reconnects += 1
+            logger.info(f"🔄 Переподключение WebSocket через {delay:.0f}с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+
+    async def _ping_loop(self, ws: aiohttp.ClientWebSocketResponse):
+        """Поддержание соединения"""
+        while not ws.closed:
+            await asyncio.sleep(self.PING_INTERVAL)
+            await ws.send_str(json.dumps({'op': 'ping'}))
+
+    async def _send_batched(self, op: str, topics: List[str]):
+        """Отправка subscribe/unsubscribe пачками"""
+        for i in range(0, len(topics), self.SUBSCRIBE_BATCH):
+            await self._ws.send_str(json.dumps({
+                'op': op,
+                'args': topics[i:i + self.SUBSCRIBE_BATCH]
+            }))
+
+    def _topics(self, symbols: Iterable[str]) -> List[str]:
+        """Список топиков для символов"""
+        topics = []
+        for symbol in symbols:
+            topics.append(f'tickers.{symbol}')
+            for timeframe in self.timeframes:
+                topics.append(f'kline.{TIMEFRAME_TO_INTERVAL[timeframe]}.{symbol}')
+        return topics
+
+    async def _backfill(self, symbols: Iterable[str]):
+        """Догрузка свечей по REST после подключения"""
+        if self.exchange is None:
+            return
+
+        for symbol in symbols:
+            for timeframe in self.timeframes:
+                try:
+                    ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, self.backfill_limit)
+                    self.store.merge_candles(symbol, timeframe, ohlcv)
+                except Exception as e:
+                    logger.warning(f"⚠️ Не удалось догрузить свечи {symbol} {timeframe}: {e}")
+
+    # =========================================================================
+    # === РАЗБОР СООБЩЕНИЙ ===
+    # =========================================================================
+
+    def _handle_message(self, raw: str):
+        """
+        Разбор кадра WebSocket и запись в хранилище
+
+        Некорректный кадр пропускается: исключение из цикла чтения
+        оборвало бы соединение и запустило полную догрузку по REST.
+        """
+        try:
+            self._apply_message(json.loads(raw))
+        except Exception as e:
+            self.bad_frames += 1
+            logger.warning(f"⚠️ Пропущен некорректный кадр WebSocket ({e!r}): {raw[:100]}")
+
+    def _apply_message(self, message: Dict):
+        """Запись данных кадра в хранилище"""
+        topic = message.get('topic')
+        if not topic:
+            # Ответы на subscribe/ping
+            if message.get('op') == 'subscribe' and not message.get('success', True):
+                logger.warning(f"⚠️ Ошибка подписки: {message.get('ret_msg')}")
+            return
+
+        self.messages_received += 1
+        self.last_message_time = time.monotonic()
+
+        if topic.startswith('kline.'):
+            _, interval, symbol = topic.split('.', 2)
+            timeframe = INTERVAL_TO_TIMEFRAME.get(interval)
+            if timeframe is None:
+                return
+            for bar in message.get('data', []):
+                self.store.update_candle(symbol, timeframe, [
+                    int(bar['start']),
+                    float(bar['open']),
+                    float(bar['high']),
+                    float(bar['low']),
+                    float(bar['close']),
+                    float(bar['volume'])
+                ], closed=bool(bar.get('confirm')))
+
+        elif topic.startswith('tickers.'):
+            data = message.get('data', {})
+            symbol = data.get('symbol') or topic.split('.', 1)[1]
+            ticker = {
+                ccxt_field: float(data[field])
+                for field, ccxt_field in TICKER_FIELDS.items()
+                if data.get(field) not in (None, '')
+            }
+            if data.get('price24hPcnt') not in (None, ''):
+                ticker['percentage'] = float(data['price24hPcnt']) * 100
+            ticker['timestamp'] = message.get('ts')
+            self.store.update_ticker(symbol, ticker)
+
+    def get_statistics(self) -> Dict:
+        """Статистика для мониторинга"""
+        return {
+            'connected': self.connected,
+            'symbols': len(self.symbols),
+            'reconnects': self.reconnects,
+            'messages_received': self.messages_received,
+            'bad_frames': self.bad_frames,
+            'seconds_since_last_message': (
+                time.monotonic() - self.last_message_time if self.last_message_time else None
+            ),
+            'store': self.store.get_statistics()
+        }
@@ -0,0 +1,277 @@
+"""
+Ограничитель частоты запросов к бирже с приоритетами
+Путь: src/exchange/rate_limiter.py
+
+Token bucket на каждую группу эндпоинтов Bybit плюс общий лимит по IP.
+Запросы ждут в очереди с приоритетами: ордера обслуживаются раньше
+позиций и баланса, те - раньше тикеров, тикеры - раньше догрузки
+свечей и сделок. Поэтому ордер не застревает за пачкой запросов OHLCV
+именно тогда, когда лимит выбран, - в волатильный момент.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLane(IntEnum):
+    """Полосы очереди: меньше значение - выше приоритет"""
+    ORDERS = 0        # Создание и отмена ордеров
+    ACCOUNT = 1       # Позиции, баланс, свои сделки
+    TICKERS = 2       # Тикеры, стакан
+    MARKET_DATA = 3   # Свечи, лента сделок, рынки
+
+
+# Лимиты Bybit v5 для обычного аккаунта: (запросов в секунду, размер всплеска)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'order': (10, 10),        # /v5/order/create, cancel, amend - 10/с на UID
+    'position': (50, 50),     # /v5/position/list
+    'account': (50, 50),      # /v5/account/wallet-balance, /v5/execution/list
+    'market': (50, 100),      # Публичные эндпоинты /v5/market/*
+}
+
+# Общий лимит по IP: 600 запросов за 5 секунд
+DEFAULT_GLOBAL_LIMIT: Tuple[float, float] = (120, 600)
+
+
+class TokenBucket:
+    """Классический token bucket с непрерывным пополнением"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Пополнение, токенов в секунду
+            capacity: Максимум токенов (допустимый всплеск)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, weight: float, now: float) -> float:
+        """Сколько секунд ждать до появления weight токенов (0 - можно сейчас)"""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= weight:
+            return 0.0
+        return (weight - self.tokens) / self.rate
+
+    def consume(self, weight: float):
+        self.tokens -= weight
+
+    def block(self, seconds: float, now: float):
+        """Полная пауза (после ответа биржи о превышении лимита)"""
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+@dataclass(order=True)
+class _Waiter:
+    """Запрос в очереди (сортируется по полосе, затем по порядку прихода)"""
+    lane: int
+    seq: int
+    endpoint: str = field(compare=False)
+    weight: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class LaneMetrics:
+    """Метрики ожидания в очереди одной полосы"""
+
+    WINDOW = 500  # Сколько последних ожиданий хранить для перцентилей
+
+    def __init__(self):
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent = deque(maxlen=self.WINDOW)
+
+    def record(self, wait: float):
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent.append(wait)
+
+    def to_dict(self, queued: int) -> Dict:
+        recent = sorted(self.recent)
+        p95 = recent[int(len(recent) * 0.95) - 1] if len(recent) >= 20 else (recent[-1] if recent else 0.0)
+        return {
+            'requests': self.requests,
+            'queued': queued,
+            'avg_wait_ms': round(self.total_wait / self.requests * 1000, 2) if self.requests else 0.0,
+            'p95_wait_ms': round(p95 * 1000, 2),
+            'max_wait_ms': round(self.max_wait * 1000, 2)
+        }
+
+
+class PriorityRateLimiter:
+    """
+    Приоритетная очередь запросов поверх token bucket
+
+    Каждый запрос расходует токены своей группы эндпоинтов и общего
+    лимита по IP. Диспетчер выдает разрешения в порядке приоритета:
+    если общий лимит исчерпан, первым его получит запрос с более
+    высоким приоритетом. Запрос, упершийся только в лимит своей группы,
+    не задерживает запросы других групп.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        global_limit: Tuple[float, float] = DEFAULT_GLOBAL_LIMIT
+    ):
+        """
+        Args:
+            limits: {группа: (запросов в секунду, всплеск)}
+            global_limit: Общий лимит по IP (запросов в секунду, всплеск)
+        """
+        self.buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rate, capacity)
+            for name, (rate, capacity) in (limits or DEFAULT_LIMITS).items()
+        }
+        self.global_bucket = TokenBucket(*global_limit)
+
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.metrics: Dict[RequestLane, LaneMetrics] = {lane: LaneMetrics() for lane in RequestLane}
+        self.rate_limit_hits = 0
+
+    async def acquire(self, lane: RequestLane, endpoint: str = 'market', weight: float = 1.0):
+        """
+        Дождаться разрешения на запрос
+
+        Args:
+            lane: Полоса приоритета
+            endpoint: Группа эндпоинтов (ключ лимитов)
+            weight: Вес запроса в токенах
+        """
+        if endpoint not in self.buckets:
+            raise ValueError(f"Неизвестная группа эндпоинтов: {endpoint}")
+
+        self._ensure_dispatcher()
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            lane=int(lane),
+            seq=next(self._seq),
+            endpoint=endpoint,
+            weight=weight,
+            enqueued_at=time.monotonic(),
+            future=loop.create_future()
+        )
+        heapq.heappush(self._queue, waiter)
+        self._wakeup.set()
+
+        await waiter.future
+
+    def penalize(self, endpoint: str, seconds: float = 1.0):
+        """Пауза для группы после ответа биржи о превышении лимита"""
+        self.rate_limit_hits += 1
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            bucket.block(seconds, time.monotonic())
+        logger.warning(f"⏳ Лимит запросов биржи превышен ({endpoint}), пауза {seconds:.1f}с")
+
+    def _ensure_dispatcher(self):
+        """Запуск диспетчера в текущем event loop"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        """Выдача разрешений в порядке приоритета"""
+        while True:
+            self._wakeup.clear()
+            next_check = self._dispatch()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_check)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self) -> Optional[float]:
+        """
+        Один проход по очереди
+
+        Returns:
+            Через сколько секунд проверить очередь снова (None - ждать новых запросов)
+        """
+        now = time.monotonic()
+        next_check = None
+        deferred = []
+
+        while self._queue:
+            waiter = heapq.heappop(self._queue)
+            if waiter.future.done():  # Ожидающий отменен
+                continue
+
+            global_wait = self.global_bucket.wait_time(waiter.weight, now)
+            if global_wait > 0:
+                # Общий лимит держим за самым приоритетным запросом
+                deferred.append(waiter)
+                next_check = global_wait if next_check is None else min(next_check, global_wait)
+                break
+
+            endpoint_wait = self.buckets[waiter.endpoint].wait_time(waiter.weight, now)
+            if endpoint_wait > 0:
+                deferred.append(waiter)
+                next_check = endpoint_wait if next_check is None else min(next_check, endpoint_wait)
+                continue
+
+            self.global_bucket.consume(waiter.weight)
+            self.buckets[waiter.endpoint].consume(waiter.weight)
+            self.metrics[RequestLane(waiter.lane)].record(now - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+        for waiter in deferred:
+            heapq.heappush(self._queue, waiter)
+
+        return next_check
+
+    async def close(self):
+        """Остановка диспетчера (ожидающие запросы отменяются)"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        for waiter in self._queue:
+            if not waiter.future.done():
+                waiter.future.cancel()
+        self._queue.clear()
+
+    def get_statistics(self) -> Dict:
+        """Метрики ожидания по полосам"""
+        queued = {lane: 0 for lane in RequestLane}
+        for waiter in self._queue:
+            if not waiter.future.done():
+                queued[RequestLane(waiter.lane)] += 1
+
+        return {
+            'lanes': {
+                lane.name.lower(): self.metrics[lane].to_dict(queued[lane])
+                for lane in RequestLane
+            },
+            'rate_limit_hits': self.rate_limit_hits
+        }
@@ -0,0 +1,192 @@
+"""
+Старшие таймфреймы из одного базового потока свечей
+Путь: src/exchange/resampler.py
+
+Вместо отдельной подписки, REST-запроса или выборки из БД на каждый
+таймфрейм старшие свечи (15m, 1h, 4h) собираются из базовых (1m/5m):
+open первой базовой свечи, max/min high/low, close последней, сумма
+объемов. Так все таймфреймы пары согласованы между собой.
+
+- resample_ohlcv / resample_frame - векторная пересборка истории
+- CandleAggregator - инкрементальное обновление формирующегося старшего
+  бара на каждом обновлении базовой свечи (в том числе формирующейся)
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .candle_buffer import CANDLE_COLUMNS, TIMEFRAME_MS
+
+
+def can_resample(base_timeframe: str, timeframe: str) -> bool:
+    """
+    Можно ли собрать timeframe из base_timeframe
+
+    Недели не собираем: у биржи они начинаются с понедельника,
+    а деление времени от эпохи дает четверг.
+    """
+    base = TIMEFRAME_MS.get(base_timeframe)
+    target = TIMEFRAME_MS.get(timeframe)
+    if not base or not target or timeframe == '1w':
+        return False
+    return target > base and target % base == 0
+
+
+def _aggregate(timestamps: np.ndarray, values: np.ndarray, period_ms: int,
+               drop_partial_first: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Агрегация базовых свечей по корзинам period_ms
+
+    Args:
+        timestamps: Время открытия базовых свечей, мс (по возрастанию)
+        values: Матрица (n, 5) open/high/low/close/volume
+        drop_partial_first: Отбросить первую корзину, если история
+            начинается с ее середины (open и high/low были бы неверны)
+    """
+    if not len(timestamps):
+        return timestamps, values
+
+    buckets = timestamps - timestamps % period_ms
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets))
+
+    result = np.empty((len(starts), len(CANDLE_COLUMNS)))
+    result[:, 0] = values[starts, 0]
+    result[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    result[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    result[:, 3] = values[ends - 1, 3]
+    result[:, 4] = np.add.reduceat(values[:, 4], starts)
+    bucket_ts = buckets[starts]
+
+    if drop_partial_first and timestamps[0] != buckets[0]:
+        return bucket_ts[1:], result[1:]
+    return bucket_ts, result
+
+
+def resample_ohlcv(candles: Sequence[Sequence[float]], timeframe: str,
+                   drop_partial_first: bool = True) -> List[List[float]]:
+    """
+    Свечи ccxt [timestamp_ms, o, h, l, c, v] базового таймфрейма -> свечи timeframe
+
+    Последний старший бар может быть формирующимся (как и в ответе биржи).
+    """
+    if not len(candles):
+        return []
+
+    data = np.asarray(candles, dtype=np.float64)
+    timestamps, values = _aggregate(
+        data[:, 0].astype(np.int64), data[:, 1:6], TIMEFRAME_MS[timeframe], drop_partial_first
+    )
+    return [[int(ts)] + row for ts, row in zip(timestamps.tolist(), values.tolist())]
+
+
+def resample_frame(df: pd.DataFrame, timeframe: str, drop_partial_first: bool = True) -> pd.DataFrame:
+    """DataFrame свечей с индексом по времени -> DataFrame старшего таймфрейма"""
+    if df.empty:
+        return df
+
+    index = pd.DatetimeIndex(df.index)
+    utc = index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index
+    timestamps = utc.to_numpy().astype('datetime64[ms]').astype(np.int64)
+    bucket_ts, values = _aggregate(
+        timestamps, df[CANDLE_COLUMNS].to_numpy(dtype=np.float64), TIMEFRAME_MS[timeframe], drop_partial_first
+    )
+
+    result_index = pd.DatetimeIndex(bucket_ts.astype('datetime64[ms]').astype('datetime64[ns]'), name=index.name)
+    if index.tz is not None:
+        result_index = result_index.tz_localize('UTC').tz_convert(index.tz)
+    return pd.DataFrame(values, index=result_index, columns=CANDLE_COLUMNS)
+
+
+class CandleAggregator:
+    """
+    Формирующийся бар старшего таймфрейма из потока базовых свечей
+
+    Базовая свеча с тем же временем, что последняя, заменяет ее (поток
+    шлет формирующийся бар много раз), более новая фиксирует предыдущую
+    в агрегате. Обновление стоит O(1).
+    """
+
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self.period_ms = TIMEFRAME_MS[timeframe]
+
+        self.bucket: Optional[int] = None       # Время открытия текущего старшего бара
+        self._committed: Optional[List[float]] = None  # open/high/low/volume закрытых базовых свечей
+        self._last: Optional[List[float]] = None       # Последняя (возможно формирующаяся) базовая свеча
+
+    def update(self, candle: Sequence[float]) -> Tuple[Optional[List[float]], Optional[int]]:
+        """
+        Обновление базовой свечи
+
+        Returns:
+            (текущий старший бар в формате ccxt или None, если свеча
+            устарела; время открытия старшего бара, который закрылся
+            этой свечой, или None)
+        """
+        timestamp = int(candle[0])
+        if self._last is not None and timestamp < self._last[0]:
+            return None, None
+
+        if self._last is not None and timestamp > self._last[0]:
+            self._commit(self._last)
+
+        closed_bucket = None
+        bucket = timestamp - timestamp % self.period_ms
+        if self.bucket is not None and bucket > self.bucket:
+            closed_bucket = self.bucket
+            self._committed = None
+
+        self.bucket = bucket
+        self._last = [timestamp] + [float(v) for v in candle[1:6]]
+        return self.current(), closed_bucket
+
+    def _commit(self, candle: List[float]):
+        if self._committed is None:
+            self._committed = [candle[1], candle[2], candle[3], candle[5]]
+            return
+        committed = self._committed
+        committed[1] = max(committed[1], candle[2])
+        committed[2] = min(committed[2], candle[3])
+        committed[3] += candle[5]
+
+    def current(self) -> Optional[List[float]]:
+        """Текущий старший бар [timestamp_ms, o, h, l, c, v]"""
+        last = self._last
+        if last is None:
+            return None
+
+        committed = self._committed
+        if committed is None:
+            return [self.bucket] + last[1:6]
+        return [
+            self.bucket,
+            committed[0],
+            max(committed[1], last[2]),
+            min(committed[2], last[3]),
+            last[4],
+            committed[3] + last[5]
+        ]
+
+    def seed(self, candles: Sequence[Sequence[float]]):
+        """Состояние по истории базовых свечей (нужен только текущий старший бар)"""
+        self.bucket = None
+        self._committed = None
+        self._last = None
+        if not len(candles):
+            return
+
+        last_ts = int(candles[-1][0])
+        bucket = last_ts - last_ts % self.period_ms
+        for candle in candles:
+            if int(candle[0]) >= bucket:
+                self.update(candle)
+
+    def closes_with(self, base_timestamp: int, base_period_ms: int) -> bool:
+        """Закрывает ли закрытая базовая свеча текущий старший бар"""
+        return self.bucket is not None and base_timestamp + base_period_ms >= self.bucket + self.period_ms
+
+
+# Экспорт
+__all__ = ['CandleAggregator', 'can_resample', 'resample_ohlcv', 'resample_frame']
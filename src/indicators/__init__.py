@@ -3,9 +3,27 @@
 """
 from .technical_indicators import TechnicalIndicators, indicators
 from .ta_wrapper import *
+from .streaming import (
+    StreamingIndicator, StreamingSMA, StreamingEMA, StreamingRSI, StreamingMACD,
+    StreamingBollinger, StreamingATR, StreamingStochastic, StreamingOBV,
+    StreamingADX, StreamingIndicators
+)
 
 __all__ = ['TechnicalIndicators', 'indicators']
 
+from .context import IndicatorContext, IndicatorContextCache, indicator_contexts
+from .batch import BatchOHLCV, BatchIndicatorResult, calculate_batch
+from .candle_patterns import detect_patterns, latest_patterns
+from .support_resistance import SupportResistance, SupportResistanceTracker, find_levels
+
+# Потоковые индикаторы
+from .streaming import __all__ as streaming_all
+__all__.extend(streaming_all)
+__all__.extend(['IndicatorContext', 'IndicatorContextCache', 'indicator_contexts'])
+__all__.extend(['BatchOHLCV', 'BatchIndicatorResult', 'calculate_batch'])
+__all__.extend(['detect_patterns', 'latest_patterns'])
+__all__.extend(['SupportResistance', 'SupportResistanceTracker', 'find_levels'])
+
 # Экспортируем все функции из ta_wrapper для обратной совместимости
 from .ta_wrapper import __all__ as ta_all
 __all__.extend(ta_all)
@@ -0,0 +1,300 @@
+"""
+Пакетный расчет индикаторов сразу для многих пар
+Файл: src/indicators/batch.py
+
+Когда бар закрывается одновременно у 20-50 пар, расчет по отдельному
+DataFrame на каждую пару тратит больше времени на накладные расходы
+Python/pandas, чем на арифметику. Здесь каждое поле OHLCV - матрица
+float64 (пары x бары), и каждый индикатор считается одним векторным
+проходом по всем парам. Формулы совпадают с ручными реализациями
+ta_wrapper (EMA как ewm(adjust=False), RSI/ATR по Уайлдеру, std с ddof=1).
+
+Истории разной длины выравниваются по последнему бару, короткие
+дополняются NaN слева. Каждый примитив начинает расчет строки с ее
+первого значения, поэтому индикаторы пары не зависят от длины истории
+соседей и совпадают с расчетом по ее собственному DataFrame.
+
+Использование:
+    batch = BatchOHLCV.from_frames({'BTCUSDT': df1, 'ETHUSDT': df2})
+    result = calculate_batch(batch)
+    rsi_btc = result['rsi'][batch.row('BTCUSDT')]
+    df_btc = result.frame('BTCUSDT')
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ===== ВХОДНЫЕ ДАННЫЕ =====
+
+@dataclass
+class BatchOHLCV:
+    """Свечи многих пар в виде матриц (пары x бары) с общей осью времени"""
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    index: Optional[pd.Index] = None   # Время баров самой длинной истории (общая ось)
+    indexes: Dict[str, pd.Index] = field(default_factory=dict)   # Время баров каждой пары
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[str, pd.DataFrame], bars: Optional[int] = None) -> 'BatchOHLCV':
+        """
+        Сборка матриц из DataFrame по парам
+
+        Берутся последние bars свечей каждой пары (по умолчанию - вся
+        история). Строки выравниваются по последнему бару, короткие
+        истории дополняются NaN слева, а не обрезают остальные.
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and len(df)}
+        if not frames:
+            raise ValueError("Нет свечей для пакетного расчета")
+
+        length = max(len(df) for df in frames.values())
+        if bars is not None:
+            length = min(length, bars)
+
+        symbols = list(frames)
+        fields = {}
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            matrix = np.full((len(symbols), length), np.nan)
+            for row, symbol in enumerate(symbols):
+                values = frames[symbol][column].to_numpy(dtype=np.float64)[-length:]
+                matrix[row, length - len(values):] = values
+            fields[column] = matrix
+
+        indexes = {symbol: frames[symbol].index[-length:] for symbol in symbols}
+        longest = max(symbols, key=lambda symbol: len(indexes[symbol]))
+        return cls(symbols=symbols, index=indexes[longest], indexes=indexes, **fields)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.close.shape
+
+    def row(self, symbol: str) -> int:
+        """Номер строки пары"""
+        return self.symbols.index(symbol)
+
+    def bars(self, symbol: str) -> int:
+        """Сколько последних столбцов строки пары заполнено"""
+        index = self.indexes.get(symbol)
+        return len(index) if index is not None else self.shape[1]
+
+
+# ===== ПРИМИТИВЫ ПО ОСИ БАРОВ =====
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    """Индекс первого не-NaN значения каждой строки (длина строки, если таких нет)"""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), values.shape[1])
+
+
+def _nan_prefix(values: np.ndarray, width: int) -> np.ndarray:
+    """Результат окна шириной width, выровненный по правому краю"""
+    result = np.full(values.shape[:-1] + (values.shape[-1] + width - 1,), np.nan)
+    result[..., width - 1:] = values
+    return result
+
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Скользящее среднее по строкам (как pandas rolling(period).mean())"""
+    if values.shape[1] < period:
+        return np.full(values.shape, np.nan)
+    return _nan_prefix(sliding_window_view(values, period, axis=1).mean(axis=-1), period)
+
+
+def rolling_std(values: np.ndarray, period: int, ddof: int = 1) -> np.ndarray:
+    """Скользящее стандартное отклонение по строкам"""
+    if values.shape[1] < period:
+        return np.full(values.shape, np.nan)
+    return _nan_prefix(sliding_window_view(values, period, axis=1).std(axis=-1, ddof=ddof), period)
+
+
+def rolling_max(values: np.ndarray, period: int) -> np.ndarray:
+    if values.shape[1] < period:
+        return np.full(values.shape, np.nan)
+    return _nan_prefix(sliding_window_view(values, period, axis=1).max(axis=-1), period)
+
+
+def rolling_min(values: np.ndarray, period: int) -> np.ndarray:
+    if values.shape[1] < period:
+        return np.full(values.shape, np.nan)
+    return _nan_prefix(sliding_window_view(values, period, axis=1).min(axis=-1), period)
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA по строкам (как pandas ewm(span=period, adjust=False))"""
+    # pandas считает рекурсию по столбцам в Cython - транспонируем
+    return pd.DataFrame(values.T).ewm(span=period, adjust=False).mean().to_numpy().T
+
+
+def wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Сглаживание Уайлдера по строкам: старт со среднего за первые period значений строки"""
+    result = np.full(values.shape, np.nan)
+    bars = values.shape[1]
+    first = _first_valid(values)
+    seed = first + period - 1
+    rows = np.flatnonzero(seed < bars)
+    if not rows.size:
+        return result
+
+    # До затравки - NaN (ewm их пропускает), в затравке - среднее окна строки
+    seeded = values[rows].copy()
+    seeded[np.arange(bars) < seed[rows, None]] = np.nan
+    window = np.take_along_axis(values[rows], first[rows, None] + np.arange(period), axis=1)
+    seeded[np.arange(len(rows)), seed[rows]] = window.mean(axis=1)
+    result[rows] = pd.DataFrame(seeded.T).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy().T
+    return result
+
+
+# ===== ИНДИКАТОРЫ =====
+
+def batch_sma(close: np.ndarray, period: int = 30) -> np.ndarray:
+    return rolling_mean(close, period)
+
+
+def batch_ema(close: np.ndarray, period: int = 30) -> np.ndarray:
+    return ema(close, period)
+
+
+def batch_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI по Уайлдеру"""
+    result = np.full(close.shape, np.nan)
+    if close.shape[1] <= period:
+        return result
+
+    delta = np.diff(close, axis=1)
+    # NaN дополнения коротких историй не должны становиться нулями
+    padding = np.isnan(delta)
+    gain = wilder(np.where(padding, np.nan, np.where(delta > 0, delta, 0.0)), period)
+    loss = wilder(np.where(padding, np.nan, np.where(delta < 0, -delta, 0.0)), period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[:, 1:] = 100 * gain / (gain + loss)
+    return result
+
+
+def batch_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """ATR по Уайлдеру (True Range со второго бара)"""
+    result = np.full(close.shape, np.nan)
+    if close.shape[1] <= period:
+        return result
+
+    prev_close = close[:, :-1]
+    tr = np.maximum(
+        high[:, 1:] - low[:, 1:],
+        np.maximum(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close))
+    )
+    result[:, 1:] = wilder(tr, period)
+    return result
+
+
+def batch_bbands(close: np.ndarray, period: int = 20,
+                 nbdevup: float = 2, nbdevdn: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands: (upper, middle, lower)"""
+    middle = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    return middle + std * nbdevup, middle, middle - std * nbdevdn
+
+
+def batch_macd(close: np.ndarray, fast: int = 12, slow: int = 26,
+               signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD: (macd, signal, histogram)"""
+    macd = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd, signal)
+    return macd, signal_line, macd - signal_line
+
+
+def batch_stoch(high: np.ndarray, low: np.ndarray, close: np.ndarray, fastk_period: int = 14,
+                slowk_period: int = 3, slowd_period: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Stochastic: (slow %K, slow %D)"""
+    highest = rolling_max(high, fastk_period)
+    lowest = rolling_min(low, fastk_period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_range = highest - lowest
+        fast_k = np.where(price_range != 0, 100 * (close - lowest) / price_range, np.nan)
+
+    slow_k = rolling_mean(fast_k, slowk_period)
+    return slow_k, rolling_mean(slow_k, slowd_period)
+
+
+def batch_obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """OBV как в TA-Lib: первый бар +volume, без изменения цены - 0"""
+    direction = np.sign(np.diff(close, axis=1, prepend=np.nan))
+    first = _first_valid(close)
+    rows = np.flatnonzero(first < close.shape[1])
+    direction[rows, first[rows]] = 1.0
+
+    # Дополнение коротких историй не входит в сумму и остается NaN
+    padding = np.arange(close.shape[1]) < first[:, None]
+    flow = np.where(padding, 0.0, volume * direction)
+    return np.where(padding, np.nan, np.cumsum(flow, axis=1))
+
+
+# ===== НАБОР КАК В calculate_all =====
+
+class BatchIndicatorResult(dict):
+    """Матрицы индикаторов {имя: (пары x бары)} с доступом по паре"""
+
+    def __init__(self, batch: BatchOHLCV, values: Dict[str, np.ndarray]):
+        super().__init__(values)
+        self.batch = batch
+
+    def last(self, symbol: str) -> Dict[str, float]:
+        """Значения на последнем баре пары"""
+        row = self.batch.row(symbol)
+        return {name: float(matrix[row, -1]) for name, matrix in self.items()}
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Индикаторы пары как DataFrame с колонками calculate_all (без дополнения NaN)"""
+        row = self.batch.row(symbol)
+        bars = self.batch.bars(symbol)
+        index = self.batch.indexes.get(symbol, self.batch.index)
+        return pd.DataFrame({name: matrix[row, -bars:] for name, matrix in self.items()}, index=index)
+
+
+def calculate_batch(batch: BatchOHLCV) -> BatchIndicatorResult:
+    """
+    Все индикаторы TechnicalIndicators.calculate_all для всех пар сразу
+
+    Returns:
+        Матрицы с теми же именами колонок, что и calculate_all
+    """
+    close = batch.close
+    macd, macd_signal, macd_hist = batch_macd(close)
+    bb_upper, bb_middle, bb_lower = batch_bbands(close, 20, 2, 2)
+    stoch_k, stoch_d = batch_stoch(batch.high, batch.low, close, 14, 3, 3)
+
+    return BatchIndicatorResult(batch, {
+        'sma_10': batch_sma(close, 10),
+        'sma_20': batch_sma(close, 20),
+        'sma_50': batch_sma(close, 50),
+        'ema_12': batch_ema(close, 12),
+        'ema_26': batch_ema(close, 26),
+        'rsi': batch_rsi(close, 14),
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'macd_hist': macd_hist,
+        'bb_upper': bb_upper,
+        'bb_middle': bb_middle,
+        'bb_lower': bb_lower,
+        'atr': batch_atr(batch.high, batch.low, close, 14),
+        'stoch_k': stoch_k,
+        'stoch_d': stoch_d,
+        'volume_sma': batch_sma(batch.volume, 20),
+        'obv': batch_obv(close, batch.volume)
+    })
+
+
+# Экспорт
+__all__ = [
+    'BatchOHLCV', 'BatchIndicatorResult', 'calculate_batch',
+    'batch_sma', 'batch_ema', 'batch_rsi', 'batch_atr', 'batch_bbands',
+    'batch_macd', 'batch_stoch', 'batch_obv'
+]
@@ -0,0 +1,546 @@
+"""
+Бенчмарк и сверка бэкендов индикаторов
+Файл: src/indicators/benchmark.py
+
+ta_wrapper молча переключается между TA-Lib и ручными реализациями,
+TechnicalIndicators - между pandas_ta и ta_wrapper, а стратегии
+используют еще и библиотеку ta. Здесь каждый индикатор считается всеми
+доступными бэкендами на одних и тех же синтетических свечах разной
+длины и с разными периодами: замеряется время и расхождение с эталоном
+(TA-Lib, если установлен, иначе ручные реализации ta_wrapper).
+
+Отчет - JSON, который можно сохранять от релиза к релизу и сравнивать
+через compare_reports. Запуск: python scripts/benchmark_indicators.py
+"""
+import contextlib
+import json
+import platform
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import ta_wrapper
+from . import batch as batch_backend
+from . import streaming
+
+try:
+    import talib
+except ImportError:
+    talib = None
+
+try:
+    import pandas_ta
+except ImportError:
+    pandas_ta = None
+
+try:
+    import ta as ta_lib
+except ImportError:
+    ta_lib = None
+
+DEFAULT_SIZES = (200, 1000, 10000)
+DEFAULT_PERIODS = (14, 50)
+DEFAULT_TOLERANCE = 1e-6
+
+Outputs = Tuple[np.ndarray, ...]
+
+
+# =========================================================================
+# === ИНДИКАТОРЫ И БЭКЕНДЫ ===
+# =========================================================================
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """Описание индикатора для бенчмарка"""
+    name: str
+    outputs: Tuple[str, ...]
+    periodic: bool = True          # Перебирать ли периоды
+    recursive: bool = True         # Зависит ли значение от всей истории (EMA, Уайлдер)
+    fixed_warmup: int = 0          # Прогрев для индикаторов без периода
+
+    def warmup(self, period: Optional[int], size: Optional[int] = None) -> int:
+        """
+        Сколько первых баров не сравнивать: бэкенды по-разному
+        инициализируют рекурсию (EMA с первого значения или со среднего),
+        и расхождение затухает только через ~20 периодов
+
+        Не больше половины ряда - иначе на рабочем окне (200 баров)
+        сравнивать было бы нечего
+        """
+        if not period:
+            warmup = self.fixed_warmup
+        else:
+            warmup = 20 * period if self.recursive else period
+        return warmup if size is None else min(warmup, size // 2)
+
+
+INDICATORS: Tuple[IndicatorSpec, ...] = (
+    IndicatorSpec('SMA', ('sma',), recursive=False),
+    IndicatorSpec('EMA', ('ema',)),
+    IndicatorSpec('RSI', ('rsi',)),
+    IndicatorSpec('ATR', ('atr',)),
+    IndicatorSpec('ADX', ('adx',)),
+    IndicatorSpec('BBANDS', ('upper', 'middle', 'lower'), recursive=False),
+    IndicatorSpec('MACD', ('macd', 'signal', 'hist'), periodic=False, fixed_warmup=520),
+    IndicatorSpec('STOCH', ('slowk', 'slowd'), periodic=False, fixed_warmup=20),
+    IndicatorSpec('OBV', ('obv',), periodic=False, fixed_warmup=0),
+)
+
+
+@contextlib.contextmanager
+def _forced_fallback():
+    """Ручные реализации ta_wrapper даже при установленном TA-Lib"""
+    saved = ta_wrapper.USE_TALIB
+    ta_wrapper.USE_TALIB = False
+    try:
+        yield
+    finally:
+        ta_wrapper.USE_TALIB = saved
+
+
+def _fallback_adapters() -> Dict[str, Callable]:
+    w = ta_wrapper
+
+    def call(func):
+        def run(d, p):
+            with _forced_fallback():
+                return func(d, p)
+        return run
+
+    return {
+        'SMA': call(lambda d, p: w.SMA(d['close'], p)),
+        'EMA': call(lambda d, p: w.EMA(d['close'], p)),
+        'RSI': call(lambda d, p: w.RSI(d['close'], p)),
+        'ATR': call(lambda d, p: w.ATR(d['high'], d['low'], d['close'], p)),
+        'ADX': call(lambda d, p: w.ADX(d['high'], d['low'], d['close'], p)),
+        'BBANDS': call(lambda d, p: w.BBANDS(d['close'], p, 2, 2)),
+        'MACD': call(lambda d, p: w.MACD(d['close'], 12, 26, 9)),
+        'STOCH': call(lambda d, p: w.STOCH(d['high'], d['low'], d['close'], 14, 3, 0, 3, 0)),
+        'OBV': call(lambda d, p: w.OBV(d['close'], d['volume'])),
+    }
+
+
+def _talib_adapters() -> Dict[str, Callable]:
+    return {
+        'SMA': lambda d, p: talib.SMA(d['close'], p),
+        'EMA': lambda d, p: talib.EMA(d['close'], p),
+        'RSI': lambda d, p: talib.RSI(d['close'], p),
+        'ATR': lambda d, p: talib.ATR(d['high'], d['low'], d['close'], p),
+        'ADX': lambda d, p: talib.ADX(d['high'], d['low'], d['close'], p),
+        'BBANDS': lambda d, p: talib.BBANDS(d['close'], p, 2, 2, 0),
+        'MACD': lambda d, p: talib.MACD(d['close'], 12, 26, 9),
+        'STOCH': lambda d, p: talib.STOCH(d['high'], d['low'], d['close'], 14, 3, 0, 3, 0),
+        'OBV': lambda d, p: talib.OBV(d['close'], d['volume']),
+    }
+
+
+def _pick(frame: pd.DataFrame, *prefixes: str) -> Outputs:
+    """Колонки результата pandas_ta по префиксам имен (имена зависят от версии)"""
+    return tuple(
+        next(frame[c] for c in frame.columns if c.startswith(prefix)).to_numpy()
+        for prefix in prefixes
+    )
+
+
+def _pandas_ta_adapters() -> Dict[str, Callable]:
+    pta = pandas_ta
+    return {
+        'SMA': lambda d, p: pta.sma(d['close_s'], length=p),
+        'EMA': lambda d, p: pta.ema(d['close_s'], length=p),
+        'RSI': lambda d, p: pta.rsi(d['close_s'], length=p),
+        'ATR': lambda d, p: pta.atr(d['high_s'], d['low_s'], d['close_s'], length=p),
+        'ADX': lambda d, p: _pick(pta.adx(d['high_s'], d['low_s'], d['close_s'], length=p), 'ADX'),
+        'BBANDS': lambda d, p: _pick(pta.bbands(d['close_s'], length=p, std=2), 'BBU', 'BBM', 'BBL'),
+        'MACD': lambda d, p: _pick(pta.macd(d['close_s'], 12, 26, 9), 'MACD_', 'MACDs', 'MACDh'),
+        'STOCH': lambda d, p: _pick(pta.stoch(d['high_s'], d['low_s'], d['close_s'], k=14, d=3, smooth_k=3),
+                                    'STOCHk', 'STOCHd'),
+        'OBV': lambda d, p: pta.obv(d['close_s'], d['volume_s']),
+    }
+
+
+def _ta_adapters() -> Dict[str, Callable]:
+    t = ta_lib
+
+    def macd(d, p):
+        m = t.trend.MACD(d['close_s'], window_slow=26, window_fast=12, window_sign=9)
+        return m.macd(), m.macd_signal(), m.macd_diff()
+
+    def bbands(d, p):
+        bb = t.volatility.BollingerBands(d['close_s'], window=p, window_dev=2)
+        return bb.bollinger_hband(), bb.bollinger_mavg(), bb.bollinger_lband()
+
+    def stoch(d, p):
+        st = t.momentum.StochasticOscillator(d['high_s'], d['low_s'], d['close_s'], window=14, smooth_window=3)
+        return st.stoch(), st.stoch_signal()
+
+    return {
+        'SMA': lambda d, p: t.trend.SMAIndicator(d['close_s'], window=p).sma_indicator(),
+        'EMA': lambda d, p: t.trend.EMAIndicator(d['close_s'], window=p).ema_indicator(),
+        'RSI': lambda d, p: t.momentum.RSIIndicator(d['close_s'], window=p).rsi(),
+        'ATR': lambda d, p: t.volatility.AverageTrueRange(
+            d['high_s'], d['low_s'], d['close_s'], window=p).average_true_range(),
+        'ADX': lambda d, p: t.trend.ADXIndicator(d['high_s'], d['low_s'], d['close_s'], window=p).adx(),
+        'BBANDS': bbands,
+        'MACD': macd,
+        'STOCH': stoch,
+        'OBV': lambda d, p: t.volume.OnBalanceVolumeIndicator(d['close_s'], d['volume_s']).on_balance_volume(),
+    }
+
+
+def _batch_adapters() -> Dict[str, Callable]:
+    b = batch_backend
+
+    def rows(result):
+        if isinstance(result, tuple):
+            return tuple(r[0] for r in result)
+        return result[0]
+
+    return {
+        'SMA': lambda d, p: rows(b.batch_sma(d['close_2d'], p)),
+        'EMA': lambda d, p: rows(b.batch_ema(d['close_2d'], p)),
+        'RSI': lambda d, p: rows(b.batch_rsi(d['close_2d'], p)),
+        'ATR': lambda d, p: rows(b.batch_atr(d['high_2d'], d['low_2d'], d['close_2d'], p)),
+        'BBANDS': lambda d, p: rows(b.batch_bbands(d['close_2d'], p, 2, 2)),
+        'MACD': lambda d, p: rows(b.batch_macd(d['close_2d'], 12, 26, 9)),
+        'STOCH': lambda d, p: rows(b.batch_stoch(d['high_2d'], d['low_2d'], d['close_2d'], 14, 3, 3)),
+        'OBV': lambda d, p: rows(b.batch_obv(d['close_2d'], d['volume_2d'])),
+    }
+
+
+def _streaming_adapters() -> Dict[str, Callable]:
+    s = streaming
+
+    def replay(factory):
+        def run(d, p):
+            indicator = factory(p)
+            return np.array([indicator.update(bar) for bar in d['bars']], dtype=float).T
+        return run
+
+    return {
+        'SMA': replay(lambda p: s.StreamingSMA(p)),
+        'EMA': replay(lambda p: s.StreamingEMA(p)),
+        'RSI': replay(lambda p: s.StreamingRSI(p)),
+        'ATR': replay(lambda p: s.StreamingATR(p)),
+        'ADX': lambda d, p: replay(lambda p: s.StreamingADX(p))(d, p)[0],
+        'BBANDS': replay(lambda p: s.StreamingBollinger(p, 2, 2)),
+        'MACD': replay(lambda p: s.StreamingMACD(12, 26, 9)),
+        'STOCH': replay(lambda p: s.StreamingStochastic(14, 3, 3)),
+        'OBV': replay(lambda p: s.StreamingOBV()),
+    }
+
+
+def available_backends() -> Dict[str, Dict[str, Callable]]:
+    """Бэкенды, доступные в текущем окружении: {имя: {индикатор: функция}}"""
+    backends = {'fallback': _fallback_adapters()}
+    if talib is not None:
+        backends['talib'] = _talib_adapters()
+    if pandas_ta is not None:
+        backends['pandas_ta'] = _pandas_ta_adapters()
+    if ta_lib is not None:
+        backends['ta'] = _ta_adapters()
+    backends['numpy_batch'] = _batch_adapters()
+    backends['streaming'] = _streaming_adapters()
+    return backends
+
+
+# =========================================================================
+# === ДАННЫЕ, ЗАМЕРЫ, СВЕРКА ===
+# =========================================================================
+
+def synthetic_ohlcv(size: int, seed: int = 42) -> Dict[str, object]:
+    """Воспроизводимые свечи (геометрическое броуновское движение) во всех нужных бэкендам видах"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    open_ = close * (1 + rng.normal(0, 0.002, size))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.003, size)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.003, size)))
+    volume = rng.uniform(10, 1000, size)
+
+    data: Dict[str, object] = {}
+    for name, values in (('open', open_), ('high', high), ('low', low), ('close', close), ('volume', volume)):
+        data[name] = values
+        data[f'{name}_s'] = pd.Series(values)
+        data[f'{name}_2d'] = values[np.newaxis, :]
+    data['bars'] = [
+        {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for o, h, l, c, v in zip(open_, high, low, close, volume)
+    ]
+    return data
+
+
+def _as_outputs(result) -> Outputs:
+    if isinstance(result, (tuple, list)):
+        return tuple(np.asarray(r, dtype=float) for r in result)
+    result = np.asarray(result, dtype=float)
+    return tuple(result) if result.ndim == 2 else (result,)
+
+
+def time_call(func: Callable[[], object], min_time: float = 0.05, repeat: int = 3) -> float:
+    """Лучшее время одного вызова в секундах"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1024:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def max_error(result: Outputs, reference: Outputs, warmup: int) -> Optional[float]:
+    """
+    Максимальное расхождение после прогрева, нормированное на масштаб
+    эталонного ряда. None - сравнивать нечего (ряд короче прогрева)
+    """
+    worst = None
+    for values, expected in zip(result, reference):
+        values, expected = values[warmup:], expected[warmup:]
+        mask = ~np.isnan(expected)
+        if not mask.any():
+            continue
+        scale = np.max(np.abs(expected[mask])) or 1.0
+        diff = np.abs(values[mask] - expected[mask])
+        error = float(np.inf) if np.isnan(diff).any() else float(np.max(diff) / scale)
+        worst = error if worst is None else max(worst, error)
+    return worst
+
+
+@dataclass
+class BenchmarkResult:
+    """Один замер: индикатор x период x размер x бэкенд"""
+    indicator: str
+    period: Optional[int]
+    size: int
+    backend: str
+    time_us: float
+    per_bar_ns: float
+    max_error: Optional[float]
+    passed: Optional[bool]
+    error: Optional[str] = None
+
+
+@dataclass
+class BenchmarkReport:
+    """Отчет бенчмарка"""
+    generated_at: str
+    environment: Dict[str, str]
+    reference: str
+    tolerance: float
+    results: List[BenchmarkResult] = field(default_factory=list)
+    recommendations: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'BenchmarkReport':
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+        raw['results'] = [BenchmarkResult(**r) for r in raw['results']]
+        return cls(**raw)
+
+
+def _environment() -> Dict[str, str]:
+    def version(module) -> str:
+        return getattr(module, '__version__', 'unknown') if module is not None else 'not installed'
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'talib': version(talib),
+        'pandas_ta': version(pandas_ta),
+        'ta': version(ta_lib),
+    }
+
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    periods: Sequence[int] = DEFAULT_PERIODS,
+    indicators: Optional[Iterable[str]] = None,
+    backends: Optional[Iterable[str]] = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_time: float = 0.05,
+    progress: Optional[Callable[[str], None]] = None
+) -> BenchmarkReport:
+    """
+    Замер времени и сверка всех индикаторов всеми бэкендами
+
+    Args:
+        sizes: Длины рядов
+        periods: Периоды для индикаторов с периодом
+        indicators: Ограничить набор индикаторов (по умолчанию все)
+        backends: Ограничить набор бэкендов (по умолчанию все доступные)
+        tolerance: Допустимое нормированное расхождение с эталоном
+        min_time: Минимальная длительность одного замера, с
+        progress: Функция для вывода прогресса
+    """
+    all_backends = available_backends()
+    reference = 'talib' if 'talib' in all_backends else 'fallback'
+    selected = [b for b in all_backends if backends is None or b in backends or b == reference]
+    specs = [s for s in INDICATORS if indicators is None or s.name in indicators]
+
+    report = BenchmarkReport(
+        generated_at=datetime.utcnow().isoformat(timespec='seconds'),
+        environment=_environment(),
+        reference=reference,
+        tolerance=tolerance
+    )
+
+    for size in sizes:
+        data = synthetic_ohlcv(size)
+
+        for spec in specs:
+            for period in (periods if spec.periodic else (None,)):
+                reference_outputs = _as_outputs(all_backends[reference][spec.name](data, period))
+
+                for backend in selected:
+                    adapter = all_backends[backend].get(spec.name)
+                    if adapter is None:
+                        continue
+
+                    label = f"{spec.name}({period or ''}) n={size} {backend}"
+                    try:
+                        outputs = _as_outputs(adapter(data, period))
+                        seconds = time_call(lambda: adapter(data, period), min_time=min_time)
+                    except Exception as e:
+                        report.results.append(BenchmarkResult(
+                            spec.name, period, size, backend, 0.0, 0.0, None, False, error=str(e)
+                        ))
+                        if progress:
+                            progress(f"❌ {label}: {e}")
+                        continue
+
+                    error = max_error(outputs, reference_outputs, spec.warmup(period, size))
+                    passed = None if error is None else error <= tolerance
+                    report.results.append(BenchmarkResult(
+                        indicator=spec.name,
+                        period=period,
+                        size=size,
+                        backend=backend,
+                        time_us=round(seconds * 1e6, 2),
+                        per_bar_ns=round(seconds * 1e9 / size, 2),
+                        max_error=error,
+                        passed=passed
+                    ))
+                    if progress:
+                        mark = '✅' if passed else ('➖' if passed is None else '❌')
+                        progress(f"{mark} {label}: {seconds * 1e6:.1f} мкс")
+
+    report.recommendations = recommend_backends(report)
+    return report
+
+
+def recommend_backends(report: BenchmarkReport) -> Dict[str, str]:
+    """
+    Самый быстрый корректный бэкенд для каждого индикатора: среди
+    бэкендов, прошедших сверку с эталоном во всех замерах, - с минимальным
+    суммарным временем. Замер без сверки (passed=None) не подтверждает
+    корректность, и такой бэкенд не рекомендуется
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    failed: Dict[str, set] = {}
+
+    for r in report.results:
+        if r.passed is not True:
+            failed.setdefault(r.indicator, set()).add(r.backend)
+        totals.setdefault(r.indicator, {}).setdefault(r.backend, 0.0)
+        totals[r.indicator][r.backend] += r.time_us
+
+    recommendations = {}
+    for indicator, by_backend in totals.items():
+        candidates = {b: t for b, t in by_backend.items() if b not in failed.get(indicator, set())}
+        if candidates:
+            recommendations[indicator] = min(candidates, key=candidates.get)
+    return recommendations
+
+
+# =========================================================================
+# === ОТЧЕТЫ ===
+# =========================================================================
+
+def format_report(report: BenchmarkReport) -> str:
+    """Отчет в markdown"""
+    lines = [
+        f"# Бенчмарк индикаторов ({report.generated_at} UTC)",
+        "",
+        "Окружение: " + ", ".join(f"{k} {v}" for k, v in report.environment.items()),
+        f"Эталон: {report.reference}, допуск {report.tolerance:g}",
+        "",
+        "| Индикатор | Период | Бары | Бэкенд | Время, мкс | нс/бар | Расхождение | Сверка |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for r in report.results:
+        error = '-' if r.max_error is None else f"{r.max_error:.1e}"
+        status = r.error or ('OK' if r.passed else ('n/a' if r.passed is None else 'FAIL'))
+        lines.append(
+            f"| {r.indicator} | {r.period or '-'} | {r.size} | {r.backend} | "
+            f"{r.time_us:.1f} | {r.per_bar_ns:.1f} | {error} | {status} |"
+        )
+
+    lines += ["", "## Рекомендуемый бэкенд", ""]
+    lines += [f"- {indicator}: {backend}" for indicator, backend in sorted(report.recommendations.items())]
+    return "\n".join(lines)
+
+
+def compare_reports(current: BenchmarkReport, baseline: BenchmarkReport, threshold: float = 1.2) -> List[str]:
+    """
+    Изменения относительно прошлого отчета: замедления и ускорения
+    больше чем в threshold раз и изменения результата сверки
+    """
+    def key(r: BenchmarkResult):
+        return (r.indicator, r.period, r.size, r.backend)
+
+    previous = {key(r): r for r in baseline.results}
+    changes = []
+
+    for r in current.results:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+
+        label = f"{r.indicator}({r.period or ''}) n={r.size} {r.backend}"
+        if old.time_us > 0 and r.time_us > 0:
+            ratio = r.time_us / old.time_us
+            if ratio >= threshold:
+                changes.append(f"🐢 {label}: медленнее в {ratio:.2f} раза ({old.time_us:.1f} → {r.time_us:.1f} мкс)")
+            elif ratio <= 1 / threshold:
+                changes.append(f"🚀 {label}: быстрее в {1 / ratio:.2f} раза ({old.time_us:.1f} → {r.time_us:.1f} мкс)")
+
+        if old.passed is not False and r.passed is False:
+            changes.append(f"❌ {label}: сверка перестала проходить (расхождение {r.max_error})")
+        elif old.passed is False and r.passed:
+            changes.append(f"✅ {label}: сверка снова проходит")
+
+    for indicator, backend in current.recommendations.items():
+        old_backend = baseline.recommendations.get(indicator)
+        if old_backend and old_backend != backend:
+            changes.append(f"🔁 {indicator}: рекомендуемый бэкенд {old_backend} → {backend}")
+
+    return changes
+
+
+# Экспорт
+__all__ = [
+    'INDICATORS', 'IndicatorSpec', 'BenchmarkResult', 'BenchmarkReport',
+    'available_backends', 'run_benchmark', 'recommend_backends',
+    'format_report', 'compare_reports', 'synthetic_ohlcv'
+]
@@ -0,0 +1,309 @@
+"""
+Векторные свечные паттерны на NumPy
+Файл: src/indicators/candle_patterns.py
+
+pandas_ta cdl_pattern(name="all") проверяет 60+ паттернов, из которых
+используется десяток. Здесь считаются только запрошенные паттерны,
+а общие величины (тело, тени, средние размеры за прошлые бары) -
+один раз на вызов. Правила и результат как у TA-Lib CDL*:
++100 бычий сигнал, -100 медвежий, 0 - паттерна нет.
+
+Использование:
+    patterns = detect_patterns(df, ['doji', 'hammer', 'engulfing'])
+    latest = latest_patterns(df)          # только последний бар
+"""
+from functools import cached_property
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Средние размеры свечей берутся за AVG_PERIOD прошлых баров (как в TA-Lib)
+AVG_PERIOD = 10
+NEAR_PERIOD = 5
+
+# Сколько последних баров нужно для точного расчета паттернов последнего бара
+LOOKBACK = AVG_PERIOD + 3
+
+# Проникновение третьей свечи в тело первой для звезд
+STAR_PENETRATION = 0.3
+
+
+class CandleGeometry:
+    """Размеры свечей и их средние, вычисляемые по требованию"""
+
+    def __init__(self, open, high, low, close):
+        self.open = np.asarray(open, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.close = np.asarray(close, dtype=float)
+        self.size = len(self.close)
+
+    @cached_property
+    def body(self) -> np.ndarray:
+        return np.abs(self.close - self.open)
+
+    @cached_property
+    def range(self) -> np.ndarray:
+        return self.high - self.low
+
+    @cached_property
+    def top(self) -> np.ndarray:
+        return np.maximum(self.open, self.close)
+
+    @cached_property
+    def bottom(self) -> np.ndarray:
+        return np.minimum(self.open, self.close)
+
+    @cached_property
+    def upper_shadow(self) -> np.ndarray:
+        return self.high - self.top
+
+    @cached_property
+    def lower_shadow(self) -> np.ndarray:
+        return self.bottom - self.low
+
+    @cached_property
+    def white(self) -> np.ndarray:
+        return self.close >= self.open
+
+    @cached_property
+    def black(self) -> np.ndarray:
+        return self.close < self.open
+
+    def shift(self, values: np.ndarray, periods: int = 1) -> np.ndarray:
+        """Значение periods баров назад (NaN/False в начале ряда)"""
+        if periods == 0:
+            return values
+        result = np.empty_like(values)
+        result[:periods] = False if values.dtype == bool else np.nan
+        result[periods:] = values[:-periods]
+        return result
+
+    def _trailing_mean(self, values: np.ndarray, period: int) -> np.ndarray:
+        """Среднее за period баров ДО текущего"""
+        cumsum = np.concatenate(([0.0], np.cumsum(values)))
+        result = np.full(self.size, np.nan)
+        if self.size > period:
+            result[period:] = (cumsum[period:-1] - cumsum[:-period - 1]) / period
+        return result
+
+    @cached_property
+    def avg_body(self) -> np.ndarray:
+        return self._trailing_mean(self.body, AVG_PERIOD)
+
+    @cached_property
+    def avg_range(self) -> np.ndarray:
+        return self._trailing_mean(self.range, AVG_PERIOD)
+
+    @cached_property
+    def avg_near(self) -> np.ndarray:
+        return self._trailing_mean(self.range, NEAR_PERIOD) * 0.2
+
+    # Настройки свечей TA-Lib: тело длинное/короткое, доджи, очень короткая тень
+    def long_body(self, shift: int = 0) -> np.ndarray:
+        return self.shift(self.body, shift) > self.shift(self.avg_body, shift)
+
+    def short_body(self, shift: int = 0) -> np.ndarray:
+        return self.shift(self.body, shift) < self.shift(self.avg_body, shift)
+
+    @cached_property
+    def doji_body(self) -> np.ndarray:
+        return self.body <= self.avg_range * 0.1
+
+    @cached_property
+    def very_short_upper(self) -> np.ndarray:
+        return self.upper_shadow < self.avg_range * 0.1
+
+    @cached_property
+    def very_short_lower(self) -> np.ndarray:
+        return self.lower_shadow < self.avg_range * 0.1
+
+
+def _signal(bullish: Optional[np.ndarray] = None, bearish: Optional[np.ndarray] = None) -> np.ndarray:
+    result = np.zeros(len(bullish if bullish is not None else bearish), dtype=int)
+    if bullish is not None:
+        result[bullish] = 100
+    if bearish is not None:
+        result[bearish] = -100
+    return result
+
+
+# ===== ПАТТЕРНЫ =====
+
+def _doji(g: CandleGeometry) -> np.ndarray:
+    return _signal(g.doji_body)
+
+
+def _hammer_shape(g: CandleGeometry) -> np.ndarray:
+    """Короткое тело, длинная нижняя тень, почти нет верхней"""
+    return g.short_body() & (g.lower_shadow > g.body) & g.very_short_upper
+
+
+def _inverted_shape(g: CandleGeometry) -> np.ndarray:
+    """Короткое тело, длинная верхняя тень, почти нет нижней"""
+    return g.short_body() & (g.upper_shadow > g.body) & g.very_short_lower
+
+
+def _hammer(g: CandleGeometry) -> np.ndarray:
+    # Тело у минимума предыдущей свечи или ниже
+    return _signal(_hammer_shape(g) & (g.bottom <= g.shift(g.low) + g.avg_near))
+
+
+def _hanging_man(g: CandleGeometry) -> np.ndarray:
+    # Тело у максимума предыдущей свечи или выше
+    return _signal(bearish=_hammer_shape(g) & (g.bottom >= g.shift(g.high) - g.avg_near))
+
+
+def _inverted_hammer(g: CandleGeometry) -> np.ndarray:
+    # Гэп вниз по телу
+    return _signal(_inverted_shape(g) & (g.top < g.shift(g.bottom)))
+
+
+def _shooting_star(g: CandleGeometry) -> np.ndarray:
+    # Гэп вверх по телу
+    return _signal(bearish=_inverted_shape(g) & (g.bottom > g.shift(g.top)))
+
+
+def _engulfing(g: CandleGeometry) -> np.ndarray:
+    prev_open, prev_close = g.shift(g.open), g.shift(g.close)
+    prev_white, prev_black = g.shift(g.white), g.shift(g.black)
+
+    bullish = g.white & prev_black & (
+        ((g.close >= prev_open) & (g.open < prev_close)) | ((g.close > prev_open) & (g.open <= prev_close))
+    )
+    bearish = g.black & prev_white & (
+        ((g.open >= prev_close) & (g.close < prev_open)) | ((g.open > prev_close) & (g.close <= prev_open))
+    )
+    return _signal(bullish, bearish)
+
+
+def _star(g: CandleGeometry, bullish: bool) -> np.ndarray:
+    """Утренняя (bullish) или вечерняя звезда"""
+    first_close, first_body = g.shift(g.close, 2), g.shift(g.body, 2)
+    first_color = g.shift(g.black if bullish else g.white, 2)
+    third_color = g.white if bullish else g.black
+
+    pattern = g.long_body(2) & first_color & g.short_body(1) & third_color & (g.body > g.avg_body)
+    if bullish:
+        pattern &= (g.shift(g.top) < first_close) & (g.close > first_close + first_body * STAR_PENETRATION)
+        return _signal(pattern)
+
+    pattern &= (g.shift(g.bottom) > first_close) & (g.close < first_close - first_body * STAR_PENETRATION)
+    return _signal(bearish=pattern)
+
+
+def _morning_star(g: CandleGeometry) -> np.ndarray:
+    return _star(g, bullish=True)
+
+
+def _evening_star(g: CandleGeometry) -> np.ndarray:
+    return _star(g, bullish=False)
+
+
+def _three_white_soldiers(g: CandleGeometry) -> np.ndarray:
+    pattern = g.white & g.very_short_upper
+    for lag in (1, 2):
+        pattern = pattern & g.shift(g.white, lag) & g.shift(g.very_short_upper, lag)
+
+    # Каждая свеча закрывается выше и открывается внутри тела предыдущей
+    for lag in (0, 1):
+        open_, close = g.shift(g.open, lag), g.shift(g.close, lag)
+        prev_open, prev_close = g.shift(g.open, lag + 1), g.shift(g.close, lag + 1)
+        pattern &= (close > prev_close) & (open_ > prev_open) & (open_ <= prev_close)
+    return _signal(pattern)
+
+
+def _three_black_crows(g: CandleGeometry) -> np.ndarray:
+    pattern = g.black & g.very_short_lower
+    for lag in (1, 2):
+        pattern = pattern & g.shift(g.black, lag) & g.shift(g.very_short_lower, lag)
+
+    for lag in (0, 1):
+        open_, close = g.shift(g.open, lag), g.shift(g.close, lag)
+        prev_open, prev_close = g.shift(g.open, lag + 1), g.shift(g.close, lag + 1)
+        pattern &= (close < prev_close) & (open_ < prev_open) & (open_ >= prev_close)
+
+    # Перед воронами - белая свеча, первая ворона закрывается ниже ее максимума
+    pattern &= g.shift(g.white, 3) & (g.shift(g.close, 2) < g.shift(g.high, 3))
+    return _signal(bearish=pattern)
+
+
+def _three_inside(g: CandleGeometry) -> np.ndarray:
+    first_open = g.shift(g.open, 2)
+    inside = (
+        g.long_body(2) & g.short_body(1)
+        & (g.shift(g.top) < g.shift(g.top, 2)) & (g.shift(g.bottom) > g.shift(g.bottom, 2))
+    )
+    bullish = inside & g.shift(g.black, 2) & g.white & (g.close > first_open)
+    bearish = inside & g.shift(g.white, 2) & g.black & (g.close < first_open)
+    return _signal(bullish, bearish)
+
+
+PATTERNS: Dict[str, Callable[[CandleGeometry], np.ndarray]] = {
+    'doji': _doji,
+    'hammer': _hammer,
+    'inverted_hammer': _inverted_hammer,
+    'hanging_man': _hanging_man,
+    'shooting_star': _shooting_star,
+    'engulfing': _engulfing,
+    'morning_star': _morning_star,
+    'evening_star': _evening_star,
+    'three_white_soldiers': _three_white_soldiers,
+    'three_black_crows': _three_black_crows,
+    'three_inside': _three_inside,
+}
+
+
+# ===== API =====
+
+def detect_patterns_arrays(open, high, low, close, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Паттерны по массивам OHLC
+
+    Args:
+        names: Какие паттерны считать (по умолчанию все из PATTERNS)
+
+    Returns:
+        {имя: массив int с +100/-100/0}
+    """
+    names = list(PATTERNS) if names is None else list(names)
+    unknown = [n for n in names if n not in PATTERNS]
+    if unknown:
+        raise ValueError(f"Неизвестные паттерны: {', '.join(unknown)}")
+
+    geometry = CandleGeometry(open, high, low, close)
+    with np.errstate(invalid='ignore'):
+        return {name: PATTERNS[name](geometry) for name in names}
+
+
+def detect_patterns(df: pd.DataFrame, names: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Паттерны по DataFrame с колонками open/high/low/close"""
+    result = detect_patterns_arrays(df['open'], df['high'], df['low'], df['close'], names)
+    return pd.DataFrame(result, index=df.index)
+
+
+def latest_patterns(df: pd.DataFrame, names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Паттерны только последнего бара
+
+    Нужно лишь LOOKBACK последних свечей, поэтому стоимость не зависит
+    от длины истории - для вызова на каждом закрытии бара.
+    """
+    tail = df.iloc[-LOOKBACK:]
+    result = detect_patterns_arrays(tail['open'], tail['high'], tail['low'], tail['close'], names)
+    return {name: int(values[-1]) for name, values in result.items()}
+
+
+def candle_pattern_function(name: str) -> Callable:
+    """Функция с сигнатурой TA-Lib CDL*(open, high, low, close)"""
+    def pattern(open, high, low, close):
+        return detect_patterns_arrays(open, high, low, close, [name])[name]
+
+    pattern.__name__ = f"CDL_{name.upper()}"
+    pattern.__doc__ = f"Паттерн {name} (NumPy)"
+    return pattern
+
+
+# Экспорт
+__all__ = ['PATTERNS', 'CandleGeometry', 'detect_patterns', 'detect_patterns_arrays', 'latest_patterns']
@@ -0,0 +1,261 @@
+"""
+Общий кэш индикаторов одного бара
+Файл: src/indicators/context.py
+
+AutoStrategySelector и стратегии считают RSI/MACD/BB/ATR/EMA по одним
+и тем же свечам пары. IndicatorContext запоминает результаты по ключу
+(индикатор, параметры) для конкретного бара (symbol, timeframe, время
+последней свечи), а IndicatorContextCache выдает всем один контекст
+на бар и выбрасывает его, когда приходит следующий.
+
+Использование:
+    context = indicator_contexts.get_context(symbol, df)
+    rsi = context.rsi(14).iloc[-1]
+    macd = context.macd()            # объект ta.trend.MACD
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import ta
+    HAS_TA = True
+except ImportError:
+    HAS_TA = False
+
+logger = logging.getLogger(__name__)
+
+
+def infer_timeframe(df: pd.DataFrame) -> Optional[str]:
+    """Таймфрейм по шагу индекса ('5m', '1h', '1d') или None"""
+    if len(df) < 2 or not isinstance(df.index, pd.DatetimeIndex):
+        return None
+
+    step_ms = int((df.index[-1] - df.index[-2]).total_seconds() * 1000)
+    for unit, unit_ms in (('d', 86_400_000), ('h', 3_600_000), ('m', 60_000)):
+        if step_ms >= unit_ms and step_ms % unit_ms == 0:
+            return f"{step_ms // unit_ms}{unit}"
+    return f"{step_ms}ms"
+
+
+def _bar_fingerprint(df: pd.DataFrame) -> Tuple:
+    """
+    Отпечаток свечей: кроме времени последнего бара учитываем его
+    close/volume (формирующийся бар меняется) и длину окна (EMA зависит
+    от начала ряда)
+    """
+    last = df.iloc[-1]
+    return (len(df), float(last['close']), float(last['volume']))
+
+
+class IndicatorContext:
+    """Мемоизация индикаторов для одного бара пары"""
+
+    def __init__(self, symbol: str, timeframe: Optional[str], df: pd.DataFrame):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.df = df
+        self.bar_time = df.index[-1]
+        self.fingerprint = _bar_fingerprint(df)
+
+        self._values: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def key(self) -> Tuple:
+        return (self.symbol, self.timeframe, self.bar_time)
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """Те же свечи, что у контекста"""
+        return len(df) > 0 and df.index[-1] == self.bar_time and _bar_fingerprint(df) == self.fingerprint
+
+    def get(self, indicator: str, compute: Callable[[pd.DataFrame], Any], **params) -> Any:
+        """
+        Значение индикатора из кэша или расчет
+
+        Args:
+            indicator: Имя индикатора
+            compute: Функция расчета по DataFrame контекста
+            **params: Параметры индикатора (часть ключа)
+        """
+        key = (indicator, tuple(sorted(params.items())))
+
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+            self.misses += 1
+
+        # Считаем вне блокировки: повторный расчет в соседнем потоке
+        # дешевле, чем ожидание
+        value = compute(self.df)
+
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+    # =========================================================================
+    # === ИНДИКАТОРЫ (библиотека ta) ===
+    # =========================================================================
+
+    def rsi(self, window: int = 14) -> pd.Series:
+        return self.get('rsi', lambda df: ta.momentum.RSIIndicator(df['close'], window=window).rsi(), window=window)
+
+    def ema(self, window: int) -> pd.Series:
+        return self.get(
+            'ema', lambda df: ta.trend.EMAIndicator(df['close'], window=window).ema_indicator(), window=window
+        )
+
+    def sma(self, window: int, column: str = 'close') -> pd.Series:
+        return self.get('sma', lambda df: df[column].rolling(window=window).mean(), window=window, column=column)
+
+    def rolling_max(self, window: int, column: str = 'high') -> pd.Series:
+        return self.get('max', lambda df: df[column].rolling(window=window).max(), window=window, column=column)
+
+    def rolling_min(self, window: int, column: str = 'low') -> pd.Series:
+        return self.get('min', lambda df: df[column].rolling(window=window).min(), window=window, column=column)
+
+    def roc(self, window: int = 12) -> pd.Series:
+        return self.get('roc', lambda df: ta.momentum.ROCIndicator(df['close'], window=window).roc(), window=window)
+
+    def macd(self, window_slow: int = 26, window_fast: int = 12, window_sign: int = 9) -> 'ta.trend.MACD':
+        return self.get(
+            'macd',
+            lambda df: ta.trend.MACD(
+                df['close'], window_slow=window_slow, window_fast=window_fast, window_sign=window_sign
+            ),
+            window_slow=window_slow, window_fast=window_fast, window_sign=window_sign
+        )
+
+    def bollinger(self, window: int = 20, window_dev: float = 2) -> 'ta.volatility.BollingerBands':
+        return self.get(
+            'bollinger',
+            lambda df: ta.volatility.BollingerBands(df['close'], window=window, window_dev=window_dev),
+            window=window, window_dev=window_dev
+        )
+
+    def atr(self, window: int = 14) -> 'ta.volatility.AverageTrueRange':
+        return self.get(
+            'atr',
+            lambda df: ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=window),
+            window=window
+        )
+
+    def adx(self, window: int = 14) -> 'ta.trend.ADXIndicator':
+        return self.get(
+            'adx',
+            lambda df: ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=window),
+            window=window
+        )
+
+    def stochastic(self, window: int = 14, smooth_window: int = 3) -> 'ta.momentum.StochasticOscillator':
+        return self.get(
+            'stochastic',
+            lambda df: ta.momentum.StochasticOscillator(
+                df['high'], df['low'], df['close'], window=window, smooth_window=smooth_window
+            ),
+            window=window, smooth_window=smooth_window
+        )
+
+    def vwap(self, window: int = 14) -> 'ta.volume.VolumeWeightedAveragePrice':
+        return self.get(
+            'vwap',
+            lambda df: ta.volume.VolumeWeightedAveragePrice(
+                df['high'], df['low'], df['close'], df['volume'], window=window
+            ),
+            window=window
+        )
+
+
+class IndicatorContextCache:
+    """
+    Один IndicatorContext на пару и таймфрейм
+
+    Контекст живет, пока не придет следующий бар (или не изменится
+    формирующийся), после чего заменяется новым.
+    """
+
+    def __init__(self, max_contexts: int = 256):
+        """
+        Args:
+            max_contexts: Максимум одновременно хранимых пар/таймфреймов
+        """
+        self.max_contexts = max_contexts
+        self._contexts: "OrderedDict[Tuple[str, Optional[str]], IndicatorContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Статистика вытесненных контекстов (живые считаются на лету)
+        self._evicted_hits = 0
+        self._evicted_misses = 0
+        self.contexts_created = 0
+
+    def get_context(self, symbol: str, df: pd.DataFrame, timeframe: Optional[str] = None) -> IndicatorContext:
+        """
+        Контекст для последнего бара свечей пары
+
+        Args:
+            symbol: Торговая пара
+            df: Свечи с индексом по времени
+            timeframe: Таймфрейм (по умолчанию определяется по индексу)
+        """
+        key = (symbol, timeframe or infer_timeframe(df))
+
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None and context.matches(df):
+                self._contexts.move_to_end(key)
+                return context
+
+            if context is not None:
+                self._retire(context)
+
+            context = IndicatorContext(symbol, key[1], df)
+            self._contexts[key] = context
+            self._contexts.move_to_end(key)
+            self.contexts_created += 1
+
+            while len(self._contexts) > self.max_contexts:
+                _, evicted = self._contexts.popitem(last=False)
+                self._retire(evicted)
+
+            return context
+
+    def _retire(self, context: IndicatorContext):
+        self._evicted_hits += context.hits
+        self._evicted_misses += context.misses
+
+    def clear(self):
+        """Сброс всех контекстов"""
+        with self._lock:
+            for context in self._contexts.values():
+                self._retire(context)
+            self._contexts.clear()
+
+    def get_statistics(self) -> Dict:
+        """Попадания и промахи по всем контекстам"""
+        with self._lock:
+            hits = self._evicted_hits + sum(c.hits for c in self._contexts.values())
+            misses = self._evicted_misses + sum(c.misses for c in self._contexts.values())
+            active = len(self._contexts)
+
+        requests = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / requests if requests else 0.0,
+            'active_contexts': active,
+            'contexts_created': self.contexts_created
+        }
+
+
+# Глобальный кэш контекстов
+indicator_contexts = IndicatorContextCache()
+
+# Экспорт
+__all__ = ['IndicatorContext', 'IndicatorContextCache', 'indicator_contexts', 'infer_timeframe']
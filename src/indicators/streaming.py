@@ -0,0 +1,577 @@
+"""
+Потоковые индикаторы с обновлением за O(1) на бар
+Файл: src/indicators/streaming.py
+
+Пакетные функции из ta_wrapper пересчитывают весь ряд при каждом
+вызове, хотя между вызовами меняется только последний бар. Здесь каждый
+индикатор хранит состояние рекуррентной формулы (EMA, сглаживание
+Уайлдера, скользящие суммы, окно Уэлфорда для дисперсии, монотонные
+очереди для максимумов/минимумов) и обновляется одним шагом:
+
+    update(bar)        - новый бар (предыдущий считается закрытым)
+    replace_last(bar)  - обновление формирующегося бара
+
+Состояние хранится только по закрытым барам, а значение для последнего
+бара считается поверх него, поэтому replace_last тоже стоит O(1) и не
+требует отката. Формулы совпадают с ручными реализациями ta_wrapper.
+"""
+import math
+from collections import deque
+from typing import Any, Dict, Mapping, Optional
+
+NAN = float('nan')
+
+
+def _is_nan(value: float) -> bool:
+    return value != value
+
+
+# ===== ПРИМИТИВЫ НАД ЧИСЛАМИ =====
+
+class _Primitive:
+    """
+    Рекуррентный расчет над рядом чисел
+
+    push(x) добавляет значение, push(x, replace=True) заменяет последнее.
+    Предыдущее значение фиксируется в состоянии только при следующем
+    push без replace.
+    """
+
+    def __init__(self):
+        self.value = NAN
+        self._pending: Optional[float] = None
+
+    def push(self, x: float, replace: bool = False) -> float:
+        if not replace and self._pending is not None:
+            self._commit(self._pending)
+        self._pending = x
+        self.value = self._compute(x)
+        return self.value
+
+    def _compute(self, x: float) -> float:
+        raise NotImplementedError
+
+    def _commit(self, x: float):
+        raise NotImplementedError
+
+
+class _EMA(_Primitive):
+    """EMA как pandas ewm(span=period, adjust=False): старт с первого значения"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.alpha = 2.0 / (period + 1)
+        self._prev = NAN
+
+    def _compute(self, x: float) -> float:
+        if _is_nan(self._prev):
+            return x
+        return self.alpha * x + (1 - self.alpha) * self._prev
+
+    def _commit(self, x: float):
+        self._prev = self._compute(x)
+
+
+class _Wilder(_Primitive):
+    """Сглаживание Уайлдера: среднее первых period значений, дальше (avg*(n-1)+x)/n"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self._count = 0
+        self._sum = 0.0
+        self._avg = NAN
+
+    def _compute(self, x: float) -> float:
+        count = self._count + 1
+        if count < self.period:
+            return NAN
+        if count == self.period:
+            return (self._sum + x) / self.period
+        return (self._avg * (self.period - 1) + x) / self.period
+
+    def _commit(self, x: float):
+        value = self._compute(x)
+        self._count += 1
+        if self._count < self.period:
+            self._sum += x
+        else:
+            self._avg = value
+
+
+class _RollingMean(_Primitive):
+    """Скользящее среднее как pandas rolling(period).mean(): NaN в окне дает NaN"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self._window: deque = deque()   # Закрытые значения, не больше period - 1
+        self._sum = 0.0
+        self._nans = 0
+        self._commits = 0
+
+    def _compute(self, x: float) -> float:
+        if len(self._window) < self.period - 1 or self._nans or _is_nan(x):
+            return NAN
+        return (self._sum + x) / self.period
+
+    def _commit(self, x: float):
+        self._window.append(x)
+        if _is_nan(x):
+            self._nans += 1
+        else:
+            self._sum += x
+
+        if len(self._window) > self.period - 1:
+            old = self._window.popleft()
+            if _is_nan(old):
+                self._nans -= 1
+            else:
+                self._sum -= old
+
+        # Периодически пересчитываем сумму, чтобы не копилась ошибка округления
+        self._commits += 1
+        if self._commits % max(self.period, 64) == 0:
+            self._sum = math.fsum(v for v in self._window if not _is_nan(v))
+
+
+class _RollingStd(_Primitive):
+    """
+    Скользящее стандартное отклонение (окно Уэлфорда)
+
+    ddof=1 - как pandas rolling(period).std(). Значение mean - скользящее
+    среднее для того же бара.
+    """
+
+    def __init__(self, period: int, ddof: int = 1):
+        super().__init__()
+        self.period = period
+        self.ddof = ddof
+        self.mean = NAN
+        self._window: deque = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._commits = 0
+
+    def _add(self, count: int, mean: float, m2: float, x: float):
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+        return count, mean, m2
+
+    def _compute(self, x: float) -> float:
+        if len(self._window) < self.period - 1:
+            self.mean = NAN
+            return NAN
+        count, mean, m2 = self._add(len(self._window), self._mean, self._m2, x)
+        self.mean = mean
+        if count - self.ddof <= 0:
+            return NAN
+        return math.sqrt(max(m2, 0.0) / (count - self.ddof))
+
+    def _commit(self, x: float):
+        _, self._mean, self._m2 = self._add(len(self._window), self._mean, self._m2, x)
+        self._window.append(x)
+
+        if len(self._window) > self.period - 1:
+            old = self._window.popleft()
+            count = len(self._window)
+            if count == 0:
+                self._mean, self._m2 = 0.0, 0.0
+            else:
+                mean = self._mean - (old - self._mean) / count
+                self._m2 -= (old - self._mean) * (old - mean)
+                self._mean = mean
+
+        # Периодическая пересборка окна против накопления ошибки
+        self._commits += 1
+        if self._commits % max(self.period, 64) == 0:
+            count, mean, m2 = 0, 0.0, 0.0
+            for value in self._window:
+                count, mean, m2 = self._add(count, mean, m2, value)
+            self._mean, self._m2 = mean, m2
+
+
+class _RollingExtreme(_Primitive):
+    """Скользящий максимум/минимум на монотонной очереди"""
+
+    def __init__(self, period: int, is_max: bool):
+        super().__init__()
+        self.period = period
+        self.is_max = is_max
+        self._queue: deque = deque()    # (номер, значение) закрытых баров
+        self._index = 0
+
+    def _better(self, a: float, b: float) -> bool:
+        return a >= b if self.is_max else a <= b
+
+    def _compute(self, x: float) -> float:
+        if self._index < self.period - 1:
+            return NAN
+        if self._queue and not self._better(x, self._queue[0][1]):
+            return self._queue[0][1]
+        return x
+
+    def _commit(self, x: float):
+        while self._queue and self._better(x, self._queue[-1][1]):
+            self._queue.pop()
+        self._queue.append((self._index, x))
+        self._index += 1
+
+        # В состоянии остаются только period - 1 последних закрытых баров
+        while self._queue and self._queue[0][0] <= self._index - self.period:
+            self._queue.popleft()
+
+
+# ===== ИНДИКАТОРЫ НАД БАРАМИ =====
+
+class StreamingIndicator:
+    """
+    Базовый потоковый индикатор
+
+    Бар - словарь с ключами open, high, low, close, volume (как строки
+    DataFrame или свечи ccxt, приведенные к словарю).
+    """
+
+    def __init__(self):
+        self.value: Any = NAN
+        self.bars = 0
+
+    def update(self, bar: Mapping[str, float]):
+        """Новый бар"""
+        self.bars += 1
+        self.value = self._push(bar, replace=False)
+        return self.value
+
+    def replace_last(self, bar: Mapping[str, float]):
+        """Замена последнего (формирующегося) бара"""
+        if self.bars == 0:
+            return self.update(bar)
+        self.value = self._push(bar, replace=True)
+        return self.value
+
+    def _push(self, bar: Mapping[str, float], replace: bool):
+        raise NotImplementedError
+
+
+class _PrevCloseMixin:
+    """Хранение цены закрытия предыдущего бара"""
+
+    def _shift_close(self, close: float, replace: bool) -> Optional[float]:
+        if not replace:
+            self._prev_close = getattr(self, '_last_close', None)
+        self._last_close = close
+        return getattr(self, '_prev_close', None)
+
+
+class StreamingSMA(StreamingIndicator):
+    """Simple Moving Average"""
+
+    def __init__(self, period: int = 30, source: str = 'close'):
+        super().__init__()
+        self.source = source
+        self._mean = _RollingMean(period)
+
+    def _push(self, bar, replace):
+        return self._mean.push(float(bar[self.source]), replace)
+
+
+class StreamingEMA(StreamingIndicator):
+    """Exponential Moving Average"""
+
+    def __init__(self, period: int = 30, source: str = 'close'):
+        super().__init__()
+        self.source = source
+        self._ema = _EMA(period)
+
+    def _push(self, bar, replace):
+        return self._ema.push(float(bar[self.source]), replace)
+
+
+class StreamingRSI(_PrevCloseMixin, StreamingIndicator):
+    """Relative Strength Index со сглаживанием Уайлдера"""
+
+    def __init__(self, period: int = 14, source: str = 'close'):
+        super().__init__()
+        self.source = source
+        self._gain = _Wilder(period)
+        self._loss = _Wilder(period)
+
+    def _push(self, bar, replace):
+        close = float(bar[self.source])
+        prev_close = self._shift_close(close, replace)
+        if prev_close is None:
+            return NAN
+
+        # Первое изменение цены появляется на втором баре
+        replace = replace and self._gain._pending is not None
+        delta = close - prev_close
+        gain = self._gain.push(max(delta, 0.0), replace)
+        loss = self._loss.push(max(-delta, 0.0), replace)
+
+        if _is_nan(gain) or gain + loss == 0:
+            return NAN
+        return 100 * gain / (gain + loss)
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD: значение - кортеж (macd, signal, histogram)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, source: str = 'close'):
+        super().__init__()
+        self.source = source
+        self._fast = _EMA(fast)
+        self._slow = _EMA(slow)
+        self._signal = _EMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def _push(self, bar, replace):
+        price = float(bar[self.source])
+        macd = self._fast.push(price, replace) - self._slow.push(price, replace)
+        signal = self._signal.push(macd, replace)
+        return macd, signal, macd - signal
+
+
+class StreamingBollinger(StreamingIndicator):
+    """Bollinger Bands: значение - кортеж (upper, middle, lower)"""
+
+    def __init__(self, period: int = 20, nbdevup: float = 2, nbdevdn: float = 2, source: str = 'close'):
+        super().__init__()
+        self.source = source
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self._std = _RollingStd(period)
+        self.value = (NAN, NAN, NAN)
+
+    def _push(self, bar, replace):
+        std = self._std.push(float(bar[self.source]), replace)
+        middle = self._std.mean
+        return middle + std * self.nbdevup, middle, middle - std * self.nbdevdn
+
+
+class StreamingATR(_PrevCloseMixin, StreamingIndicator):
+    """Average True Range со сглаживанием Уайлдера"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self._atr = _Wilder(period)
+
+    def _push(self, bar, replace):
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        prev_close = self._shift_close(close, replace)
+        if prev_close is None:
+            return NAN
+
+        replace = replace and self._atr._pending is not None
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        return self._atr.push(tr, replace)
+
+
+class StreamingStochastic(StreamingIndicator):
+    """Stochastic Oscillator: значение - кортеж (slow %K, slow %D)"""
+
+    def __init__(self, fastk_period: int = 5, slowk_period: int = 3, slowd_period: int = 3):
+        super().__init__()
+        self._highest = _RollingExtreme(fastk_period, is_max=True)
+        self._lowest = _RollingExtreme(fastk_period, is_max=False)
+        self._slow_k = _RollingMean(slowk_period)
+        self._slow_d = _RollingMean(slowd_period)
+        self.value = (NAN, NAN)
+
+    def _push(self, bar, replace):
+        highest = self._highest.push(float(bar['high']), replace)
+        lowest = self._lowest.push(float(bar['low']), replace)
+
+        price_range = highest - lowest
+        if _is_nan(price_range) or price_range == 0:
+            fast_k = NAN
+        else:
+            fast_k = 100 * (float(bar['close']) - lowest) / price_range
+
+        slow_k = self._slow_k.push(fast_k, replace)
+        return slow_k, self._slow_d.push(slow_k, replace)
+
+
+class StreamingOBV(_PrevCloseMixin, StreamingIndicator):
+    """On Balance Volume"""
+
+    def __init__(self):
+        super().__init__()
+        self._obv = 0.0          # По закрытым барам
+        self._last_flow = 0.0    # Вклад последнего бара
+
+    def _push(self, bar, replace):
+        close, volume = float(bar['close']), float(bar['volume'])
+        prev_close = self._shift_close(close, replace)
+
+        if not replace:
+            self._obv += self._last_flow
+
+        if prev_close is None or close > prev_close:
+            self._last_flow = volume
+        elif close < prev_close:
+            self._last_flow = -volume
+        else:
+            self._last_flow = 0.0
+        return self._obv + self._last_flow
+
+
+class StreamingADX(_PrevCloseMixin, StreamingIndicator):
+    """ADX со сглаживанием Уайлдера: значение - кортеж (adx, +DI, -DI)"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self._tr = _Wilder(period)
+        self._plus_dm = _Wilder(period)
+        self._minus_dm = _Wilder(period)
+        self._adx = _Wilder(period)
+        self._prev_bar: Optional[tuple] = None
+        self._last_bar: Optional[tuple] = None
+        self.value = (NAN, NAN, NAN)
+
+    def _push(self, bar, replace):
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        if not replace:
+            self._prev_bar = self._last_bar
+        self._last_bar = (high, low)
+        prev_close = self._shift_close(close, replace)
+        if prev_close is None:
+            return NAN, NAN, NAN
+
+        prev_high, prev_low = self._prev_bar
+        up, down = high - prev_high, prev_low - low
+        plus_dm = up if up > down and up > 0 else 0.0
+        minus_dm = down if down > up and down > 0 else 0.0
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        replace = replace and self._tr._pending is not None
+        atr = self._tr.push(tr, replace)
+        plus_avg = self._plus_dm.push(plus_dm, replace)
+        minus_avg = self._minus_dm.push(minus_dm, replace)
+        if _is_nan(atr):
+            return NAN, NAN, NAN
+
+        plus_di = 100 * plus_avg / atr if atr > 0 else 0.0
+        minus_di = 100 * minus_avg / atr if atr > 0 else 0.0
+        di_sum = plus_di + minus_di
+        dx = 100 * abs(plus_di - minus_di) / di_sum if di_sum > 0 else 0.0
+
+        # Первый DX идет в ADX как новое значение, дальше - как и остальные ряды
+        adx_replace = replace and self._adx._pending is not None
+        return self._adx.push(dx, adx_replace), plus_di, minus_di
+
+
+# ===== НАБОР ИНДИКАТОРОВ ПАРЫ =====
+
+class StreamingIndicators:
+    """
+    Потоковый аналог TechnicalIndicators.calculate_all
+
+    Держит по экземпляру каждого индикатора для одной пары и таймфрейма
+    и отдает значения последнего бара с теми же именами колонок.
+
+    Использование:
+        stream = StreamingIndicators()
+        stream.warm_up(df)                 # История
+        values = stream.push(candle)       # Новая свеча или обновление текущей
+    """
+
+    def __init__(self):
+        self.sma_10 = StreamingSMA(10)
+        self.sma_20 = StreamingSMA(20)
+        self.sma_50 = StreamingSMA(50)
+        self.ema_12 = StreamingEMA(12)
+        self.ema_26 = StreamingEMA(26)
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.bbands = StreamingBollinger(20, 2, 2)
+        self.atr = StreamingATR(14)
+        self.stoch = StreamingStochastic(14, 3, 3)
+        self.volume_sma = StreamingSMA(20, source='volume')
+        self.obv = StreamingOBV()
+
+        self.last_timestamp = None
+        self.values: Dict[str, float] = {}
+
+    def _indicators(self):
+        return (
+            self.sma_10, self.sma_20, self.sma_50, self.ema_12, self.ema_26,
+            self.rsi, self.macd, self.bbands, self.atr, self.stoch,
+            self.volume_sma, self.obv
+        )
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """Новый бар"""
+        for indicator in self._indicators():
+            indicator.update(bar)
+        return self._collect()
+
+    def replace_last(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """Обновление последнего бара"""
+        for indicator in self._indicators():
+            indicator.replace_last(bar)
+        return self._collect()
+
+    def push(self, candle) -> Dict[str, float]:
+        """
+        Свеча ccxt [timestamp, open, high, low, close, volume]: бар с тем
+        же временем, что и последний, заменяет его, иначе добавляется
+        """
+        timestamp = candle[0]
+        bar = {
+            'open': candle[1], 'high': candle[2], 'low': candle[3],
+            'close': candle[4], 'volume': candle[5]
+        }
+        if timestamp == self.last_timestamp:
+            return self.replace_last(bar)
+
+        self.last_timestamp = timestamp
+        return self.update(bar)
+
+    def warm_up(self, df) -> Dict[str, float]:
+        """Прогон истории из DataFrame с колонками open, high, low, close, volume"""
+        columns = [df[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close', 'volume')]
+        for open_, high, low, close, volume in zip(*columns):
+            bar = {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+            for indicator in self._indicators():
+                indicator.update(bar)
+
+        if len(df):
+            last = df.index[-1]
+            self.last_timestamp = last.value // 1_000_000 if hasattr(last, 'value') else last
+        return self._collect()
+
+    def _collect(self) -> Dict[str, float]:
+        macd, macd_signal, macd_hist = self.macd.value
+        bb_upper, bb_middle, bb_lower = self.bbands.value
+        stoch_k, stoch_d = self.stoch.value
+
+        self.values = {
+            'sma_10': self.sma_10.value,
+            'sma_20': self.sma_20.value,
+            'sma_50': self.sma_50.value,
+            'ema_12': self.ema_12.value,
+            'ema_26': self.ema_26.value,
+            'rsi': self.rsi.value,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'atr': self.atr.value,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'volume_sma': self.volume_sma.value,
+            'obv': self.obv.value
+        }
+        return self.values
+
+
+# Экспорт
+__all__ = [
+    'StreamingIndicator', 'StreamingSMA', 'StreamingEMA', 'StreamingRSI',
+    'StreamingMACD', 'StreamingBollinger', 'StreamingATR', 'StreamingStochastic',
+    'StreamingOBV', 'StreamingADX', 'StreamingIndicators'
+]
@@ -0,0 +1,271 @@
+"""
+Уровни поддержки и сопротивления
+Файл: src/indicators/support_resistance.py
+
+Общая реализация для MarketAnalyzer, DynamicLevelCalculator и Backtester.
+Пивоты - бары, чей максимум (минимум) является экстремумом окна из
+order баров слева и справа; ищутся одним проходом sliding_window_view.
+Близкие пивоты склеиваются в зоны с числом касаний: зона из пяти
+касаний - более надежный уровень, чем одиночный экстремум.
+
+SupportResistanceTracker держит пивоты пары между циклами и при
+появлении нового бара проверяет только один кандидат - бар, у которого
+только что набралось order баров справа.
+
+Использование:
+    levels = find_levels(df['high'], df['low'])
+    support = levels.nearest_support(price)      # LevelZone или None
+
+    tracker.sync(df)                             # только новые закрытые бары
+    levels = tracker.levels
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Баров слева и справа от пивота
+DEFAULT_ORDER = 5
+
+# Пивоты ближе этой доли цены друг к другу склеиваются в одну зону
+DEFAULT_TOLERANCE = 0.003
+
+
+@dataclass
+class LevelZone:
+    """Зона уровня: склеенные близкие пивоты"""
+    kind: str              # 'support' или 'resistance'
+    price: float           # Средняя цена пивотов зоны
+    lower: float
+    upper: float
+    touches: int           # Сколько пивотов попало в зону
+    last_index: int        # Номер бара последнего касания
+
+    def to_dict(self) -> dict:
+        return {
+            'price': self.price,
+            'lower': self.lower,
+            'upper': self.upper,
+            'touches': self.touches
+        }
+
+
+@dataclass
+class SupportResistance:
+    """Зоны поддержки и сопротивления, отсортированные по цене"""
+    supports: List[LevelZone] = field(default_factory=list)
+    resistances: List[LevelZone] = field(default_factory=list)
+
+    def nearest_support(self, price: float) -> Optional[LevelZone]:
+        """Ближайшая зона поддержки ниже цены"""
+        below = [zone for zone in self.supports if zone.price < price]
+        return below[-1] if below else None
+
+    def nearest_resistance(self, price: float) -> Optional[LevelZone]:
+        """Ближайшая зона сопротивления выше цены"""
+        above = [zone for zone in self.resistances if zone.price > price]
+        return above[0] if above else None
+
+
+# ===== ВЕКТОРНЫЙ РАСЧЕТ =====
+
+def find_pivots(values, order: int = DEFAULT_ORDER, high: bool = True) -> np.ndarray:
+    """
+    Индексы пивотов ряда
+
+    Бар - пивот, если он строго выше (ниже) order баров слева и не ниже
+    (не выше) order баров справа: на плато из равных экстремумов
+    засчитывается только первый бар.
+    """
+    values = np.asarray(values, dtype=float)
+    width = 2 * order + 1
+    if len(values) < width:
+        return np.empty(0, dtype=int)
+
+    sign = 1.0 if high else -1.0
+    windows = sliding_window_view(values * sign, width)
+    centre = windows[:, order]
+    is_pivot = (windows[:, :order].max(axis=1) < centre) & (windows[:, order + 1:].max(axis=1) <= centre)
+    return np.flatnonzero(is_pivot) + order
+
+
+def cluster_levels(prices, indices, kind: str, tolerance: float = DEFAULT_TOLERANCE) -> List[LevelZone]:
+    """
+    Склейка цен пивотов в зоны: соседние по цене пивоты с разрывом
+    меньше tolerance * цена попадают в одну зону
+    """
+    prices = np.asarray(prices, dtype=float)
+    if not len(prices):
+        return []
+
+    order = np.argsort(prices, kind='stable')
+    prices = prices[order]
+    indices = np.asarray(indices)[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], np.diff(prices) > prices[:-1] * tolerance)))
+    ends = np.append(starts[1:], len(prices))
+    counts = ends - starts
+    means = np.add.reduceat(prices, starts) / counts
+    last = np.maximum.reduceat(indices, starts)
+
+    return [
+        LevelZone(kind, float(means[z]), float(prices[starts[z]]), float(prices[ends[z] - 1]),
+                  int(counts[z]), int(last[z]))
+        for z in range(len(starts))
+    ]
+
+
+def find_levels(high, low, order: int = DEFAULT_ORDER, tolerance: float = DEFAULT_TOLERANCE,
+                min_touches: int = 1) -> SupportResistance:
+    """
+    Зоны поддержки (по пивотам минимумов) и сопротивления (по пивотам максимумов)
+
+    Args:
+        high, low: Максимумы и минимумы свечей
+        order: Баров слева и справа от пивота
+        tolerance: Доля цены, в пределах которой пивоты склеиваются
+        min_touches: Отбросить зоны с меньшим числом касаний
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    highs = find_pivots(high, order, high=True)
+    lows = find_pivots(low, order, high=False)
+    return _build_levels(low[lows], lows, high[highs], highs, tolerance, min_touches)
+
+
+def _build_levels(support_prices, support_indices, resistance_prices, resistance_indices,
+                  tolerance: float, min_touches: int) -> SupportResistance:
+    supports = cluster_levels(support_prices, support_indices, 'support', tolerance)
+    resistances = cluster_levels(resistance_prices, resistance_indices, 'resistance', tolerance)
+    return SupportResistance(
+        supports=[z for z in supports if z.touches >= min_touches],
+        resistances=[z for z in resistances if z.touches >= min_touches]
+    )
+
+
+# ===== ИНКРЕМЕНТАЛЬНЫЙ РАСЧЕТ =====
+
+class SupportResistanceTracker:
+    """
+    Пивоты одной пары, обновляемые по одному бару
+
+    append() стоит O(order); зоны пересчитываются лениво и только если
+    с прошлого запроса появился или устарел пивот.
+    """
+
+    def __init__(self, order: int = DEFAULT_ORDER, max_bars: int = 200,
+                 tolerance: float = DEFAULT_TOLERANCE, min_touches: int = 1):
+        """
+        Args:
+            order: Баров слева и справа от пивота
+            max_bars: Пивоты старше этого числа баров забываются
+            tolerance: Доля цены, в пределах которой пивоты склеиваются
+            min_touches: Минимум касаний для зоны
+        """
+        self.order = order
+        self.max_bars = max_bars
+        self.tolerance = tolerance
+        self.min_touches = min_touches
+        self.reset()
+
+    def reset(self):
+        width = 2 * self.order + 1
+        self._highs: Deque[float] = deque(maxlen=width)
+        self._lows: Deque[float] = deque(maxlen=width)
+        self._pivot_highs: Deque[Tuple[int, float]] = deque()
+        self._pivot_lows: Deque[Tuple[int, float]] = deque()
+        self._levels: Optional[SupportResistance] = None
+        self.bars = 0
+        self.last_time = None
+
+    def append(self, high: float, low: float, time=None):
+        """Новый закрытый бар"""
+        self._highs.append(float(high))
+        self._lows.append(float(low))
+        self.bars += 1
+        self.last_time = time
+
+        if len(self._highs) == self._highs.maxlen:
+            index = self.bars - 1 - self.order
+            if self._is_pivot(self._highs, 1.0):
+                self._pivot_highs.append((index, self._highs[self.order]))
+                self._levels = None
+            if self._is_pivot(self._lows, -1.0):
+                self._pivot_lows.append((index, self._lows[self.order]))
+                self._levels = None
+
+        oldest = self.bars - self.max_bars
+        for pivots in (self._pivot_highs, self._pivot_lows):
+            while pivots and pivots[0][0] < oldest:
+                pivots.popleft()
+                self._levels = None
+
+    def _is_pivot(self, window: Deque[float], sign: float) -> bool:
+        values = [v * sign for v in window]
+        centre = values[self.order]
+        return max(values[:self.order]) < centre and max(values[self.order + 1:]) <= centre
+
+    def warm_up(self, high, low, times=None):
+        """Начальная загрузка истории векторным поиском пивотов"""
+        self.reset()
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        if not len(high):
+            return
+
+        first = max(0, len(high) - self.max_bars)
+        for pivots, values, is_high in ((self._pivot_highs, high, True), (self._pivot_lows, low, False)):
+            pivots.extend((int(i), float(values[i])) for i in find_pivots(values, self.order, is_high) if i >= first)
+
+        self._highs.extend(high[-self._highs.maxlen:])
+        self._lows.extend(low[-self._lows.maxlen:])
+        self.bars = len(high)
+        self.last_time = times[-1] if times is not None else None
+
+    def sync(self, df: pd.DataFrame):
+        """
+        Догнать свечи пары: добавляются только новые закрытые бары
+
+        Последний бар DataFrame считается формирующимся и не учитывается.
+        Если новые свечи не стыкуются с уже учтенными (пропуск, рестарт),
+        история перечитывается целиком.
+        """
+        closed = len(df) - 1
+        if closed <= 0:
+            return
+
+        index = df.index
+        if self.last_time is not None:
+            if index[closed - 1] == self.last_time:
+                return
+
+            position = index[:closed].searchsorted(self.last_time)
+            if position < closed and index[position] == self.last_time:
+                highs = df['high'].to_numpy()
+                lows = df['low'].to_numpy()
+                for i in range(position + 1, closed):
+                    self.append(highs[i], lows[i], index[i])
+                return
+
+        self.warm_up(df['high'].to_numpy()[:closed], df['low'].to_numpy()[:closed], index[:closed])
+
+    @property
+    def levels(self) -> SupportResistance:
+        if self._levels is None:
+            self._levels = _build_levels(
+                [p for _, p in self._pivot_lows], [i for i, _ in self._pivot_lows],
+                [p for _, p in self._pivot_highs], [i for i, _ in self._pivot_highs],
+                self.tolerance, self.min_touches
+            )
+        return self._levels
+
+
+# Экспорт
+__all__ = [
+    'LevelZone', 'SupportResistance', 'SupportResistanceTracker',
+    'find_pivots', 'cluster_levels', 'find_levels'
+]
@@ -14,6 +14,64 @@ except ImportError:
     USE_TALIB = False
     print("⚠️ TA-Lib не установлен, используем ручные реализации индикаторов")
 
+# ===== СГЛАЖИВАНИЕ УАЙЛДЕРА =====
+
+def _wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Сглаживание Уайлдера как в TA-Lib: первое значение - среднее
+    за period, дальше avg = (avg * (period - 1) + x) / period
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    if len(values) < period:
+        return result
+
+    seeded = values[period - 1:].copy()
+    seeded[0] = values[:period].mean()
+    result[period - 1:] = pd.Series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().values
+    return result
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True Range начиная со второго бара (первый - NaN, как в TA-Lib)"""
+    prev_close = np.roll(close, 1)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[0] = np.nan
+    return tr
+
+def _directional(high, low, close, timeperiod: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """+DI, -DI и ADX по Уайлдеру"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+
+    plus_di = np.full(n, np.nan)
+    minus_di = np.full(n, np.nan)
+    adx = np.full(n, np.nan)
+    if n <= timeperiod:
+        return plus_di, minus_di, adx
+
+    up = np.diff(high)
+    down = -np.diff(low)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    tr = _true_range(high, low, close)[1:]
+
+    atr = _wilder(tr, timeperiod)
+    plus_avg = _wilder(plus_dm, timeperiod)
+    minus_avg = _wilder(minus_dm, timeperiod)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus = np.where(atr > 0, 100 * plus_avg / atr, 0.0)
+        minus = np.where(atr > 0, 100 * minus_avg / atr, 0.0)
+        di_sum = plus + minus
+        dx = np.where(di_sum > 0, 100 * np.abs(plus - minus) / di_sum, 0.0)
+
+    plus_di[timeperiod:] = plus[timeperiod - 1:]
+    minus_di[timeperiod:] = minus[timeperiod - 1:]
+    adx[timeperiod:] = _wilder(dx[timeperiod - 1:], timeperiod)
+    return plus_di, minus_di, adx
+
 # ===== БАЗОВЫЕ ИНДИКАТОРЫ =====
 
 def SMA(series: Union[pd.Series, np.ndarray], timeperiod: int = 30) -> np.ndarray:
@@ -35,14 +93,19 @@ def RSI(series: Union[pd.Series, np.ndarray], timeperiod: int = 14) -> np.ndarra
     if USE_TALIB:
         return talib.RSI(series, timeperiod=timeperiod)
     else:
-        prices = pd.Series(series)
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=timeperiod).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=timeperiod).mean()
+        # Сглаживание Уайлдера, как в TA-Lib
+        prices = np.asarray(series, dtype=float)
+        rsi = np.full(len(prices), np.nan)
+        if len(prices) <= timeperiod:
+            return rsi
         
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi.values
+        delta = np.diff(prices)
+        gain = _wilder(np.where(delta > 0, delta, 0.0), timeperiod)
+        loss = _wilder(np.where(delta < 0, -delta, 0.0), timeperiod)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi[1:] = 100 * gain / (gain + loss)
+        return rsi
 
 def BBANDS(series: Union[pd.Series, np.ndarray], 
            timeperiod: int = 20, 
@@ -88,18 +151,17 @@ def ATR(high: Union[pd.Series, np.ndarray],
     if USE_TALIB:
         return talib.ATR(high, low, close, timeperiod=timeperiod)
     else:
-        high_s = pd.Series(high)
-        low_s = pd.Series(low)
-        close_s = pd.Series(close)
-        
-        tr1 = high_s - low_s
-        tr2 = abs(high_s - close_s.shift())
-        tr3 = abs(low_s - close_s.shift())
+        # Сглаживание Уайлдера, как в TA-Lib
+        tr = _true_range(
+            np.asarray(high, dtype=float),
+            np.asarray(low, dtype=float),
+            np.asarray(close, dtype=float)
+        )
+        atr = np.full(len(tr), np.nan)
+        if len(tr) > timeperiod:
+            atr[1:] = _wilder(tr[1:], timeperiod)
         
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=timeperiod).mean()
-        
-        return atr.values
+        return atr
 
 def STOCH(high: Union[pd.Series, np.ndarray],
           low: Union[pd.Series, np.ndarray],
@@ -153,33 +215,31 @@ def ADX(high, low, close, timeperiod=14):
     if USE_TALIB:
         return talib.ADX(high, low, close, timeperiod=timeperiod)
     else:
-        # Упрощенная реализация
-        return np.full_like(close, 25.0)  # Нейтральное значение
+        return _directional(high, low, close, timeperiod)[2]
 
 def PLUS_DI(high, low, close, timeperiod=14):
     """Plus Directional Indicator"""
     if USE_TALIB:
         return talib.PLUS_DI(high, low, close, timeperiod=timeperiod)
     else:
-        return np.full_like(close, 25.0)
+        return _directional(high, low, close, timeperiod)[0]
 
 def MINUS_DI(high, low, close, timeperiod=14):
     """Minus Directional Indicator"""
     if USE_TALIB:
         return talib.MINUS_DI(high, low, close, timeperiod=timeperiod)
     else:
-        return np.full_like(close, 25.0)
+        return _directional(high, low, close, timeperiod)[1]
 
 def OBV(close, volume):
     """On Balance Volume"""
     if USE_TALIB:
         return talib.OBV(close, volume)
     else:
-        close_s = pd.Series(close)
-        volume_s = pd.Series(volume)
-        
-        obv = (volume_s * (~close_s.diff().le(0) * 2 - 1)).cumsum()
-        return obv.values
+        # Как в TA-Lib: первый бар +volume, при неизменной цене OBV не меняется
+        direction = np.sign(np.diff(np.asarray(close, dtype=float), prepend=np.nan))
+        direction[0] = 1.0
+        return np.cumsum(np.asarray(volume, dtype=float) * direction)
 
 def ROC(series, timeperiod=10):
     """Rate of Change"""
@@ -215,24 +275,26 @@ def MFI(high, low, close, volume, timeperiod=14):
         mfi = 100 - (100 / (1 + positive_flow / negative_flow))
         return mfi.values
 
-# ===== ПАТТЕРНЫ СВЕЧЕЙ (заглушки) =====
+# ===== ПАТТЕРНЫ СВЕЧЕЙ =====
+
+from .candle_patterns import candle_pattern_function
 
-def _candle_pattern_stub(open, high, low, close):
-    """Заглушка для паттернов свечей"""
-    return np.zeros_like(close, dtype=int)
+def _candle_pattern(talib_name: str, name: str):
+    """TA-Lib CDL*, если установлен, иначе векторная реализация на NumPy"""
+    return getattr(talib, talib_name) if USE_TALIB else candle_pattern_function(name)
 
 # Паттерны свечей
-CDLDOJI = _candle_pattern_stub
-CDLHAMMER = _candle_pattern_stub
-CDLINVERTEDHAMMER = _candle_pattern_stub
-CDLHANGINGMAN = _candle_pattern_stub
-CDLENGULFING = _candle_pattern_stub
-CDLMORNINGSTAR = _candle_pattern_stub
-CDLEVENINGSTAR = _candle_pattern_stub
-CDLSHOOTINGSTAR = _candle_pattern_stub
-CDL3WHITESOLDIERS = _candle_pattern_stub
-CDL3BLACKCROWS = _candle_pattern_stub
-CDL3INSIDE = _candle_pattern_stub
+CDLDOJI = _candle_pattern('CDLDOJI', 'doji')
+CDLHAMMER = _candle_pattern('CDLHAMMER', 'hammer')
+CDLINVERTEDHAMMER = _candle_pattern('CDLINVERTEDHAMMER', 'inverted_hammer')
+CDLHANGINGMAN = _candle_pattern('CDLHANGINGMAN', 'hanging_man')
+CDLENGULFING = _candle_pattern('CDLENGULFING', 'engulfing')
+CDLMORNINGSTAR = _candle_pattern('CDLMORNINGSTAR', 'morning_star')
+CDLEVENINGSTAR = _candle_pattern('CDLEVENINGSTAR', 'evening_star')
+CDLSHOOTINGSTAR = _candle_pattern('CDLSHOOTINGSTAR', 'shooting_star')
+CDL3WHITESOLDIERS = _candle_pattern('CDL3WHITESOLDIERS', 'three_white_soldiers')
+CDL3BLACKCROWS = _candle_pattern('CDL3BLACKCROWS', 'three_black_crows')
+CDL3INSIDE = _candle_pattern('CDL3INSIDE', 'three_inside')
 
 # ===== ОСТАЛЬНЫЕ ИНДИКАТОРЫ =====
 
@@ -17,6 +17,7 @@ except ImportError:
 
 # Импортируем наш wrapper с fallback реализациями
 from .ta_wrapper import *
+from .batch import BatchOHLCV, calculate_batch
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,33 @@ class TechnicalIndicators:
         
         return result
     
+    def calculate_all_batch(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Рассчитать индикаторы calculate_all сразу для многих пар
+        
+        Все пары считаются одним векторным проходом по матрицам
+        (пары x бары). Короткие истории дополняются NaN слева, поэтому
+        значения каждой пары совпадают с calculate_all по ее DataFrame.
+        
+        Args:
+            frames: {символ: DataFrame с колонками open, high, low, close, volume}
+            
+        Returns:
+            {символ: DataFrame с добавленными индикаторами}
+        """
+        frames = {symbol: df for symbol, df in frames.items() if len(df) >= 30}
+        if not frames:
+            return {}
+        
+        batch = BatchOHLCV.from_frames(frames)
+        values = calculate_batch(batch)
+        
+        result = {}
+        for symbol in batch.symbols:
+            result[symbol] = pd.concat([frames[symbol], values.frame(symbol)], axis=1)
+        
+        return result
+    
     def sma(self, series: pd.Series, period: int) -> pd.Series:
         """Simple Moving Average"""
         if self.has_pandas_ta:
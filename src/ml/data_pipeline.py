@@ -17,6 +17,8 @@ from ..core.database import SessionLocal
 from ..core.models import Trade, Signal, MarketData
 from ..logging.smart_logger import SmartLogger
 from .features.feature_engineering import FeatureEngineering
+from ..exchange.candle_buffer import TIMEFRAME_MS
+from ..exchange.resampler import can_resample, resample_frame
 
 
 class DataPipeline:
@@ -27,6 +29,8 @@ class DataPipeline:
     def __init__(self, symbols: List[str], timeframes: List[str] = ['5m', '15m', '1h', '4h']):
         self.symbols = symbols
         self.timeframes = timeframes
+        # Из БД читается только младший таймфрейм, остальные собираются из него
+        self.base_timeframe = min(timeframes, key=lambda tf: TIMEFRAME_MS.get(tf, float('inf')))
         self.feature_engineering = FeatureEngineering()
         self.logger = SmartLogger(__name__)
         
@@ -72,6 +76,15 @@ class DataPipeline:
             if (datetime.now() - last_update).seconds < 300:  # 5 минут
                 return self.cache['market_data'][cache_key]
         
+        # Старший таймфрейм - пересборка базовых свечей вместо отдельной выборки
+        if can_resample(self.base_timeframe, timeframe):
+            base_df = await self.fetch_market_data(symbol, self.base_timeframe, start_date, end_date)
+            if not base_df.empty:
+                df = resample_frame(base_df, timeframe)
+                self.cache['market_data'][cache_key] = df
+                self.cache['last_update'][cache_key] = datetime.now()
+                return df
+        
         db = SessionLocal()
         try:
             query = db.query(MarketData).filter(
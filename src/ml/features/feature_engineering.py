@@ -12,7 +12,16 @@ from sqlalchemy.orm import Session
 
 from ...core.database import SessionLocal
 from ...core.models import Candle, MarketCondition, Signal, Trade
+from ...exchange.market_hub import market_hub
 from ...indicators.technical_indicators import TechnicalIndicators
+from ...indicators.candle_patterns import detect_patterns
+
+# Паттерны свечей, которые идут в признаки
+CANDLE_PATTERN_NAMES = [
+    'doji', 'hammer', 'inverted_hammer', 'hanging_man', 'engulfing',
+    'morning_star', 'evening_star', 'shooting_star',
+    'three_white_soldiers', 'three_black_crows', 'three_inside'
+]
 
 
 class FeatureEngineer:
@@ -22,6 +31,7 @@ class FeatureEngineer:
     
     def __init__(self):
         self.tech_indicators = TechnicalIndicators()
+        self.market_hub = market_hub
         
         # Список базовых признаков
         self.price_features = [
@@ -71,25 +81,12 @@ class FeatureEngineer:
         """
         db = SessionLocal()
         try:
-            # Получаем свечи
-            candles = db.query(Candle).filter(
-                Candle.symbol == symbol,
-                Candle.timeframe == timeframe
-            ).order_by(Candle.timestamp.desc()).limit(lookback_periods * 2).all()
+            # Свежие свечи из общего хаба, длинная история - из БД
+            df = await self._load_candles(db, symbol, timeframe, lookback_periods)
             
-            if len(candles) < lookback_periods:
+            if df is None or len(df) < lookback_periods:
                 return pd.DataFrame()
             
-            # Конвертируем в DataFrame
-            df = pd.DataFrame([{
-                'timestamp': c.timestamp,
-                'open': float(c.open),
-                'high': float(c.high),
-                'low': float(c.low),
-                'close': float(c.close),
-                'volume': float(c.volume)
-            } for c in reversed(candles)])
-            
             # Добавляем все группы признаков
             df = self._add_price_features(df)
             df = self._add_technical_indicators(df)
@@ -113,6 +110,42 @@ class FeatureEngineer:
         finally:
             db.close()
     
+    async def _load_candles(self, db: Session, symbol: str, timeframe: str,
+                            lookback_periods: int) -> Optional[pd.DataFrame]:
+        """
+        Свечи для расчета признаков
+        
+        Если окно помещается в буфер хаба, свечи берутся оттуда (те же,
+        что уже загружены для анализа), иначе - из таблицы candles.
+        """
+        limit = lookback_periods * 2
+        
+        if limit <= self.market_hub.store.max_candles:
+            try:
+                hub_df = await self.market_hub.get_candles(symbol, timeframe, limit)
+                if hub_df is not None and len(hub_df) >= lookback_periods:
+                    # Копия: дальше добавляются колонки, буфер хаба не трогаем
+                    return hub_df.reset_index()
+            except Exception:
+                pass  # Биржа недоступна - используем БД
+        
+        candles = db.query(Candle).filter(
+            Candle.symbol == symbol,
+            Candle.timeframe == timeframe
+        ).order_by(Candle.timestamp.desc()).limit(limit).all()
+        
+        if not candles:
+            return None
+        
+        return pd.DataFrame([{
+            'timestamp': c.timestamp,
+            'open': float(c.open),
+            'high': float(c.high),
+            'low': float(c.low),
+            'close': float(c.close),
+            'volume': float(c.volume)
+        } for c in reversed(candles)])
+    
     def _add_price_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Добавляет ценовые признаки"""
         # Изменения цены
@@ -206,55 +239,21 @@ class FeatureEngineer:
         return df
     
     def _add_candle_patterns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Добавляет паттерны свечей используя pandas-ta"""
-        # Получаем все доступные паттерны
-        df_patterns = df.ta.cdl_pattern(name="all")
-        
-        # Если паттерны найдены, добавляем их
-        if df_patterns is not None and not df_patterns.empty:
-            pattern_cols = df_patterns.columns.tolist()
-            
-            # Переименовываем некоторые паттерны для совместимости
-            rename_map = {
-                'CDL_DOJI': 'doji',
-                'CDL_HAMMER': 'hammer',
-                'CDL_INVERTEDHAMMER': 'inverted_hammer',
-                'CDL_HANGINGMAN': 'hanging_man',
-                'CDL_ENGULFING': 'bullish_engulfing',
-                'CDL_MORNINGSTAR': 'morning_star',
-                'CDL_EVENINGSTAR': 'evening_star',
-                'CDL_SHOOTINGSTAR': 'shooting_star',
-                'CDL_3WHITESOLDIERS': 'three_white_soldiers',
-                'CDL_3BLACKCROWS': 'three_black_crows',
-                'CDL_3INSIDE': 'three_inside'
-            }
-            
-            for old_name, new_name in rename_map.items():
-                if old_name in df_patterns.columns:
-                    df[new_name] = df_patterns[old_name]
-            
-            # Bearish engulfing - инвертируем значение
-            if 'CDL_ENGULFING' in df_patterns.columns:
-                df['bearish_engulfing'] = df_patterns['CDL_ENGULFING'] * -1
-            
-            # Создаем суммарный паттерн-сигнал
-            pattern_cols = [col for col in df.columns if col in rename_map.values()]
-            if pattern_cols:
-                df['pattern_strength'] = df[pattern_cols].abs().sum(axis=1)
-                df['pattern_direction'] = df[pattern_cols].sum(axis=1)
-            else:
-                df['pattern_strength'] = 0
-                df['pattern_direction'] = 0
-        else:
-            # Если паттерны не найдены, создаем пустые колонки
-            for pattern in ['doji', 'hammer', 'inverted_hammer', 'hanging_man',
-                          'bullish_engulfing', 'bearish_engulfing', 'morning_star',
-                          'evening_star', 'shooting_star', 'three_white_soldiers',
-                          'three_black_crows', 'three_inside']:
-                df[pattern] = 0
-            df['pattern_strength'] = 0
-            df['pattern_direction'] = 0
-        
+        """Добавляет паттерны свечей (только используемые, векторно на NumPy)"""
+        patterns = detect_patterns(df, CANDLE_PATTERN_NAMES)
+
+        # Поглощение - один знаковый паттерн: bullish - как есть, bearish - инвертированный
+        columns = []
+        for name in CANDLE_PATTERN_NAMES:
+            column = 'bullish_engulfing' if name == 'engulfing' else name
+            df[column] = patterns[name]
+            columns.append(column)
+        df['bearish_engulfing'] = patterns['engulfing'] * -1
+
+        # Создаем суммарный паттерн-сигнал
+        df['pattern_strength'] = df[columns].abs().sum(axis=1)
+        df['pattern_direction'] = df[columns].sum(axis=1)
+
         return df
     
     def _add_time_features(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -19,6 +19,7 @@ from ...core.database import SessionLocal
 from ..models.classifier import DirectionClassifier
 from ..models.regressor import PriceLevelRegressor
 from ..strategy_selector import MLStrategySelector
+from ...indicators.support_resistance import SupportResistance, SupportResistanceTracker
 
 
 @dataclass
@@ -37,6 +38,9 @@ class BacktestConfig:
     use_take_profit: bool = True
     trailing_stop: bool = False
     trailing_stop_distance: float = 0.02  # 2%
+    use_sr_levels: bool = False  # Ставить TP перед ближайшей зоной поддержки/сопротивления
+    sr_order: int = 5  # Баров слева и справа от пивота уровня
+    sr_lookback: int = 200  # Сколько баров истории учитывать в уровнях
 
 
 @dataclass
@@ -160,6 +164,14 @@ class Backtester:
         trades = []
         open_positions = []
         
+        # Уровни обновляются по одному закрытому бару - как в живой торговле
+        sr_tracker = None
+        if self.config.use_sr_levels:
+            sr_tracker = SupportResistanceTracker(
+                order=self.config.sr_order, max_bars=self.config.sr_lookback
+            )
+            sr_tracker.append(market_data.iloc[0]['high'], market_data.iloc[0]['low'])
+        
         # Основной цикл бэктеста
         for i in range(1, len(market_data)):
             current_time = market_data.index[i]
@@ -167,6 +179,9 @@ class Backtester:
             current_high = market_data.iloc[i]['high']
             current_low = market_data.iloc[i]['low']
             
+            if sr_tracker is not None:
+                sr_tracker.append(current_high, current_low, current_time)
+            
             # Проверяем открытые позиции
             positions_to_close = []
             
@@ -247,7 +262,8 @@ class Backtester:
                     # Открываем длинную позицию
                     new_trade = self._open_position(
                         'long', current_time, current_price, position_size,
-                        sl_percent, tp_percent, confidence, strategy
+                        sl_percent, tp_percent, confidence, strategy,
+                        levels=sr_tracker.levels if sr_tracker is not None else None
                     )
                     open_positions.append(new_trade)
                     balance -= new_trade.position_size + new_trade.commission_paid
@@ -262,7 +278,8 @@ class Backtester:
                     # Открываем короткую позицию
                     new_trade = self._open_position(
                         'short', current_time, current_price, position_size,
-                        sl_percent, tp_percent, confidence, strategy
+                        sl_percent, tp_percent, confidence, strategy,
+                        levels=sr_tracker.levels if sr_tracker is not None else None
                     )
                     open_positions.append(new_trade)
                     balance -= new_trade.position_size + new_trade.commission_paid
@@ -298,9 +315,29 @@ class Backtester:
         
         return result
     
+    @staticmethod
+    def strategy_predictions(strategy, market_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Предсказания для run_backtest из сигналов стратегии
+
+        Сигналы всей истории считаются одним вызовом analyze_series
+        (BaseStrategy), уровни SL/TP переводятся в проценты от цены.
+        """
+        series = strategy.analyze_series(market_data)
+        price = market_data['close']
+
+        predictions = pd.DataFrame(index=market_data.index)
+        predictions['signal'] = series['action'].map({'BUY': 'buy', 'SELL': 'sell'}).fillna('hold')
+        predictions['confidence'] = series['confidence']
+        predictions['take_profit_percent'] = ((series['take_profit'] - price).abs() / price * 100).fillna(2.0)
+        predictions['stop_loss_percent'] = ((series['stop_loss'] - price).abs() / price * 100).fillna(1.0)
+        predictions['strategy'] = strategy.name
+        return predictions
+
     def _open_position(self, side: str, entry_time: datetime, entry_price: float,
                       position_size: float, sl_percent: float, tp_percent: float,
-                      confidence: float, strategy: str) -> Trade:
+                      confidence: float, strategy: str,
+                      levels: Optional[SupportResistance] = None) -> Trade:
         """Открывает новую позицию"""
         commission = position_size * self.config.commission
         
@@ -314,6 +351,17 @@ class Backtester:
             stop_loss = entry_price * (1 + sl_percent / 100) if self.config.use_stop_loss else None
             take_profit = entry_price * (1 - tp_percent / 100) if self.config.use_take_profit else None
         
+        # TP не дальше ближайшей зоны на пути цены
+        if levels is not None and take_profit is not None:
+            if side == 'long':
+                zone = levels.nearest_resistance(entry_price)
+                if zone is not None and entry_price < zone.lower < take_profit:
+                    take_profit = zone.lower
+            else:
+                zone = levels.nearest_support(entry_price)
+                if zone is not None and take_profit < zone.upper < entry_price:
+                    take_profit = zone.upper
+        
         trade = Trade(
             entry_time=entry_time,
             entry_price=entry_price,
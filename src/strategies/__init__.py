@@ -3,10 +3,17 @@
 """
 from .factory import strategy_factory, StrategyFactory
 from .base import BaseStrategy, TradingSignal
+from .pool import strategy_pool, StrategyPool
+from .ensemble import strategy_ensemble, StrategyEnsemble, EnsembleEvaluation
 
 __all__ = [
     'strategy_factory',
     'StrategyFactory', 
+    'strategy_pool',
+    'StrategyPool',
+    'strategy_ensemble',
+    'StrategyEnsemble',
+    'EnsembleEvaluation',
     'BaseStrategy',
     'TradingSignal'
 ]
\ No newline at end of file
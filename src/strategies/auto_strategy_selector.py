@@ -5,22 +5,23 @@
 Этот модуль анализирует рыночные условия и автоматически выбирает
 оптимальную стратегию для каждой торговой пары.
 """
+import asyncio
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import ta
 import logging
-from dataclasses import dataclass
-from collections import defaultdict
-import pickle
+from dataclasses import asdict, dataclass
 import json
 from pathlib import Path
 
 from ..core.database import SessionLocal
 from ..core.models import Trade, Signal, TradeStatus
 from ..core.clean_logging import get_clean_logger
-from ..analysis.market_analyzer import MarketAnalyzer
+from ..analysis.market_analyzer import market_analyzer
+from ..indicators.context import IndicatorContext, indicator_contexts
+from .performance import strategy_performance
+from .online_selector import MIN_UPDATES, OnlineStrategyModel
 
 logger = get_clean_logger(__name__)
 
@@ -47,6 +48,77 @@ class StrategyPerformance:
     trades_count: int
     last_updated: datetime
 
+def _ewm_mean(values: np.ndarray, alpha: np.ndarray, min_periods: int) -> np.ndarray:
+    """
+    EMA (ewm adjust=False, как в pandas и ta) по колонкам матрицы бары x ряды
+    
+    Рекурсия идет по барам сразу для всех колонок. Пропуски допускаются
+    только в начале колонки (выравнивание по последнему бару).
+    """
+    decay = 1 - alpha
+    norm = decay + alpha
+    result = np.full(values.shape, np.nan)
+    weighted = values[0].copy()
+    count = (~np.isnan(weighted)).astype(np.int64)
+    for i in range(len(values)):
+        if i:
+            current = values[i]
+            count += ~np.isnan(current)
+            # Как в pandas: при совпадении значений без пересчета (постоянный ряд)
+            update = np.where(weighted != current, (decay * weighted + alpha * current) / norm, weighted)
+            weighted = np.where(np.isnan(weighted), current, update)
+        result[i] = np.where(count >= min_periods, weighted, np.nan)
+    return result
+
+
+def _batch_momentum(frames: List[pd.DataFrame]) -> np.ndarray:
+    """
+    Momentum (-100...100) нескольких пар за один проход - как _calculate_momentum
+    
+    Цены закрытия пар выравниваются по последнему бару в одну матрицу
+    (бары x пары, короткие истории дополнены NaN в начале); RSI и MACD
+    считаются теми же EMA, что и в ta, сразу по всем колонкам.
+    """
+    pairs = len(frames)
+    length = max(len(df) for df in frames)
+    close = np.full((length, pairs), np.nan)
+    for column, df in enumerate(frames):
+        values = df['close'].to_numpy(dtype=float)
+        close[length - len(values):, column] = values
+    
+    # RSI(14) как ta.momentum.RSIIndicator: движения вверх/вниз с первого бара пары
+    diff = np.full_like(close, np.nan)
+    diff[1:] = close[1:] - close[:-1]
+    listed = ~np.isnan(close)
+    up_direction = np.where(listed, np.where(diff > 0, diff, 0.0), np.nan)
+    down_direction = np.where(listed, -np.where(diff < 0, diff, 0.0), np.nan)
+    
+    rsi_ema = _ewm_mean(np.hstack([up_direction, down_direction]), np.full(2 * pairs, 1 / 14), 14)
+    emaup, emadn = rsi_ema[-1, :pairs], rsi_ema[-1, pairs:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+    
+    # MACD(12, 26, 9) как ta.trend.MACD: быстрая и медленная EMA одной рекурсией
+    alpha = np.concatenate([np.full(pairs, 2 / 13), np.full(pairs, 2 / 27)])
+    emas = _ewm_mean(np.hstack([close, close]), alpha, 12)
+    ema_slow = np.where(np.cumsum(listed, axis=0) >= 26, emas[:, pairs:], np.nan)
+    macd = emas[:, :pairs] - ema_slow
+    macd_signal = _ewm_mean(macd, np.full(pairs, 2 / 10), 9)
+    macd_diff = macd[-1] - macd_signal[-1]
+    
+    missing = np.full(pairs, np.nan)
+    price_change_5 = (close[-1] - close[-5]) / close[-5] * 100 if length >= 5 else missing
+    price_change_10 = (close[-1] - close[-10]) / close[-10] * 100 if length >= 10 else missing
+    
+    momentum = ((rsi - 50) * 2 * 0.3 +
+                price_change_5 * 0.2 +
+                price_change_10 * 0.2 +
+                np.clip(macd_diff * 100, -100, 100) * 0.3)
+    
+    # Недостаточно истории - как при ошибке расчета
+    return np.nan_to_num(np.clip(momentum, -100, 100), nan=0.0)
+
+
 class AutoStrategySelector:
     """
     Интеллектуальный селектор стратегий
@@ -59,7 +131,7 @@ class AutoStrategySelector:
     """
     
     def __init__(self):
-        self.analyzer = MarketAnalyzer()
+        self.analyzer = market_analyzer  # Общий с BotManager - без повторной загрузки
         
         # Доступные стратегии
         self.available_strategies = [
@@ -70,19 +142,18 @@ class AutoStrategySelector:
             'conservative'       # Для неопределенных условий
         ]
         
-        # Кэш производительности стратегий
-        self.performance_cache: Dict[str, Dict[str, StrategyPerformance]] = defaultdict(dict)
-        
-        # Путь для сохранения обученной модели
-        self.model_path = Path("models/strategy_selector.pkl")
+        # Состояние онлайн-модели (обучается по каждой закрытой сделке)
+        self.model_path = Path("models/strategy_selector_online.json")
         self.model_path.parent.mkdir(exist_ok=True)
+        self.online_model = OnlineStrategyModel.load(self.model_path, self.available_strategies)
         
-        # Загружаем обученную модель если есть
-        self.ml_model = self._load_model()
-        
-        # История выбора стратегий для обучения
+        # История выбора стратегий
         self.selection_history = []
         
+        # Признаки условий последнего выбора и открытых сделок: (symbol, strategy) -> features
+        self._selection_contexts: Dict[Tuple[str, str], List[float]] = {}
+        self._trade_contexts: Dict[Tuple[str, str], List[float]] = {}
+        
         logger.info("✅ AutoStrategySelector инициализирован")
     
     async def select_best_strategy(self, symbol: str, timeframe: str = '5m') -> Tuple[str, float]:
@@ -106,7 +177,7 @@ class AutoStrategySelector:
                 return 'safe_multi_indicator', 0.5
             
             # Определяем рыночные условия
-            market_condition = self._analyze_market_conditions(market_data)
+            market_condition = self._analyze_market_conditions(market_data, symbol)
             logger.info(f"📊 Рыночные условия {symbol}: {market_condition.trend}, "
                        f"волатильность: {market_condition.volatility}, "
                        f"фаза: {market_condition.market_phase}")
@@ -115,8 +186,8 @@ class AutoStrategySelector:
             performance_data = self._get_historical_performance(symbol, market_condition)
             
             # Выбираем стратегию
-            if self.ml_model:
-                # Используем ML модель
+            if self.online_model.is_trained:
+                # Используем онлайн-модель
                 best_strategy, confidence = self._ml_select_strategy(
                     symbol, market_condition, performance_data
                 )
@@ -138,10 +209,12 @@ class AutoStrategySelector:
             logger.error(f"Ошибка выбора стратегии для {symbol}: {e}")
             return 'safe_multi_indicator', 0.3
     
-    def _analyze_market_conditions(self, market_data: Dict) -> MarketCondition:
+    def _analyze_market_conditions(self, market_data: Dict, symbol: str) -> MarketCondition:
         """Анализ текущих рыночных условий"""
         try:
             df = market_data['df']
+            # Тот же контекст индикаторов затем получат стратегии
+            context = indicator_contexts.get_context(symbol, df)
             current_price = market_data['current_price']
             
             # Определяем тренд
@@ -167,7 +240,7 @@ class AutoStrategySelector:
                 volume_level = 'HIGH'
             
             # Рассчитываем momentum
-            momentum = self._calculate_momentum(df)
+            momentum = self._calculate_momentum(df, context)
             
             # Близость к уровням поддержки/сопротивления
             sr_ratio = 0.5  # По умолчанию
@@ -209,11 +282,11 @@ class AutoStrategySelector:
                 confidence=0.3
             )
     
-    def _calculate_momentum(self, df: pd.DataFrame) -> float:
+    def _calculate_momentum(self, df: pd.DataFrame, context: IndicatorContext) -> float:
         """Расчет общего momentum (-100 to 100)"""
         try:
             # RSI momentum
-            rsi = ta.momentum.rsi(df['close'], window=14).iloc[-1]
+            rsi = context.rsi(14).iloc[-1]
             rsi_momentum = (rsi - 50) * 2  # Масштабируем к -100...100
             
             # Price momentum
@@ -223,7 +296,7 @@ class AutoStrategySelector:
                              df['close'].iloc[-10] * 100)
             
             # MACD momentum
-            macd = ta.trend.MACD(df['close'])
+            macd = context.macd()
             macd_momentum = macd.macd_diff().iloc[-1] * 100  # Масштабируем
             
             # Комбинированный momentum
@@ -277,231 +350,293 @@ class AutoStrategySelector:
         
         return min(confidence, 1.0)
     
-    def _get_historical_performance(self, symbol: str, 
-                                  condition: MarketCondition) -> Dict[str, StrategyPerformance]:
-        """Получение исторической производительности стратегий"""
-        # Проверяем кэш
-        cache_key = f"{symbol}_{condition.trend}_{condition.volatility}"
-        if cache_key in self.performance_cache:
-            cached_data = self.performance_cache[cache_key]
-            # Проверяем актуальность (обновляем раз в час)
-            if any(p.last_updated > datetime.utcnow() - timedelta(hours=1) 
-                   for p in cached_data.values()):
-                return cached_data
+    def _condition_frame(self, market_data: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Рыночные условия нескольких пар одной таблицей
         
-        # Загружаем из базы данных
-        performance_data = self._load_performance_from_db(symbol, condition)
+        Те же правила, что в _analyze_market_conditions, но каждое -
+        одна векторная операция по всем парам.
         
-        # Сохраняем в кэш
-        self.performance_cache[cache_key] = performance_data
+        Returns:
+            DataFrame по символам с колонками - полями MarketCondition
+        """
+        symbols = list(market_data)
+        data = list(market_data.values())
         
-        return performance_data
+        trend = np.array([d['trend']['direction'] for d in data], dtype=object)
+        trend_strength = np.array([d['trend']['strength'] for d in data], dtype=float)
+        daily = np.array([d['volatility']['daily'] for d in data], dtype=float)
+        volume_ratio = np.array([d['volume_analysis']['ratio'] for d in data], dtype=float)
+        volume_trend = np.array([d['volume_analysis']['trend'] for d in data], dtype=object)
+        correlation = np.array([d['volume_analysis']['price_correlation'] for d in data], dtype=float)
+        price = np.array([d['current_price'] for d in data], dtype=float)
+        support = np.array([d['support'] or np.nan for d in data], dtype=float)
+        resistance = np.array([d['resistance'] or np.nan for d in data], dtype=float)
+        
+        volatility_level = np.select([daily < 0.01, daily < 0.03], ['LOW', 'MEDIUM'], 'HIGH')
+        volume_level = np.select([volume_ratio < 0.7, volume_ratio < 1.3], ['LOW', 'NORMAL'], 'HIGH')
+        
+        # Близость к уровням поддержки/сопротивления
+        price_range = resistance - support
+        with np.errstate(invalid='ignore'):
+            sr_ratio = np.where(price_range > 0, (price - support) / price_range, 0.5)
+        
+        # Рыночная фаза (упрощенный метод Вайкоффа)
+        market_phase = np.select(
+            [(trend == 'SIDEWAYS') & (volume_trend == 'DECREASING'),
+             (trend == 'UPTREND') & (volume_trend == 'INCREASING'),
+             (trend == 'SIDEWAYS') & (volume_trend == 'INCREASING'),
+             trend == 'DOWNTREND'],
+            ['ACCUMULATION', 'MARKUP', 'DISTRIBUTION', 'MARKDOWN'],
+            'UNKNOWN'
+        )
+        
+        # Уверенность в определении условий
+        confidence = (0.5 +
+                      np.where(trend_strength > 5, 0.2, 0) +
+                      np.where((daily > 0.5) & (daily < 3), 0.15, 0) +
+                      np.where(correlation > 0.5, 0.15, 0))
+        
+        return pd.DataFrame({
+            'trend': trend,
+            'volatility': volatility_level,
+            'volume': volume_level,
+            'momentum': _batch_momentum([d['df'] for d in data]),
+            'support_resistance_ratio': sr_ratio,
+            'market_phase': market_phase,
+            'confidence': np.minimum(confidence, 1.0)
+        }, index=symbols)
+    
+    @staticmethod
+    def _condition_feature_matrix(conditions: pd.DataFrame) -> np.ndarray:
+        """Признаки онлайн-модели для таблицы условий - как _condition_features"""
+        trend = conditions['trend'].to_numpy()
+        volatility = conditions['volatility'].to_numpy()
+        volume = conditions['volume'].to_numpy()
+        return np.column_stack([
+            np.select([trend == 'UPTREND', trend == 'DOWNTREND'], [1, -1], 0),
+            np.select([volatility == 'HIGH', volatility == 'MEDIUM'], [1, 0.5], 0),
+            np.select([volume == 'HIGH', volume == 'NORMAL'], [1, 0.5], 0),
+            conditions['momentum'].to_numpy(dtype=float) / 100,
+            conditions['support_resistance_ratio'].to_numpy(dtype=float),
+            conditions['confidence'].to_numpy(dtype=float)
+        ]).astype(float)
+    
+    def _get_historical_performance(self, symbol: str, 
+                                  condition: MarketCondition) -> Dict[str, StrategyPerformance]:
+        """Получение исторической производительности стратегий"""
+        return self._load_performance_from_db(symbol, condition)
     
     def _load_performance_from_db(self, symbol: str, 
                                 condition: MarketCondition) -> Dict[str, StrategyPerformance]:
-        """Загрузка производительности из БД"""
-        db = SessionLocal()
+        """
+        Производительность стратегий пары
+        
+        История читается из БД одним запросом при первом обращении к паре,
+        дальше статистика обновляется при закрытии сделок (strategy_performance)
+        """
         performance_data = {}
         
         try:
-            # Для каждой стратегии считаем метрики
-            for strategy in self.available_strategies:
-                # Получаем сделки за последние 30 дней
-                trades = db.query(Trade).filter(
-                    Trade.symbol == symbol,
-                    Trade.strategy == strategy,
-                    Trade.status == TradeStatus.CLOSED,
-                    Trade.created_at >= datetime.utcnow() - timedelta(days=30)
-                ).all()
-                
-                if len(trades) < 5:  # Недостаточно данных
-                    # Используем дефолтные значения
-                    performance_data[strategy] = StrategyPerformance(
-                        strategy_name=strategy,
-                        win_rate=0.5,
-                        average_profit=0,
-                        profit_factor=1.0,
-                        max_drawdown=0,
-                        sharpe_ratio=0,
-                        trades_count=len(trades),
-                        last_updated=datetime.utcnow()
-                    )
-                    continue
-                
-                # Рассчитываем метрики
-                profitable_trades = [t for t in trades if t.profit and t.profit > 0]
-                win_rate = len(profitable_trades) / len(trades)
-                
-                profits = [t.profit for t in trades if t.profit is not None]
-                average_profit = np.mean(profits) if profits else 0
-                
-                # Profit factor
-                gross_profit = sum(p for p in profits if p > 0)
-                gross_loss = abs(sum(p for p in profits if p < 0))
-                profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-                
-                # Max drawdown
-                cumulative_profits = np.cumsum(profits)
-                running_max = np.maximum.accumulate(cumulative_profits)
-                drawdown = (running_max - cumulative_profits) / running_max
-                max_drawdown = np.max(drawdown) if len(drawdown) > 0 else 0
-                
-                # Sharpe ratio (упрощенный)
-                if len(profits) > 1:
-                    returns = np.array(profits) / 1000  # Нормализация
-                    sharpe_ratio = np.mean(returns) / np.std(returns) if np.std(returns) > 0 else 0
-                else:
-                    sharpe_ratio = 0
-                
+            metrics = strategy_performance.get_metrics(symbol, self.available_strategies)
+            now = datetime.utcnow()
+            for strategy, values in metrics.items():
                 performance_data[strategy] = StrategyPerformance(
                     strategy_name=strategy,
-                    win_rate=win_rate,
-                    average_profit=average_profit,
-                    profit_factor=min(profit_factor, 10),  # Ограничиваем
-                    max_drawdown=max_drawdown,
-                    sharpe_ratio=sharpe_ratio,
-                    trades_count=len(trades),
-                    last_updated=datetime.utcnow()
+                    last_updated=now,
+                    **values
                 )
-                
         except Exception as e:
             logger.error(f"Ошибка загрузки производительности: {e}")
-        finally:
-            db.close()
         
         return performance_data
     
     def _rule_based_selection(self, condition: MarketCondition, 
                             performance: Dict[str, StrategyPerformance]) -> Tuple[str, float]:
         """Выбор стратегии на основе правил"""
-        scores = {}
+        scores = self._rule_based_scores(condition, performance)
+        
+        # Выбираем лучшую стратегию
+        best_strategy = max(scores, key=scores.get)
+        best_score = scores[best_strategy]
+        
+        return best_strategy, self._score_to_confidence(best_score)
+    
+    @staticmethod
+    def _score_to_confidence(score: float) -> float:
+        """Нормализация счета правил к уверенности (0.3-1)"""
+        max_possible_score = 100
+        confidence = min(score / max_possible_score, 1.0)
         
-        for strategy in self.available_strategies:
-            score = 0
+        # Минимальная уверенность
+        return max(confidence, 0.3)
+    
+    def _rule_based_scores(self, condition: MarketCondition, 
+                           performance: Dict[str, StrategyPerformance]) -> Dict[str, float]:
+        """Счет правил для каждой стратегии"""
+        scores = self._rule_score_matrix(pd.DataFrame([asdict(condition)]), [performance])
+        return dict(zip(self.available_strategies, scores[0].tolist()))
+    
+    def _rule_score_matrix(self, conditions: pd.DataFrame,
+                           performance: List[Dict[str, StrategyPerformance]]) -> np.ndarray:
+        """
+        Счет правил сразу для нескольких пар
+        
+        Args:
+            conditions: Условия пар (колонки - поля MarketCondition)
+            performance: Производительность стратегий для каждой пары
             
+        Returns:
+            Матрица пары x стратегии (порядок - available_strategies)
+        """
+        trend = conditions['trend'].to_numpy()
+        volatility = conditions['volatility'].to_numpy()
+        volume = conditions['volume'].to_numpy()
+        momentum = conditions['momentum'].to_numpy(dtype=float)
+        confidence = conditions['confidence'].to_numpy(dtype=float)
+        market_phase = conditions['market_phase'].to_numpy()
+        
+        scores = np.zeros((len(conditions), len(self.available_strategies)))
+        
+        for column, strategy in enumerate(self.available_strategies):
             # Базовый счет на основе производительности
-            if strategy in performance:
-                perf = performance[strategy]
-                score += perf.win_rate * 30  # Win rate важнее всего
-                score += min(perf.profit_factor, 3) * 20  # Profit factor
-                score += (1 - perf.max_drawdown) * 15  # Меньше drawdown - лучше
-                score += min(perf.sharpe_ratio, 2) * 10  # Sharpe ratio
+            rows = [(i, pair[strategy]) for i, pair in enumerate(performance) if strategy in pair]
+            if rows:
+                index = np.array([i for i, _ in rows])
+                perf = np.array([
+                    (p.win_rate, p.profit_factor, p.max_drawdown, p.sharpe_ratio, p.trades_count)
+                    for _, p in rows
+                ], dtype=float)
+                win_rate, profit_factor, max_drawdown, sharpe_ratio, trades_count = perf.T
+                
+                score = win_rate * 30  # Win rate важнее всего
+                score += np.minimum(profit_factor, 3) * 20  # Profit factor
+                score += (1 - max_drawdown) * 15  # Меньше drawdown - лучше
+                score += np.minimum(sharpe_ratio, 2) * 10  # Sharpe ratio
                 
                 # Учитываем количество сделок (больше данных - больше доверия)
-                confidence_factor = min(perf.trades_count / 20, 1.0)
-                score *= confidence_factor
+                score *= np.minimum(trades_count / 20, 1.0)
+                scores[index, column] = score
+            
+            score = scores[:, column]
             
             # Корректировка на основе рыночных условий
             if strategy == 'momentum':
                 # Momentum стратегия хороша для трендов
-                if condition.trend in ['UPTREND', 'DOWNTREND']:
-                    score *= 1.5
-                if abs(condition.momentum) > 50:
-                    score *= 1.3
-                if condition.volatility == 'HIGH':
-                    score *= 0.7  # Не очень для высокой волатильности
-                    
+                score *= np.where((trend == 'UPTREND') | (trend == 'DOWNTREND'), 1.5, 1)
+                score *= np.where(np.abs(momentum) > 50, 1.3, 1)
+                score *= np.where(volatility == 'HIGH', 0.7, 1)  # Не очень для высокой волатильности
+                
             elif strategy == 'scalping':
                 # Скальпинг для боковых рынков с низкой волатильностью
-                if condition.trend == 'SIDEWAYS':
-                    score *= 1.5
-                if condition.volatility == 'LOW':
-                    score *= 1.4
-                if condition.volume == 'HIGH':
-                    score *= 1.2
-                    
+                score *= np.where(trend == 'SIDEWAYS', 1.5, 1)
+                score *= np.where(volatility == 'LOW', 1.4, 1)
+                score *= np.where(volume == 'HIGH', 1.2, 1)
+                
             elif strategy == 'multi_indicator':
                 # Универсальная стратегия
                 score *= 1.1  # Небольшой бонус за универсальность
-                if condition.confidence > 0.7:
-                    score *= 1.2
-                    
+                score *= np.where(confidence > 0.7, 1.2, 1)
+                
             elif strategy == 'safe_multi_indicator':
                 # Безопасная для неопределенности
-                if condition.confidence < 0.5:
-                    score *= 1.5
-                if condition.volatility == 'HIGH':
-                    score *= 1.3
-                    
+                score *= np.where(confidence < 0.5, 1.5, 1)
+                score *= np.where(volatility == 'HIGH', 1.3, 1)
+                
             elif strategy == 'conservative':
                 # Консервативная для защиты капитала
-                if condition.market_phase == 'DISTRIBUTION':
-                    score *= 1.4
-                if condition.volatility == 'HIGH':
-                    score *= 1.2
-            
-            scores[strategy] = score
+                score *= np.where(market_phase == 'DISTRIBUTION', 1.4, 1)
+                score *= np.where(volatility == 'HIGH', 1.2, 1)
         
-        # Выбираем лучшую стратегию
-        best_strategy = max(scores, key=scores.get)
-        best_score = scores[best_strategy]
+        return scores
+    
+    def _strategy_confidences(self, symbol: str, condition: MarketCondition,
+                              performance: Dict[str, StrategyPerformance]) -> Dict[str, float]:
+        """Уверенность селектора в каждой стратегии (вероятности ML или правила)"""
+        if self.online_model.is_trained:
+            try:
+                return self.online_model.predict(self._condition_features(condition))
+            except Exception as e:
+                logger.error(f"Ошибка ML предсказания: {e}")
         
-        # Нормализуем счет к уверенности (0-1)
-        max_possible_score = 100
-        confidence = min(best_score / max_possible_score, 1.0)
+        scores = self._rule_based_scores(condition, performance)
+        return {strategy: self._score_to_confidence(score) for strategy, score in scores.items()}
+    
+    async def select_from_ensemble(self, symbol: str, evaluation) -> Optional[Tuple[str, float]]:
+        """
+        Выбор среди сигналов всех стратегий на одном баре
         
-        # Минимальная уверенность
-        confidence = max(confidence, 0.3)
+        Кандидаты - стратегии ансамбля с сигналом BUY/SELL; побеждает
+        максимум (уверенность селектора в стратегии x уверенность ее
+        сигнала).
+        
+        Args:
+            evaluation: EnsembleEvaluation из strategy_ensemble.evaluate
+            
+        Returns:
+            (стратегия, уверенность селектора) или None, если все ждут
+        """
+        candidates = {
+            name: signal for name, signal in evaluation.actionable().items()
+            if name in self.available_strategies
+        }
+        if not candidates:
+            return None
         
-        return best_strategy, confidence
-    
-    def _ml_select_strategy(self, symbol: str, condition: MarketCondition,
-                          performance: Dict[str, StrategyPerformance]) -> Tuple[str, float]:
-        """Выбор стратегии с помощью ML модели"""
         try:
-            # Подготавливаем features
-            features = self._prepare_ml_features(symbol, condition, performance)
+            market_data = await self.analyzer.analyze_symbol(symbol)
+            if not market_data:
+                return None
             
-            # Предсказание
-            prediction = self.ml_model.predict([features])[0]
-            confidence = self.ml_model.predict_proba([features]).max()
+            condition = self._analyze_market_conditions(market_data, symbol)
+            performance = self._get_historical_performance(symbol, condition)
+            confidences = self._strategy_confidences(symbol, condition, performance)
             
-            # Мапим индекс к названию стратегии
-            strategy = self.available_strategies[prediction]
+            best_strategy = max(
+                candidates, key=lambda name: confidences.get(name, 0.0) * candidates[name].confidence
+            )
+            self._save_selection(symbol, condition, best_strategy)
             
-            return strategy, confidence
+            logger.info(f"✅ Из ансамбля ({', '.join(candidates)}) выбрана стратегия "
+                        f"'{best_strategy}' для {symbol}")
+            return best_strategy, confidences.get(best_strategy, 0.3)
+            
+        except Exception as e:
+            logger.error(f"Ошибка выбора из ансамбля для {symbol}: {e}")
+            return None
+    
+    def _ml_select_strategy(self, symbol: str, condition: MarketCondition,
+                          performance: Dict[str, StrategyPerformance]) -> Tuple[str, float]:
+        """Выбор стратегии онлайн-моделью: max P(прибыльная сделка) + бонус исследования"""
+        try:
+            return self.online_model.select(self._condition_features(condition))
             
         except Exception as e:
             logger.error(f"Ошибка ML предсказания: {e}")
             # Fallback к rule-based
             return self._rule_based_selection(condition, performance)
     
-    def _prepare_ml_features(self, symbol: str, condition: MarketCondition,
-                           performance: Dict[str, StrategyPerformance]) -> List[float]:
-        """Подготовка features для ML модели"""
-        features = []
-        
-        # Market condition features
-        features.append(1 if condition.trend == 'UPTREND' else 
-                       -1 if condition.trend == 'DOWNTREND' else 0)
-        features.append(1 if condition.volatility == 'HIGH' else 
-                       0.5 if condition.volatility == 'MEDIUM' else 0)
-        features.append(1 if condition.volume == 'HIGH' else 
-                       0.5 if condition.volume == 'NORMAL' else 0)
-        features.append(condition.momentum / 100)  # Нормализованный
-        features.append(condition.support_resistance_ratio)
-        features.append(condition.confidence)
-        
-        # Performance features для каждой стратегии
-        for strategy in self.available_strategies:
-            if strategy in performance:
-                perf = performance[strategy]
-                features.extend([
-                    perf.win_rate,
-                    perf.average_profit / 100,  # Нормализация
-                    min(perf.profit_factor, 5) / 5,  # Нормализация
-                    perf.max_drawdown,
-                    min(perf.sharpe_ratio, 3) / 3,  # Нормализация
-                    min(perf.trades_count, 50) / 50  # Нормализация
-                ])
-            else:
-                # Дефолтные значения
-                features.extend([0.5, 0, 0.2, 0.1, 0, 0])
-        
-        return features
+    @staticmethod
+    def _condition_features(condition: MarketCondition) -> List[float]:
+        """Признаки рыночных условий для онлайн-модели (порядок - FEATURE_NAMES)"""
+        return [
+            1 if condition.trend == 'UPTREND' else
+            -1 if condition.trend == 'DOWNTREND' else 0,
+            1 if condition.volatility == 'HIGH' else
+            0.5 if condition.volatility == 'MEDIUM' else 0,
+            1 if condition.volume == 'HIGH' else
+            0.5 if condition.volume == 'NORMAL' else 0,
+            condition.momentum / 100,  # Нормализованный
+            condition.support_resistance_ratio,
+            condition.confidence
+        ]
     
-    def _save_selection(self, symbol: str, condition: MarketCondition, strategy: str):
-        """Сохранение выбора для последующего обучения"""
+    def _save_selection(self, symbol: str, condition: MarketCondition, strategy: str,
+                        features: Optional[List[float]] = None):
+        """Сохранение выбора; его условия станут контекстом сделки по сигналу"""
+        if features is None:
+            features = self._condition_features(condition)
+        self._selection_contexts[(symbol, strategy)] = features
         self.selection_history.append({
             'timestamp': datetime.utcnow(),
             'symbol': symbol,
@@ -513,119 +648,121 @@ class AutoStrategySelector:
         if len(self.selection_history) > 10000:
             self.selection_history = self.selection_history[-5000:]
     
-    def train_ml_model(self):
-        """Обучение ML модели на исторических данных"""
-        logger.info("🎓 Начинаем обучение ML модели...")
+    def bind_trade_context(self, symbol: str, strategy: str):
+        """
+        Закрепить условия последнего выбора за открытой сделкой
         
-        try:
-            # Загружаем исторические данные
-            X, y = self._prepare_training_data()
-            
-            if len(X) < 100:
-                logger.warning("Недостаточно данных для обучения")
-                return
-            
-            # Используем простой RandomForest
-            from sklearn.ensemble import RandomForestClassifier
-            from sklearn.model_selection import train_test_split
-            
-            # Разделяем на train/test
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-            
-            # Обучаем модель
-            model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-            model.fit(X_train, y_train)
-            
-            # Оценка
-            train_score = model.score(X_train, y_train)
-            test_score = model.score(X_test, y_test)
-            
-            logger.info(f"✅ Модель обучена. Train score: {train_score:.2f}, "
-                       f"Test score: {test_score:.2f}")
-            
-            # Сохраняем модель
-            self.ml_model = model
-            self._save_model()
-            
-        except Exception as e:
-            logger.error(f"Ошибка обучения модели: {e}")
+        Вызывается после исполнения сигнала: дальнейшие выборы по паре
+        не подменят условия, в которых сделка была открыта.
+        """
+        features = self._selection_contexts.get((symbol, strategy))
+        if features is not None:
+            self._trade_contexts[(symbol, strategy)] = features
     
-    def _prepare_training_data(self) -> Tuple[List[List[float]], List[int]]:
-        """Подготовка данных для обучения"""
-        X = []
-        y = []
+    def learn_from_trade(self, symbol: str, strategy: Optional[str], profit: Optional[float]) -> bool:
+        """
+        Обновление онлайн-модели по закрытой сделке - O(число признаков)
+        
+        Returns:
+            True, если модель обновлена и сохранена
+        """
+        if not strategy or profit is None:
+            return False
+        
+        features = self._trade_contexts.pop((symbol, strategy), None)
+        if features is None:
+            # Контекст не закреплен - берем условия последнего выбора пары
+            features = self._selection_contexts.get((symbol, strategy))
+        if features is None:
+            # Сделка открыта до перезапуска или не через селектор
+            return False
+        
+        if not self.online_model.update(strategy, features, won=profit > 0):
+            return False
         
-        db = SessionLocal()
         try:
-            # Загружаем исторические сделки
-            trades = db.query(Trade).filter(
-                Trade.status == TradeStatus.CLOSED,
-                Trade.created_at >= datetime.utcnow() - timedelta(days=90)
-            ).all()
-            
-            # Группируем по стратегиям и условиям
-            for trade in trades:
-                # Здесь нужно восстановить условия рынка на момент сделки
-                # Это упрощенная версия
-                features = self._extract_features_from_trade(trade)
-                if features:
-                    X.append(features)
-                    # Целевая переменная - индекс стратегии
-                    strategy_idx = self.available_strategies.index(trade.strategy)
-                    y.append(strategy_idx)
-            
-        finally:
-            db.close()
-        
-        return X, y
-    
-    def _extract_features_from_trade(self, trade: Trade) -> Optional[List[float]]:
-        """Извлечение features из исторической сделки"""
-        # Это упрощенная версия - в реальности нужно восстановить
-        # рыночные условия на момент сделки
-        return None  # TODO: Implement
-    
-    def _save_model(self):
-        """Сохранение обученной модели"""
-        if self.ml_model:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.ml_model, f)
-            logger.info(f"✅ Модель сохранена в {self.model_path}")
-    
-    def _load_model(self):
-        """Загрузка обученной модели"""
-        if self.model_path.exists():
-            try:
-                with open(self.model_path, 'rb') as f:
-                    model = pickle.load(f)
-                logger.info("✅ ML модель загружена")
-                return model
-            except Exception as e:
-                logger.error(f"Ошибка загрузки модели: {e}")
-        return None
+            self.online_model.save()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения онлайн-модели: {e}")
+        
+        if self.online_model.updates == MIN_UPDATES:
+            logger.info(f"🎓 Онлайн-модель селектора набрала {MIN_UPDATES} сделок и заменяет правила")
+        return True
     
-    async def analyze_and_select_all_pairs(self, pairs: List[str]) -> Dict[str, Tuple[str, float]]:
+    async def analyze_and_select_all_pairs(self, pairs: List[str],
+                                           max_concurrency: int = 10) -> Dict[str, Tuple[str, float]]:
         """
         Анализ и выбор стратегий для всех пар
         
+        Данные пар запрашиваются у анализатора конкурентно; условия
+        считаются одной таблицей по всем парам, а стратегии оцениваются
+        одним вычислением онлайн-модели или правил.
+        
+        Args:
+            pairs: Торговые пары
+            max_concurrency: Сколько пар анализировать одновременно
+            
         Returns:
             Dict[symbol, (strategy, confidence)]
         """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(symbol: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.analyzer.analyze_symbol(symbol)
+        
+        fetched = await asyncio.gather(*(fetch(symbol) for symbol in pairs), return_exceptions=True)
+        
+        market_data = {}
         results = {}
+        for symbol, data in zip(pairs, fetched):
+            if isinstance(data, Exception) or not data:
+                logger.warning(f"Нет данных для {symbol}, используем дефолтную стратегию")
+                results[symbol] = ('safe_multi_indicator', 0.5)
+            else:
+                market_data[symbol] = data
         
-        for symbol in pairs:
-            strategy, confidence = await self.select_best_strategy(symbol)
-            results[symbol] = (strategy, confidence)
-            
-            # Небольшая задержка чтобы не перегружать API
-            await asyncio.sleep(0.5)
+        if market_data and not self.online_model.is_trained:
+            # Статистика стратегий для правил - одним запросом к БД вне event loop
+            try:
+                await asyncio.to_thread(strategy_performance.prefetch, list(market_data))
+            except Exception as e:
+                logger.error(f"Ошибка загрузки производительности: {e}")
+        
+        if market_data:
+            try:
+                results.update(self._select_batch(market_data))
+            except Exception as e:
+                logger.error(f"Ошибка пакетного выбора стратегий: {e}")
+                for symbol in market_data:
+                    results[symbol] = ('safe_multi_indicator', 0.3)
+        
+        return {symbol: results[symbol] for symbol in pairs}
+    
+    def _select_batch(self, market_data: Dict[str, Dict]) -> Dict[str, Tuple[str, float]]:
+        """Выбор стратегий для пар с уже полученными данными анализатора"""
+        conditions = self._condition_frame(market_data)
+        features = self._condition_feature_matrix(conditions)
+        
+        if self.online_model.is_trained:
+            best, confidences = self.online_model.select_batch(features)
+            strategies = self.online_model.strategies
+        else:
+            performance = [
+                self._get_historical_performance(symbol, None) for symbol in conditions.index
+            ]
+            scores = self._rule_score_matrix(conditions, performance)
+            best = scores.argmax(axis=1)
+            confidences = np.maximum(np.minimum(scores[np.arange(len(best)), best] / 100, 1.0), 0.3)
+            strategies = self.available_strategies
+        
+        results = {}
+        for row, (symbol, condition) in enumerate(zip(conditions.index, conditions.to_dict('records'))):
+            strategy = strategies[best[row]]
+            self._save_selection(symbol, MarketCondition(**condition), strategy, features[row].tolist())
+            results[symbol] = (strategy, float(confidences[row]))
         
+        logger.info(f"✅ Стратегии выбраны для {len(results)} пар")
         return results
 
 # Создаем глобальный экземпляр
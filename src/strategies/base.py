@@ -4,9 +4,15 @@
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Tuple, Dict, Any, Optional
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 
+from ..indicators.context import IndicatorContext
+
+# Колонки результата analyze_series: одна строка на бар
+SERIES_COLUMNS = ['action', 'confidence', 'stop_loss', 'take_profit']
+
 @dataclass
 class TradingSignal:
     """Результат анализа стратегии"""
@@ -31,6 +37,113 @@ class BaseStrategy(ABC):
         """Анализ данных и генерация сигнала"""
         pass
     
+    # =========================================================================
+    # === АНАЛИЗ ВСЕЙ ИСТОРИИ (для бэктеста) ===
+    # =========================================================================
+    
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Сигналы analyze для каждого бара истории за один проход
+        
+        Строка i совпадает с результатом analyze(df.iloc[:i + 1]), но
+        индикаторы считаются один раз по всему ряду, а не на каждом
+        префиксе - бэктест стоит O(N) вместо O(N²).
+        
+        Returns:
+            DataFrame с индексом df и колонками SERIES_COLUMNS
+            (action BUY/SELL/WAIT, confidence, stop_loss, take_profit;
+            у WAIT уверенность 0 и уровни NaN)
+        """
+        raise NotImplementedError(f"Стратегия {self.name} не поддерживает analyze_series")
+    
+    @property
+    def supports_series(self) -> bool:
+        """Реализован ли векторный analyze_series"""
+        return type(self).analyze_series is not BaseStrategy.analyze_series
+    
+    async def replay(self, df: pd.DataFrame, start: int = 0, symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Побаровый прогон analyze по префиксам df (эталон для analyze_series)
+        
+        Args:
+            start: С какого бара начинать (бары до него не анализируются)
+            symbol: Имя пары для кэша индикаторов
+        """
+        symbol = symbol or f"replay:{self.name}"
+        rows = []
+        for end in range(start + 1, len(df) + 1):
+            signal = await self.analyze(df.iloc[:end], symbol)
+            rows.append((
+                signal.action,
+                float(signal.confidence),
+                np.nan if signal.stop_loss is None else float(signal.stop_loss),
+                np.nan if signal.take_profit is None else float(signal.take_profit)
+            ))
+        return pd.DataFrame(rows, index=df.index[start:], columns=SERIES_COLUMNS)
+    
+    def _series_valid(self, df: pd.DataFrame, min_length: int = 50) -> np.ndarray:
+        """validate_dataframe для каждого префикса df"""
+        required_columns = ['open', 'high', 'low', 'close', 'volume']
+        if not all(col in df.columns for col in required_columns):
+            return np.zeros(len(df), dtype=bool)
+        
+        lengths = np.arange(1, len(df) + 1)
+        clean = np.cumsum(df.isnull().any(axis=1).to_numpy()) == 0
+        return (lengths >= max(50, min_length)) & clean
+    
+    def _series_context(self, df: pd.DataFrame) -> IndicatorContext:
+        """Отдельный контекст индикаторов по всему ряду (вне общего кэша)"""
+        return IndicatorContext(f"series:{self.name}", None, df)
+    
+    def _series_result(self, df: pd.DataFrame, buy: np.ndarray, sell: np.ndarray,
+                       confidence, stop_loss, take_profit) -> pd.DataFrame:
+        """
+        Сборка результата analyze_series
+        
+        buy и sell не должны пересекаться; confidence и уровни берутся
+        только там, где есть сигнал.
+        """
+        active = buy | sell
+        return pd.DataFrame({
+            'action': np.select([buy, sell], ['BUY', 'SELL'], 'WAIT'),
+            'confidence': np.where(active, confidence, 0.0),
+            'stop_loss': np.where(active, stop_loss, np.nan),
+            'take_profit': np.where(active, take_profit, np.nan)
+        }, index=df.index, columns=SERIES_COLUMNS)
+    
+    def _series_wait(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Результат analyze_series без сигналов"""
+        none = np.zeros(len(df), dtype=bool)
+        return self._series_result(df, none, none, 0.0, np.nan, np.nan)
+    
+    @staticmethod
+    def _series_scores(signals: List[Tuple[np.ndarray, np.ndarray, float]], size: int) -> Tuple[np.ndarray, ...]:
+        """
+        Суммы весов и число сигналов покупки/продажи по барам
+
+        Веса складываются в порядке signals - так же, как sum() по списку
+        сигналов в analyze, поэтому пороги срабатывают одинаково.
+
+        Returns:
+            (buy_score, sell_score, buy_count, sell_count)
+        """
+        buy_score, sell_score = np.zeros(size), np.zeros(size)
+        buy_count, sell_count = np.zeros(size, dtype=int), np.zeros(size, dtype=int)
+        for buy, sell, weight in signals:
+            buy_score += np.where(buy, weight, 0.0)
+            sell_score += np.where(sell, weight, 0.0)
+            buy_count += buy
+            sell_count += sell
+        return buy_score, sell_score, buy_count, sell_count
+
+    @staticmethod
+    def _series_risk_reward(entry, stop_loss, take_profit) -> np.ndarray:
+        """calculate_risk_reward по массивам"""
+        risk = np.abs(entry - stop_loss)
+        reward = np.abs(take_profit - entry)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(risk == 0, 0.0, reward / risk)
+    
     def validate_dataframe(self, df: pd.DataFrame) -> bool:
         """Валидация входных данных"""
         required_columns = ['open', 'high', 'low', 'close', 'volume']
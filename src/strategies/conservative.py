@@ -4,11 +4,11 @@
 """
 import pandas as pd
 import numpy as np
-import ta
 from typing import Dict
 import logging
 
 from .base import BaseStrategy, TradingSignal
+from ..indicators.context import IndicatorContext, indicator_contexts
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +31,8 @@ class ConservativeStrategy(BaseStrategy):
             return TradingSignal('WAIT', 0, 0, reason='Недостаточно данных')
         
         try:
-            # Рассчитываем индикаторы
-            indicators = self._calculate_indicators(df)
+            # Рассчитываем индикаторы (общий кэш бара)
+            indicators = self._calculate_indicators(df, indicator_contexts.get_context(symbol, df))
             
             # Проверяем рыночные условия
             market_condition = self._check_market_conditions(indicators, df)
@@ -49,29 +49,72 @@ class ConservativeStrategy(BaseStrategy):
             logger.error(f"Ошибка консервативного анализа {symbol}: {e}")
             return TradingSignal('WAIT', 0, 0, reason='Ошибка анализа')
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Сигналы analyze для каждого бара за один проход"""
+        if df.empty:
+            return self._series_wait(df)
+        
+        context = self._series_context(df)
+        valid = self._series_valid(df, 200)
+        price = df['close'].to_numpy(dtype=float)
+        
+        sma_50 = context.sma(50).to_numpy()
+        sma_200 = context.sma(200).to_numpy()
+        rsi = context.rsi(14).to_numpy()
+        atr = context.atr().average_true_range().to_numpy()
+        support = context.rolling_min(20).to_numpy()
+        resistance = context.rolling_max(20).to_numpy()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atr_percent = (atr / price) * 100
+            volume_trend = context.sma(10, 'volume').to_numpy() / context.sma(50, 'volume').to_numpy()
+        
+        # Рыночные условия _check_market_conditions
+        suitable = valid & ~(atr_percent > 5) & ~((volume_trend < 0.5) | (volume_trend > 3))
+        uptrend = suitable & (price > sma_50) & (sma_50 > sma_200)
+        downtrend = suitable & ~uptrend & (price < sma_50) & (sma_50 < sma_200)
+        
+        # Точки входа _find_entry_signal
+        buy = uptrend & (30 < rsi) & (rsi < 40) & (price > sma_50) & (price < sma_50 * 1.02)
+        sell = downtrend & (60 < rsi) & (rsi < 70) & (price < sma_50) & (price > sma_50 * 0.98)
+        
+        stop_loss = np.where(buy, support, resistance)
+        take_profit = np.where(buy, price + (price - stop_loss) * 3, price - (stop_loss - price) * 3)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk_percent = np.where(buy, (price - stop_loss) / price, (stop_loss - price) / price) * 100
+        stop_loss = np.where(
+            risk_percent > self.max_risk_percent,
+            np.where(buy, price * (1 - self.max_risk_percent / 100), price * (1 + self.max_risk_percent / 100)),
+            stop_loss
+        )
+        
+        confirmed = self._series_risk_reward(price, stop_loss, take_profit) >= self.min_risk_reward
+        return self._series_result(df, buy & confirmed, sell & confirmed, 0.8, stop_loss, take_profit)
+    
+    def _calculate_indicators(self, df: pd.DataFrame, context: IndicatorContext) -> Dict:
         """Расчет надежных индикаторов"""
         indicators = {}
         
         # Скользящие средние для определения тренда
-        indicators['sma_50'] = df['close'].rolling(window=50).mean().iloc[-1]
-        indicators['sma_200'] = df['close'].rolling(window=200).mean().iloc[-1]
+        indicators['sma_50'] = context.sma(50).iloc[-1]
+        indicators['sma_200'] = context.sma(200).iloc[-1]
         
         # RSI для определения перекупленности/перепроданности
-        indicators['rsi'] = ta.momentum.rsi(df['close'], window=14).iloc[-1]
+        indicators['rsi'] = context.rsi(14).iloc[-1]
         
         # ATR для волатильности
-        atr = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'])
+        atr = context.atr()
         indicators['atr'] = atr.average_true_range().iloc[-1]
         indicators['atr_percent'] = (indicators['atr'] / df['close'].iloc[-1]) * 100
         
         # Объемный анализ
-        indicators['volume_sma'] = df['volume'].rolling(window=50).mean().iloc[-1]
-        indicators['volume_trend'] = df['volume'].rolling(window=10).mean().iloc[-1] / indicators['volume_sma']
+        indicators['volume_sma'] = context.sma(50, 'volume').iloc[-1]
+        indicators['volume_trend'] = context.sma(10, 'volume').iloc[-1] / indicators['volume_sma']
         
         # Поддержка и сопротивление
-        indicators['resistance'] = df['high'].rolling(window=20).max().iloc[-1]
-        indicators['support'] = df['low'].rolling(window=20).min().iloc[-1]
+        indicators['resistance'] = context.rolling_max(20).iloc[-1]
+        indicators['support'] = context.rolling_min(20).iloc[-1]
         
         # Текущая цена
         indicators['current_price'] = df['close'].iloc[-1]
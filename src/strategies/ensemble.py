@@ -0,0 +1,143 @@
+"""
+Ансамблевая оценка стратегий на одном баре
+Путь: src/strategies/ensemble.py
+
+Раньше селектор выбирал одну стратегию, и анализ выполняла только она:
+сравнить кандидатов на одном баре было нельзя, а смена стратегии
+требовала нового прохода. StrategyEnsemble прогоняет все стратегии по
+одним и тем же свечам пары подряд. Индикаторы считаются один раз:
+первая стратегия заполняет общий IndicatorContext бара, остальные
+берут из него объединение своих входов (RSI, ATR, EMA, BB, ...),
+поэтому каждая следующая стратегия почти ничего не стоит.
+
+Результат - матрица (стратегия x действие/уверенность/уровни), из
+которой выбирает AutoStrategySelector.select_from_ensemble.
+
+Использование:
+    evaluation = await strategy_ensemble.evaluate(symbol, df)
+    evaluation.matrix()          # DataFrame по стратегиям
+    evaluation.actionable()      # только BUY/SELL
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .base import TradingSignal
+from .pool import StrategyPool, strategy_pool
+
+logger = logging.getLogger(__name__)
+
+# Колонки матрицы оценок
+MATRIX_COLUMNS = ['action', 'confidence', 'stop_loss', 'take_profit', 'risk_reward_ratio']
+
+
+@dataclass
+class EnsembleEvaluation:
+    """Сигналы всех стратегий для одного бара пары"""
+    symbol: str
+    bar_time: object
+    signals: Dict[str, TradingSignal] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0                  # Секунды на всю оценку
+
+    def actionable(self) -> Dict[str, TradingSignal]:
+        """Стратегии с сигналом BUY/SELL"""
+        return {name: s for name, s in self.signals.items() if s.action in ('BUY', 'SELL')}
+
+    def matrix(self) -> pd.DataFrame:
+        """Матрица стратегия x (действие, уверенность, уровни)"""
+        rows = {
+            name: [s.action, s.confidence, s.stop_loss, s.take_profit, s.risk_reward_ratio]
+            for name, s in self.signals.items()
+        }
+        matrix = pd.DataFrame.from_dict(rows, orient='index', columns=MATRIX_COLUMNS)
+        # Уровни у WAIT - None, в матрице - NaN
+        matrix[MATRIX_COLUMNS[1:]] = matrix[MATRIX_COLUMNS[1:]].astype(float)
+        return matrix
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'bar_time': str(self.bar_time),
+            'signals': {
+                name: {'action': s.action, 'confidence': s.confidence, 'reason': s.reason}
+                for name, s in self.signals.items()
+            },
+            'errors': dict(self.errors),
+            'elapsed_ms': round(self.elapsed * 1000, 2)
+        }
+
+
+class StrategyEnsemble:
+    """Прогон всех стратегий по общему контексту индикаторов"""
+
+    def __init__(self, pool: StrategyPool, strategies: Optional[Iterable[str]] = None):
+        """
+        Args:
+            pool: Пул экземпляров стратегий
+            strategies: Какие стратегии оценивать (по умолчанию все из фабрики)
+        """
+        self.pool = pool
+        self.strategies = list(strategies) if strategies else None
+
+        # Статистика
+        self.evaluations = 0
+        self.total_time = 0.0
+
+    def strategy_names(self) -> List[str]:
+        return self.strategies or self.pool.factory.list_strategies()
+
+    async def evaluate(self, symbol: str, df: pd.DataFrame,
+                       strategies: Optional[Iterable[str]] = None) -> EnsembleEvaluation:
+        """
+        Сигналы всех стратегий по свечам пары
+
+        Стратегии выполняются подряд в одном потоке: контекст бара
+        создается первой и переиспользуется остальными. Ошибка одной
+        стратегии не мешает остальным и попадает в errors.
+        """
+        started = time.perf_counter()
+        evaluation = EnsembleEvaluation(symbol=symbol, bar_time=df.index[-1] if len(df) else None)
+
+        for name in strategies or self.strategy_names():
+            try:
+                evaluation.signals[name] = await self.pool.get(name).analyze(df, symbol)
+            except Exception as e:
+                logger.error(f"❌ Ансамбль: ошибка стратегии {name} для {symbol}: {e}")
+                evaluation.errors[name] = str(e)
+
+        evaluation.elapsed = time.perf_counter() - started
+        self.evaluations += 1
+        self.total_time += evaluation.elapsed
+        return evaluation
+
+    async def evaluate_pairs(self, frames: Dict[str, pd.DataFrame],
+                             strategies: Optional[Iterable[str]] = None) -> Dict[str, EnsembleEvaluation]:
+        """Оценка нескольких пар: {symbol: EnsembleEvaluation}"""
+        names = list(strategies) if strategies else None
+        return {symbol: await self.evaluate(symbol, df, names) for symbol, df in frames.items()}
+
+    def get_statistics(self) -> Dict:
+        return {
+            'evaluations': self.evaluations,
+            'avg_time_ms': self.total_time / self.evaluations * 1000 if self.evaluations else 0.0,
+            'strategies': self.strategy_names()
+        }
+
+
+def ensemble_matrix(evaluations: Dict[str, EnsembleEvaluation]) -> pd.DataFrame:
+    """Общая матрица по парам: индекс (symbol, strategy)"""
+    frames = {symbol: evaluation.matrix() for symbol, evaluation in evaluations.items()}
+    if not frames:
+        return pd.DataFrame(columns=MATRIX_COLUMNS)
+    return pd.concat(frames, names=['symbol', 'strategy'])
+
+
+# Глобальный ансамбль
+strategy_ensemble = StrategyEnsemble(strategy_pool)
+
+# Экспорт
+__all__ = ['EnsembleEvaluation', 'StrategyEnsemble', 'ensemble_matrix', 'strategy_ensemble']
@@ -5,13 +5,11 @@ Momentum стратегия
 import pandas as pd
 import numpy as np
 from typing import Dict  # ✅ ИСПРАВЛЕНО: добавлен импорт Dict
-from ta.momentum import RSIIndicator, ROCIndicator
-from ta.trend import EMAIndicator
-from ta.volatility import AverageTrueRange
 import logging
 from typing import Dict
 
 from .base import BaseStrategy, TradingSignal
+from ..indicators.context import IndicatorContext, indicator_contexts
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +42,8 @@ class MomentumStrategy(BaseStrategy):
             return TradingSignal('WAIT', 0, 0, reason='Недостаточно данных')
         
         try:
-            # Рассчитываем индикаторы
-            indicators = self._calculate_indicators(df)
+            # Рассчитываем индикаторы (общий кэш бара)
+            indicators = self._calculate_indicators(df, indicator_contexts.get_context(symbol, df))
             
             # Проверяем корректность данных
             if not indicators:
@@ -61,7 +59,72 @@ class MomentumStrategy(BaseStrategy):
             logger.error(f"Ошибка анализа momentum для {symbol}: {e}")
             return TradingSignal('WAIT', 0, 0, reason=f'Ошибка анализа: {e}')
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Сигналы analyze для каждого бара за один проход"""
+        if df.empty:
+            return self._series_wait(df)
+        
+        context = self._series_context(df)
+        close = df['close']
+        price = close.to_numpy(dtype=float)
+        valid = self._series_valid(df, max(self.rsi_period, self.ema_slow, self.roc_period))
+        
+        rsi = context.rsi(self.rsi_period)
+        rsi_now, rsi_prev = rsi.to_numpy(), rsi.shift(1).to_numpy()
+        ema_fast = context.ema(self.ema_fast).to_numpy()
+        ema_slow = context.ema(self.ema_slow).to_numpy()
+        roc = context.roc(self.roc_period).to_numpy()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change_5 = ((close - close.shift(5)) / close.shift(5) * 100).to_numpy()
+            change_10 = ((close - close.shift(10)) / close.shift(10) * 100).to_numpy()
+            
+            volume_mean = context.sma(20, 'volume').to_numpy()
+            volume_ratio = np.where(volume_mean > 0, df['volume'].to_numpy() / volume_mean, 1.0)
+        
+        # Баллы в том же порядке, что в _analyze_momentum (суммы совпадают до бита)
+        bullish = np.zeros(len(df))
+        bearish = np.zeros(len(df))
+        
+        rsi_up = (rsi_now > self.RSI_NEUTRAL) & (rsi_now > rsi_prev)
+        rsi_down = ~rsi_up & (rsi_now < self.RSI_NEUTRAL) & (rsi_now < rsi_prev)
+        bullish += np.where(rsi_up, 0.2, 0.0)
+        bearish += np.where(rsi_down, 0.2, 0.0)
+        
+        ema_up = ema_fast > ema_slow
+        bullish += np.where(ema_up, 0.25, 0.0)
+        bearish += np.where(~ema_up, 0.25, 0.0)
+        
+        price_up = (change_5 > self.PRICE_CHANGE_THRESHOLD_5D) & (change_10 > self.PRICE_CHANGE_THRESHOLD_10D)
+        price_down = ~price_up & (change_5 < -self.PRICE_CHANGE_THRESHOLD_5D) & (change_10 < -self.PRICE_CHANGE_THRESHOLD_10D)
+        bullish += np.where(price_up, 0.3, 0.0)
+        bearish += np.where(price_down, 0.3, 0.0)
+        
+        roc_up = roc > self.ROC_BULLISH_THRESHOLD
+        roc_down = ~roc_up & (roc < self.ROC_BEARISH_THRESHOLD)
+        bullish += np.where(roc_up, 0.15, 0.0)
+        bearish += np.where(roc_down, 0.15, 0.0)
+        
+        high_volume = volume_ratio > self.VOLUME_RATIO_THRESHOLD
+        volume_bullish = high_volume & (bullish > bearish)
+        bullish += np.where(volume_bullish, 0.1, 0.0)
+        bearish += np.where(high_volume & ~volume_bullish, 0.1, 0.0)
+        
+        is_bullish = bullish > bearish
+        strength = np.where(is_bullish, bullish, bearish)
+        active = valid & (strength >= self.min_momentum_score)
+        buy = active & is_bullish
+        sell = active & ~is_bullish
+        
+        atr = context.atr().average_true_range().to_numpy()
+        return self._series_result(
+            df, buy, sell,
+            confidence=np.minimum(0.9, strength),
+            stop_loss=np.where(buy, price - atr * 2.0, price + atr * 2.0),
+            take_profit=np.where(buy, price + atr * 3.0, price - atr * 3.0)
+        )
+    
+    def _calculate_indicators(self, df: pd.DataFrame, context: IndicatorContext) -> Dict:
         """Расчет индикаторов momentum с защитой от ошибок"""
         indicators = {}
         
@@ -72,32 +135,30 @@ class MomentumStrategy(BaseStrategy):
                 return {}
             
             # RSI
-            rsi = RSIIndicator(df['close'], window=self.rsi_period)
-            rsi_values = rsi.rsi()
+            rsi_values = context.rsi(self.rsi_period)
             indicators['rsi'] = rsi_values.iloc[-1] if not rsi_values.empty else self.RSI_NEUTRAL
             indicators['rsi_prev'] = rsi_values.iloc[-2] if len(rsi_values) > 1 else self.RSI_NEUTRAL
             
             # EMA
-            ema_fast_values = EMAIndicator(df['close'], window=self.ema_fast).ema_indicator()
-            ema_slow_values = EMAIndicator(df['close'], window=self.ema_slow).ema_indicator()
+            ema_fast_values = context.ema(self.ema_fast)
+            ema_slow_values = context.ema(self.ema_slow)
             indicators['ema_fast'] = ema_fast_values.iloc[-1]
             indicators['ema_slow'] = ema_slow_values.iloc[-1]
             
             # Rate of Change
-            roc = ROCIndicator(df['close'], window=self.roc_period)
-            indicators['roc'] = roc.roc().iloc[-1]
+            indicators['roc'] = context.roc(self.roc_period).iloc[-1]
             
             # Price momentum с защитой от выхода за границы
             indicators['price_change_5'] = self._safe_price_change(df, 6)
             indicators['price_change_10'] = self._safe_price_change(df, 11)
             
             # Volume momentum
-            volume_mean = df['volume'].rolling(window=20).mean()
+            volume_mean = context.sma(20, 'volume')
             indicators['volume_ratio'] = (df['volume'].iloc[-1] / volume_mean.iloc[-1] 
                                        if volume_mean.iloc[-1] > 0 else 1.0)
             
             # ATR для volatility
-            atr = AverageTrueRange(df['high'], df['low'], df['close'])
+            atr = context.atr()
             indicators['atr'] = atr.average_true_range().iloc[-1]
             
             # Текущая цена
@@ -5,14 +5,11 @@
 import pandas as pd
 import numpy as np
 from typing import Dict  # ✅ ИСПРАВЛЕНО: добавлен импорт Dict
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.trend import EMAIndicator, MACD, ADXIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import OnBalanceVolumeIndicator
 import logging
 from typing import Dict
 
 from .base import BaseStrategy, TradingSignal
+from ..indicators.context import IndicatorContext, indicator_contexts
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +41,8 @@ class MultiIndicatorStrategy(BaseStrategy):
             return TradingSignal('WAIT', 0, 0, reason='Недостаточно данных')
         
         try:
-            # Рассчитываем все индикаторы
-            indicators = self._calculate_indicators(df)
+            # Рассчитываем все индикаторы (общий кэш бара)
+            indicators = self._calculate_indicators(df, indicator_contexts.get_context(symbol, df))
             
             # ✅ УЛУЧШЕНИЕ: Проверяем корректность индикаторов
             if not indicators:
@@ -61,7 +58,63 @@ class MultiIndicatorStrategy(BaseStrategy):
             logger.error(f"Ошибка анализа {symbol}: {e}")
             return TradingSignal('WAIT', 0, 0, reason=f'Ошибка анализа: {e}')
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Сигналы analyze для каждого бара за один проход"""
+        if df.empty:
+            return self._series_wait(df)
+        
+        context = self._series_context(df)
+        price = df['close'].to_numpy(dtype=float)
+        valid = self._series_valid(df, 200)
+        
+        rsi = context.rsi(14).to_numpy()
+        macd = context.macd()
+        macd_line = macd.macd().to_numpy()
+        macd_signal = macd.macd_signal().to_numpy()
+        macd_diff = macd.macd_diff().to_numpy()
+        bb_percent = context.bollinger(20, 2).bollinger_pband().to_numpy()
+        ema_9, ema_21, ema_50 = (context.ema(period).to_numpy() for period in (9, 21, 50))
+        adx = context.adx()
+        adx_value, adx_pos, adx_neg = adx.adx().to_numpy(), adx.adx_pos().to_numpy(), adx.adx_neg().to_numpy()
+        stoch = context.stochastic()
+        stoch_k, stoch_d = stoch.stoch().to_numpy(), stoch.stoch_signal().to_numpy()
+        atr = context.atr().average_true_range().to_numpy()
+        
+        # Сигналы в порядке _analyze_signals: (покупка, продажа, вес)
+        rsi_buy = rsi < self.RSI_OVERSOLD
+        macd_buy = (macd_line > macd_signal) & (macd_diff > 0)
+        bb_buy = bb_percent < self.BB_LOWER_THRESHOLD
+        ema_buy = (ema_9 > ema_21) & (ema_21 > ema_50) & (price > ema_9)
+        adx_trend = adx_value > self.ADX_TREND_THRESHOLD
+        stoch_buy = (stoch_k < self.STOCH_OVERSOLD) & (stoch_k > stoch_d)
+        signals = [
+            (rsi_buy, ~rsi_buy & (rsi > self.RSI_OVERBOUGHT), 0.8),
+            (macd_buy, ~macd_buy & (macd_line < macd_signal) & (macd_diff < 0), 0.7),
+            (bb_buy, ~bb_buy & (bb_percent > self.BB_UPPER_THRESHOLD), 0.6),
+            (ema_buy, ~ema_buy & (ema_9 < ema_21) & (ema_21 < ema_50) & (price < ema_9), 0.7),
+            (adx_trend & (adx_pos > adx_neg), adx_trend & ~(adx_pos > adx_neg), 0.6),
+            (stoch_buy, ~stoch_buy & (stoch_k > self.STOCH_OVERBOUGHT) & (stoch_k < stoch_d), 0.6),
+        ]
+        
+        buy_score, sell_score, buy_count, sell_count = self._series_scores(signals, len(df))
+        
+        buy = valid & (buy_count >= self.min_indicators_confirm) & (buy_score > sell_score)
+        sell = valid & ~buy & (sell_count >= self.min_indicators_confirm) & (sell_score > buy_score)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidence = np.where(
+                buy,
+                np.minimum(0.95, buy_score / (buy_count * 0.8)),
+                np.minimum(0.95, sell_score / (sell_count * 0.8))
+            )
+        
+        return self._series_result(
+            df, buy, sell, confidence,
+            stop_loss=np.where(buy, price - atr * 2.0, price + atr * 2.0),
+            take_profit=np.where(buy, price + atr * 3.0, price - atr * 3.0)
+        )
+    
+    def _calculate_indicators(self, df: pd.DataFrame, context: IndicatorContext) -> Dict:
         """Расчет всех индикаторов с защитой от ошибок"""
         indicators = {}
         
@@ -74,12 +127,11 @@ class MultiIndicatorStrategy(BaseStrategy):
                 return {}
             
             # RSI с проверкой
-            rsi_indicator = RSIIndicator(df['close'], window=14)
-            rsi_values = rsi_indicator.rsi()
+            rsi_values = context.rsi(14)
             indicators['rsi'] = rsi_values.iloc[-1] if not rsi_values.empty else 50.0
             
             # MACD с проверкой
-            macd = MACD(df['close'])
+            macd = context.macd()
             macd_line = macd.macd()
             macd_signal = macd.macd_signal()
             macd_diff = macd.macd_diff()
@@ -89,7 +141,7 @@ class MultiIndicatorStrategy(BaseStrategy):
             indicators['macd_diff'] = macd_diff.iloc[-1] if not macd_diff.empty else 0.0
             
             # Bollinger Bands с проверкой
-            bb = BollingerBands(df['close'], window=20, window_dev=2)
+            bb = context.bollinger(20, 2)
             bb_upper = bb.bollinger_hband()
             bb_middle = bb.bollinger_mavg()
             bb_lower = bb.bollinger_lband()
@@ -103,21 +155,21 @@ class MultiIndicatorStrategy(BaseStrategy):
             indicators['bb_percent'] = bb_percent.iloc[-1] if not bb_percent.empty else 0.5
             
             # EMA с проверкой
-            self._calculate_ema_safely(df, indicators)
+            self._calculate_ema_safely(df, indicators, context)
             
             # ADX с проверкой
-            self._calculate_adx_safely(df, indicators)
+            self._calculate_adx_safely(df, indicators, context)
             
             # ATR для stop loss
-            atr = AverageTrueRange(df['high'], df['low'], df['close'])
+            atr = context.atr()
             atr_values = atr.average_true_range()
             indicators['atr'] = atr_values.iloc[-1] if not atr_values.empty else df['close'].iloc[-1] * 0.02
             
             # Volume indicators с проверкой
-            self._calculate_volume_safely(df, indicators)
+            self._calculate_volume_safely(df, indicators, context)
             
             # Stochastic с проверкой
-            self._calculate_stochastic_safely(df, indicators)
+            self._calculate_stochastic_safely(df, indicators, context)
             
             # Price action
             indicators['current_price'] = df['close'].iloc[-1]
@@ -133,14 +185,13 @@ class MultiIndicatorStrategy(BaseStrategy):
             logger.error(f"Ошибка расчета индикаторов: {e}")
             return {}
     
-    def _calculate_ema_safely(self, df: pd.DataFrame, indicators: Dict):
+    def _calculate_ema_safely(self, df: pd.DataFrame, indicators: Dict, context: IndicatorContext):
         """✅ НОВОЕ: Безопасный расчет EMA"""
         try:
             periods = [9, 21, 50, 200]
             for period in periods:
                 if len(df) >= period:
-                    ema_indicator = EMAIndicator(df['close'], window=period)
-                    ema_values = ema_indicator.ema_indicator()
+                    ema_values = context.ema(period)
                     indicators[f'ema_{period}'] = ema_values.iloc[-1] if not ema_values.empty else df['close'].iloc[-1]
                 else:
                     indicators[f'ema_{period}'] = df['close'].iloc[-1]
@@ -150,11 +201,11 @@ class MultiIndicatorStrategy(BaseStrategy):
             for period in [9, 21, 50, 200]:
                 indicators[f'ema_{period}'] = df['close'].iloc[-1]
     
-    def _calculate_adx_safely(self, df: pd.DataFrame, indicators: Dict):
+    def _calculate_adx_safely(self, df: pd.DataFrame, indicators: Dict, context: IndicatorContext):
         """✅ НОВОЕ: Безопасный расчет ADX"""
         try:
             if len(df) >= 14:  # ADX требует минимум 14 периодов
-                adx = ADXIndicator(df['high'], df['low'], df['close'])
+                adx = context.adx()
                 adx_values = adx.adx()
                 adx_pos_values = adx.adx_pos()
                 adx_neg_values = adx.adx_neg()
@@ -172,11 +223,11 @@ class MultiIndicatorStrategy(BaseStrategy):
             indicators['adx_pos'] = 0.0
             indicators['adx_neg'] = 0.0
     
-    def _calculate_volume_safely(self, df: pd.DataFrame, indicators: Dict):
+    def _calculate_volume_safely(self, df: pd.DataFrame, indicators: Dict, context: IndicatorContext):
         """✅ НОВОЕ: Безопасный расчет объемных индикаторов"""
         try:
             if len(df) >= 20:
-                volume_sma = df['volume'].rolling(window=20).mean()
+                volume_sma = context.sma(20, 'volume')
                 indicators['volume_sma'] = volume_sma.iloc[-1] if not volume_sma.empty else df['volume'].iloc[-1]
                 
                 if indicators['volume_sma'] > 0:
@@ -191,11 +242,11 @@ class MultiIndicatorStrategy(BaseStrategy):
             indicators['volume_sma'] = df['volume'].iloc[-1] if len(df) > 0 else 1.0
             indicators['volume_ratio'] = 1.0
     
-    def _calculate_stochastic_safely(self, df: pd.DataFrame, indicators: Dict):
+    def _calculate_stochastic_safely(self, df: pd.DataFrame, indicators: Dict, context: IndicatorContext):
         """✅ НОВОЕ: Безопасный расчет Stochastic"""
         try:
             if len(df) >= 14:  # Stochastic требует минимум 14 периодов
-                stoch = StochasticOscillator(df['high'], df['low'], df['close'])
+                stoch = context.stochastic()
                 stoch_k_values = stoch.stoch()
                 stoch_d_values = stoch.stoch_signal()
                 
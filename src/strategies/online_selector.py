@@ -0,0 +1,229 @@
+"""
+Онлайн-модель выбора стратегии
+Путь: src/strategies/online_selector.py
+
+Вместо RandomForest, который переобучался с нуля каждые 100 выборов
+и забывал все при перезапуске, - контекстный бандит: на каждую
+стратегию своя логистическая регрессия P(сделка прибыльна | рыночные
+условия). Закрытая сделка обновляет веса своей стратегии одним шагом
+SGD за O(число признаков), выбор - одно умножение матрицы весов на
+вектор признаков (микросекунды). Малоиспытанные стратегии получают
+бонус исследования, убывающий с числом их сделок.
+
+Состояние (веса, счетчики) хранится компактным JSON и загружается
+при старте.
+
+Использование:
+    model = OnlineStrategyModel.load(path, strategies, FEATURE_NAMES)
+    probabilities = model.predict(features)       # {strategy: P(win)}
+    model.update('momentum', features, won=True)
+    model.save()
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Признаки рыночных условий (порядок важен для сохраненных весов)
+FEATURE_NAMES = ['trend', 'volatility', 'volume', 'momentum', 'support_resistance', 'condition_confidence']
+
+# Сколько обновлений нужно, прежде чем доверять модели больше, чем правилам
+MIN_UPDATES = 50
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30.0, 30.0)))
+
+
+class OnlineStrategyModel:
+    """Логистическая регрессия на каждую стратегию, обучаемая по одной сделке"""
+
+    VERSION = 1
+
+    def __init__(self, strategies: Sequence[str], feature_names: Sequence[str] = FEATURE_NAMES,
+                 learning_rate: float = 0.05, l2: float = 1e-4, exploration: float = 0.1,
+                 path: Optional[Path] = None):
+        """
+        Args:
+            strategies: Стратегии (руки бандита)
+            feature_names: Имена признаков контекста
+            learning_rate: Шаг SGD
+            l2: L2-регуляризация весов
+            exploration: Бонус исследования для стратегии без сделок
+            path: Файл состояния
+        """
+        self.strategies = list(strategies)
+        self.feature_names = list(feature_names)
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.exploration = exploration
+        self.path = path
+
+        # Последний столбец - свободный член
+        self.weights = np.zeros((len(self.strategies), len(self.feature_names) + 1))
+        self.counts = np.zeros(len(self.strategies), dtype=np.int64)
+        self.wins = np.zeros(len(self.strategies), dtype=np.int64)
+        self._index = {name: i for i, name in enumerate(self.strategies)}
+
+    @property
+    def updates(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def is_trained(self) -> bool:
+        return self.updates >= MIN_UPDATES
+
+    def _context(self, features: Sequence[float]) -> np.ndarray:
+        x = np.empty(len(self.feature_names) + 1)
+        x[:-1] = features
+        x[-1] = 1.0
+        return x
+
+    # =========================================================================
+    # === ВЫБОР И ОБУЧЕНИЕ ===
+    # =========================================================================
+
+    def predict(self, features: Sequence[float]) -> Dict[str, float]:
+        """Вероятность прибыльной сделки для каждой стратегии"""
+        probabilities = _sigmoid(self.weights @ self._context(features))
+        return dict(zip(self.strategies, probabilities.tolist()))
+
+    def select(self, features: Sequence[float], candidates: Optional[Sequence[str]] = None) -> Tuple[str, float]:
+        """
+        Стратегия с максимумом P(win) + бонус исследования
+
+        Returns:
+            (стратегия, P(win) без бонуса)
+        """
+        probabilities = _sigmoid(self.weights @ self._context(features))
+        scores = probabilities + self.exploration / np.sqrt(1.0 + self.counts)
+        if candidates is not None:
+            allowed = np.array([name in candidates for name in self.strategies])
+            scores = np.where(allowed, scores, -np.inf)
+        best = int(np.argmax(scores))
+        return self.strategies[best], float(probabilities[best])
+
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        """Вероятности для матрицы контекстов (пары x признаки) -> (пары x стратегии)"""
+        features = np.asarray(features, dtype=float)
+        contexts = np.hstack([features, np.ones((len(features), 1))])
+        return _sigmoid(contexts @ self.weights.T)
+
+    def select_batch(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Выбор для матрицы контекстов одним умножением
+
+        Returns:
+            (индексы стратегий в self.strategies, P(win) выбранных)
+        """
+        probabilities = self.predict_batch(features)
+        scores = probabilities + self.exploration / np.sqrt(1.0 + self.counts)
+        best = scores.argmax(axis=1)
+        return best, probabilities[np.arange(len(best)), best]
+
+    def update(self, strategy: str, features: Sequence[float], won: bool) -> bool:
+        """
+        Один шаг SGD по исходу сделки стратегии
+
+        Returns:
+            False, если стратегия модели неизвестна
+        """
+        index = self._index.get(strategy)
+        if index is None:
+            return False
+
+        x = self._context(features)
+        w = self.weights[index]
+        error = float(won) - float(_sigmoid(w @ x))
+        w += self.learning_rate * (error * x - self.l2 * w)
+        self.counts[index] += 1
+        self.wins[index] += int(won)
+        return True
+
+    # =========================================================================
+    # === СОХРАНЕНИЕ ===
+    # =========================================================================
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': self.VERSION,
+            'features': self.feature_names,
+            'learning_rate': self.learning_rate,
+            'l2': self.l2,
+            'exploration': self.exploration,
+            'strategies': {
+                name: {
+                    'weights': [round(w, 8) for w in self.weights[i].tolist()],
+                    'count': int(self.counts[i]),
+                    'wins': int(self.wins[i])
+                }
+                for i, name in enumerate(self.strategies)
+            }
+        }
+
+    def save(self, path: Optional[Path] = None):
+        """Атомарная запись состояния (временный файл + rename)"""
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, strategies: Sequence[str],
+             feature_names: Sequence[str] = FEATURE_NAMES) -> 'OnlineStrategyModel':
+        """
+        Модель из файла состояния или новая
+
+        Новые стратегии начинают с нулевых весов, удаленные - отбрасываются.
+        Состояние с другим набором признаков не загружается.
+        """
+        path = Path(path)
+        model = cls(strategies, feature_names, path=path)
+        if not path.exists():
+            return model
+
+        try:
+            state = json.loads(path.read_text(encoding='utf-8'))
+            if state.get('features') != list(feature_names):
+                logger.warning("⚠️ Признаки онлайн-модели изменились, начинаем обучение заново")
+                return model
+
+            model.learning_rate = state.get('learning_rate', model.learning_rate)
+            model.l2 = state.get('l2', model.l2)
+            model.exploration = state.get('exploration', model.exploration)
+            for name, arm in state.get('strategies', {}).items():
+                index = model._index.get(name)
+                if index is None:
+                    continue
+                model.weights[index] = arm['weights']
+                model.counts[index] = arm.get('count', 0)
+                model.wins[index] = arm.get('wins', 0)
+            logger.info(f"✅ Онлайн-модель селектора загружена: {model.updates} обновлений")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки онлайн-модели: {e}")
+            return cls(strategies, feature_names, path=path)
+
+        return model
+
+    def get_statistics(self) -> Dict:
+        return {
+            'updates': self.updates,
+            'trained': self.is_trained,
+            'per_strategy': {
+                name: {
+                    'trades': int(self.counts[i]),
+                    'win_rate': float(self.wins[i] / self.counts[i]) if self.counts[i] else None
+                }
+                for i, name in enumerate(self.strategies)
+            }
+        }
+
+
+# Экспорт
+__all__ = ['FEATURE_NAMES', 'MIN_UPDATES', 'OnlineStrategyModel']
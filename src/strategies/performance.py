@@ -0,0 +1,223 @@
+"""
+Статистика стратегий по закрытым сделкам
+Путь: src/strategies/performance.py
+
+AutoStrategySelector раньше на каждый промах кэша делал отдельный
+запрос Trade на каждую стратегию пары, загружал ORM-объекты целиком
+и пересчитывал метрики в Python - стоимость росла с историей сделок.
+
+StrategyPerformanceStore держит по каждой паре (symbol, strategy)
+накопленные суммы: число сделок и побед, сумму и сумму квадратов
+прибыли, валовую прибыль/убыток, а рядом - состояние накопленной
+просадки (текущий результат, пик, максимальная просадка). История пары
+читается из БД один раз - одним запросом по всем стратегиям и только
+нужными колонками, дальше статистика обновляется при закрытии сделки
+за O(1). Сделки старше окна (30 дней) вычитаются из сумм по мере
+устаревания; просадка считается от начала загруженной истории.
+
+Использование:
+    strategy_performance.prefetch(symbols)   # История многих пар одним запросом
+    metrics = strategy_performance.get_metrics(symbol, strategies)
+    strategy_performance.record_trade(symbol, strategy, profit, opened_at)
+"""
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.database import SessionLocal
+from ..core.models import Trade, TradeStatus
+
+logger = logging.getLogger(__name__)
+
+# Окно статистики и минимум сделок для доверия к ней
+PERFORMANCE_WINDOW_DAYS = 30
+MIN_TRADES = 5
+
+
+@dataclass
+class StrategyStats:
+    """Накопленные суммы по сделкам одной стратегии на одной паре"""
+    trades: int = 0
+    wins: int = 0
+    profit_count: int = 0          # Сделки с известной прибылью
+    profit_sum: float = 0.0
+    profit_sq_sum: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0        # Модуль суммы убытков
+
+    # Состояние просадки по накопленному результату
+    cumulative: float = 0.0
+    peak: Optional[float] = None
+    max_drawdown: float = 0.0
+
+    # Сделки окна (время открытия, прибыль) - для вычитания устаревших
+    window: Deque[Tuple[datetime, Optional[float]]] = field(default_factory=deque)
+
+    def add(self, opened_at: datetime, profit: Optional[float]):
+        self.window.append((opened_at, profit))
+        self._apply(profit, 1)
+
+        if profit is None:
+            return
+        self.cumulative += profit
+        self.peak = self.cumulative if self.peak is None else max(self.peak, self.cumulative)
+        if self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak - self.cumulative) / self.peak)
+
+    def expire(self, since: datetime):
+        """Вычесть сделки, открытые раньше since"""
+        while self.window and self.window[0][0] < since:
+            _, profit = self.window.popleft()
+            self._apply(profit, -1)
+
+    def _apply(self, profit: Optional[float], sign: int):
+        self.trades += sign
+        if profit is None:
+            return
+        self.profit_count += sign
+        self.profit_sum += sign * profit
+        self.profit_sq_sum += sign * profit * profit
+        if profit > 0:
+            self.wins += sign
+            self.gross_profit += sign * profit
+        elif profit < 0:
+            self.gross_loss += sign * -profit
+
+    def metrics(self) -> Dict[str, float]:
+        """Метрики окна: win rate, средняя прибыль, profit factor, просадка, Sharpe"""
+        if self.trades < MIN_TRADES:
+            return {
+                'win_rate': 0.5, 'average_profit': 0.0, 'profit_factor': 1.0,
+                'max_drawdown': 0.0, 'sharpe_ratio': 0.0, 'trades_count': self.trades
+            }
+
+        count = self.profit_count
+        mean = self.profit_sum / count if count else 0.0
+        sharpe = 0.0
+        if count > 1:
+            # Дисперсия по суммам; масштаб прибыли на Sharpe не влияет
+            variance = max(self.profit_sq_sum / count - mean * mean, 0.0)
+            std = math.sqrt(variance)
+            sharpe = mean / std if std > 0 else 0.0
+
+        profit_factor = self.gross_profit / self.gross_loss if self.gross_loss > 0 else float('inf')
+        return {
+            'win_rate': self.wins / self.trades,
+            'average_profit': mean,
+            'profit_factor': min(profit_factor, 10),
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': sharpe,
+            'trades_count': self.trades
+        }
+
+
+class StrategyPerformanceStore:
+    """Статистика всех стратегий по парам, обновляемая при закрытии сделок"""
+
+    def __init__(self, window_days: int = PERFORMANCE_WINDOW_DAYS):
+        self.window = timedelta(days=window_days)
+        self._stats: Dict[Tuple[str, str], StrategyStats] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.db_loads = 0
+        self.recorded = 0
+
+    def _load_symbols(self, symbols: List[str]):
+        """История пар из БД: один запрос по всем парам и стратегиям, только нужные колонки"""
+        since = datetime.utcnow() - self.window
+        db = SessionLocal()
+        try:
+            rows = db.query(Trade.symbol, Trade.strategy, Trade.profit, Trade.created_at).filter(
+                Trade.symbol.in_(symbols),
+                Trade.status == TradeStatus.CLOSED,
+                Trade.created_at >= since
+            ).order_by(Trade.created_at).all()
+        finally:
+            db.close()
+
+        stats: Dict[Tuple[str, str], StrategyStats] = {}
+        for symbol, strategy, profit, opened_at in rows:
+            stats.setdefault((symbol, strategy), StrategyStats()).add(opened_at, profit)
+
+        self._stats.update(stats)
+        self._loaded.update(symbols)
+        self.db_loads += 1
+        logger.debug(f"📚 Статистика стратегий {len(symbols)} пар: {len(rows)} сделок за {self.window.days} дн.")
+
+    def prefetch(self, symbols: Iterable[str]):
+        """
+        Загрузить историю всех еще не загруженных пар одним запросом
+
+        Синхронный запрос к БД - из event loop вызывать через asyncio.to_thread.
+        """
+        with self._lock:
+            missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self._loaded]
+            if missing:
+                self._load_symbols(missing)
+
+    def get_metrics(self, symbol: str, strategies: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """Метрики стратегий пары за окно ({strategy: metrics})"""
+        since = datetime.utcnow() - self.window
+        with self._lock:
+            if symbol not in self._loaded:
+                self._load_symbols([symbol])
+
+            result = {}
+            for strategy in strategies:
+                stats = self._stats.get((symbol, strategy))
+                if stats is None:
+                    stats = self._stats[(symbol, strategy)] = StrategyStats()
+                stats.expire(since)
+                result[strategy] = stats.metrics()
+            return result
+
+    def record_trade(self, symbol: str, strategy: Optional[str], profit: Optional[float],
+                     opened_at: Optional[datetime] = None):
+        """
+        Закрытая сделка (вызывается после сохранения сделки в БД)
+
+        Пара, история которой еще не загружалась, получит сделку при
+        первой загрузке из БД - здесь она не учитывается, чтобы не
+        посчитать ее дважды.
+        """
+        if not strategy:
+            return
+        with self._lock:
+            if symbol not in self._loaded:
+                return
+            stats = self._stats.setdefault((symbol, strategy), StrategyStats())
+            stats.add(opened_at or datetime.utcnow(), profit)
+            self.recorded += 1
+
+    def reset(self, symbol: Optional[str] = None):
+        """Сбросить статистику (следующий запрос перечитает историю из БД)"""
+        with self._lock:
+            if symbol is None:
+                self._stats.clear()
+                self._loaded.clear()
+                return
+            self._loaded.discard(symbol)
+            for key in [key for key in self._stats if key[0] == symbol]:
+                del self._stats[key]
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                'symbols': len(self._loaded),
+                'strategies_tracked': len(self._stats),
+                'db_loads': self.db_loads,
+                'recorded_trades': self.recorded
+            }
+
+
+# Глобальное хранилище статистики стратегий
+strategy_performance = StrategyPerformanceStore()
+
+# Экспорт
+__all__ = ['StrategyStats', 'StrategyPerformanceStore', 'strategy_performance']
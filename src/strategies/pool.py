@@ -0,0 +1,165 @@
+"""
+Пул долгоживущих экземпляров стратегий
+Путь: src/strategies/pool.py
+
+_generate_signal раньше создавал стратегию через фабрику для каждого
+сигнала каждой пары в каждом цикле. Стратегии по контракту не хранят
+состояния между вызовами analyze, поэтому один экземпляр на
+(имя, параметры) можно переиспользовать - в том числе из разных потоков.
+
+Параметры - атрибуты экземпляра (rsi_period, min_confidence, ...):
+варианту с подобранными селектором параметрами соответствует свой
+экземпляр, а повторный запрос тех же параметров ничего не создает.
+
+Использование:
+    strategy_pool.warm_up()                          # при старте бота
+    strategy = strategy_pool.get('momentum')
+    tuned = strategy_pool.get('scalping', rsi_period=5)
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .base import BaseStrategy
+from .factory import StrategyFactory, strategy_factory
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def _freeze(value: Any) -> Any:
+    """Хешируемое представление значения параметра"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class StrategyPool:
+    """
+    Экземпляры стратегий по ключу (имя, параметры)
+
+    Варианты с параметрами вытесняются по LRU, когда их больше
+    max_instances; экземпляры по умолчанию (без параметров) не вытесняются.
+    """
+
+    def __init__(self, factory: StrategyFactory, max_instances: int = 64):
+        """
+        Args:
+            factory: Фабрика, через которую создаются экземпляры
+            max_instances: Максимум вариантов с параметрами
+        """
+        self.factory = factory
+        self.max_instances = max_instances
+
+        self._defaults: Dict[str, BaseStrategy] = {}
+        self._variants: "OrderedDict[PoolKey, BaseStrategy]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name: str, **params) -> BaseStrategy:
+        """
+        Экземпляр стратегии из пула (создается при первом запросе)
+
+        Raises:
+            ValueError: Неизвестная стратегия или параметр, которого нет у стратегии
+        """
+        key = (name, tuple(sorted((k, _freeze(v)) for k, v in params.items())))
+        strategy_class = self.factory._strategies.get(name)
+
+        with self._lock:
+            strategy = self._variants.get(key) if params else self._defaults.get(name)
+            # Стратегию могли перерегистрировать в фабрике под тем же именем
+            if strategy is not None and type(strategy) is strategy_class:
+                self.hits += 1
+                if params:
+                    self._variants.move_to_end(key)
+                return strategy
+            self.misses += 1
+
+        # Конструктор - вне блокировки; при гонке останется первый экземпляр
+        strategy = self._create(name, params)
+
+        with self._lock:
+            if not params:
+                current = self._defaults.get(name)
+                if current is not None and type(current) is type(strategy):
+                    return current
+                self._defaults[name] = strategy
+                return strategy
+
+            current = self._variants.get(key)
+            if current is not None and type(current) is type(strategy):
+                return current
+            self._variants[key] = strategy
+            while len(self._variants) > self.max_instances:
+                self._variants.popitem(last=False)
+                self.evictions += 1
+            return strategy
+
+    def _create(self, name: str, params: Dict[str, Any]) -> BaseStrategy:
+        strategy = self.factory.create(name)
+        for param, value in params.items():
+            if param.startswith('_') or not hasattr(strategy, param):
+                raise ValueError(f"У стратегии '{name}' нет параметра '{param}'")
+            setattr(strategy, param, value)
+        return strategy
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Создание экземпляров по умолчанию заранее (при старте бота)
+
+        Returns:
+            Сколько стратегий готово в пуле
+        """
+        ready = 0
+        for name in names or self.factory.list_strategies():
+            try:
+                self.get(name)
+                ready += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Стратегия {name} не создана при прогреве пула: {e}")
+        logger.info(f"🏊 Пул стратегий прогрет: {ready} экземпляров")
+        return ready
+
+    def invalidate(self, name: Optional[str] = None):
+        """Сброс экземпляров стратегии (или всех) - например, после смены кода"""
+        with self._lock:
+            if name is None:
+                self._defaults.clear()
+                self._variants.clear()
+                return
+            self._defaults.pop(name, None)
+            for key in [key for key in self._variants if key[0] == name]:
+                del self._variants[key]
+
+    def get_statistics(self) -> Dict:
+        """Сколько экземпляров в пуле и как часто они переиспользуются"""
+        with self._lock:
+            requests = self.hits + self.misses
+            per_strategy: Dict[str, int] = {name: 1 for name in self._defaults}
+            for name, _ in self._variants:
+                per_strategy[name] = per_strategy.get(name, 0) + 1
+            return {
+                'instances': len(self._defaults) + len(self._variants),
+                'variants': len(self._variants),
+                'per_strategy': per_strategy,
+                'hits': self.hits,
+                'misses': self.misses,
+                'reuse_rate': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions
+            }
+
+
+# Глобальный пул стратегий
+strategy_pool = StrategyPool(strategy_factory)
+
+# Экспорт
+__all__ = ['StrategyPool', 'strategy_pool']
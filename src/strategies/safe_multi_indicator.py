@@ -4,12 +4,12 @@
 """
 import pandas as pd
 import numpy as np
-import ta
 from typing import Dict, Any
 import logging
 import warnings
 
 from .base import BaseStrategy, TradingSignal
+from ..indicators.context import IndicatorContext, indicator_contexts
 
 # Подавляем предупреждения NumPy
 warnings.filterwarnings('ignore', category=RuntimeWarning)
@@ -34,10 +34,18 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
         
         try:
             # Очищаем данные от NaN и inf
-            df = self._clean_dataframe(df)
+            clean = self._clean_dataframe(df)
+            
+            # Индикаторы - по очищенным свечам: общий кэш бара, только если
+            # очистка ничего не изменила, иначе отдельный контекст
+            if clean.equals(df):
+                context = indicator_contexts.get_context(symbol, df)
+            else:
+                context = IndicatorContext(f"clean:{symbol}", None, clean)
+            df = clean
             
             # Рассчитываем индикаторы с защитой
-            indicators = self._safe_calculate_indicators(df)
+            indicators = self._safe_calculate_indicators(df, context)
             
             if not indicators:
                 return TradingSignal('WAIT', 0, 0, reason='Ошибка расчета индикаторов')
@@ -52,6 +60,75 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
             logger.error(f"Ошибка анализа {symbol}: {e}")
             return TradingSignal('WAIT', 0, 0, reason='Ошибка анализа')
     
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Сигналы analyze для каждого бара за один проход"""
+        if df.empty:
+            return self._series_wait(df)
+        
+        valid = self._series_valid(df)
+        clean = self._clean_dataframe(df)
+        context = self._series_context(clean)   # Как в analyze - по очищенным свечам
+        price = clean['close'].to_numpy(dtype=float)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            
+            # Подстановки вместо NaN - как в _safe_calculate_indicators
+            rsi = context.rsi(14).fillna(50.0).to_numpy()
+            macd = context.macd()
+            macd_line = macd.macd().fillna(0.0).to_numpy()
+            macd_signal = macd.macd_signal().fillna(0.0).to_numpy()
+            macd_diff = macd.macd_diff().fillna(0.0).to_numpy()
+            bb_percent = context.bollinger(20, 2).bollinger_pband().fillna(0.5).to_numpy()
+            ema_9, ema_21, ema_50 = (context.ema(period).to_numpy() for period in (9, 21, 50))
+            adx = context.adx()
+            adx_value = adx.adx().fillna(0.0).to_numpy()
+            adx_pos = adx.adx_pos().fillna(0.0).to_numpy()
+            adx_neg = adx.adx_neg().fillna(0.0).to_numpy()
+            atr = context.atr().average_true_range().to_numpy()
+            atr = np.where(np.isnan(atr), price * 0.02, atr)
+        
+        rsi_buy = rsi < 30
+        macd_buy = (macd_line > macd_signal) & (macd_diff > 0)
+        bb_buy = bb_percent < 0.2
+        ema_buy = (ema_9 > ema_21) & (ema_21 > ema_50) & (price > ema_9)
+        adx_trend = adx_value > 25
+        signals = [
+            (rsi_buy, ~rsi_buy & (rsi > 70), 0.8),
+            (macd_buy, ~macd_buy & (macd_line < macd_signal) & (macd_diff < 0), 0.7),
+            (bb_buy, ~bb_buy & (bb_percent > 0.8), 0.6),
+            (ema_buy, ~ema_buy & (ema_9 < ema_21) & (ema_21 < ema_50) & (price < ema_9), 0.7),
+            (adx_trend & (adx_pos > adx_neg), adx_trend & ~(adx_pos > adx_neg), 0.6),
+        ]
+        
+        buy_score, sell_score, buy_count, sell_count = self._series_scores(signals, len(df))
+        
+        buy = valid & (buy_count >= self.min_indicators_confirm) & (buy_score > sell_score)
+        sell = valid & ~buy & (sell_count >= self.min_indicators_confirm) & (sell_score > buy_score)
+        
+        # Уровни как в _make_decision: ограничение 5%/10% и добор R:R до 1:2
+        stop_loss = np.where(
+            buy, np.maximum(price * 0.95, price - 2 * atr), np.minimum(price * 1.05, price + 2 * atr)
+        )
+        take_profit = np.where(
+            buy, np.minimum(price * 1.1, price + 3 * atr), np.maximum(price * 0.9, price - 3 * atr)
+        )
+        low_reward = self._series_risk_reward(price, stop_loss, take_profit) < 1.5
+        take_profit = np.where(
+            low_reward,
+            np.where(buy, price + (price - stop_loss) * 2, price - (stop_loss - price) * 2),
+            take_profit
+        )
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidence = np.where(
+                buy,
+                np.minimum(0.95, buy_score / (buy_count * 0.8)),
+                np.minimum(0.95, sell_score / (sell_count * 0.8))
+            )
+        
+        return self._series_result(df, buy, sell, confidence, stop_loss, take_profit)
+    
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Очистка данных от некорректных значений"""
         df = df.copy()
@@ -60,14 +137,14 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
         df.replace([np.inf, -np.inf], np.nan, inplace=True)
         
         # Заполняем NaN методом forward fill
-        df.fillna(method='ffill', inplace=True)
+        df.ffill(inplace=True)
         
         # Если остались NaN, заполняем средними значениями
         df.fillna(df.mean(), inplace=True)
         
         return df
     
-    def _safe_calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def _safe_calculate_indicators(self, df: pd.DataFrame, context: IndicatorContext) -> Dict:
         """Безопасный расчет индикаторов"""
         indicators = {}
         
@@ -78,7 +155,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # RSI
                 try:
-                    indicators['rsi'] = ta.momentum.rsi(df['close'], window=14).iloc[-1]
+                    indicators['rsi'] = context.rsi(14).iloc[-1]
                     if pd.isna(indicators['rsi']):
                         indicators['rsi'] = 50.0
                 except:
@@ -86,7 +163,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # MACD
                 try:
-                    macd = ta.trend.MACD(df['close'])
+                    macd = context.macd()
                     indicators['macd'] = macd.macd().iloc[-1]
                     indicators['macd_signal'] = macd.macd_signal().iloc[-1]
                     indicators['macd_diff'] = macd.macd_diff().iloc[-1]
@@ -102,7 +179,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # Bollinger Bands
                 try:
-                    bb = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
+                    bb = context.bollinger(20, 2)
                     indicators['bb_upper'] = bb.bollinger_hband().iloc[-1]
                     indicators['bb_lower'] = bb.bollinger_lband().iloc[-1]
                     indicators['bb_middle'] = bb.bollinger_mavg().iloc[-1]
@@ -124,9 +201,9 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # EMA
                 try:
-                    indicators['ema_9'] = ta.trend.ema_indicator(df['close'], window=9).iloc[-1]
-                    indicators['ema_21'] = ta.trend.ema_indicator(df['close'], window=21).iloc[-1]
-                    indicators['ema_50'] = ta.trend.ema_indicator(df['close'], window=50).iloc[-1]
+                    indicators['ema_9'] = context.ema(9).iloc[-1]
+                    indicators['ema_21'] = context.ema(21).iloc[-1]
+                    indicators['ema_50'] = context.ema(50).iloc[-1]
                 except:
                     current_price = df['close'].iloc[-1]
                     indicators['ema_9'] = current_price
@@ -135,7 +212,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # ADX (с защитой от деления на ноль)
                 try:
-                    adx = ta.trend.ADXIndicator(df['high'], df['low'], df['close'])
+                    adx = context.adx()
                     indicators['adx'] = adx.adx().iloc[-1]
                     indicators['adx_pos'] = adx.adx_pos().iloc[-1]
                     indicators['adx_neg'] = adx.adx_neg().iloc[-1]
@@ -151,7 +228,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # ATR
                 try:
-                    atr = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'])
+                    atr = context.atr()
                     indicators['atr'] = atr.average_true_range().iloc[-1]
                     if pd.isna(indicators['atr']):
                         indicators['atr'] = df['close'].iloc[-1] * 0.02
@@ -160,7 +237,7 @@ class SafeMultiIndicatorStrategy(BaseStrategy):
                 
                 # Volume
                 try:
-                    indicators['volume_sma'] = df['volume'].rolling(window=20).mean().iloc[-1]
+                    indicators['volume_sma'] = context.sma(20, 'volume').iloc[-1]
                     indicators['volume_ratio'] = df['volume'].iloc[-1] / indicators['volume_sma']
                     if pd.isna(indicators['volume_ratio']):
                         indicators['volume_ratio'] = 1.0
@@ -4,13 +4,11 @@
 """
 import pandas as pd
 import numpy as np
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
 import logging
 from typing import Dict
 
 from .base import BaseStrategy, TradingSignal
+from ..indicators.context import IndicatorContext, indicator_contexts
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +34,8 @@ class ScalpingStrategy(BaseStrategy):
             return TradingSignal('WAIT', 0, 0, reason='Недостаточно данных')
         
         try:
-            # Рассчитываем индикаторы
-            indicators = self._calculate_indicators(df)
+            # Рассчитываем индикаторы (общий кэш бара)
+            indicators = self._calculate_indicators(df, indicator_contexts.get_context(symbol, df))
             
             # Проверяем условия для скальпинга
             scalp_signal = self._check_scalping_conditions(indicators)
@@ -49,12 +47,62 @@ class ScalpingStrategy(BaseStrategy):
             logger.error(f"Ошибка анализа скальпинга для {symbol}: {e}")
             return TradingSignal('WAIT', 0, 0, reason=f'Ошибка анализа: {e}')
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> Dict:
+    def analyze_series(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Сигналы analyze для каждого бара за один проход"""
+        if df.empty:
+            return self._series_wait(df)
+        
+        context = self._series_context(df)
+        valid = self._series_valid(df)
+        open_, high, low, close = (df[col].to_numpy(dtype=float) for col in ('open', 'high', 'low', 'close'))
+        
+        bb_percent = context.bollinger(self.bb_period, self.bb_std).bollinger_pband().to_numpy()
+        rsi = context.rsi(self.rsi_period).to_numpy()
+        vwap = context.vwap().volume_weighted_average_price().to_numpy()
+        atr = context.atr(14).average_true_range().to_numpy()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atr_percent = (atr / close) * 100
+            volume_ratio = df['volume'].to_numpy() / context.sma(20, 'volume').to_numpy()
+        
+        candle_body = np.abs(close - open_)
+        upper_wick = high - np.maximum(close, open_)
+        lower_wick = np.minimum(close, open_) - low
+        micro_up = df['close'].gt(df['close'].shift(4)).to_numpy()
+        
+        # Фильтры _check_scalping_conditions (NaN их не срабатывает, как и в analyze)
+        tradable = valid & ~(atr_percent > 3) & ~(atr_percent < 0.5) & ~(volume_ratio < self.min_volume_ratio)
+        
+        conditions = [
+            (bb_percent < 0.2) & (rsi < 35) & (lower_wick > candle_body * 1.5),
+            (close > vwap) & (close < vwap * 1.002) & (volume_ratio > 1.5) & micro_up,
+            (bb_percent > 0.8) & (rsi > 65) & (upper_wick > candle_body * 1.5),
+            (close < vwap) & (close > vwap * 0.998) & (volume_ratio > 1.5) & ~micro_up,
+        ]
+        entry = np.select(conditions, [1, 2, 3, 4], 0)
+        is_buy = (entry == 1) | (entry == 2)
+        
+        stop_loss = np.where(
+            is_buy, close * (1 - self.max_loss_percent / 100), close * (1 + self.max_loss_percent / 100)
+        )
+        take_profit = np.where(
+            is_buy, close * (1 + self.min_profit_percent / 100), close * (1 - self.min_profit_percent / 100)
+        )
+        
+        active = tradable & (entry > 0) & ~(self._series_risk_reward(close, stop_loss, take_profit) < 0.6)
+        return self._series_result(
+            df, active & is_buy, active & ~is_buy,
+            confidence=np.where((entry == 1) | (entry == 3), 0.8, 0.7),
+            stop_loss=stop_loss,
+            take_profit=take_profit
+        )
+    
+    def _calculate_indicators(self, df: pd.DataFrame, context: IndicatorContext) -> Dict:
         """Расчет индикаторов для скальпинга"""
         indicators = {}
         
         # Bollinger Bands
-        bb = BollingerBands(df['close'], window=self.bb_period, window_dev=self.bb_std)
+        bb = context.bollinger(self.bb_period, self.bb_std)
         indicators['bb_upper'] = bb.bollinger_hband().iloc[-1]
         indicators['bb_lower'] = bb.bollinger_lband().iloc[-1]
         indicators['bb_middle'] = bb.bollinger_mavg().iloc[-1]
@@ -62,20 +110,19 @@ class ScalpingStrategy(BaseStrategy):
         indicators['bb_percent'] = bb.bollinger_pband().iloc[-1]
         
         # RSI
-        rsi = RSIIndicator(df['close'], window=self.rsi_period)
-        indicators['rsi'] = rsi.rsi().iloc[-1]
+        indicators['rsi'] = context.rsi(self.rsi_period).iloc[-1]
         
         # VWAP
-        vwap = VolumeWeightedAveragePrice(df['high'], df['low'], df['close'], df['volume'])
+        vwap = context.vwap()
         indicators['vwap'] = vwap.volume_weighted_average_price().iloc[-1]
         
         # ATR для расчета стопов
-        atr = AverageTrueRange(df['high'], df['low'], df['close'], window=14)
+        atr = context.atr(14)
         indicators['atr'] = atr.average_true_range().iloc[-1]
         indicators['atr_percent'] = (indicators['atr'] / df['close'].iloc[-1]) * 100
         
         # Volume analysis
-        indicators['volume_sma'] = df['volume'].rolling(window=20).mean().iloc[-1]
+        indicators['volume_sma'] = context.sma(20, 'volume').iloc[-1]
         indicators['volume_ratio'] = df['volume'].iloc[-1] / indicators['volume_sma']
         
         # Price action
@@ -0,0 +1,38 @@
+"""
+Вынос CPU-нагрузки из event loop
+Путь: src/utils/concurrency.py
+
+Расчет индикаторов и анализ стратегий - чистые вычисления на pandas/numpy.
+В event loop они блокируют все остальное (поток WebSocket, монитор
+выходов), поэтому выполняются в общем пуле потоков.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from ..core.config import config
+
+# Общий пул для вычислений
+cpu_executor = ThreadPoolExecutor(
+    max_workers=getattr(config, 'CPU_WORKERS', 4),
+    thread_name_prefix='cpu'
+)
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Выполнить синхронную функцию в пуле вычислений"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_coroutine_in_executor(func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Выполнить async функцию без реального ввода-вывода в пуле вычислений
+
+    Подходит для методов вроде BaseStrategy.analyze: они объявлены как
+    async, но внутри только считают. Корутина выполняется в отдельном
+    event loop рабочего потока и не должна обращаться к объектам,
+    привязанным к основному loop (сессии биржи, asyncio.Lock и т.п.).
+    """
+    return await run_cpu_bound(lambda: asyncio.run(func(*args, **kwargs)))
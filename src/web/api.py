@@ -584,13 +584,13 @@ async def analyze_trade_context(
     """Анализ контекста конкретной сделки"""
     try:
         from ..analysis.advanced_analytics import advanced_analytics
-        from ..analysis.market_analyzer import MarketAnalyzer
+        from ..analysis.market_analyzer import market_analyzer
         
         trade = db.query(Trade).filter(Trade.id == trade_id).first()
         if not trade:
             raise HTTPException(status_code=404, detail="Trade not found")
         
-        analyzer = MarketAnalyzer()
+        analyzer = market_analyzer
         market_data = await analyzer.analyze_symbol(trade.symbol)
         
         if market_data and 'df' in market_data:
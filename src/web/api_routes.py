@@ -12,13 +12,13 @@ from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 import logging
 
 # Импорты из нашего проекта
-from ..core.database import get_db
+from ..core.database import db as db_manager, get_async_db, get_async_session
 from ..core.models import Trade, Signal, TradingPair, User, BotState, Balance, TradeStatus
 from ..core.clean_logging import get_clean_logger
 from .dashboard import get_dashboard_html
@@ -146,6 +146,11 @@ def set_bot_manager(manager):
 # Создаем роутер
 router = APIRouter()
 
+@router.on_event("shutdown")
+async def close_database():
+    """Закрыть пул асинхронного engine при остановке приложения"""
+    await db_manager.close_async()
+
 # ===== ФУНКЦИИ ЗАЩИТЫ ОТ БРУТФОРСА =====
 
 def check_user_blocked(user: User) -> bool:
@@ -161,7 +166,7 @@ def check_user_blocked(user: User) -> bool:
     
     return True
 
-def handle_failed_login(db: Session, user: User, client_ip: str):
+async def handle_failed_login(db: AsyncSession, user: User, client_ip: str):
     """Обработка неудачной попытки входа"""
     user.failed_login_attempts += 1
     
@@ -171,16 +176,16 @@ def handle_failed_login(db: Session, user: User, client_ip: str):
         user.blocked_at = datetime.utcnow()
         logger.warning(f"🔒 Пользователь {user.username} заблокирован после {MAX_LOGIN_ATTEMPTS} неудачных попыток. IP: {client_ip}")
     
-    db.commit()
+    await db.commit()
 
-def handle_successful_login(db: Session, user: User):
+async def handle_successful_login(db: AsyncSession, user: User):
     """Обработка успешного входа"""
     user.failed_login_attempts = 0
     user.last_login = datetime.utcnow()
     if user.is_blocked:
         user.is_blocked = False
         user.blocked_at = None
-    db.commit()
+    await db.commit()
 
 # ===== ОСНОВНЫЕ ENDPOINTS =====
 
@@ -219,10 +224,9 @@ async def health_check():
     # Проверяем компоненты
     try:
         # База данных
-        db = next(get_db())
-        db.execute("SELECT 1")
+        async with get_async_session() as db:
+            await db.execute(text("SELECT 1"))
         health_info["components"]["database"] = "healthy"
-        db.close()
     except Exception as e:
         health_info["components"]["database"] = "error"
         health_info["status"] = "degraded"
@@ -242,7 +246,7 @@ async def health_check():
 async def login(
     request: LoginRequest,
     req: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint для входа в систему с защитой от брутфорса
@@ -254,7 +258,7 @@ async def login(
     client_ip = req.client.host if req.client else "unknown"
     
     # Ищем пользователя
-    user = db.query(User).filter(User.username == request.username).first()
+    user = await db.scalar(select(User).where(User.username == request.username))
     
     if not user:
         # Пользователь не найден, но не сообщаем об этом явно
@@ -280,7 +284,7 @@ async def login(
     # Проверяем пароль
     if not verify_password(request.password, user.hashed_password):
         # Неверный пароль
-        handle_failed_login(db, user, client_ip)
+        await handle_failed_login(db, user, client_ip)
         
         remaining_attempts = MAX_LOGIN_ATTEMPTS - user.failed_login_attempts
         logger.warning(f"❌ Неверный пароль для {user.username}. Осталось попыток: {remaining_attempts}. IP: {client_ip}")
@@ -305,7 +309,7 @@ async def login(
         )
     
     # Успешный вход
-    handle_successful_login(db, user)
+    await handle_successful_login(db, user)
     
     # Создаем токен
     access_token = create_access_token(data={"sub": user.username})
@@ -326,7 +330,7 @@ async def login(
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     req: Request = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """OAuth2 совместимый endpoint для получения токена"""
     # Используем тот же механизм что и /api/login
@@ -492,7 +496,7 @@ async def bot_action(
 # ===== DATA ENDPOINTS =====
 
 @router.get("/api/stats")
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_async_db)):
     """Получить статистику торговли"""
     try:
         # Определяем временные границы
@@ -500,9 +504,9 @@ async def get_statistics(db: Session = Depends(get_db)):
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Статистика за сегодня
-        today_trades = db.query(Trade).filter(
-            Trade.created_at >= today_start
-        ).all()
+        today_trades = (await db.scalars(
+            select(Trade).where(Trade.created_at >= today_start)
+        )).all()
         
         # Считаем метрики
         total_trades = len(today_trades)
@@ -545,29 +549,31 @@ async def get_trades(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список сделок с пагинацией (требует авторизации)"""
     try:
-        query = db.query(Trade)
+        query = select(Trade)
         
         # Фильтр по пользователю если не админ
         if not current_user.is_admin:
-            query = query.filter(Trade.user_id == current_user.id)
+            query = query.where(Trade.user_id == current_user.id)
         
         # Фильтр по статусу
         if status:
             if status == "open":
-                query = query.filter(Trade.status == TradeStatus.OPEN)
+                query = query.where(Trade.status == TradeStatus.OPEN)
             elif status == "closed":
-                query = query.filter(Trade.status == TradeStatus.CLOSED)
+                query = query.where(Trade.status == TradeStatus.CLOSED)
         
         # Получаем общее количество
-        total = query.count()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
         # Получаем сделки с пагинацией
-        trades = query.order_by(desc(Trade.created_at)).offset(offset).limit(limit).all()
+        trades = (await db.scalars(
+            query.order_by(desc(Trade.created_at)).offset(offset).limit(limit)
+        )).all()
         
         # Форматируем для отправки
         trades_data = []
@@ -605,18 +611,18 @@ async def get_trades(
 async def get_signals(
     limit: int = 50,
     executed: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получить список торговых сигналов"""
     try:
-        query = db.query(Signal)
+        query = select(Signal)
         
         # Фильтр по исполнению
         if executed is not None:
-            query = query.filter(Signal.executed == executed)
+            query = query.where(Signal.executed == executed)
         
         # Получаем сигналы
-        signals = query.order_by(desc(Signal.created_at)).limit(limit).all()
+        signals = (await db.scalars(query.order_by(desc(Signal.created_at)).limit(limit))).all()
         
         # Форматируем для отправки
         signals_data = []
@@ -646,7 +652,7 @@ async def get_signals(
 
 @router.get("/api/balance")
 async def get_balance(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить текущий баланс (требует авторизации)"""
@@ -666,7 +672,7 @@ async def get_balance(
                     timestamp=datetime.utcnow()
                 )
                 db.add(balance_record)
-                db.commit()
+                await db.commit()
                 
                 return {
                     "USDT": {
@@ -681,9 +687,11 @@ async def get_balance(
                 logger.warning(f"Не удалось получить баланс с биржи: {e}")
         
         # Если не получилось с биржи, берем из БД
-        latest_balance = db.query(Balance).filter(
-            Balance.currency == 'USDT'
-        ).order_by(desc(Balance.timestamp)).first()
+        latest_balance = await db.scalar(
+            select(Balance).where(
+                Balance.currency == 'USDT'
+            ).order_by(desc(Balance.timestamp)).limit(1)
+        )
         
         if latest_balance:
             return {
@@ -712,12 +720,12 @@ async def get_balance(
 
 @router.get("/api/trading-pairs")
 async def get_trading_pairs(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список торговых пар (требует авторизации)"""
     try:
-        pairs = db.query(TradingPair).all()
+        pairs = (await db.scalars(select(TradingPair))).all()
         
         pairs_data = []
         for pair in pairs:
@@ -743,7 +751,7 @@ async def get_trading_pairs(
 @router.post("/api/trading-pairs")
 async def update_trading_pairs(
     pairs: List[str],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить список активных торговых пар (требует авторизации)"""
@@ -757,13 +765,13 @@ async def update_trading_pairs(
     
     try:
         # Деактивируем все пары
-        db.query(TradingPair).update({"is_active": False})
+        await db.execute(update(TradingPair).values(is_active=False))
         
         # Активируем выбранные
         for symbol in pairs:
-            pair = db.query(TradingPair).filter(
+            pair = await db.scalar(select(TradingPair).where(
                 TradingPair.symbol == symbol
-            ).first()
+            ))
             
             if pair:
                 pair.is_active = True
@@ -778,7 +786,7 @@ async def update_trading_pairs(
                 )
                 db.add(new_pair)
         
-        db.commit()
+        await db.commit()
         
         # Обновляем в боте если он запущен
         if bot_manager:
@@ -793,7 +801,7 @@ async def update_trading_pairs(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Ошибка обновления торговых пар: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -804,7 +812,7 @@ async def update_trading_pairs(
 
 @router.get("/api/settings")
 async def get_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить текущие настройки (требует авторизации)"""
@@ -843,7 +851,7 @@ async def get_settings(
 @router.post("/api/settings")
 async def update_settings(
     settings: SettingsRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить настройки бота (требует прав администратора)"""
@@ -921,18 +929,18 @@ async def websocket_endpoint(websocket: WebSocket):
 @router.get("/api/export/trades")
 async def export_trades(
     format: str = "csv",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Экспорт сделок в CSV или JSON (требует авторизации)"""
     try:
-        query = db.query(Trade)
+        query = select(Trade)
         
         # Фильтр по пользователю если не админ
         if not current_user.is_admin:
-            query = query.filter(Trade.user_id == current_user.id)
+            query = query.where(Trade.user_id == current_user.id)
         
-        trades = query.order_by(desc(Trade.created_at)).all()
+        trades = (await db.scalars(query.order_by(desc(Trade.created_at)))).all()
         
         if format == "json":
             trades_data = []
@@ -1005,7 +1013,7 @@ async def export_trades(
 @router.post("/api/admin/unblock-user/{username}")
 async def unblock_user(
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Разблокировать пользователя (только для администраторов)"""
@@ -1018,7 +1026,7 @@ async def unblock_user(
         )
     
     # Ищем пользователя
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     
     if not user:
         raise HTTPException(
@@ -1030,7 +1038,7 @@ async def unblock_user(
     user.is_blocked = False
     user.blocked_at = None
     user.failed_login_attempts = 0
-    db.commit()
+    await db.commit()
     
     logger.info(f"🔓 Администратор {current_user.username} разблокировал пользователя {username}")
     
@@ -1041,7 +1049,7 @@ async def unblock_user(
 
 @router.get("/api/admin/users")
 async def get_users_list(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список пользователей (только для администраторов)"""
@@ -1053,7 +1061,7 @@ async def get_users_list(
             detail="Только администратор может просматривать список пользователей"
         )
     
-    users = db.query(User).all()
+    users = (await db.scalars(select(User))).all()
     
     users_data = []
     for user in users:
@@ -1077,7 +1085,7 @@ async def get_users_list(
 @router.get("/api/analytics/performance")
 async def get_performance_analytics(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить расширенную аналитику производительности (требует авторизации)"""
@@ -1093,16 +1101,16 @@ async def get_performance_analytics(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        query = db.query(Trade).filter(
+        query = select(Trade).where(
             Trade.created_at >= start_date,
             Trade.status == TradeStatus.CLOSED
         )
         
         # Фильтр по пользователю если не админ
         if not current_user.is_admin:
-            query = query.filter(Trade.user_id == current_user.id)
+            query = query.where(Trade.user_id == current_user.id)
         
-        trades = query.all()
+        trades = (await db.scalars(query)).all()
         
         return {
             "period": {
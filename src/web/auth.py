@@ -8,11 +8,13 @@ from typing import Optional
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..core.config import config
 from ..core.models import User
-from ..core.database import get_db
+from ..core.database import get_async_db, get_db
 
 logger = logging.getLogger(__name__)
 
@@ -70,25 +72,41 @@ class AuthService:
             logger.error(f"Ошибка аутентификации: {e}")
             return None
     
-    def get_current_user_from_token(self, token: str, db: Session) -> User:
-        """Получение пользователя из JWT токена"""
-        credentials_exception = HTTPException(
+    def _credentials_exception(self) -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        
+    
+    def _username_from_token(self, token: str) -> str:
+        """Имя пользователя из JWT токена"""
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
             username: str = payload.get("sub")
-            if username is None:
-                raise credentials_exception
         except jwt.PyJWTError:
-            raise credentials_exception
+            raise self._credentials_exception()
+        if username is None:
+            raise self._credentials_exception()
+        return username
+    
+    def get_current_user_from_token(self, token: str, db: Session) -> User:
+        """Получение пользователя из JWT токена"""
+        username = self._username_from_token(token)
         
         user = db.query(User).filter(User.username == username).first()
         if user is None:
-            raise credentials_exception
+            raise self._credentials_exception()
+        
+        return user
+    
+    async def get_current_user_from_token_async(self, token: str, db: AsyncSession) -> User:
+        """Получение пользователя из JWT токена через асинхронную сессию"""
+        username = self._username_from_token(token)
+        
+        user = await db.scalar(select(User).where(User.username == username))
+        if user is None:
+            raise self._credentials_exception()
         
         return user
 
@@ -116,10 +134,10 @@ def get_current_user_oauth2(token: str = Depends(oauth2_scheme), db: Session = D
 # ✅ ИСПРАВЛЕНИЕ: Dependency для HTTPBearer (используется в app.py)
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Dependency для получения текущего пользователя через HTTPBearer"""
-    return auth_service.get_current_user_from_token(credentials.credentials, db)
+    return await auth_service.get_current_user_from_token_async(credentials.credentials, db)
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Dependency для получения активного пользователя"""
@@ -15,6 +15,7 @@ from concurrent.futures import ThreadPoolExecutor
 from ..core.database import SessionLocal
 from ..core.models import Trade, Signal, Order, Strategy, StrategyPerformance
 from ..exchange.client import ExchangeClient
+from ..exchange.market_store import market_store
 from ..logging.smart_logger import SmartLogger
 from sqlalchemy import and_, func, desc
 from sqlalchemy.orm import Session
@@ -30,11 +31,16 @@ class ChartAPI:
     API для работы с графиками и real-time данными
     """
     
-    def __init__(self, app, socketio, exchange_client: ExchangeClient):
+    def __init__(self, app, socketio, exchange_client: ExchangeClient,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
         self.app = app
         self.socketio = socketio
         self.exchange_client = exchange_client
         
+        # Event loop, в котором работает клиент биржи (его сессия aiohttp
+        # привязана к этому loop). Без явного - loop start_real_time_updates
+        self.loop = loop
+        
         # Кеш для данных
         self.price_cache = {}
         self.balance_cache = None
@@ -60,7 +66,7 @@ class ChartAPI:
                     return jsonify(self.balance_cache)
                 
                 # Получаем баланс из exchange
-                balance_info = asyncio.run(self.exchange_client.get_account_balance())
+                balance_info = self._run_on_loop(self.exchange_client.get_account_balance())
                 
                 # Форматируем данные
                 formatted_balance = {
@@ -101,12 +107,8 @@ class ChartAPI:
                 timeframe = request.args.get('timeframe', '1h')
                 limit = int(request.args.get('limit', 500))
                 
-                # Получаем исторические данные
-                klines = asyncio.run(
-                    self.exchange_client.get_historical_klines(
-                        symbol, timeframe, limit
-                    )
-                )
+                # Получаем исторические данные (из потока или REST)
+                klines = self._get_klines(symbol, timeframe, limit)
                 
                 # Форматируем для TradingView
                 chart_data = {
@@ -326,18 +328,12 @@ class ChartAPI:
         def get_market_indicators(symbol):
             """Получает текущие индикаторы рынка"""
             try:
-                # Получаем последние данные
-                klines = asyncio.run(
-                    self.exchange_client.get_historical_klines(
-                        symbol, '1h', 100
-                    )
-                )
+                # Получаем последние данные (из потока или REST)
+                klines = self._get_klines(symbol, '1h', 100)
                 
                 # Конвертируем в DataFrame
                 df = pd.DataFrame(klines, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                    'taker_buy_quote', 'ignore'
+                    'timestamp', 'open', 'high', 'low', 'close', 'volume'
                 ])
                 
                 df['close'] = df['close'].astype(float)
@@ -399,6 +395,33 @@ class ChartAPI:
             """Страница аналитики"""
             return render_template('analytics.html')
     
+    def _get_klines(self, symbol: str, timeframe: str, limit: int) -> List:
+        """
+        Свечи для графика в формате ccxt
+        
+        Сначала читаем хранилище WebSocket потока, к бирже
+        обращаемся только если там недостаточно данных.
+        """
+        if market_store.has_fresh_candles(symbol, timeframe, limit):
+            return market_store.get_candles(symbol, timeframe, limit)
+        
+        return self._run_on_loop(
+            self.exchange_client.fetch_ohlcv(symbol, timeframe, limit)
+        )
+    
+    def _run_on_loop(self, coro, timeout: float = 15.0):
+        """
+        Выполнить корутину клиента биржи из потока Flask
+        
+        asyncio.run на каждый запрос привязывал бы сессию общего клиента
+        к одноразовому event loop - корутина отправляется в loop клиента.
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            coro.close()
+            raise RuntimeError("Event loop клиента биржи не запущен")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=timeout)
+    
     def _register_socketio_handlers(self):
         """Регистрирует WebSocket обработчики"""
         
@@ -437,6 +460,9 @@ class ChartAPI:
     
     async def start_real_time_updates(self):
         """Запускает real-time обновления"""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        
         # Запускаем задачи обновления
         self.background_tasks.append(
             asyncio.create_task(self._price_update_loop())
@@ -463,15 +489,17 @@ class ChartAPI:
                 # Обновляем цены для активных символов
                 for symbol in active_symbols:
                     try:
-                        ticker = await self.exchange_client.get_ticker(symbol)
+                        ticker = market_store.get_ticker(symbol)
+                        if ticker is None:
+                            ticker = await self.exchange_client.fetch_ticker(symbol)
                         
                         price_data = {
                             'symbol': symbol,
-                            'price': float(ticker['lastPrice']),
-                            'change_24h': float(ticker['priceChangePercent']),
-                            'volume_24h': float(ticker['volume']),
-                            'high_24h': float(ticker['highPrice']),
-                            'low_24h': float(ticker['lowPrice']),
+                            'price': float(ticker['last']),
+                            'change_24h': float(ticker.get('percentage') or 0),
+                            'volume_24h': float(ticker.get('baseVolume') or 0),
+                            'high_24h': float(ticker.get('high') or 0),
+                            'low_24h': float(ticker.get('low') or 0),
                             'timestamp': datetime.utcnow().isoformat()
                         }
                         
@@ -276,13 +276,15 @@ class RealtimeDataProvider:
                 active_symbols = await self.bot_manager.get_active_symbols()
                 
                 for symbol in active_symbols:
-                    ticker = await self.bot_manager.exchange.get_ticker(symbol)
+                    ticker = self.bot_manager.market_store.get_ticker(symbol)
+                    if ticker is None:
+                        ticker = await self.bot_manager.exchange.fetch_ticker(symbol)
                     
                     await self.ws_manager.broadcast(f'market:{symbol}', {
                         'symbol': symbol,
                         'price': ticker['last'],
-                        'change_24h': ticker['percentage'],
-                        'volume_24h': ticker['quoteVolume'],
+                        'change_24h': ticker.get('percentage'),
+                        'volume_24h': ticker.get('quoteVolume'),
                         'high_24h': ticker['high'],
                         'low_24h': ticker['low']
                     })